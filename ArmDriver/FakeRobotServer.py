@@ -0,0 +1,172 @@
+#!/usr/bin/env python
+"""
+--------------------------------------------------------------------
+Michigan  Technological University: Blue Marble Security Enterprise
+--------------------------------------------------------------------
+
+Local stand-in for the Niryo arm's TCP server used to test the motion
+layer without hardware. Every command sent by FakeRobotClient is one
+round trip to the server, so tests can count round trips per pick.
+
+FakeRobotServer.py
+Author: Blue Marble Security Enterprise
+Date Last Modified: 10/19/2026
+"""
+
+__author__ = 'Blue Marble Security Enterprise'
+__version__ = '1.0'
+
+import json
+import socket
+import logging
+import threading
+
+HOST = '127.0.0.1'
+
+
+class FakeRobotServer(threading.Thread):
+    """
+    TCP server that accepts newline delimited JSON commands and records them
+    """
+
+    def __init__(self, port=0, supports_trajectories=True):
+        """
+        Constructor
+        :param port:                    Port to listen on (0 - pick a free port)
+        :param supports_trajectories:   False - reject execute_trajectory_from_poses like an older robot
+        """
+        super(FakeRobotServer, self).__init__()
+        self.daemon = True
+
+        self._logger = logging.getLogger('GM_Pick_Point.' + self.__class__.__name__)
+        self._supports_trajectories = supports_trajectories
+        self._terminate_thread_event = threading.Event()
+
+        self._commands = []
+        self._commands_lock = threading.Lock()
+
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._socket.bind((HOST, port))
+        self._socket.listen(1)
+        self._socket.settimeout(0.5)
+        self.port = self._socket.getsockname()[1]
+
+    def run(self):
+        """
+        Main thread function
+        """
+        self._logger.debug('Listening on %s:%d', HOST, self.port)
+        while not self._terminate_thread_event.is_set():
+            try:
+                connection, _ = self._socket.accept()
+            except socket.timeout:
+                continue
+            self._serve(connection)
+        self._socket.close()
+        self._logger.debug('Terminated Thread')
+
+    def _serve(self, connection):
+        """
+        Internal facing function to answer commands from one client until it disconnects
+        :param connection: the client socket
+        """
+        connection.settimeout(None)
+        stream = connection.makefile('rw')
+        try:
+            while not self._terminate_thread_event.is_set():
+                line = stream.readline()
+                if not line:
+                    break
+
+                request = json.loads(line)
+                with self._commands_lock:
+                    self._commands.append((request['command'], request['args']))
+
+                if request['command'] == 'execute_trajectory_from_poses' and not self._supports_trajectories:
+                    reply = dict(status='ERROR', message='Unknown command')
+                elif request['command'] == 'need_calibration':
+                    reply = dict(status='OK', result=False)
+                else:
+                    reply = dict(status='OK', result=None)
+                stream.write(json.dumps(reply) + '\n')
+                stream.flush()
+        finally:
+            stream.close()
+            connection.close()
+
+    def get_commands(self):
+        """
+        External facing function to get every command received so far
+        :return: a list of (command, args)
+        """
+        with self._commands_lock:
+            result = list(self._commands)
+        return result
+
+    def clear_commands(self):
+        """
+        External facing function to forget all received commands
+        """
+        with self._commands_lock:
+            self._commands = []
+
+    def terminate_thread(self):
+        """
+        External facing method to request termination of this thread
+        """
+        self._terminate_thread_event.set()
+
+
+class FakeRobotClient:
+    """
+    Client with the subset of the NiryoRobot interface used by the pick loop
+    """
+
+    def __init__(self, port, host=HOST):
+        """
+        Constructor
+        :param port: Port of the FakeRobotServer
+        :param host: Host of the FakeRobotServer
+        """
+        self._socket = socket.create_connection((host, port))
+        self._stream = self._socket.makefile('rw')
+
+    def _send(self, command, *args):
+        """
+        Internal facing function to send one command and wait for its reply
+        :param command: name of the command
+        :param args:    JSON serializable command arguments
+        :return: the result of the command
+        """
+        self._stream.write(json.dumps(dict(command=command, args=list(args))) + '\n')
+        self._stream.flush()
+        reply = json.loads(self._stream.readline())
+        if reply['status'] != 'OK':
+            raise RuntimeError('%s failed: %s' % (command, reply.get('message')))
+        return reply['result']
+
+    def calibrate_auto(self):
+        self._send('calibrate_auto')
+
+    def need_calibration(self):
+        return self._send('need_calibration')
+
+    def move_pose(self, *args):
+        if len(args) == 1:
+            args = args[0]
+        self._send('move_pose', [float(v) for v in args])
+
+    def execute_trajectory_from_poses(self, list_poses, dist_smoothing=0.0):
+        self._send('execute_trajectory_from_poses', [[float(v) for v in pose] for pose in list_poses],
+                   dist_smoothing)
+
+    def grasp_with_tool(self):
+        self._send('grasp_with_tool')
+
+    def release_with_tool(self):
+        self._send('release_with_tool')
+
+    def close_connection(self):
+        self._stream.close()
+        self._socket.close()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+"""
+--------------------------------------------------------------------
+Michigan  Technological University: Blue Marble Security Enterprise
+--------------------------------------------------------------------
+
+Motion layer that sends each pick to the Niryo arm as a few compound
+trajectories instead of one blocking call per waypoint
+
+TrajectoryDriver.py
+Author: Blue Marble Security Enterprise
+Date Last Modified: 10/19/2026
+"""
+
+__author__ = 'Blue Marble Security Enterprise'
+__version__ = '1.0'
+
+import logging
+import traceback
+
+from CycleTracer import TRACER
+
+APPROACH_HEIGHT = 0.18          # Height (m) above the item the arm approaches from
+RETREAT_HEIGHT = 0.2            # Height (m) above the item the arm lifts to after grasping
+PICK_PITCH = 1.4                # Pitch (rad) of the gripper while picking
+DIST_SMOOTHING = 0.02           # Distance (m) from a waypoint at which the arm starts blending into the next one
+
+
+class TrajectoryDriver:
+    """
+    Builds the approach / grasp / retreat / drop sequence of a pick as waypoint trajectories
+
+    A pick is sent as:
+        1. one trajectory above the item and down onto it (blended through the approach point)
+        2. grasp
+        3. one trajectory up out of the way and over to the drop off (blended through the retreat point)
+        4. release (the gripper is left open for the next pick)
+
+    If the robot does not support trajectories the same waypoints are sent one move_pose at a time. A robot with the
+    method whose firmware rejects the command is found out by the first trajectory, which is then sent pose by pose
+    like every one after it.
+    """
+
+    def __init__(self, robot, dist_smoothing=DIST_SMOOTHING, use_trajectories=None):
+        """
+        Constructor
+        :param robot:               A connected NiryoRobot (or anything with the same interface)
+        :param dist_smoothing:      Distance (m) from intermediate waypoints at which to start blending
+        :param use_trajectories:    True - send compound trajectories, False - one move_pose per waypoint,
+                                    None - use trajectories if the robot supports them
+        """
+        self._logger = logging.getLogger('GM_Pick_Point.' + self.__class__.__name__)
+        self._robot = robot
+        self._dist_smoothing = dist_smoothing
+
+        # Detected support is only trusted once the robot accepted a trajectory
+        self._trajectories_unconfirmed = use_trajectories is None
+        if use_trajectories is None:
+            use_trajectories = hasattr(robot, 'execute_trajectory_from_poses')
+        self._use_trajectories = use_trajectories
+        self._gripper_open = None           # Unknown until the first gripper command
+
+        self._logger.debug('Compound trajectories: %s', self._use_trajectories)
+
+    @staticmethod
+    def build_pick_trajectories(x, y, z, rotation, drop_off):
+        """
+        Build the waypoints of a pick
+        :param x:           X of the item in the arm's frame
+        :param y:           Y of the item in the arm's frame
+        :param z:           Height of the item in the arm's frame
+        :param rotation:    Roll (rad) of the gripper
+        :param drop_off:    The drop off pose [x, y, z, roll, pitch, yaw]
+        :return: (approach, retreat) lists of poses [x, y, z, roll, pitch, yaw]
+        """
+        approach = [[x, y, z + APPROACH_HEIGHT, rotation, PICK_PITCH, 0],
+                    [x, y, z, rotation, PICK_PITCH, 0]]
+        retreat = [[x, y, z + RETREAT_HEIGHT, rotation, PICK_PITCH, 0],
+                   list(drop_off)]
+        return approach, retreat
+
+    def execute_pick(self, x, y, z, rotation, drop_off):
+        """
+        Pick an item and place it at a drop off
+        :param x:           X of the item in the arm's frame
+        :param y:           Y of the item in the arm's frame
+        :param z:           Height of the item in the arm's frame
+        :param rotation:    Roll (rad) of the gripper
+        :param drop_off:    The drop off pose [x, y, z, roll, pitch, yaw]
+        """
+        approach, retreat = self.build_pick_trajectories(x, y, z, rotation, drop_off)
+
+        self.open_gripper()
+        self.execute_trajectory(approach)
+        self.close_gripper()
+        self.execute_trajectory(retreat)
+        self.open_gripper()
+
+    def execute_trajectory(self, poses):
+        """
+        Move through a list of poses, blending through every pose but the last
+        :param poses: a list of poses [x, y, z, roll, pitch, yaw]
+        """
+        if self._use_trajectories and len(poses) > 1:
+            try:
+                with TRACER.span('robot.execute_trajectory', waypoints=len(poses)):
+                    self._robot.execute_trajectory_from_poses(poses, self._dist_smoothing)
+                self._trajectories_unconfirmed = False
+                return
+            except Exception:
+                if not self._trajectories_unconfirmed:
+                    raise
+                self._logger.warning('Robot rejected a compound trajectory, moving one pose at a time:\n%s',
+                                     traceback.format_exc())
+                self._use_trajectories = False
+                self._trajectories_unconfirmed = False
+
+        for pose in poses:
+            self.move_pose(pose)
+
+    def move_pose(self, pose):
+        """
+        Move to a single pose
+        :param pose: a pose [x, y, z, roll, pitch, yaw]
+        """
+        with TRACER.span('robot.move_pose'):
+            self._robot.move_pose(pose)
+
+    def open_gripper(self):
+        """
+        Open the gripper (skipped if it is already open)
+        """
+        if self._gripper_open is not True:
+            with TRACER.span('robot.open_gripper'):
+                self._robot.release_with_tool()
+            self._gripper_open = True
+
+    def close_gripper(self):
+        """
+        Close the gripper (skipped if it is already closed)
+        """
+        if self._gripper_open is not False:
+            with TRACER.span('robot.close_gripper'):
+                self._robot.grasp_with_tool()
+            self._gripper_open = False
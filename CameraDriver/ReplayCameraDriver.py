@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+"""
+--------------------------------------------------------------------
+Michigan  Technological University: Blue Marble Security Enterprise
+--------------------------------------------------------------------
+
+Camera driver that replays recorded images from disk
+
+ReplayCameraDriver.py
+Author: Blue Marble Security Enterprise
+Date Last Modified: 10/19/2026
+"""
+
+__author__ = 'Blue Marble Security Enterprise'
+__version__ = '1.0'
+
+import os
+import glob
+import time
+import logging
+
+import cv2
+
+from CameraDriver.CameraDriver import CameraDriver
+
+IMAGE_EXTENSIONS = ('*.png', '*.bmp', '*.jpg')
+
+
+class ReplayCameraDriver(CameraDriver):
+    """
+    Serves the images of a directory in name order, looping back to the first after the last
+    """
+
+    def __init__(self, image_dir):
+        """
+        Constructor
+        :param image_dir: directory of recorded images
+        """
+        self._logger = logging.getLogger('GM_Pick_Point.' + self.__class__.__name__)
+        self._image_dir = image_dir
+
+        paths = []
+        for extension in IMAGE_EXTENSIONS:
+            paths += glob.glob(os.path.join(image_dir, extension))
+        self._paths = sorted(paths)
+        if len(self._paths) == 0:
+            raise ValueError('No images found in %s' % image_dir)
+
+        self._images = [cv2.imread(path) for path in self._paths]
+        self._next_index = 0
+        self._logger.info('Loaded %d recorded images', len(self._images))
+
+    def get_image(self, num_images):
+        """
+        Get the next recorded images
+        :param num_images: the number of images to obtain
+        :return: a list of images
+        """
+        result = []
+        for _ in range(num_images):
+            result.append(self._images[self._next_index])
+            self._next_index = (self._next_index + 1) % len(self._images)
+        return result
+
+    def get_info(self):
+        """
+        Get camera information
+        :return: [all info acquired, serial number, vendor name, display name] like SpinCameraDriver
+        """
+        return [True, self._image_dir, 'Replay', os.path.basename(self._image_dir)]
+
+
+class ReplayStereoCameraDriver:
+    """
+    Serves the recorded left/right pairs of a directory in name order, looping back to the first after the last.
+    A pair is a left image with 'left' in its name and the right image with 'right' in its place.
+    """
+
+    def __init__(self, pair_dir, frame_interval=0.0):
+        """
+        Constructor
+        :param pair_dir:        directory of recorded pairs
+        :param frame_interval:  seconds every get_pair() sleeps, the modelled capture time of a pair (0 - no sleep)
+        """
+        self._logger = logging.getLogger('GM_Pick_Point.' + self.__class__.__name__)
+        self._frame_interval = frame_interval
+
+        self._pairs = []
+        for extension in IMAGE_EXTENSIONS:
+            for left_path in sorted(glob.glob(os.path.join(pair_dir, extension))):
+                name = os.path.basename(left_path)
+                if 'left' not in name.lower():
+                    continue
+                start = name.lower().index('left')
+                right_name = name[:start] + ('Right' if name[start] == 'L' else 'right') + name[start + 4:]
+                right_path = os.path.join(pair_dir, right_name)
+                if os.path.exists(right_path):
+                    self._pairs.append((cv2.imread(left_path), cv2.imread(right_path)))
+        if len(self._pairs) == 0:
+            raise ValueError('No left/right pairs found in %s' % pair_dir)
+
+        self._next_index = 0
+        self._logger.info('Loaded %d recorded pairs', len(self._pairs))
+
+    def get_pair(self):
+        """
+        Get the next recorded pair
+        :return: (left image, right image)
+        """
+        if self._frame_interval > 0:
+            time.sleep(self._frame_interval)
+        pair = self._pairs[self._next_index]
+        self._next_index = (self._next_index + 1) % len(self._pairs)
+        return pair
+
+    def get_num_pairs(self):
+        """
+        :return: the number of recorded pairs
+        """
+        return len(self._pairs)
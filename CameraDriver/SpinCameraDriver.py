@@ -36,7 +36,7 @@ class SpinCameraDriver(CameraDriver.CameraDriver):
         # init the logger
         self._id = self._camera.TLDevice.DeviceSerialNumber.ToString()
         self._logger = logging.getLogger('GM_Pick_Point.' + self.__class__.__name__ + '.Camera:' + self._id)
-        self._logger.debug('Initializing Camera %s ...' % self._id)
+        self._logger.debug('Initializing Camera %s ...', self._id)
 
         # Setup camera to take pictures based on a software trigger
         self._camera = camera
@@ -71,35 +71,35 @@ class SpinCameraDriver(CameraDriver.CameraDriver):
         :param num_images: the number of images to take
         :return: a list of images that is <= num_images
         """
-        self._logger.debug('Getting Images from Camera %s ...' % str(self._camera.GetUniqueID()))
+        self._logger.debug('Getting Images from Camera %s ...', str(self._camera.GetUniqueID()))
         result = []                         # resulting list of images
         self._camera.BeginAcquisition()     # Start acquiring images
 
         # Attempt to take all images
         for img_num in range(num_images):
-            self._logger.debug('Getting Image %d...' % img_num)
+            self._logger.debug('Getting Image %d...', img_num)
             self._camera.TriggerSoftware()
             img = self._camera.GetNextImage()
 
             # Check if the image was correctly received
             if img.IsIncomplete():
-                self._logger.warning('Camera %s Image %d Is Incomplete - Skipping'
-                                     % (str(self._camera.GetUniqueID()), img_num))
+                self._logger.warning('Camera %s Image %d Is Incomplete - Skipping',
+                                     str(self._camera.GetUniqueID()), img_num)
                 pass
             else:
-                self._logger.debug('Image %d Obtained' % img_num)
+                self._logger.debug('Image %d Obtained', img_num)
                 # see documentation: enum ColorProcessingAlgorithm
                 image_converted = img.Convert(PySpin.PixelFormat_BGR8, PySpin.DIRECTIONAL_FILTER)
                 image_data = image_converted.GetData()
 
                 # Convert the image to be compatible with OpenCV
-                self._logger.debug('Converting Image %d For OpenCV' % img_num)
+                self._logger.debug('Converting Image %d For OpenCV', img_num)
                 cvi = np.frombuffer(image_data, dtype=np.uint8)
                 cvi = cvi.reshape((img.GetHeight(), img.GetWidth(), 3))
 
                 # Add the resulting image to the result list
                 result.append(cvi)
-                self._logger.debug('Image %d Complete' % img_num)
+                self._logger.debug('Image %d Complete', img_num)
 
             # Release and delete the image reference
             img.Release()
@@ -191,7 +191,7 @@ if __name__ == '__main__':
     # Get a list of all cameras on the system
     system = PySpin.System.GetInstance()
     cam_list = system.GetCameras()
-    logger.debug("number of cameras {}".format(cam_list.GetSize()))
+    logger.debug("number of cameras %d", cam_list.GetSize())
     
     if cam_list.GetSize() == 0:
         logger.error("no cameras found, aborting")
@@ -204,7 +204,7 @@ if __name__ == '__main__':
     # For each camera make a camera driver to get images
     for i in range(cam_list.GetSize()):
         cam = cam_list.GetByIndex(i)
-        logger.debug("camera {} serial: {}".format(i, cam.GetUniqueID()))
+        logger.debug("camera %d serial: %s", i, cam.GetUniqueID())
         driver = SpinCameraDriver(cam)
         images = driver.get_image(1)
 
@@ -96,8 +96,8 @@ class SpinSingleCameraDriver(threading.Thread):
                 self._logger.info(" Camera - FOUND\n"
                                   "\t Serial Number: %s\n"
                                   "\t Vendor Name  : %s\n"
-                                  "\t Display Name : %s"
-                                  % (info[1], info[2], info[3]))
+                                  "\t Display Name : %s",
+                                  info[1], info[2], info[3])
 
         if self._driver is None:
             self._logger.error("Unable to find Camera - EXITING")
@@ -160,7 +160,7 @@ class SpinSingleCameraDriver(threading.Thread):
         """
 
         # Wait to acquire the thread access lock
-        self._logger.debug('Requesting %d new images' % num_images)
+        self._logger.debug('Requesting %d new images', num_images)
         with self._lock:
 
             self._request = (self._get_images, (num_images,))           # Set request
@@ -177,7 +177,7 @@ class SpinSingleCameraDriver(threading.Thread):
         :param num_images: the number of images to get
         :return: A list of images
         """
-        self._logger.info("Acquiring %d images..." % num_images)
+        self._logger.info("Acquiring %d images...", num_images)
         result = []
         images = num_images
         while images > 0:
@@ -190,6 +190,6 @@ class SpinSingleCameraDriver(threading.Thread):
             result.append(image)
             images -= 1
 
-        self._logger.info("Acquiring %d simages - COMPLETE" % num_images)
+        self._logger.info("Acquiring %d simages - COMPLETE", num_images)
         self._acquired_images = result
 
@@ -0,0 +1,459 @@
+#!/usr/bin/env python
+"""
+--------------------------------------------------------------------
+Michigan  Technological University: Blue Marble Security Enterprise
+--------------------------------------------------------------------
+
+Calibrated 2D transforms between the FLIR camera, the Niryo arm and the
+ZED Mini. Transforms are fitted from calibration point pairs as full
+affine or homography matrices and applied to whole arrays of points.
+
+The FLIR -> ZED registration is also stored as a RegistrationMap: the
+FLIR lens distortion is removed (with the camera matrix and distortion
+coefficients of calibration/calDetails.npz), a homography is fitted and
+the ZED coords of a grid of FLIR pixels, every REGISTRATION_STEP pixels,
+are stored as one small float32 array. Mapping points is then a
+vectorized gather of the four grid points around each point and a
+bilinear blend, whatever model built the map.
+
+To fit the transforms from a CSV of calibration points with the columns
+camera_x, camera_y, arm_x, arm_y, zed_x, zed_y:
+    python CoordinateTransform.py points.csv [affine|homography]
+
+CoordinateTransform.py
+Author: Blue Marble Security Enterprise
+Date Last Modified: 10/19/2026
+"""
+
+__author__ = 'Blue Marble Security Enterprise'
+__version__ = '1.0'
+
+import os
+import sys
+import csv
+
+import cv2
+import numpy as np
+
+TRANSFORM_FILE = os.path.join('calibration', 'transforms.npz')     # Where fitted transforms are stored
+REGISTRATION_FILE = os.path.join('calibration', 'camera_to_zed_map.npz')   # Where the FLIR -> ZED map is stored
+CAMERA_CALIBRATION_FILE = os.path.join('calibration', 'calDetails.npz')    # FLIR lens calibration (mtx1, dist1)
+MODELS = ('affine', 'homography')
+REGISTRATION_STEP = 8           # Input pixels between the grid points of a RegistrationMap
+
+
+class CoordinateTransform:
+    """
+    A 3x3 matrix mapping 2D points from one coordinate system to another
+    """
+
+    def __init__(self, matrix, model='affine', residuals=None):
+        """
+        Constructor
+        :param matrix:      3x3 transform matrix (homogeneous coordinates)
+        :param model:       'affine' or 'homography'
+        :param residuals:   Per calibration point fitting error (in output units) or None
+        """
+        self.matrix = np.asarray(matrix, dtype=np.float64).reshape(3, 3)
+        self.model = model
+        self.residuals = None if residuals is None else np.asarray(residuals, dtype=np.float64)
+
+    @staticmethod
+    def from_bounds(in_coor, out_coor):
+        """
+        Build the axis-aligned transform between two sets of north, east, south, west bounds, each bound maps to the
+        matching bound and points in between are scaled linearly
+        :param in_coor:     dict with the north, east, south, and west bounds of the input coordinate system
+        :param out_coor:    dict with the north, east, south, and west bounds of the output coordinate system
+        :return: a CoordinateTransform
+        """
+        scale_x = (out_coor['east'] - out_coor['west']) / (in_coor['east'] - in_coor['west'])
+        scale_y = (out_coor['south'] - out_coor['north']) / (in_coor['south'] - in_coor['north'])
+        matrix = [[scale_x, 0.0, out_coor['west'] - scale_x * in_coor['west']],
+                  [0.0, scale_y, out_coor['north'] - scale_y * in_coor['north']],
+                  [0.0, 0.0, 1.0]]
+        return CoordinateTransform(matrix)
+
+    @staticmethod
+    def fit(src_points, dst_points, model='affine'):
+        """
+        Fit a transform to calibration point pairs by least squares
+        :param src_points:  Nx2 array of points in the input coordinate system
+        :param dst_points:  Nx2 array of the same points in the output coordinate system
+        :param model:       'affine' (N >= 3) or 'homography' (N >= 4)
+        :return: a CoordinateTransform with its fitting residuals
+        """
+        src = np.asarray(src_points, dtype=np.float64).reshape(-1, 2)
+        dst = np.asarray(dst_points, dtype=np.float64).reshape(-1, 2)
+        if src.shape != dst.shape:
+            raise ValueError('Point arrays do not match: %s vs %s' % (src.shape, dst.shape))
+
+        if model == 'affine':
+            if len(src) < 3:
+                raise ValueError('An affine transform needs at least 3 points')
+            design = np.hstack([src, np.ones((len(src), 1))])
+            solution = np.linalg.lstsq(design, dst, rcond=None)[0]      # 3x2
+            matrix = np.vstack([solution.T, [0.0, 0.0, 1.0]])
+
+        elif model == 'homography':
+            if len(src) < 4:
+                raise ValueError('A homography needs at least 4 points')
+            matrix = _fit_homography(src, dst)
+
+        else:
+            raise ValueError('Unknown model %s, expected one of %s' % (model, MODELS))
+
+        transform = CoordinateTransform(matrix, model)
+        transform.residuals = np.linalg.norm(transform.apply(src) - dst, axis=1)
+        return transform
+
+    def apply(self, points):
+        """
+        Transform an array of points
+        :param points: Nx2 array of points (or a single (x, y))
+        :return: Nx2 array of transformed points (or a single (x, y) array)
+        """
+        points = np.asarray(points, dtype=np.float64)
+        single = points.ndim == 1
+        points = points.reshape(-1, 2)
+
+        result = points.dot(self.matrix[:2, :2].T) + self.matrix[:2, 2]
+        if self.model == 'homography':
+            w = points.dot(self.matrix[2, :2]) + self.matrix[2, 2]
+            result /= w[:, np.newaxis]
+
+        return result[0] if single else result
+
+    def apply_boxes(self, boxes):
+        """
+        Transform an array of axis aligned boxes
+        :param boxes: Nx4 array of (left, top, right, bottom)
+        :return: Nx4 array of the axis aligned boxes bounding the four transformed corners of every box
+        """
+        return _apply_boxes(self.apply, boxes)
+
+    def inverse(self):
+        """
+        :return: the CoordinateTransform mapping output points back to input points
+        """
+        return CoordinateTransform(np.linalg.inv(self.matrix), self.model)
+
+    def then(self, other):
+        """
+        Chain two transforms
+        :param other: a CoordinateTransform applied after this one
+        :return: a CoordinateTransform equivalent to other.apply(self.apply(points))
+        """
+        model = 'affine' if self.model == other.model == 'affine' else 'homography'
+        return CoordinateTransform(other.matrix.dot(self.matrix), model)
+
+    @property
+    def rms_error(self):
+        """
+        Property decorated access function to get the root mean square fitting error
+
+        To Call: transform.rms_error
+
+        :return: the RMS error (in output units) or None if the transform was not fitted
+        """
+        if self.residuals is None or len(self.residuals) == 0:
+            return None
+        return float(np.sqrt(np.mean(self.residuals ** 2)))
+
+    @property
+    def max_error(self):
+        """
+        Property decorated access function to get the largest fitting error
+
+        To Call: transform.max_error
+
+        :return: the max error (in output units) or None if the transform was not fitted
+        """
+        if self.residuals is None or len(self.residuals) == 0:
+            return None
+        return float(np.max(self.residuals))
+
+
+class RegistrationMap:
+    """
+    Dense lookup table of the output coords of every input pixel, sampled every step pixels
+    """
+
+    def __init__(self, table, step=REGISTRATION_STEP, residuals=None):
+        """
+        Constructor
+        :param table:       RxCx2 array, table[i, j] is the (x, y) output of input pixel (j * step, i * step)
+        :param step:        Input pixels between grid points
+        :param residuals:   Per calibration point registration error (in output units) or None
+        """
+        self.table = np.asarray(table, dtype=np.float32)
+        self.step = int(step)
+        self.model = 'registration map'
+        self.residuals = None if residuals is None else np.asarray(residuals, dtype=np.float64)
+
+    @staticmethod
+    def build(transform, image_size, camera_matrix=None, dist_coeffs=None, step=REGISTRATION_STEP):
+        """
+        Tabulate a transform over an image, removing the lens distortion first
+        :param transform:       CoordinateTransform from undistorted input pixels to output coords
+        :param image_size:      (width, height) of the input image
+        :param camera_matrix:   3x3 input camera matrix (None - no lens distortion)
+        :param dist_coeffs:     Input lens distortion coefficients
+        :param step:            Input pixels between grid points
+        :return: a RegistrationMap
+        """
+        cols = np.arange(0, image_size[0] + step, step, dtype=np.float64)
+        rows = np.arange(0, image_size[1] + step, step, dtype=np.float64)
+        grid = np.stack(np.meshgrid(cols, rows), axis=-1).reshape(-1, 2)
+        table = transform.apply(_undistort(grid, camera_matrix, dist_coeffs))
+        return RegistrationMap(table.reshape(len(rows), len(cols), 2), step)
+
+    @staticmethod
+    def fit(src_points, dst_points, image_size, camera_matrix=None, dist_coeffs=None, model='homography',
+            step=REGISTRATION_STEP):
+        """
+        Fit a registration to calibration point pairs
+        :param src_points:      Nx2 array of points in the input image
+        :param dst_points:      Nx2 array of the same points in the output coordinate system
+        :param image_size:      (width, height) of the input image
+        :param camera_matrix:   3x3 input camera matrix (None - no lens distortion)
+        :param dist_coeffs:     Input lens distortion coefficients
+        :param model:           'affine' or 'homography' fitted to the undistorted points
+        :param step:            Input pixels between grid points
+        :return: a RegistrationMap with its registration error at the calibration points
+        """
+        src = np.asarray(src_points, dtype=np.float64).reshape(-1, 2)
+        dst = np.asarray(dst_points, dtype=np.float64).reshape(-1, 2)
+        transform = CoordinateTransform.fit(_undistort(src, camera_matrix, dist_coeffs), dst, model)
+        registration = RegistrationMap.build(transform, image_size, camera_matrix, dist_coeffs, step)
+        registration.residuals = registration.get_errors(src, dst)
+        return registration
+
+    def apply(self, points):
+        """
+        Map an array of points
+        :param points: Nx2 array of input pixels (or a single (x, y))
+        :return: Nx2 array of output coords (or a single (x, y) array)
+        """
+        points = np.asarray(points, dtype=np.float64)
+        single = points.ndim == 1
+        points = points.reshape(-1, 2)
+
+        # Grid cell of every point, points past the edge are extrapolated from the last cell
+        grid_x = points[:, 0] / self.step
+        grid_y = points[:, 1] / self.step
+        col = np.clip(np.floor(grid_x), 0, self.table.shape[1] - 2).astype(np.intp)
+        row = np.clip(np.floor(grid_y), 0, self.table.shape[0] - 2).astype(np.intp)
+        frac_x = (grid_x - col)[:, np.newaxis]
+        frac_y = (grid_y - row)[:, np.newaxis]
+
+        table = self.table
+        top = table[row, col] * (1 - frac_x) + table[row, col + 1] * frac_x
+        bottom = table[row + 1, col] * (1 - frac_x) + table[row + 1, col + 1] * frac_x
+        result = top * (1 - frac_y) + bottom * frac_y
+
+        return result[0] if single else result
+
+    def apply_boxes(self, boxes):
+        """
+        Map an array of axis aligned boxes
+        :param boxes: Nx4 array of (left, top, right, bottom)
+        :return: Nx4 array of the axis aligned boxes bounding the four mapped corners of every box
+        """
+        return _apply_boxes(self.apply, boxes)
+
+    def get_errors(self, src_points, dst_points):
+        """
+        Measure the registration error at known point pairs
+        :param src_points: Nx2 array of points in the input image
+        :param dst_points: Nx2 array of the same points in the output coordinate system
+        :return: N array of distances (in output units) between the mapped and the known points
+        """
+        dst = np.asarray(dst_points, dtype=np.float64).reshape(-1, 2)
+        return np.linalg.norm(self.apply(np.asarray(src_points, dtype=np.float64).reshape(-1, 2)) - dst, axis=1)
+
+    @property
+    def rms_error(self):
+        """
+        Property decorated access function to get the RMS registration error
+
+        To Call: registration.rms_error
+
+        :return: the RMS error (in output units) or None if the map was not fitted
+        """
+        if self.residuals is None or len(self.residuals) == 0:
+            return None
+        return float(np.sqrt(np.mean(self.residuals ** 2)))
+
+    @property
+    def max_error(self):
+        """
+        Property decorated access function to get the largest registration error
+
+        To Call: registration.max_error
+
+        :return: the max error (in output units) or None if the map was not fitted
+        """
+        if self.residuals is None or len(self.residuals) == 0:
+            return None
+        return float(np.max(self.residuals))
+
+    def save(self, path=REGISTRATION_FILE):
+        """
+        Save the map
+        :param path: .npz file to write
+        """
+        arrays = dict(table=self.table, step=np.array(self.step))
+        if self.residuals is not None:
+            arrays['residuals'] = self.residuals
+        np.savez(path, **arrays)
+
+    @staticmethod
+    def load(path=REGISTRATION_FILE):
+        """
+        Load a map saved by save()
+        :param path: .npz file to read
+        :return: a RegistrationMap
+        """
+        with np.load(path) as arrays:
+            residuals = arrays['residuals'] if 'residuals' in arrays.files else None
+            return RegistrationMap(arrays['table'], int(arrays['step']), residuals)
+
+
+def load_camera_calibration(path=CAMERA_CALIBRATION_FILE):
+    """
+    Load the FLIR lens calibration
+    :param path: .npz written by calibration/calibrate.py
+    :return: (3x3 camera matrix, distortion coefficients, (width, height) of the image)
+    """
+    with np.load(path) as arrays:
+        size = arrays['size']
+        return arrays['mtx1'], arrays['dist1'], (int(size[1]), int(size[2]))
+
+
+def save_transforms(path, transforms):
+    """
+    Save named transforms to one .npz file
+    :param path:        file to write
+    :param transforms:  dict of name -> CoordinateTransform
+    """
+    arrays = dict()
+    for name, transform in transforms.items():
+        arrays[name + '_matrix'] = transform.matrix
+        arrays[name + '_model'] = np.array(transform.model)
+        if transform.residuals is not None:
+            arrays[name + '_residuals'] = transform.residuals
+    np.savez(path, **arrays)
+
+
+def load_transforms(path):
+    """
+    Load named transforms saved by save_transforms
+    :param path: file to read
+    :return: dict of name -> CoordinateTransform
+    """
+    result = dict()
+    with np.load(path) as arrays:
+        for key in arrays.files:
+            if key.endswith('_matrix'):
+                name = key[:-len('_matrix')]
+                residuals = arrays[name + '_residuals'] if name + '_residuals' in arrays.files else None
+                result[name] = CoordinateTransform(arrays[key], str(arrays[name + '_model']), residuals)
+    return result
+
+
+def _apply_boxes(apply, boxes):
+    """
+    Map axis aligned boxes through a point mapping
+    :param apply:   function mapping an Nx2 array of points
+    :param boxes:   Nx4 array of (left, top, right, bottom)
+    :return: Nx4 array of the axis aligned boxes bounding the four mapped corners of every box
+    """
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    corners = boxes[:, [0, 1, 2, 1, 2, 3, 0, 3]].reshape(-1, 2)
+    corners = apply(corners).reshape(-1, 4, 2)
+    return np.column_stack([corners.min(axis=1), corners.max(axis=1)])
+
+
+def _undistort(points, camera_matrix, dist_coeffs):
+    """
+    Remove the lens distortion from pixel coords
+    :param points:          Nx2 array of distorted pixels
+    :param camera_matrix:   3x3 camera matrix (None - return the points unchanged)
+    :param dist_coeffs:     Lens distortion coefficients
+    :return: Nx2 array of the undistorted pixels
+    """
+    if camera_matrix is None:
+        return points
+    undistorted = cv2.undistortPoints(points.reshape(-1, 1, 2), camera_matrix, dist_coeffs, P=camera_matrix)
+    return undistorted.reshape(-1, 2).astype(np.float64)
+
+
+def _fit_homography(src, dst):
+    """
+    Direct linear transform with Hartley normalization
+    :param src: Nx2 array of input points
+    :param dst: Nx2 array of output points
+    :return: 3x3 homography
+    """
+    src_norm, src_t = _normalize(src)
+    dst_norm, dst_t = _normalize(dst)
+
+    rows = np.zeros((2 * len(src), 9))
+    x, y = src_norm[:, 0], src_norm[:, 1]
+    u, v = dst_norm[:, 0], dst_norm[:, 1]
+    rows[0::2, 0:3] = np.column_stack([-x, -y, -np.ones_like(x)])
+    rows[0::2, 6:9] = np.column_stack([u * x, u * y, u])
+    rows[1::2, 3:6] = np.column_stack([-x, -y, -np.ones_like(x)])
+    rows[1::2, 6:9] = np.column_stack([v * x, v * y, v])
+
+    homography = np.linalg.svd(rows)[2][-1].reshape(3, 3)
+    homography = np.linalg.inv(dst_t).dot(homography).dot(src_t)
+    return homography / homography[2, 2]
+
+
+def _normalize(points):
+    """
+    Translate and scale points so their centroid is the origin and their mean distance from it is sqrt(2)
+    :param points: Nx2 array
+    :return: (normalized Nx2 array, 3x3 normalizing matrix)
+    """
+    centroid = points.mean(axis=0)
+    mean_distance = np.linalg.norm(points - centroid, axis=1).mean()
+    scale = np.sqrt(2) / mean_distance if mean_distance > 0 else 1.0
+    matrix = np.array([[scale, 0.0, -scale * centroid[0]],
+                       [0.0, scale, -scale * centroid[1]],
+                       [0.0, 0.0, 1.0]])
+    return (points - centroid) * scale, matrix
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print("Syntax: {0} CALIBRATION_POINTS_CSV [affine|homography]".format(sys.argv[0]))
+        sys.exit(1)
+
+    fit_model = sys.argv[2] if len(sys.argv) > 2 else 'affine'
+    with open(sys.argv[1]) as points_file:
+        rows = [r for r in csv.DictReader(points_file)]
+    camera = np.array([[float(r['camera_x']), float(r['camera_y'])] for r in rows])
+    arm = np.array([[float(r['arm_x']), float(r['arm_y'])] for r in rows])
+    zed = np.array([[float(r['zed_x']), float(r['zed_y'])] for r in rows])
+
+    fitted = dict(camera_to_arm=CoordinateTransform.fit(camera, arm, fit_model),
+                  camera_to_zed=CoordinateTransform.fit(camera, zed, fit_model))
+    for transform_name, fitted_transform in fitted.items():
+        print("{0} ({1}): RMS error {2:.4f}, max error {3:.4f}".format(
+            transform_name, fitted_transform.model, fitted_transform.rms_error, fitted_transform.max_error))
+
+    save_transforms(TRANSFORM_FILE, fitted)
+    print("Saved to {0}".format(TRANSFORM_FILE))
+
+    # Dense FLIR -> ZED map through the undistorted FLIR image
+    if os.path.exists(CAMERA_CALIBRATION_FILE):
+        lens_matrix, lens_distortion, camera_size = load_camera_calibration()
+        registration_map = RegistrationMap.fit(camera, zed, camera_size, lens_matrix, lens_distortion,
+                                               'homography' if len(camera) >= 4 else 'affine')
+        print("camera_to_zed ({0}): RMS error {1:.4f}, max error {2:.4f}".format(
+            registration_map.model, registration_map.rms_error, registration_map.max_error))
+        registration_map.save(REGISTRATION_FILE)
+        print("Saved to {0}".format(REGISTRATION_FILE))
@@ -0,0 +1,337 @@
+#!/usr/bin/env python
+"""
+--------------------------------------------------------------------
+Michigan  Technological University: Blue Marble Security Enterprise
+--------------------------------------------------------------------
+
+Records begin/end spans of every phase of the pick cycle, from every
+thread, into rotating trace files in the Chrome trace event format.
+Open them with chrome://tracing or https://ui.perfetto.dev
+
+Usage:
+    from CycleTracer import TRACER
+
+    with TRACER.span('zed.get_object_height', item='cat_ear', frame=12):
+        ...
+
+When the tracer is not started, span() returns a shared no-op context
+manager, so the instrumentation costs next to nothing.
+
+CycleTracer.py
+Author: Blue Marble Security Enterprise
+Date Last Modified: 10/19/2026
+"""
+
+__author__ = 'Blue Marble Security Enterprise'
+__version__ = '1.0'
+
+import os
+import json
+import glob
+import time
+import logging
+import datetime
+import threading
+
+FLUSH_INTERVAL = 1.0                    # Seconds between writes of buffered events to the trace file
+MAX_FILE_SIZE = 50 * 1024 * 1024        # Bytes after which a new trace file is started
+ROTATE_INTERVAL = 3600                  # Seconds after which a new trace file is started
+MAX_TRACE_FILES = 24                    # Oldest trace files are deleted past this count
+SUMMARY_INTERVAL = 3600                 # Seconds covered by each slowest phase summary
+SUMMARY_SIZE = 10                       # Number of phases listed in each summary
+
+
+class _NullSpan:
+    """
+    Context manager that does nothing, returned while tracing is off
+    """
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    """
+    Context manager that records one span
+    """
+    __slots__ = ('_tracer', '_name', '_tags', '_start')
+
+    def __init__(self, tracer, name, tags):
+        self._tracer = tracer
+        self._name = name
+        self._tags = tags
+        self._start = 0.0
+
+    def __enter__(self):
+        self._start = time.time()
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        if exc_type is not None:
+            self._tags['error'] = exc_type.__name__
+        self._tracer.record(self._name, self._start, time.time(), self._tags)
+        return False
+
+
+class CycleTracer:
+    """
+    Collects spans from every thread and hands them to a TraceWriter thread
+    """
+
+    def __init__(self):
+        self._logger = logging.getLogger('GM_Pick_Point.' + self.__class__.__name__)
+        self._lock = threading.Lock()
+        self._events = []
+        self._thread_names = dict()
+        self._writer = None
+        self.enabled = False
+
+        # Per phase [count, total seconds, max seconds] of the current summary interval
+        self._summary_bucket = None
+        self._phase_stats = dict()
+        self._summaries = []
+
+    def start(self, trace_dir, max_file_size=MAX_FILE_SIZE, rotate_interval=ROTATE_INTERVAL):
+        """
+        Start recording spans (does nothing if already started)
+        :param trace_dir:       Directory to write trace files to
+        :param max_file_size:   Bytes after which a new trace file is started
+        :param rotate_interval: Seconds after which a new trace file is started
+        """
+        with self._lock:
+            if self._writer is not None:
+                return
+            self._writer = TraceWriter(self, trace_dir, max_file_size, rotate_interval)
+            self._writer.start()
+            self.enabled = True
+        self._logger.info('Tracing to %s', trace_dir)
+
+    def stop(self):
+        """
+        Stop recording spans and write out everything that is buffered
+        """
+        with self._lock:
+            writer = self._writer
+            self._writer = None
+            self.enabled = False
+        if writer is not None:
+            writer.terminate_thread()
+            writer.join()
+        self._log_summary()
+
+    def span(self, name, **tags):
+        """
+        Get a context manager that records the time spent inside it
+        :param name:    Name of the phase
+        :param tags:    JSON serializable values to attach to the span (job, item, frame, ...)
+        :return: a context manager
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, tags)
+
+    def record(self, name, start, end, tags=None):
+        """
+        Record a finished span
+        :param name:    Name of the phase
+        :param start:   time.time() the phase began
+        :param end:     time.time() the phase ended
+        :param tags:    dict of values to attach to the span
+        """
+        thread = threading.current_thread()
+        event = dict(name=name, ph='X', ts=int(start * 1e6), dur=int((end - start) * 1e6), pid=os.getpid(),
+                     tid=thread.ident, args=tags or dict())
+
+        summary = None
+        with self._lock:
+            if not self.enabled:
+                return
+            if thread.ident not in self._thread_names:
+                self._thread_names[thread.ident] = thread.name
+                self._events.append(dict(name='thread_name', ph='M', pid=os.getpid(), tid=thread.ident,
+                                         args=dict(name=thread.name)))
+            self._events.append(event)
+
+            bucket = int(end // SUMMARY_INTERVAL)
+            if bucket != self._summary_bucket:
+                summary = self._close_summary()
+                self._summary_bucket = bucket
+
+            stats = self._phase_stats.get(name)
+            if stats is None:
+                stats = self._phase_stats[name] = [0, 0.0, 0.0]
+            stats[0] += 1
+            stats[1] += end - start
+            stats[2] = max(stats[2], end - start)
+
+        if summary:
+            self._write_summary(summary)
+
+    def take_events(self):
+        """
+        Remove and return every buffered event (used by the TraceWriter)
+        :return: a list of trace events
+        """
+        with self._lock:
+            events = self._events
+            self._events = []
+        return events
+
+    def get_summaries(self):
+        """
+        Get the slowest phases of every finished summary interval
+        :return: a list of (interval start datetime, [(phase, count, total s, max s), ...])
+        """
+        with self._lock:
+            result = list(self._summaries)
+        return result
+
+    def _close_summary(self):
+        """
+        Internal facing function to finish the current summary interval, called with the lock held
+        :return: (interval start datetime, slowest phases) or None if the interval was empty
+        """
+        if self._summary_bucket is None or len(self._phase_stats) == 0:
+            self._phase_stats = dict()
+            return None
+
+        phases = sorted(((name, stats[0], stats[1], stats[2]) for name, stats in self._phase_stats.items()),
+                        key=lambda phase: phase[2], reverse=True)[:SUMMARY_SIZE]
+        summary = (datetime.datetime.fromtimestamp(self._summary_bucket * SUMMARY_INTERVAL), phases)
+        self._summaries.append(summary)
+        self._phase_stats = dict()
+        return summary
+
+    def _log_summary(self):
+        """
+        Internal facing function to close and log the current summary interval
+        """
+        with self._lock:
+            summary = self._close_summary()
+            self._summary_bucket = None
+        if summary:
+            self._write_summary(summary)
+
+    def _write_summary(self, summary):
+        """
+        Internal facing function to log one summary interval
+        :param summary: (interval start datetime, slowest phases)
+        """
+        lines = ['Slowest phases since %s:' % summary[0].strftime("%Y.%m.%d-%H.%M.%S")]
+        for name, count, total, longest in summary[1]:
+            lines.append('\t%-40s count: %6d  total: %9.3f s  mean: %8.1f ms  max: %8.1f ms' %
+                         (name, count, total, 1000.0 * total / count, 1000.0 * longest))
+        self._logger.info('\n'.join(lines))
+
+
+class TraceWriter(threading.Thread):
+    """
+    Background thread that appends buffered events to rotating trace files
+    """
+
+    def __init__(self, tracer, trace_dir, max_file_size, rotate_interval):
+        """
+        Constructor
+        :param tracer:          The CycleTracer to take events from
+        :param trace_dir:       Directory to write trace files to
+        :param max_file_size:   Bytes after which a new trace file is started
+        :param rotate_interval: Seconds after which a new trace file is started
+        """
+        super(TraceWriter, self).__init__(name='TraceWriter')
+        self.daemon = True
+
+        self._logger = logging.getLogger('GM_Pick_Point.' + self.__class__.__name__)
+        self._terminate_thread_event = threading.Event()
+        self._tracer = tracer
+        self._trace_dir = trace_dir
+        self._max_file_size = max_file_size
+        self._rotate_interval = rotate_interval
+
+        self._file = None
+        self._file_size = 0
+        self._file_opened = 0.0
+        self._thread_events = []        # thread_name events, repeated at the top of every file
+
+    def run(self):
+        """
+        Main thread function
+        """
+        if not os.path.exists(self._trace_dir):
+            os.makedirs(self._trace_dir)
+
+        try:
+            while not self._terminate_thread_event.wait(FLUSH_INTERVAL):
+                self._write(self._tracer.take_events())
+            self._write(self._tracer.take_events())
+        finally:
+            self._close_file()
+
+    def terminate_thread(self):
+        """
+        External facing method to request termination of this thread
+        """
+        self._terminate_thread_event.set()
+
+    def _write(self, events):
+        """
+        Internal facing function to append events to the trace file, rotating it when needed
+        :param events: a list of trace events
+        """
+        if len(events) == 0:
+            return
+
+        if self._file is None or self._file_size >= self._max_file_size or \
+                time.time() - self._file_opened >= self._rotate_interval:
+            self._open_file()
+
+        chunks = []
+        for event in events:
+            if event['ph'] == 'M':
+                self._thread_events.append(event)
+            chunks.append(',\n' + json.dumps(event))
+        data = ''.join(chunks)
+        self._file.write(data)
+        self._file.flush()
+        self._file_size += len(data)
+
+    def _open_file(self):
+        """
+        Internal facing function to start a new trace file and delete the oldest ones
+        """
+        self._close_file()
+        path = os.path.join(self._trace_dir, 'Trace - %s.json' %
+                            datetime.datetime.now().strftime("%Y.%m.%d-%H.%M.%S.%f"))
+        self._file = open(path, 'w')
+        self._file_opened = time.time()
+
+        # The closing ] is optional in the trace event format, so a file cut short by a crash still loads
+        header = '[' + json.dumps(dict(name='process_name', ph='M', pid=os.getpid(), args=dict(name='pick-point')))
+        for event in self._thread_events:
+            header += ',\n' + json.dumps(event)
+        self._file.write(header)
+        self._file_size = len(header)
+        self._logger.debug('Writing trace to %s', path)
+
+        trace_files = sorted(glob.glob(os.path.join(self._trace_dir, 'Trace - *.json')))
+        for old_path in trace_files[:-MAX_TRACE_FILES]:
+            os.remove(old_path)
+
+    def _close_file(self):
+        """
+        Internal facing function to finish the current trace file
+        """
+        if self._file is not None:
+            self._file.write('\n]\n')
+            self._file.close()
+            self._file = None
+
+
+# Tracer shared by every thread of the process
+TRACER = CycleTracer()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+"""
+--------------------------------------------------------------------
+Michigan  Technological University: Blue Marble Security Enterprise
+--------------------------------------------------------------------
+
+Temporal depth accumulator
+
+Keeps a running depth estimate of every pixel from the stream of depth
+maps. Each new depth close to the estimate moves it by ALPHA
+(exponentially weighted moving average), which smooths the frame to
+frame jitter at item edges. A depth further than OUTLIER_DEPTH from the
+estimate is ignored as a glitch, unless the pixel disagrees for
+RESET_FRAMES frames in a row, then the scene changed (an item was placed
+or picked) and the estimate jumps to the new depth. A pixel without a
+valid depth keeps its estimate for MAX_MISSES frames.
+
+Pixels left without an estimate are filled with the mean of their
+estimated neighbours (a normalized box filter, FILL_PASSES times). The
+valid mask tells the pixels with a measured estimate from the filled
+ones.
+
+DepthAccumulator.py
+Author: Blue Marble Security Enterprise
+Date Last Modified: 10/19/2026
+"""
+
+__author__ = 'Blue Marble Security Enterprise'
+__version__ = '1.0'
+
+import cv2
+import numpy as np
+
+ALPHA = 0.3                     # Weight of a new depth in the running estimate
+OUTLIER_DEPTH = 0.02            # Depths further than this (m) from the estimate are outliers
+RESET_FRAMES = 3                # Outliers in a row that replace the estimate (the scene changed)
+MAX_MISSES = 15                 # Frames a pixel keeps its estimate without a valid depth
+FILL_KERNEL = 5                 # Size (pixels) of the neighbourhood holes are filled from
+FILL_PASSES = 2                 # Fill passes, each one closes holes FILL_KERNEL // 2 pixels deeper
+
+
+class DepthAccumulator:
+    """
+    Exponentially weighted, outlier rejecting running depth estimate of every pixel
+    """
+
+    def __init__(self, alpha=ALPHA, outlier_depth=OUTLIER_DEPTH, reset_frames=RESET_FRAMES, max_misses=MAX_MISSES,
+                 fill_kernel=FILL_KERNEL, fill_passes=FILL_PASSES):
+        """
+        Constructor
+        :param alpha:           Weight of a new depth in the running estimate (0 - 1]
+        :param outlier_depth:   Depths further than this (m) from the estimate are outliers
+        :param reset_frames:    Outliers in a row that replace the estimate
+        :param max_misses:      Frames a pixel keeps its estimate without a valid depth
+        :param fill_kernel:     Size (pixels) of the neighbourhood holes are filled from
+        :param fill_passes:     Fill passes (0 - holes are not filled)
+        """
+        self._alpha = alpha
+        self._outlier_depth = outlier_depth
+        self._reset_frames = reset_frames
+        self._max_misses = min(max_misses, 254)
+        self._fill_kernel = (fill_kernel, fill_kernel)
+        self._fill_passes = fill_passes
+
+        self._estimate = None           # Running depth of every pixel (meters), NaN - no estimate
+        self._outliers = None           # Outliers in a row of every pixel
+        self._misses = None             # Frames since every pixel had a valid depth
+        self._num_frames = 0
+
+    def reset(self):
+        """
+        Forget every estimate, the next depth map starts over
+        """
+        self._estimate = None
+        self._num_frames = 0
+
+    def get_num_frames(self):
+        """
+        :return: the number of depth maps accumulated since the last reset
+        """
+        return self._num_frames
+
+    def update(self, depth_map):
+        """
+        Accumulate the next depth map
+        :param depth_map: 2D array of depths (meters), holes are NaN or inf
+        :return: (new 2D float32 array of the filled estimate (meters, NaN where nothing could be filled),
+                  new 2D bool array, True for the pixels with a measured estimate)
+        """
+        depth_map = np.asarray(depth_map, dtype=np.float32)
+        valid = np.isfinite(depth_map)
+
+        if self._estimate is None or self._estimate.shape != depth_map.shape:
+            self._estimate = np.where(valid, depth_map, np.nan).astype(np.float32)
+            self._outliers = np.zeros(depth_map.shape, dtype=np.uint8)
+            self._misses = np.where(valid, 0, self._max_misses + 1).astype(np.uint8)
+        else:
+            estimate = self._estimate
+            known = np.isfinite(estimate)
+            with np.errstate(invalid='ignore'):
+                error = depth_map - estimate
+                close = np.abs(error) <= self._outlier_depth   # False when either side is a hole
+
+            # Blend the depths that agree with the estimate, count the ones that do not
+            np.add(estimate, self._alpha * error, out=estimate, where=valid & close)
+            outlier = valid & known & ~close
+            self._outliers = np.where(outlier, np.minimum(self._outliers, 254) + 1, 0).astype(np.uint8)
+
+            # New pixels, and pixels that disagreed long enough, take the new depth
+            replace = valid & (~known | (self._outliers >= self._reset_frames))
+            np.copyto(estimate, depth_map, where=replace)
+            self._outliers[replace] = 0
+
+            # Forget pixels that had no valid depth for too long
+            self._misses = np.where(valid, 0, np.minimum(self._misses, self._max_misses) + 1).astype(np.uint8)
+            estimate[self._misses > self._max_misses] = np.nan
+
+        self._num_frames += 1
+        valid_mask = np.isfinite(self._estimate)
+        return self._fill_holes(self._estimate, valid_mask), valid_mask
+
+    def _fill_holes(self, estimate, valid_mask):
+        """
+        Internal facing function to fill the pixels without an estimate from their neighbours
+        :param estimate:    2D array of depths (meters), NaN - no estimate
+        :param valid_mask:  2D bool array, True for the pixels with an estimate
+        :return: a new 2D float32 array of depths, NaN where no neighbour had an estimate
+        """
+        filled = np.where(valid_mask, estimate, 0.0).astype(np.float32)
+        weight = valid_mask.astype(np.float32)
+        for _ in range(self._fill_passes):
+            holes = weight == 0
+            if not holes.any():
+                break
+
+            # Mean of the estimated neighbours: box sum of the depths over box count of the estimated pixels
+            sums = cv2.boxFilter(filled, -1, self._fill_kernel, normalize=False)
+            counts = cv2.boxFilter(weight, -1, self._fill_kernel, normalize=False)
+            fillable = holes & (counts > 0.5)
+            filled[fillable] = sums[fillable] / counts[fillable]
+            weight[fillable] = 1.0
+
+        filled[weight == 0] = np.nan
+        return filled
@@ -0,0 +1,393 @@
+#!/usr/bin/env python
+"""
+--------------------------------------------------------------------
+Michigan  Technological University: Blue Marble Security Enterprise
+--------------------------------------------------------------------
+
+Background depth acquisition shared by the ZED Mini driver and its
+simulated stand-in.
+
+A DepthAcquisitionThread calls the driver's grab function over and over
+and keeps only the latest depth map (meters, a NumPy array) with the
+time.time() it was grabbed at. With a DepthAccumulator the cached map is
+the accumulator's filled running estimate instead of the raw grab, the
+raw grab is kept next to it for the depth background. A height query
+reads the cached map instead of waiting on the sensor. Every depth map handed out is a new
+array that is never written to again, so it is shared between threads
+without copying.
+
+get_roi_statistics() summarizes the height above the empty table inside
+many boxes of one depth map in a single vectorized pass: every box is
+sampled on the same ROI_SAMPLES x ROI_SAMPLES grid, so one fancy index
+gathers an NxSxS array of depths, one subtraction from the background
+(a per-pixel DepthBackground or one desk depth) turns them into heights
+and one sort along the last axis gives the median and percentile of the
+valid (finite) heights of every box. Given the map's validity mask,
+filled pixels count as heights but not towards a box's valid fraction,
+so a box the sensor did not see is still read as the desk.
+
+A DepthImageWriter saves a sample of the queried depth maps, with the
+queried point marked, from its own thread so the pick loop never waits
+on PNG encoding or the disk.
+
+DepthAcquisition.py
+Author: Blue Marble Security Enterprise
+Date Last Modified: 10/19/2026
+"""
+
+__author__ = 'Blue Marble Security Enterprise'
+__version__ = '1.0'
+
+import os
+import time
+import queue
+import logging
+import threading
+import traceback
+
+import cv2
+import numpy as np
+
+from CycleTracer import TRACER
+
+ACQUISITION_TIMEOUT = 2.0       # Max seconds a query waits for a depth map new enough
+RETRY_INTERVAL = 0.01           # Seconds to wait after a failed grab before trying again
+MIN_VISIBLE_DEPTH = 0.3         # Depth (m) drawn white in the debug images
+MAX_VISIBLE_DEPTH = 2.0         # Depth (m) drawn black in the debug images
+MARK_RADIUS = 2                 # Half the size (pixels) of the dot marking the queried point
+DEBUG_QUEUE_SIZE = 4            # Debug images past this many waiting to be written are dropped
+ROI_SAMPLES = 16                # Depths sampled along each side of a box
+ROI_SCALE = 0.5                 # Part of a box's width and height around its center that is sampled
+MIN_ROI_SIZE = 8.0              # Min width and height (pixels) sampled, a point is sampled as a box this size
+ROI_PERCENTILE = 90.0           # Percentile of the heights reported with the median (high - the top of the item)
+GRAB_TRACE_INTERVAL = 100       # One of every this many grabs is traced, a span per frame would swamp the trace
+MIN_VALID_FRACTION = 0.25       # Boxes with fewer valid depths than this are read as the desk
+
+# Height statistics of one box
+ROI_STATS_DTYPE = np.dtype([('median', np.float32),             # meters above the background, NaN if no valid depth
+                            ('percentile', np.float32),         # meters above the background, NaN if no valid depth
+                            ('valid_fraction', np.float32)])    # part of the sampled depths that are finite
+
+_STOP = object()                # Queued by DepthImageWriter.terminate_thread() so the writer stops waiting
+
+
+def get_depth_at(depth_map, x, y, default):
+    """
+    Read one depth from a depth map, clamping the point to the map
+    :param depth_map:   2D array of depths (meters)
+    :param x:           Column of the point (pixels)
+    :param y:           Row of the point (pixels)
+    :param default:     Depth returned for a hole (NaN or inf) in the map
+    :return: the depth at the point (meters)
+    """
+    row = int(min(max(y, 0), depth_map.shape[0] - 1))
+    col = int(min(max(x, 0), depth_map.shape[1] - 1))
+    depth = float(depth_map[row, col])
+    return depth if np.isfinite(depth) else default
+
+
+def get_roi_statistics(depth_map, boxes, background, percentile=ROI_PERCENTILE, samples=ROI_SAMPLES, scale=ROI_SCALE,
+                       min_size=MIN_ROI_SIZE, valid_mask=None):
+    """
+    Get robust statistics of the height above the background of many boxes of one depth map at once
+    :param depth_map:   2D array of depths (meters)
+    :param boxes:       Nx4 array of (left, top, right, bottom) in the depth map's pixels
+    :param background:  Depth (m) of the empty table, one desk depth or a 2D array the shape of depth_map
+    :param valid_mask:  2D bool array the shape of depth_map, True for the measured depths (None - every finite
+                        depth is measured)
+    :param percentile:  Percentile of the valid heights to report with the median
+    :param samples:     Depths sampled along each side of a box
+    :param scale:       Part of a box's width and height around its center that is sampled
+    :param min_size:    Min width and height (pixels) sampled
+    :return: N array of ROI_STATS_DTYPE
+    """
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    stats = np.zeros(len(boxes), dtype=ROI_STATS_DTYPE)
+    if len(boxes) == 0:
+        return stats
+
+    # Sample grid of every box, centered in each of samples x samples cells of the sampled part
+    centers = (boxes[:, :2] + boxes[:, 2:]) / 2
+    sizes = np.maximum(np.abs(boxes[:, 2:] - boxes[:, :2]) * scale, min_size)
+    steps = (np.arange(samples) + 0.5) / samples - 0.5
+    cols = np.clip(np.round(centers[:, 0:1] + sizes[:, 0:1] * steps), 0, depth_map.shape[1] - 1).astype(np.intp)
+    rows = np.clip(np.round(centers[:, 1:2] + sizes[:, 1:2] * steps), 0, depth_map.shape[0] - 1).astype(np.intp)
+    rows, cols = rows[:, :, np.newaxis], cols[:, np.newaxis, :]
+    if np.ndim(background) == 0:
+        values = background - depth_map[rows, cols]
+    else:
+        values = background[rows, cols] - depth_map[rows, cols]
+    values = values.reshape(len(boxes), -1)
+
+    # Holes sort to the end, the statistics are read from the first num_valid heights of every box
+    valid = np.isfinite(values)
+    num_valid = valid.sum(axis=1)
+    values = np.sort(np.where(valid, values, np.inf), axis=1)
+    last = np.maximum(num_valid - 1, 0)
+    median = np.take_along_axis(values, (last // 2)[:, np.newaxis], axis=1)[:, 0]
+    high = np.take_along_axis(values, (last * percentile // 100).astype(np.intp)[:, np.newaxis], axis=1)[:, 0]
+
+    stats['median'] = np.where(num_valid > 0, median, np.nan)
+    stats['percentile'] = np.where(num_valid > 0, high, np.nan)
+    if valid_mask is not None:
+        num_valid = (valid & valid_mask[rows, cols].reshape(len(boxes), -1)).sum(axis=1)
+    stats['valid_fraction'] = num_valid / float(values.shape[1])
+    return stats
+
+
+def get_heights(stats, arm_offset, min_valid_fraction=MIN_VALID_FRACTION):
+    """
+    Turn box height statistics into pick heights
+    :param stats:               N array of ROI_STATS_DTYPE
+    :param arm_offset:          Height (m) added for the arm to pick correctly
+    :param min_valid_fraction:  Boxes with fewer valid depths than this are read as the desk
+    :return: N array of heights (meters) of the items above the desk plus the arm offset
+    """
+    readable = (stats['valid_fraction'] >= min_valid_fraction) & np.isfinite(stats['median'])
+    return arm_offset + np.where(readable, stats['median'], 0.0).astype(np.float64)
+
+
+def render_depth_map(depth_map, x=None, y=None, boxes=None):
+    """
+    Draw a depth map as a grayscale image, near is bright, holes are black
+    :param depth_map:   2D array of depths (meters)
+    :param x:           Column of the point to mark (None - no mark)
+    :param y:           Row of the point to mark
+    :param boxes:       Nx4 array of (left, top, right, bottom) to outline (None - no outlines)
+    :return: a 2D uint8 image
+    """
+    depth_map = np.asarray(depth_map, dtype=np.float32)
+    depth_map = np.where(np.isfinite(depth_map), depth_map, MAX_VISIBLE_DEPTH)
+    scale = 255.0 / (MAX_VISIBLE_DEPTH - MIN_VISIBLE_DEPTH)
+    image = ((MAX_VISIBLE_DEPTH - np.clip(depth_map, MIN_VISIBLE_DEPTH, MAX_VISIBLE_DEPTH)) * scale).astype(np.uint8)
+
+    # Mark the queried point with a black dot
+    if x is not None and y is not None:
+        row, col = int(round(y)), int(round(x))
+        image[max(row - MARK_RADIUS, 0):max(row + MARK_RADIUS + 1, 0),
+              max(col - MARK_RADIUS, 0):max(col + MARK_RADIUS + 1, 0)] = 0
+
+    if boxes is not None:
+        for left, top, right, bottom in np.round(np.asarray(boxes).reshape(-1, 4)).astype(int).tolist():
+            cv2.rectangle(image, (left, top), (right, bottom), 0)
+    return image
+
+
+class DepthAcquisitionThread(threading.Thread):
+
+    def __init__(self, grab, name='DepthAcquisition', accumulator=None):
+        """
+        Constructor
+        :param grab:        Function that waits for the next depth map and returns it as a new 2D array (meters),
+                            None if the grab failed
+        :param name:        Name of the thread
+        :param accumulator: DepthAccumulator every grab is fed to (None - cache the raw grabs)
+        """
+        super(DepthAcquisitionThread, self).__init__(name=name)
+        self.daemon = True
+
+        self._logger = logging.getLogger('GM_Pick_Point.' + self.__class__.__name__)
+        self._terminate_thread_event = threading.Event()
+        self._grab = grab
+        self._accumulator = accumulator
+
+        self._frame_condition = threading.Condition()   # Notified every time a new depth map is cached
+        self._depth_map = None
+        self._raw_depth_map = None                      # The grab the cached depth map was made from
+        self._valid_mask = None                         # None - not computed yet (no accumulator)
+        self._timestamp = None
+        self._num_frames = 0
+        self._num_failures = 0
+
+    def run(self):
+        """
+        Main thread function
+        """
+        try:
+            while not self._terminate_thread_event.is_set():
+                if self._num_frames % GRAB_TRACE_INTERVAL == 0:
+                    with TRACER.span('depth.grab', thread=self.name):
+                        depth_map = self._grab()
+                else:
+                    depth_map = self._grab()
+                timestamp = time.time()
+
+                if depth_map is None:
+                    self._num_failures += 1
+                    self._terminate_thread_event.wait(RETRY_INTERVAL)
+                    continue
+
+                raw_depth_map = depth_map
+                valid_mask = None
+                if self._accumulator is not None:
+                    depth_map, valid_mask = self._accumulator.update(depth_map)
+
+                with self._frame_condition:
+                    self._depth_map = depth_map
+                    self._raw_depth_map = raw_depth_map
+                    self._valid_mask = valid_mask
+                    self._timestamp = timestamp
+                    self._num_frames += 1
+                    self._frame_condition.notify_all()
+        except Exception:
+            self._logger.error('Unhandled Exception:\n%s', str(traceback.format_exc()))
+
+    def terminate_thread(self):
+        """
+        External facing method to request termination of this thread
+        """
+        self._terminate_thread_event.set()
+
+    def get_latest(self, max_age=None, timeout=ACQUISITION_TIMEOUT):
+        """
+        External facing function to get the latest depth map
+        :param max_age: Max seconds since the depth map was grabbed (None - any age), waits for a newer one
+        :param timeout: Max seconds to wait, an older depth map is returned if no newer one arrives in time
+        :return: (depth map, time.time() it was grabbed at), (None, None) if no depth map was grabbed yet
+        """
+        with self._frame_condition:
+            self._wait_for_depth_map(max_age, timeout)
+            return self._depth_map, self._timestamp
+
+    def get_latest_valid(self, max_age=None, timeout=ACQUISITION_TIMEOUT):
+        """
+        External facing function to get the latest depth map with its validity mask
+        :param max_age: Max seconds since the depth map was grabbed (None - any age), waits for a newer one
+        :param timeout: Max seconds to wait, an older depth map is returned if no newer one arrives in time
+        :return: (depth map, 2D bool array True for the measured depths, time.time() it was grabbed at),
+                 (None, None, None) if no depth map was grabbed yet
+        """
+        with self._frame_condition:
+            self._wait_for_depth_map(max_age, timeout)
+
+            # Without an accumulator the mask is only computed for the depth maps it is asked for
+            if self._depth_map is not None and self._valid_mask is None:
+                self._valid_mask = np.isfinite(self._depth_map)
+            return self._depth_map, self._valid_mask, self._timestamp
+
+    def _wait_for_depth_map(self, max_age, timeout):
+        """
+        Internal facing function to wait, holding the frame condition, for a depth map new enough
+        :param max_age: Max seconds since the depth map was grabbed (None - any age)
+        :param timeout: Max seconds to wait
+        """
+        deadline = time.time() + timeout
+        while self._depth_map is None or (max_age is not None and time.time() - self._timestamp > max_age):
+            remaining = deadline - time.time()
+            if remaining <= 0 or not self.is_alive():
+                if self._depth_map is not None:
+                    self._logger.warning('Using a depth map %0.3f s old', time.time() - self._timestamp)
+                break
+            self._frame_condition.wait(remaining)
+
+    def get_next(self, timeout=ACQUISITION_TIMEOUT, raw=False):
+        """
+        External facing function to wait for a depth map grabbed after the call
+        :param timeout: Max seconds to wait
+        :param raw:     True - the grab itself instead of the accumulator's estimate
+        :return: (depth map, time.time() it was grabbed at), (None, None) if none arrived in time
+        """
+        deadline = time.time() + timeout
+        with self._frame_condition:
+            num_frames = self._num_frames
+            while self._num_frames == num_frames:
+                remaining = deadline - time.time()
+                if remaining <= 0 or not self.is_alive():
+                    return None, None
+                self._frame_condition.wait(remaining)
+            return (self._raw_depth_map if raw else self._depth_map), self._timestamp
+
+    def get_num_frames(self):
+        """
+        :return: the number of depth maps grabbed
+        """
+        return self._num_frames
+
+    def get_num_failures(self):
+        """
+        :return: the number of failed grabs
+        """
+        return self._num_failures
+
+
+class DepthImageWriter(threading.Thread):
+
+    def __init__(self, image_dir, sample_interval=1):
+        """
+        Constructor
+        :param image_dir:       Directory the images are written to
+        :param sample_interval: Save one of every sample_interval depth maps submitted
+        """
+        super(DepthImageWriter, self).__init__(name='DepthImageWriter')
+        self.daemon = True
+
+        self._logger = logging.getLogger('GM_Pick_Point.' + self.__class__.__name__)
+        self._image_dir = image_dir
+        self._sample_interval = max(int(sample_interval), 1)
+        self._queue = queue.Queue(DEBUG_QUEUE_SIZE)
+
+        self._num_submitted = 0
+        self._num_written = 0
+        self._num_dropped = 0
+
+    def submit(self, depth_map, x=None, y=None, boxes=None):
+        """
+        External facing function to queue a depth map to be saved, it never blocks
+        :param depth_map:   2D array of depths (meters), must not be modified afterwards
+        :param x:           Column of the queried point
+        :param y:           Row of the queried point
+        :param boxes:       Nx4 array of the queried boxes
+        :return: True if the depth map was queued
+        """
+        index = self._num_submitted
+        self._num_submitted += 1
+        if index % self._sample_interval != 0:
+            return False
+
+        try:
+            self._queue.put_nowait((index, depth_map, x, y, boxes))
+            return True
+        except queue.Full:
+            self._num_dropped += 1
+            return False
+
+    def run(self):
+        """
+        Main thread function
+        """
+        try:
+            os.makedirs(self._image_dir, exist_ok=True)
+            while True:
+                entry = self._queue.get()
+                try:
+                    if entry is _STOP:
+                        break
+                    index, depth_map, x, y, boxes = entry
+                    path = os.path.join(self._image_dir, '%d.png' % index)
+                    if cv2.imwrite(path, render_depth_map(depth_map, x, y, boxes)):
+                        self._num_written += 1
+                    else:
+                        self._logger.warning('Could not write %s', path)
+                finally:
+                    self._queue.task_done()
+        except Exception:
+            self._logger.error('Unhandled Exception:\n%s', str(traceback.format_exc()))
+
+    def terminate_thread(self):
+        """
+        External facing method to request termination of this thread, queued images are written first
+        """
+        if self.is_alive():
+            self._queue.put(_STOP)
+
+    def flush(self):
+        """
+        External facing function to wait until every queued image is written
+        """
+        self._queue.join()
+
+    def get_num_written(self):
+        """
+        :return: the number of images written
+        """
+        return self._num_written
@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+"""
+--------------------------------------------------------------------
+Michigan  Technological University: Blue Marble Security Enterprise
+--------------------------------------------------------------------
+
+Per-pixel depth of the empty table
+
+The depth of the empty table is averaged over many frames, pixel by
+pixel, and saved as a .npy file. Heights are read against it instead of
+one desk depth for the whole table, so a tilted table or the lens'
+distortion of the depth does not show up as item height. The file is
+memory-mapped when loaded, only the pixels that are read are paged in.
+
+The same background gives a cheap check for anything on the table: the
+heights of a sparse grid of pixels are compared against OCCUPIED_HEIGHT.
+
+Usage (with the table empty):
+    python DepthBackground.py [NUM_FRAMES]
+
+DepthBackground.py
+Author: Blue Marble Security Enterprise
+Date Last Modified: 10/19/2026
+"""
+
+__author__ = 'Blue Marble Security Enterprise'
+__version__ = '1.0'
+
+import os
+import sys
+import logging
+
+import numpy as np
+
+BACKGROUND_FILE = os.path.join('calibration', 'depth_background.npy')   # Where the background is stored
+BACKGROUND_FRAMES = 30          # Depth maps averaged into a background
+MIN_COVERAGE = 0.5              # Pixels with a valid depth in fewer of the frames than this are filled
+OCCUPIED_HEIGHT = 0.01          # Height (m) above the background a pixel must be to count as occupied
+OCCUPIED_FRACTION = 0.002       # Part of the checked pixels that must be occupied for the table to be occupied
+OCCUPANCY_STRIDE = 4            # Every this many rows and columns are checked for occupancy
+
+
+class DepthBackground:
+    """
+    Per-pixel depth of the empty table
+    """
+
+    def __init__(self, depth_map):
+        """
+        Constructor
+        :param depth_map: 2D array of the empty table's depths (meters), without holes
+        """
+        self._logger = logging.getLogger('GM_Pick_Point.' + self.__class__.__name__)
+        self.depth_map = depth_map
+
+    @staticmethod
+    def build(depth_maps, fill_depth, min_coverage=MIN_COVERAGE):
+        """
+        Average depth maps of the empty table
+        :param depth_maps:      iterable of 2D arrays of depths (meters) of the same shape
+        :param fill_depth:      Depth (m) of the pixels without enough valid depths
+        :param min_coverage:    Pixels with a valid depth in fewer of the frames than this are filled
+        :return: a DepthBackground
+        """
+        total = None
+        count = None
+        num_frames = 0
+        for depth_map in depth_maps:
+            valid = np.isfinite(depth_map)
+            if total is None:
+                total = np.zeros(depth_map.shape, dtype=np.float64)
+                count = np.zeros(depth_map.shape, dtype=np.int32)
+            total += np.where(valid, depth_map, 0.0)
+            count += valid
+            num_frames += 1
+
+        if num_frames == 0:
+            raise ValueError('No depth maps to build a background from')
+
+        covered = count >= max(min_coverage * num_frames, 1)
+        background = np.where(covered, total / np.maximum(count, 1), fill_depth).astype(np.float32)
+        return DepthBackground(background)
+
+    @staticmethod
+    def load(path=BACKGROUND_FILE):
+        """
+        Load a background saved by save(), memory-mapped read only
+        :param path: .npy file to read
+        :return: a DepthBackground
+        """
+        return DepthBackground(np.load(path, mmap_mode='r'))
+
+    def save(self, path=BACKGROUND_FILE):
+        """
+        Save the background
+        :param path: .npy file to write
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        np.save(path, np.asarray(self.depth_map, dtype=np.float32))
+        self._logger.info('Saved %s depth background to %s', str(self.depth_map.shape), path)
+
+    @property
+    def shape(self):
+        """
+        Property decorated access function to get the rows and columns of the background
+
+        To Call: background.shape
+
+        :return: (rows, cols)
+        """
+        return self.depth_map.shape
+
+    def get_height_map(self, depth_map):
+        """
+        Get the height of every pixel above the empty table
+        :param depth_map: 2D array of depths (meters) of the same shape as the background
+        :return: 2D float32 array of heights (meters), NaN where the depth map has a hole
+        """
+        return np.subtract(self.depth_map, depth_map, dtype=np.float32)
+
+    def is_occupied(self, depth_map, min_height=OCCUPIED_HEIGHT, min_fraction=OCCUPIED_FRACTION,
+                    stride=OCCUPANCY_STRIDE):
+        """
+        Check if anything stands on the table
+        :param depth_map:       2D array of depths (meters) of the same shape as the background
+        :param min_height:      Height (m) above the background a pixel must be to count as occupied
+        :param min_fraction:    Part of the checked pixels that must be occupied for the table to be occupied
+        :param stride:          Every this many rows and columns are checked
+        :return: True if the table is occupied
+        """
+        heights = np.subtract(self.depth_map[::stride, ::stride], depth_map[::stride, ::stride], dtype=np.float32)
+        with np.errstate(invalid='ignore'):
+            num_occupied = np.count_nonzero(heights > min_height)
+        return num_occupied >= min_fraction * heights.size
+
+
+if __name__ == '__main__':
+    from ZEDMiniDriver import ZEDMiniDriver
+
+    logging.basicConfig(level=logging.INFO)
+
+    zed_driver = ZEDMiniDriver()
+    try:
+        zed_driver.capture_background(int(sys.argv[1]) if len(sys.argv) > 1 else BACKGROUND_FRAMES)
+    finally:
+        zed_driver.close()
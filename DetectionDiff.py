@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+"""
+--------------------------------------------------------------------
+Michigan  Technological University: Blue Marble Security Enterprise
+--------------------------------------------------------------------
+
+Matches the detections of two frames to find exactly which items
+appeared, disappeared or moved between them
+
+Detections are matched per class (so two identical items are two
+separate instances) by spatial proximity using a uniform grid, which
+keeps the matching close to linear in the number of detections.
+
+DetectionDiff.py
+Author: Blue Marble Security Enterprise
+Date Last Modified: 10/19/2026
+"""
+
+__author__ = 'Blue Marble Security Enterprise'
+__version__ = '1.0'
+
+import math
+from collections import defaultdict
+
+MATCH_RADIUS = 40               # Max distance (pixels) between two detections of the same item in consecutive frames
+JITTER_RADIUS = 8               # Max distance (pixels) a detection can wander without counting as moved
+
+
+class DetectionDiff:
+    """
+    Result of diffing two sets of detections
+    """
+
+    def __init__(self):
+        self.appeared = []          # Detections in the current frame only
+        self.disappeared = []       # Detections in the previous frame only
+        self.moved = []             # (previous, current) pairs of the same item that moved
+        self.unchanged = []         # (previous, current) pairs of the same item that stayed put
+
+    @property
+    def changed(self):
+        """
+        Property decorated access function to check if anything changed
+
+        To Call: diff.changed
+
+        :return: True if any item appeared, disappeared or moved
+        """
+        return len(self.appeared) > 0 or len(self.disappeared) > 0 or len(self.moved) > 0
+
+
+def diff_detections(previous, current, match_radius=MATCH_RADIUS, jitter_radius=JITTER_RADIUS):
+    """
+    Diff the detections of two frames
+    :param previous:        Detections (anything with class_id, x, and y) of the earlier frame
+    :param current:         Detections of the later frame
+    :param match_radius:    Max distance (pixels) between two detections of the same item
+    :param jitter_radius:   Max distance (pixels) an item can wander without counting as moved
+    :return: a DetectionDiff
+    """
+    result = DetectionDiff()
+
+    previous_by_class = _group_by_class(previous)
+    current_by_class = _group_by_class(current)
+
+    for class_id in set(previous_by_class) | set(current_by_class):
+        old_items = previous_by_class.get(class_id, [])
+        new_items = current_by_class.get(class_id, [])
+
+        # Pair up nearby instances, closest pairs first
+        pairs = _match_nearby(old_items, new_items, match_radius)
+        matched_old = set()
+        matched_new = set()
+        for distance, old_index, new_index in pairs:
+            matched_old.add(old_index)
+            matched_new.add(new_index)
+            pair = (old_items[old_index], new_items[new_index])
+            if distance <= jitter_radius:
+                result.unchanged.append(pair)
+            else:
+                result.moved.append(pair)
+
+        # Whatever is left over of a class either moved further than match_radius or really (dis)appeared.
+        # The per class counts decide which: only the surplus on each side appeared or disappeared.
+        old_left = [old_items[i] for i in range(len(old_items)) if i not in matched_old]
+        new_left = [new_items[i] for i in range(len(new_items)) if i not in matched_new]
+        far_pairs = sorted(((_distance(o, n), i, j) for i, o in enumerate(old_left) for j, n in enumerate(new_left)),
+                           key=lambda pair: pair[0])
+        for _, old_index, new_index in far_pairs:
+            if old_left[old_index] is None or new_left[new_index] is None:
+                continue
+            result.moved.append((old_left[old_index], new_left[new_index]))
+            old_left[old_index] = None
+            new_left[new_index] = None
+
+        result.disappeared.extend(item for item in old_left if item is not None)
+        result.appeared.extend(item for item in new_left if item is not None)
+
+    return result
+
+
+def _group_by_class(detections):
+    """
+    Group detections by class ID
+    :param detections: an iterable of detections
+    :return: dict of class_id -> list of detections
+    """
+    result = defaultdict(list)
+    for detection in detections:
+        result[detection.class_id].append(detection)
+    return result
+
+
+def _match_nearby(old_items, new_items, radius):
+    """
+    Greedily pair up detections that are within a radius of each other, closest pairs first
+    :param old_items:   list of detections of one class in the earlier frame
+    :param new_items:   list of detections of the same class in the later frame
+    :param radius:      max distance between the two detections of a pair
+    :return: a list of (distance, old index, new index)
+    """
+    if len(old_items) == 0 or len(new_items) == 0:
+        return []
+
+    # Bucket the new detections into a grid with radius sized cells so only the 3x3 neighbouring cells are searched
+    grid = defaultdict(list)
+    for new_index, item in enumerate(new_items):
+        grid[(int(item.x // radius), int(item.y // radius))].append(new_index)
+
+    candidates = []
+    for old_index, item in enumerate(old_items):
+        cell_x = int(item.x // radius)
+        cell_y = int(item.y // radius)
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for new_index in grid.get((cell_x + dx, cell_y + dy), ()):
+                    distance = _distance(item, new_items[new_index])
+                    if distance <= radius:
+                        candidates.append((distance, old_index, new_index))
+    candidates.sort(key=lambda pair: pair[0])
+
+    result = []
+    used_old = set()
+    used_new = set()
+    for distance, old_index, new_index in candidates:
+        if old_index in used_old or new_index in used_new:
+            continue
+        used_old.add(old_index)
+        used_new.add(new_index)
+        result.append((distance, old_index, new_index))
+    return result
+
+
+def _distance(a, b):
+    """
+    Euclidean distance between two detections
+    """
+    return math.hypot(a.x - b.x, a.y - b.y)
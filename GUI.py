@@ -70,7 +70,7 @@ class GUI(threading.Thread):
 
         except Exception:
             tb = traceback.format_exc()
-            self._logger.error('Unhandled Exception:\n%s' % str(tb))
+            self._logger.error('Unhandled Exception:\n%s', str(tb))
 
         finally:
             self._logger.debug('Destroying GUI...')
@@ -292,7 +292,7 @@ class GUI(threading.Thread):
         internal facing function to set the bin name field
         :param bin_new: the new name of the bin
         """
-        self._logger.debug('Setting bin to: ' + bin_new)
+        self._logger.debug('Setting bin to: %s', bin_new)
         self._bin.configure(text=bin_new)
 
     def _set_coordinates(self, x, y, z):
@@ -303,7 +303,7 @@ class GUI(threading.Thread):
         :param z: the z coord of the object
         """
         coords_new = "X: %s\nY: %s\nZ: %s" % (x, y, z)
-        self._logger.debug('Setting Coordinates: ' + coords_new)
+        self._logger.debug('Setting Coordinates: %s', coords_new)
         self._coord.configure(text=coords_new)
 
     def _update_log(self):
@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+"""
+--------------------------------------------------------------------
+Michigan  Technological University: Blue Marble Security Enterprise
+--------------------------------------------------------------------
+
+Windowless stand-in for the GUI thread, used for headless runs and the
+simulated cell. It stays alive until termination is requested, keeps the
+log messages it is sent and forwards them to the logger instead of Tk.
+
+HeadlessGUI.py
+Author: Blue Marble Security Enterprise
+Date Last Modified: 10/19/2026
+"""
+
+__author__ = 'Blue Marble Security Enterprise'
+__version__ = '1.0'
+
+import logging
+import threading
+
+MAX_LOG_LENGTH = 100
+
+
+class HeadlessGUI(threading.Thread):
+    """
+    GUI without a window
+    """
+
+    def __init__(self):
+        """
+        Constructor
+        """
+        super(HeadlessGUI, self).__init__()
+        self.daemon = True
+
+        self._logger = logging.getLogger('GM_Pick_Point.' + self.__class__.__name__)
+        self._terminate_event = threading.Event()
+        self._log_messages = []
+        self._log_request_lock = threading.Lock()
+        self.start()
+
+    def run(self):
+        self._terminate_event.wait()
+
+    def terminate_thread(self):
+        self._logger.debug('Termination Requested')
+        self._terminate_event.set()
+
+    def set_result(self, status, error='Unknown Error', item='None', placement='None', x=0, y=0, z=0):
+        self._logger.debug('Result: %s %s %s (%s, %s, %s)', status, item, placement, x, y, z)
+
+    def add_msg_to_log(self, msg):
+        self._logger.info(msg)
+        with self._log_request_lock:
+            if len(self._log_messages) == MAX_LOG_LENGTH:
+                self._log_messages.pop(0)
+            self._log_messages.append(msg)
+
+    def get_log(self):
+        with self._log_request_lock:
+            result = list(self._log_messages)
+        return result
@@ -6,15 +6,39 @@ Michigan  Technological University: Blue Marble Security Enterprise
 
 Item.py
 Author: Shaun Flynn
-Date Last Modified: 4/23/2019
+Date Last Modified: 10/19/2026
 """
 
 __author__ = 'Blue Marble Security Enterprise'
 __version__ = '1.0'
 
+from collections import namedtuple
+
+import numpy as np
+
+LABEL_MAP_BY_NAME = dict(bird_eye=1, bird_mouth=2, bird_wing=3, bird_body=4, bird_seeds=5, cat_eyes=6, cat_mouth=7,
+                         cat_body=8, cat_ear=9, cat_food=10, dog_ear=11, dog_eyes=12, dog_mouth=13, dog_body=14,
+                         dog_tail=15, dog_food=16)
+LABEL_MAP_BY_ID = dict((value, key) for key, value in LABEL_MAP_BY_NAME.items())
+
+# Animal (bird, cat, dog) each class belongs to
+FAMILY_BY_ID = dict((key, value.split('_')[0]) for key, value in LABEL_MAP_BY_ID.items())
+
+# Layout of one detection in a DetectionBatch
+DETECTION_DTYPE = np.dtype([('class_id', np.int16),
+                            ('x', np.int32),
+                            ('y', np.int32),
+                            ('rot', np.uint8),
+                            ('score', np.float32),
+                            ('bbox', np.float32, (4,))])        # left, top, right, bottom in pixels
+
+NOMINAL_BOX_SIZE = 60.0         # Width and height (pixels) of the box given to a detection that has no box of its own
+
 
 class Item:
-    def __init__(self, item_type, placement=None, x=None, y=None, z=None, rot=None):
+    __slots__ = ('item_type', 'class_id', 'placement', 'x', 'y', 'z', 'rot', 'item_id')
+
+    def __init__(self, item_type, placement=None, x=None, y=None, z=None, rot=None, item_id=None):
         """
         Constructor
         :param item_type: A string containing a SQL compatible name fo the item
@@ -22,13 +46,16 @@ class Item:
         :param x: The current X coord
         :param y: The current Y coord
         :param z: The current Z coord
+        :param item_id: The ID of the item's row in the database
         """
         self.item_type = item_type
+        self.class_id = LABEL_MAP_BY_NAME.get(item_type)
         self.placement = placement
         self.x = x
         self.y = y
         self.z = z
         self.rot = rot
+        self.item_id = item_id
 
     @property
     def tuple(self):
@@ -40,3 +67,170 @@ class Item:
         :return: a tuple version of the class
         """
         return self.item_type, self.placement, self.x, self.y, self.z, self.rot
+
+
+class Detection(namedtuple('Detection', ['class_id', 'x', 'y', 'z', 'rot', 'score'])):
+    """
+    Immutable record of one detected object
+
+    Detections are never modified once created so they can be shared between threads without copying.
+    """
+    __slots__ = ()
+
+    def __new__(cls, class_id, x, y, z=0, rot=0, score=1.0):
+        """
+        Constructor
+        :param class_id:    Integer class ID (see LABEL_MAP_BY_ID)
+        :param x:           X coord of the center of the object (pixels)
+        :param y:           Y coord of the center of the object (pixels)
+        :param z:           Z coord of the object
+        :param rot:         1 - the object is wider than it is tall, 0 otherwise
+        :param score:       Detection confidence [0 - 1]
+        """
+        return super(Detection, cls).__new__(cls, class_id, x, y, z, rot, score)
+
+    @staticmethod
+    def from_name(item_type, x, y, z=0, rot=0, score=1.0):
+        """
+        Create a Detection from a class name
+        :param item_type: the class name (see LABEL_MAP_BY_NAME)
+        :return: a Detection
+        """
+        return Detection(LABEL_MAP_BY_NAME[item_type], x, y, z, rot, score)
+
+    @property
+    def item_type(self):
+        """
+        Property decorated access function to get the class name
+
+        To Call: detection.item_type
+
+        :return: the class name
+        """
+        return LABEL_MAP_BY_ID[self.class_id]
+
+    @property
+    def family(self):
+        """
+        Property decorated access function to get the animal the class belongs to
+
+        To Call: detection.family
+
+        :return: 'bird', 'cat' or 'dog'
+        """
+        return FAMILY_BY_ID[self.class_id]
+
+    @property
+    def placement(self):
+        """
+        Detections have no destination, kept for compatibility with Item
+        """
+        return None
+
+
+class DetectionBatch:
+    """
+    Every detection of one frame backed by a single read only NumPy structured array
+
+    The batch keeps its own copy of the array, which is never modified after construction, so a batch is handed
+    between threads by reference.
+    """
+    __slots__ = ('array', 'frame_id', 'timestamp', '_detections')
+
+    def __init__(self, array, frame_id=0, timestamp=0.0):
+        """
+        Constructor
+        :param array:       A structured array with dtype DETECTION_DTYPE, copied so the caller's stays writable
+        :param frame_id:    Number of the frame the detections came from
+        :param timestamp:   time.time() the frame was captured at
+        """
+        array = np.array(array, dtype=DETECTION_DTYPE)
+        array.flags.writeable = False
+        self.array = array
+        self.frame_id = frame_id
+        self.timestamp = timestamp
+        self._detections = None
+
+    @staticmethod
+    def empty(frame_id=0, timestamp=0.0):
+        """
+        :return: a DetectionBatch without detections
+        """
+        return DetectionBatch(np.zeros(0, dtype=DETECTION_DTYPE), frame_id, timestamp)
+
+    @staticmethod
+    def from_detections(detections, frame_id=0, timestamp=0.0):
+        """
+        Build a batch from Detections (or anything with class_id, x, y, rot, and score)
+        :param detections: an iterable of Detections, one with a bbox (left, top, right, bottom) keeps it, the
+                           others get a NOMINAL_BOX_SIZE box around their center
+        :return: a DetectionBatch
+        """
+        detections = list(detections)
+        array = np.zeros(len(detections), dtype=DETECTION_DTYPE)
+        half_size = NOMINAL_BOX_SIZE / 2
+        for index, detection in enumerate(detections):
+            bbox = getattr(detection, 'bbox', None)
+            if bbox is None:
+                bbox = (detection.x - half_size, detection.y - half_size,
+                        detection.x + half_size, detection.y + half_size)
+            array[index] = (detection.class_id, detection.x, detection.y, detection.rot or 0,
+                            getattr(detection, 'score', 1.0), bbox)
+        return DetectionBatch(array, frame_id, timestamp)
+
+    def __len__(self):
+        return len(self.array)
+
+    def __iter__(self):
+        return iter(self.detections)
+
+    @property
+    def detections(self):
+        """
+        Property decorated access function to get the batch as a tuple of Detections (built once, on first use)
+
+        To Call: batch.detections
+
+        :return: a tuple of Detections
+        """
+        if self._detections is None:
+            self._detections = tuple(Detection(int(row['class_id']), int(row['x']), int(row['y']), 0,
+                                               int(row['rot']), float(row['score'])) for row in self.array)
+        return self._detections
+
+    def get_item_types(self):
+        """
+        :return: a frozenset of the class names of every detection in the batch
+        """
+        return frozenset(LABEL_MAP_BY_ID[class_id] for class_id in np.unique(self.array['class_id']).tolist()
+                         if class_id in LABEL_MAP_BY_ID)
+
+    @property
+    def positions(self):
+        """
+        Property decorated access function to get the centers of every detection
+
+        To Call: batch.positions
+
+        :return: Nx2 float array of (x, y) pixel coords
+        """
+        return np.column_stack([self.array['x'], self.array['y']]).astype(np.float64)
+
+    @property
+    def class_ids(self):
+        """
+        Property decorated access function to get the class ID of every detection
+
+        To Call: batch.class_ids
+
+        :return: N array of class IDs
+        """
+        return self.array['class_id']
+
+    def select(self, mask):
+        """
+        Get a sub-batch
+        :param mask: boolean mask or index array into the batch
+        :return: a new DetectionBatch of the same frame
+        """
+        return DetectionBatch(self.array[mask], self.frame_id, self.timestamp)
@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+"""
+--------------------------------------------------------------------
+Michigan  Technological University: Blue Marble Security Enterprise
+--------------------------------------------------------------------
+
+Assigns the items visible on the table to the pending items of every
+claimable job at once, instead of only looking for the first requested
+item of one job.
+
+Every (pending item, detection) pair of the same class that the arm can
+reach gets a cost:
+    TRAVEL_WEIGHT * distance from the arm to the detection
+    - PRIORITY_WEIGHT * priority of the job
+    + RANK_WEIGHT * place of the item in the schedule
+    - CONFIDENCE_WEIGHT * detection score
+and the assignment with the lowest total cost, each pending item and
+each detection used at most once, is found as a bipartite matching with
+scipy.optimize.linear_sum_assignment.
+
+The matched detections are the ones the pick loop plans. Picks are
+planned from a later frame than the claim, so select() finds the
+detection of every claimed item again: the nearest one of its class to
+where it was matched.
+
+ItemMatcher.py
+Author: Blue Marble Security Enterprise
+Date Last Modified: 10/19/2026
+"""
+
+__author__ = 'Blue Marble Security Enterprise'
+__version__ = '1.0'
+
+import logging
+
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
+from Item import LABEL_MAP_BY_NAME
+
+TRAVEL_WEIGHT = 1.0             # Cost per meter the arm travels to the item
+PRIORITY_WEIGHT = 1.0           # Cost removed per priority level of the item's job
+RANK_WEIGHT = 0.05              # Cost per place further back in the schedule
+CONFIDENCE_WEIGHT = 0.5         # Cost removed per unit of detection confidence
+INFEASIBLE = 1e9                # Cost of a pair that can not be picked (wrong class or out of reach)
+
+
+class ItemMatcher:
+
+    def __init__(self, travel_weight=TRAVEL_WEIGHT, priority_weight=PRIORITY_WEIGHT, rank_weight=RANK_WEIGHT,
+                 confidence_weight=CONFIDENCE_WEIGHT):
+        """
+        Constructor
+        :param travel_weight:       Cost per meter the arm travels to the item
+        :param priority_weight:     Cost removed per priority level of the item's job
+        :param rank_weight:         Cost per place further back in the schedule
+        :param confidence_weight:   Cost removed per unit of detection confidence
+        """
+        self._logger = logging.getLogger('GM_Pick_Point.' + self.__class__.__name__)
+        self._travel_weight = travel_weight
+        self._priority_weight = priority_weight
+        self._rank_weight = rank_weight
+        self._confidence_weight = confidence_weight
+
+    def get_costs(self, pending_items, batch, pick_points, reachable, arm_position):
+        """
+        Build the cost of every (pending item, detection) pair
+        :param pending_items:   (item id, name, destination, job id, job name, priority) rows in schedule order
+        :param batch:           The DetectionBatch of the table
+        :param pick_points:     Nx2 (x, y) of every detection in the arm's frame
+        :param reachable:       N bool, True for the detections the arm can reach
+        :param arm_position:    (x, y) of the arm
+        :return: a len(pending_items) x len(batch) array, INFEASIBLE for pairs that can not be picked
+        """
+        class_ids = np.array([LABEL_MAP_BY_NAME.get(row[1], -1) for row in pending_items])
+        priorities = np.array([row[5] for row in pending_items], dtype=np.float64)
+        ranks = np.arange(len(pending_items), dtype=np.float64)
+
+        pick_points = np.asarray(pick_points, dtype=np.float64).reshape(-1, 2)
+        travel = np.hypot(pick_points[:, 0] - arm_position[0], pick_points[:, 1] - arm_position[1])
+        scores = batch.array['score'].astype(np.float64)
+
+        costs = (self._travel_weight * travel - self._confidence_weight * scores)[np.newaxis, :] + \
+            (self._rank_weight * ranks - self._priority_weight * priorities)[:, np.newaxis]
+        feasible = (class_ids[:, np.newaxis] == batch.array['class_id'][np.newaxis, :]) & \
+            np.asarray(reachable, dtype=bool)[np.newaxis, :]
+        return np.where(feasible, costs, INFEASIBLE)
+
+    def match(self, pending_items, batch, pick_points, reachable, arm_position):
+        """
+        Find the lowest cost assignment of detections to pending items
+        :param pending_items:   (item id, name, destination, job id, job name, priority) rows in schedule order
+        :param batch:           The DetectionBatch of the table
+        :param pick_points:     Nx2 (x, y) of every detection in the arm's frame
+        :param reachable:       N bool, True for the detections the arm can reach
+        :param arm_position:    (x, y) of the arm
+        :return: a list of (pending item row, detection index), most urgent pending item first
+        """
+        if len(pending_items) == 0 or len(batch) == 0:
+            return []
+
+        costs = self.get_costs(pending_items, batch, pick_points, reachable, arm_position)
+        rows, cols = linear_sum_assignment(costs)
+        matches = [(pending_items[row], int(col)) for row, col in zip(rows, cols) if costs[row, col] < INFEASIBLE]
+        self._logger.debug('Matched %d of %d pending items to %d detections',
+                           len(matches), len(pending_items), len(batch))
+        return matches
+
+    @staticmethod
+    def select(requested_items, batch, reachable):
+        """
+        Find the detections that serve the claimed items in a frame, each detection used at most once
+        :param requested_items: Items claimed in schedule order, with the (x, y) camera pixels of the detection they
+                                were matched to (None - claimed without a match, any detection of the class serves)
+        :param batch:           The DetectionBatch of the frame
+        :param reachable:       N bool, True for the detections the arm can reach
+        :return: a list of (requested item, detection index), requested items without a detection are left out
+        """
+        available = np.asarray(reachable, dtype=bool).copy()
+        positions = batch.positions
+        class_ids = batch.array['class_id']
+
+        selected = []
+        for requested_item in requested_items:
+            candidates = np.flatnonzero(available & (class_ids == requested_item.class_id))
+            if len(candidates) == 0:
+                continue
+            index = candidates[0]
+            if requested_item.x is not None:
+                offsets = positions[candidates] - (requested_item.x, requested_item.y)
+                index = candidates[np.argmin(np.hypot(offsets[:, 0], offsets[:, 1]))]
+            available[index] = False
+            selected.append((requested_item, int(index)))
+        return selected
@@ -23,14 +23,14 @@ import cv2
 import numpy as np
 import copy
 
-from Item import Item
+from Item import DetectionBatch, DETECTION_DTYPE, LABEL_MAP_BY_NAME, LABEL_MAP_BY_ID
 
 FONT = cv2.FONT_HERSHEY_SIMPLEX
-LABEL_MAP_BY_NAME = dict(bird_eye=1, bird_mouth=2, bird_wing=3, bird_body=4, bird_seeds=5, cat_eyes=6, cat_mouth=7,
-                         cat_body=8, cat_ear=9, cat_food=10, dog_ear=11, dog_eyes=12, dog_mouth=13, dog_body=14,
-                         dog_tail=15, dog_food=16)
-LABEL_MAP_BY_ID = dict((value, key) for key, value in LABEL_MAP_BY_NAME.items())
 MIN_SCORE = 0.5
+IMAGE_ROWS = 1024               # Size of the full resolution FLIR image detections are reported in
+IMAGE_COLS = 1280
+
+_logger = logging.getLogger('GM_Pick_Point.Network')
 
 
 class Network:
@@ -152,40 +152,44 @@ class Network:
 
     @staticmethod
     def get_item_locations(network_output):
+        """
+        Get every detected object above MIN_SCORE
+        :param network_output: The output of the NN
+        :return: A tuple of Detections
+        """
+        return Network.get_detection_batch(network_output).detections
 
-        result = []
+    @staticmethod
+    def get_detection_batch(network_output, frame_id=0, timestamp=0.0):
+        """
+        Get every detected object above MIN_SCORE as one DetectionBatch
+        :param network_output:  The output of the NN
+        :param frame_id:        Number of the frame that was processed
+        :param timestamp:       time.time() the frame was captured at
+        :return: A DetectionBatch
+        """
         num_detections = int(network_output[0][0])
-
-        rows = 1024
-        cols = 1280
-
-        for i in range(num_detections):
-            class_id = int(network_output[3][0][i])
-            score = float(network_output[1][0][i])
-            bbox = [float(v) for v in network_output[2][0][i]]
-
-            if score >= MIN_SCORE:
-                class_name = LABEL_MAP_BY_ID[class_id]
-
-                new_x = bbox[1] * cols
-                new_y = bbox[0] * rows
-                right = bbox[3] * cols
-                bottom = bbox[2] * rows
-
-                length = right - new_x
-                height = bottom - new_y
-
-                # Rotation will be 1
-                if (length > height):
-                    rot = 1
-
-                else:
-                    rot = 0
-
-                x = int((int(new_x) + int(right)) / 2)
-                y = int((int(new_y) + int(bottom)) / 2)
-                result.append(Item(class_name, x=x, y=y, rot=rot))
-        return result
+        scores = np.asarray(network_output[1][0][:num_detections], dtype=np.float32)
+        boxes = np.asarray(network_output[2][0][:num_detections], dtype=np.float32).reshape(-1, 4)
+        class_ids = np.asarray(network_output[3][0][:num_detections]).astype(np.int16)
+
+        keep = scores >= MIN_SCORE
+        scores, boxes, class_ids = scores[keep], boxes[keep], class_ids[keep]
+
+        # Boxes are [top, left, bottom, right] as a fraction of the image
+        left = boxes[:, 1] * IMAGE_COLS
+        top = boxes[:, 0] * IMAGE_ROWS
+        right = boxes[:, 3] * IMAGE_COLS
+        bottom = boxes[:, 2] * IMAGE_ROWS
+
+        array = np.zeros(len(scores), dtype=DETECTION_DTYPE)
+        array['class_id'] = class_ids
+        array['x'] = (np.trunc(left) + np.trunc(right)) // 2
+        array['y'] = (np.trunc(top) + np.trunc(bottom)) // 2
+        array['rot'] = (right - left) > (bottom - top)          # Rotation will be 1 when wider than tall
+        array['score'] = scores
+        array['bbox'] = np.column_stack([left, top, right, bottom])
+        return DetectionBatch(array, frame_id, timestamp)
 
     @staticmethod
     def visualize_output(img, network_output, label="ALL", max_labels=float('inf'),
@@ -202,7 +206,7 @@ class Network:
         """
         rows = img.shape[0]
         cols = img.shape[1]
-        print("Rows: {} Cols: {}".format(rows, cols))
+        _logger.debug('Rows: %d Cols: %d', rows, cols)
         result_img = copy.deepcopy(img)
         num_detections = int(network_output[0][0])
         display_all = label == "ALL"
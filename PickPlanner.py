@@ -0,0 +1,154 @@
+#!/usr/bin/env python
+"""
+--------------------------------------------------------------------
+Michigan  Technological University: Blue Marble Security Enterprise
+--------------------------------------------------------------------
+
+Orders every reachable item of a detection snapshot so the arm travels
+as little as possible between picks and drop-offs
+
+PickPlanner.py
+Author: Blue Marble Security Enterprise
+Date Last Modified: 10/19/2026
+"""
+
+__author__ = 'Blue Marble Security Enterprise'
+__version__ = '1.0'
+
+import math
+import logging
+
+MAX_TWO_OPT_PASSES = 10         # Upper bound on 2-opt improvement sweeps over a plan
+
+
+class PlannedPick:
+    """
+    A single entry of a pick plan
+    """
+
+    def __init__(self, item, pick_position, drop_off, drop_off_name, depth_position=None, height=None):
+        """
+        Constructor
+        :param item:            The detected Item to pick
+        :param pick_position:   (x, y) of the item in the arm's frame
+        :param drop_off:        The full drop off pose [x, y, z, roll, pitch, yaw]
+        :param drop_off_name:   The name of the drop off location (key into the sorting coords)
+        :param depth_position:  (x, y) of the item in the depth sensor's image
+        :param height:          Height (m) for the arm to pick the item at (None - ask the depth sensor at pick time)
+        """
+        self.item = item
+        self.pick_position = pick_position
+        self.drop_off = drop_off
+        self.drop_off_name = drop_off_name
+        self.depth_position = depth_position
+        self.height = height
+
+    @property
+    def drop_position(self):
+        """
+        Property decorated access function to get the (x, y) of the drop off
+
+        To Call: planned_pick.drop_position
+
+        :return: (x, y) of the drop off in the arm's frame
+        """
+        return self.drop_off[0], self.drop_off[1]
+
+
+class PickPlanner:
+    """
+    Travel minimizing pick sequencer
+
+    A pick moves the arm from wherever it is to the item and then on to the item's drop off. The
+    pick -> drop off leg is fixed for every item, so the order only changes the drop off -> next pick
+    legs. The plan is built with a nearest neighbour pass and then improved with 2-opt.
+    """
+
+    def __init__(self, use_two_opt=True):
+        """
+        Constructor
+        :param use_two_opt: True - refine the nearest neighbour plan with 2-opt, False - nearest neighbour only
+        """
+        self._logger = logging.getLogger('GM_Pick_Point.' + self.__class__.__name__)
+        self._use_two_opt = use_two_opt
+
+    def plan(self, candidates, start_position):
+        """
+        Order a list of candidate picks
+        :param candidates:      A list of PlannedPicks (in any order)
+        :param start_position:  (x, y) of the arm before the first pick
+        :return: a new list of PlannedPicks in the order they should be executed
+        """
+        if len(candidates) < 2:
+            return list(candidates)
+
+        order = self._nearest_neighbour(candidates, start_position)
+        if self._use_two_opt:
+            order = self._two_opt(order, start_position)
+
+        self._logger.debug('Planned %d picks, travel: %0.3f',
+                           len(order), self.get_travel(order, start_position))
+        return order
+
+    @staticmethod
+    def get_travel(order, start_position):
+        """
+        Get the total distance the arm travels to execute a plan
+        :param order:           A list of PlannedPicks
+        :param start_position:  (x, y) of the arm before the first pick
+        :return: the total travel distance
+        """
+        travel = 0.0
+        position = start_position
+        for planned_pick in order:
+            travel += _distance(position, planned_pick.pick_position)
+            travel += _distance(planned_pick.pick_position, planned_pick.drop_position)
+            position = planned_pick.drop_position
+        return travel
+
+    @staticmethod
+    def _nearest_neighbour(candidates, start_position):
+        """
+        Internal facing function to build a greedy plan
+        :param candidates:      A list of PlannedPicks
+        :param start_position:  (x, y) of the arm before the first pick
+        :return: a list of PlannedPicks
+        """
+        remaining = list(candidates)
+        order = []
+        position = start_position
+        while remaining:
+            next_pick = min(remaining, key=lambda p: _distance(position, p.pick_position))
+            remaining.remove(next_pick)
+            order.append(next_pick)
+            position = next_pick.drop_position
+        return order
+
+    def _two_opt(self, order, start_position):
+        """
+        Internal facing function to improve a plan by reversing sub-sequences while that shortens it
+        :param order:           A list of PlannedPicks
+        :param start_position:  (x, y) of the arm before the first pick
+        :return: a list of PlannedPicks
+        """
+        best_travel = self.get_travel(order, start_position)
+        for _ in range(MAX_TWO_OPT_PASSES):
+            improved = False
+            for i in range(len(order) - 1):
+                for j in range(i + 1, len(order)):
+                    candidate = order[:i] + order[i:j + 1][::-1] + order[j + 1:]
+                    travel = self.get_travel(candidate, start_position)
+                    if travel < best_travel - 1e-9:
+                        order = candidate
+                        best_travel = travel
+                        improved = True
+            if not improved:
+                break
+        return order
+
+
+def _distance(a, b):
+    """
+    Euclidean distance between two (x, y) points
+    """
+    return math.hypot(a[0] - b[0], a[1] - b[1])
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+"""
+--------------------------------------------------------------------
+Michigan  Technological University: Blue Marble Security Enterprise
+--------------------------------------------------------------------
+
+Logging filter that lets through at most a burst of each message per
+interval so diagnostics logged every frame or every pick can not flood
+the console or the log file. Messages are told apart by logger, level
+and unformatted message, so log with lazy arguments:
+    logger.debug('Arm x: %s', x)        (not 'Arm x: %s' % x)
+
+The first message let through after a quiet period reports how many
+were dropped. Once an interval the budgets of messages that were not
+logged for a whole interval are forgotten, a budget that dropped
+messages is kept one interval longer to report them.
+
+RateLimitFilter.py
+Author: Blue Marble Security Enterprise
+Date Last Modified: 10/19/2026
+"""
+
+__author__ = 'Blue Marble Security Enterprise'
+__version__ = '1.0'
+
+import time
+import logging
+import threading
+
+RATE_LIMIT_INTERVAL = 10.0      # Seconds each message's budget covers
+RATE_LIMIT_BURST = 5            # Messages of one kind let through per interval
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Per message rate limit for handlers
+    """
+
+    def __init__(self, interval=RATE_LIMIT_INTERVAL, burst=RATE_LIMIT_BURST, max_level=logging.INFO):
+        """
+        Constructor
+        :param interval:    Seconds each message's budget covers
+        :param burst:       Messages of one kind let through per interval
+        :param max_level:   Messages above this level (warnings and errors by default) are never limited
+        """
+        super(RateLimitFilter, self).__init__()
+        self._interval = interval
+        self._burst = burst
+        self._max_level = max_level
+        self._lock = threading.Lock()
+        self._budgets = dict()          # (logger, level, message) -> [interval start, messages let through, dropped]
+        self._next_prune = 0.0          # record.created time of the next sweep of expired budgets
+
+    def filter(self, record):
+        """
+        :param record: a LogRecord
+        :return: True to let the record through, False to drop it
+        """
+        if record.levelno > self._max_level:
+            return True
+
+        # One filter can be shared by several handlers, each record is only counted once
+        decision = getattr(record, 'rate_limit_passed', None)
+        if decision is not None:
+            return decision
+
+        key = (record.name, record.levelno, record.msg)
+        with self._lock:
+            if record.created >= self._next_prune:
+                self._prune(record.created)
+
+            budget = self._budgets.get(key)
+            if budget is None or record.created - budget[0] >= self._interval:
+                dropped = 0 if budget is None else budget[2]
+                self._budgets[key] = [record.created, 1, 0]
+                if dropped:
+                    record.msg = '%s (%d similar messages suppressed)' % (record.msg, dropped)
+                decision = True
+
+            elif budget[1] < self._burst:
+                budget[1] += 1
+                decision = True
+
+            else:
+                budget[2] += 1
+                decision = False
+
+        record.rate_limit_passed = decision
+        return decision
+
+    def _prune(self, now):
+        """
+        Internal facing function to forget the expired budgets, the caller holds the lock
+        :param now: record.created time of the record being filtered
+        """
+        for key, budget in list(self._budgets.items()):
+            idle = now - budget[0]
+            if idle >= 2 * self._interval or (idle >= self._interval and budget[2] == 0):
+                del self._budgets[key]
+        self._next_prune = now + self._interval
+
+    def get_dropped(self):
+        """
+        :return: the number of messages dropped in the current intervals
+        """
+        with self._lock:
+            result = sum(budget[2] for budget in self._budgets.values())
+        return result
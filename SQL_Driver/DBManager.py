@@ -4,29 +4,65 @@
 Michigan  Technological University: Blue Marble Security Enterprise
 --------------------------------------------------------------------
 
-methods for managing SQLite database tables and rows
+methods for managing SQLite database jobs and items
 This is for internal use only to make it easier to edit and
-view tables.  Some database management may require you to go into the
+view jobs.  Some database management may require you to go into the
 terminal and work from there.  The sqlite database file is "pickpoint.db"
 
+Run from the repository root:
+    python -m SQL_Driver.DBManager
+    python -m SQL_Driver.DBManager --import jobs.csv more_jobs.json conditions.txt
+
+Job files are imported in a single transaction. Supported formats:
+    .csv    header row, then one row per item:
+                job,name,destination,quantity,priority,deadline
+            destination, quantity (default 1), priority (default 0) and
+            deadline may be left out
+    .json   a list of jobs (or {"jobs": [...]}):
+                [{"name": "cat", "priority": 1, "deadline": "2026-10-20 08:00",
+                  "items": [{"name": "cat_ear", "destination": "Cat Bin",
+                             "quantity": 2}]}]
+    other   the output of test_cond_generator.py, one job per file named
+            after the file, one "piece quadrant rotation" line per item
+A deadline is time.time() seconds or a local "YYYY-MM-DD HH:MM[:SS]".
+Item names must be class names of the detector (Item.LABEL_MAP_BY_NAME),
+a file with an unknown name is not imported. Importing a job that
+already exists adds its items, takes the new priority and deadline and
+reopens the job.
+
 DBManager.py
 Author: careyes1 [GitHub]
-Date Last Modified 4/23/2019
+Date Last Modified 10/19/2026
 """
 
 __author__ = 'Blue Marble Security Enterprise'
 __version__ = '1.0'
 
+import os
+import csv
+import sys
+import json
+import time
+import argparse
+import datetime
 import sqlite3
+from collections import OrderedDict
+
+from Item import LABEL_MAP_BY_NAME
+from SQL_Driver import Schema
+from SQL_Driver.Schema import STATUS_INCOMPLETE
+from SQL_Driver.ObjectDB import DB_FILE
 
 
-def connect():
+def connect(db_file=DB_FILE):
     """
-    Connects to the pickpoint.db file
+    Connects to the pickpoint.db file and migrates it to the latest schema
+    :param db_file: path to the database file
     :return: connection to DB
     """
     try:
-        connection = sqlite3.connect("pickpoint.db")
+        connection = sqlite3.connect(db_file)
+        Schema.migrate(connection)
         return connection
     except sqlite3.Error as e:
         print(e)
@@ -34,53 +70,75 @@ def connect():
     return None
 
 
+def get_job_id(conn, table):
+    """
+    Looks up a job by name
+    :param conn: connection to database
+           table: name of job
+    :return: the job's ID or None if there is no such job
+    """
+    row = conn.execute("select id from jobs where name = ?", (table,)).fetchone()
+    if row is None:
+        print("No job named", table)
+        return None
+    return row[0]
+
+
 def create_table(conn, table):
     """
-    Creates a table for a particular job
+    Creates a job
     :param conn: connection to database
-           table: name of table
+           table: name of job
     :return: N/A
     """
-    c = conn.cursor()
     try:
-        c.execute("""create table {0}(id integer primary key autoincrement, 
-        name varchar(20), destination varchar(20))""".format(table))
-        conn.commit()
-        print("Table ", table, " created")
+        with conn:
+            conn.execute("insert into jobs(name) values(?)", (table,))
+        print("Job ", table, " created")
     except sqlite3.Error as e:
-        print("Table creation failed:\n", e)
+        print("Job creation failed:\n", e)
 
 
 def insert_object(conn, name, destination, table, count):
     """
-    Inserts a type of object into a job table in the database.
-    Can insert multiple of the same part/destination
+    Inserts a type of object into a job in the database and reopens the job.
+    Can insert multiple of the same part/destination, stored as the item's quantity
     :param conn: connection to database
-           name: name of the part
+           name: name of the part, a class name of the detector
            destination: location where part is to be placed
-           table: name of table
+           table: name of job
            count: quantity to be inserted
     :return: N/A
     """
+    if name not in LABEL_MAP_BY_NAME:
+        print(name, "is not an item\n")
+        return
     try:
-        for i in range(count):
-            conn.execute("insert into {0} values(null, '{1}', '{2}')".format(table, name, destination))
-        conn.commit()
+        job_id = get_job_id(conn, table)
+        if job_id is None:
+            return
+        with conn:
+            conn.execute("insert into job_items(job_id, name, destination, quantity) values(?, ?, ?, ?)",
+                         (job_id, name, destination, count))
+            conn.execute("update jobs set status = ? where id = ?", (STATUS_INCOMPLETE, job_id))
     except sqlite3.Error as e:
         print(e, "\n")
 
 
 def select(conn, table):
     """
-    View all contents in table
+    View all items of a job
     :param conn: connection to database
-           table: name of table
+           table: name of job
     :return: N/A
     """
     try:
-        table = conn.execute("Select * from {0}".format(table)).fetchall()
+        table = conn.execute("select job_items.id, job_items.name, job_items.destination, job_items.quantity, "
+                             "job_items.picked, job_items.status "
+                             "from job_items join jobs on jobs.id = job_items.job_id "
+                             "where jobs.name = ? order by job_items.id", (table,)).fetchall()
         if len(table) == 0:
-            print("No objects in table\n")
+            print("No objects in job\n")
             return
         for row in table:
             print(row)
@@ -90,39 +148,161 @@ def select(conn, table):
 
 def delete_row(conn, id, table):
     """
-    Deletes a row in table by row ID
+    Deletes an item of a job by item ID
     :param conn: connection to database
-           id: row ID
-           table: name of table
+           id: item ID
+           table: name of job
     :return: N/A
     """
     try:
-        item = conn.execute("select * from {0} where id = {1}".format(table, id)).fetchone()
-        conn.execute("delete from {0} where id = {1}".format(table, id))
-        conn.commit()
+        job_id = get_job_id(conn, table)
+        if job_id is None:
+            return
+        item = conn.execute("select * from job_items where id = ? and job_id = ?", (id, job_id)).fetchone()
+        with conn:
+            conn.execute("delete from job_items where id = ? and job_id = ?", (id, job_id))
         print(item, "deleted")
     except sqlite3.Error as e:
         print(e)
 
 
-def main():
-    conn = connect()
+def _parse_deadline(deadline):
+    """
+    Internal helper to read a deadline
+    :param deadline: time.time() seconds, "YYYY-MM-DD HH:MM[:SS]" local time or None/empty
+    :return: time.time() seconds or None
+    """
+    if deadline is None or deadline == '':
+        return None
+    try:
+        return float(deadline)
+    except ValueError:
+        pass
+    for date_format in ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M'):
+        try:
+            return time.mktime(datetime.datetime.strptime(deadline, date_format).timetuple())
+        except ValueError:
+            pass
+    raise ValueError('Deadline %s is not a time' % deadline)
+
+
+def _add_item(jobs, job, priority, deadline, name, destination, quantity):
+    """
+    Internal helper to add an item to the jobs read from a file, repeats of an item add to its quantity
+    :param jobs: OrderedDict of job name -> [priority, deadline, OrderedDict of (name, destination) -> quantity]
+    """
+    if name not in LABEL_MAP_BY_NAME:
+        raise ValueError('Job %s requests %s, which is not an item' % (job, name))
+    if job not in jobs:
+        jobs[job] = [priority, _parse_deadline(deadline), OrderedDict()]
+    items = jobs[job][2]
+    items[(name, destination)] = items.get((name, destination), 0) + quantity
+
+
+def read_job_file(path, jobs=None):
+    """
+    Reads the jobs of a CSV, JSON or test condition file (see the top of this file for the formats)
+    :param path: path to the file
+           jobs: jobs read from earlier files to add to
+    :return: OrderedDict of job name -> [priority, deadline, OrderedDict of (name, destination) -> quantity]
+    """
+    if jobs is None:
+        jobs = OrderedDict()
+    extension = os.path.splitext(path)[1].lower()
+
+    if extension == '.csv':
+        with open(path, newline='') as csv_file:
+            for row in csv.DictReader(csv_file):
+                _add_item(jobs, row['job'], int(row.get('priority') or 0), row.get('deadline'), row['name'],
+                          row.get('destination') or None, int(row.get('quantity') or 1))
+
+    elif extension == '.json':
+        with open(path) as json_file:
+            data = json.load(json_file)
+        if isinstance(data, dict):
+            data = data['jobs']
+        for job in data:
+            for item in job.get('items', []):
+                _add_item(jobs, job['name'], int(job.get('priority', 0)), job.get('deadline'), item['name'],
+                          item.get('destination'), int(item.get('quantity', 1)))
+
+    else:
+        # test_cond_generator.py output: "piece    quadrant    rotation" per line, sorted to the piece's animal bin
+        job = os.path.splitext(os.path.basename(path))[0]
+        with open(path) as text_file:
+            for line in text_file:
+                fields = line.split()
+                if len(fields) == 0:
+                    continue
+                piece = fields[0]
+                _add_item(jobs, job, 0, None, piece, piece.split('_')[0].title() + ' Bin', 1)
+
+    return jobs
+
+
+def import_jobs(conn, jobs):
+    """
+    Inserts jobs and their items in a single transaction. Items are added to jobs that already exist, which take
+    the new priority and deadline and are incomplete again
+    :param conn: connection to database
+           jobs: OrderedDict of job name -> [priority, deadline, OrderedDict of (name, destination) -> quantity]
+    :return: the number of rows inserted or updated
+    """
+    with conn:
+        before = conn.total_changes
+        # Update then insert instead of an upsert, the SQLite of older Pythons has no ON CONFLICT DO UPDATE
+        conn.executemany("update jobs set priority = ?, deadline = ?, status = ? where name = ?",
+                         [(job[0], job[1], STATUS_INCOMPLETE, name) for name, job in jobs.items()])
+        conn.executemany("insert or ignore into jobs(name, priority, deadline) values(?, ?, ?)",
+                         [(name, job[0], job[1]) for name, job in jobs.items()])
+        job_ids = dict((name, job_id) for job_id, name in conn.execute("select id, name from jobs"))
+        conn.executemany("insert into job_items(job_id, name, destination, quantity) values(?, ?, ?, ?)",
+                         [(job_ids[job], name, destination, quantity)
+                          for job, (_, _, items) in jobs.items()
+                          for (name, destination), quantity in items.items()])
+        return conn.total_changes - before
+
+
+def import_files(conn, paths):
+    """
+    Imports the jobs of several files in a single transaction and reports the rate
+    :param conn: connection to database
+           paths: paths to CSV, JSON or test condition files
+    :return: N/A
+    """
+    try:
+        start = time.time()
+        jobs = OrderedDict()
+        for path in paths:
+            read_job_file(path, jobs)
+        rows = import_jobs(conn, jobs)
+        elapsed = max(time.time() - start, 1e-6)
+        print("%d jobs, %d rows imported in %0.3f s (%0.0f rows/s)" % (len(jobs), rows, elapsed, rows / elapsed))
+    except (sqlite3.Error, OSError, ValueError, KeyError) as e:
+        print("Import failed, nothing was imported:\n", repr(e))
+
+
+def main(db_file=DB_FILE):
+    conn = connect(db_file)
     while 1:
-        inp = input("table, insert, select, delete, quit\n")
+        inp = input("table (new job), insert, import, select, delete, quit\n")
         if inp == "table":
-            table = input("Table name: ")
+            table = input("Job name: ")
             create_table(conn, table)
         if inp == "insert":
-            table = input("Table name: ")
+            table = input("Job name: ")
             name = input("Part name: ")
             destination = input("Part destination: ")
             count = int(input("Quantity: "))
             insert_object(conn, name, destination, table, count)
+        if inp == "import":
+            paths = input("Job files: ")
+            import_files(conn, paths.split())
         if inp == "select":
-            table = input("Table name: ")
+            table = input("Job name: ")
             select(conn, table)
         if inp == "delete":
-            table = input("Table name: ")
+            table = input("Job name: ")
             part_id = int(input("Part ID: "))
             delete_row(conn, part_id, table)
         if inp == "quit":
@@ -131,4 +311,16 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser(description='Manage the jobs of the pick-point database')
+    parser.add_argument('--db', default=DB_FILE, help='database file')
+    parser.add_argument('--import', dest='import_paths', nargs='+', metavar='FILE',
+                        help='import the jobs of CSV, JSON or test condition files and exit')
+    cmd_args = parser.parse_args()
+
+    if cmd_args.import_paths:
+        connection = connect(cmd_args.db)
+        import_files(connection, cmd_args.import_paths)
+        connection.close()
+        sys.exit(0)
+
+    main(cmd_args.db)
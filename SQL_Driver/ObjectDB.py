@@ -5,106 +5,545 @@ Michigan  Technological University: Blue Marble Security Enterprise
 --------------------------------------------------------------------
 
 Driver to connect to SQLite database and get jobs and objects from
-tables.
+tables. The database is migrated to the latest schema (see Schema.py)
+when it is opened.
+
+Every thread gets its own connection, opened on first use, with the
+database in WAL mode so readers never block the writer (or each other).
+Statements are parameterized so SQLite serves them from each
+connection's statement cache, and writes are short transactions.
+
+Several pick loops (or arms) can pull work from one database: an item is
+claimed in a single write transaction that selects it and marks it in
+progress, so no two workers get the same item. A claim is a lease, if a
+worker dies without renewing it the item goes back to the queue. A
+claim is for one unit: claiming an item with more than one left to pick
+splits the unit off into a row of its own, so the rest of the quantity
+stays pending for the other workers.
+Workers are named "host:pid", so a pick loop restarted after a crash
+hands the claims of its earlier run back right away (recover_claims):
+the claims of a worker on this host whose process is gone. Claims of
+another live pick loop on this host are left alone.
+
+Pending work is scheduled by job priority, then deadline, then age (see
+Schema.SCHEDULE_ORDER), read straight off the jobs_schedule index. When
+the items visible on the table are passed to claim_next_item, it may
+interleave jobs: the first visible item of the next SCHEDULE_WINDOW jobs
+is claimed ahead of an item of the first job that is not on the table.
+
+Reads of jobs and items are cached per connection until the database
+changes. A change is seen through PRAGMA data_version (commits of any
+other connection) and the connection's total_changes (its own writes),
+which costs one PRAGMA instead of re-running the query.
 
 ObjectDB.py
 Author: careyes1 [GitHub]
-Date Last Modified 9/25/2019
+Date Last Modified 10/19/2026
 """
 
 __author__ = 'Blue Marble Security Enterprise'
 __version__ = '1.0'
 
 import os
+import time
+import socket
 import sqlite3
 import threading
 import logging
 import traceback
+from contextlib import contextmanager
 
 from SQL_Driver import SQLiteDriver
+from SQL_Driver import Schema
+from SQL_Driver.Schema import STATUS_INCOMPLETE, STATUS_IN_PROGRESS, STATUS_COMPLETE, SCHEDULE_ORDER
+
+
+DB_FILE = os.path.join(os.getcwd(), 'SQL_Driver', 'pickpoint.db')
+STATEMENT_CACHE_SIZE = 64           # Prepared statements kept per connection
+BUSY_TIMEOUT = 5000                 # Milliseconds a connection waits for a lock before failing
+CACHE_SIZE_KB = 8192                # Page cache per connection
+LEASE_TIMEOUT = 300                 # Seconds a claimed item stays claimed without its lease being renewed
+PROCESS_QUERY_LIMITED_INFORMATION = 0x1000     # Windows OpenProcess access right to read the exit code
+STILL_ACTIVE = 259                  # Windows exit code of a process that is still running
+ERROR_ACCESS_DENIED = 5             # Windows error of OpenProcess on a process of another user
+SCHEDULE_WINDOW = 8                 # Jobs at the head of the schedule whose visible items may be picked out of order
+CONNECTION_PRAGMAS = ('PRAGMA journal_mode = WAL',          # Readers and the writer do not block each other
+                      'PRAGMA synchronous = NORMAL',        # Safe in WAL mode, fsync only on checkpoints
+                      'PRAGMA cache_size = -%d' % CACHE_SIZE_KB,
+                      'PRAGMA temp_store = MEMORY',
+                      'PRAGMA foreign_keys = ON',
+                      'PRAGMA busy_timeout = %d' % BUSY_TIMEOUT)
+
+
+def worker_name():
+    """
+    :return: the name this process claims items as, "host:pid"
+    """
+    return '%s:%d' % (socket.gethostname(), os.getpid())
+
+
+def _process_exists(pid):
+    """
+    Check if a process of this host is running
+    :param pid: process id
+    :return: True if the process is running (or can not be checked)
+    """
+    if os.name == 'nt':
+        # os.kill() terminates the process on Windows, ask for its exit code instead
+        import ctypes
+        kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+        handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+        if not handle:
+            return ctypes.get_last_error() == ERROR_ACCESS_DENIED
+        try:
+            exit_code = ctypes.c_ulong()
+            if not kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code)):
+                return True
+            return exit_code.value == STILL_ACTIVE
+        finally:
+            kernel32.CloseHandle(handle)
+
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+@contextmanager
+def _write_transaction(conn):
+    """
+    Run the statements of the with block in one transaction that holds the write lock from the start,
+    so a row read in it can not be changed by another connection before it is written
+    :param conn: an sqlite3 connection
+    """
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        yield conn
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
+
+
+# SCHEDULE_ORDER of the jobs table when it is joined to job_items
+_JOB_ORDER = ', '.join('jobs.' + term.strip() for term in SCHEDULE_ORDER.split(','))
+
+# The first pending item of the first job in the schedule that has one. CROSS JOIN keeps jobs the outer loop, so
+# jobs are walked in jobs_schedule order and the query stops at the first job with a pending item
+_NEXT_ITEM = ("SELECT job_items.id, job_items.name, job_items.destination, jobs.id, jobs.name FROM jobs "
+              "CROSS JOIN job_items ON job_items.job_id = jobs.id AND job_items.status = ? "
+              "WHERE jobs.status = ? ORDER BY %s, job_items.id LIMIT 1" % _JOB_ORDER)
+
+# Every pending item of the first SCHEDULE_WINDOW jobs, in schedule order, with the quantity left to pick
+_PENDING_ITEMS = ("SELECT job_items.id, job_items.name, job_items.destination, jobs.id, jobs.name, jobs.priority, "
+                  "job_items.quantity - job_items.picked "
+                  "FROM (SELECT id, name, priority, deadline FROM jobs WHERE status = ? "
+                  "      ORDER BY %s LIMIT ?) AS jobs "
+                  "CROSS JOIN job_items ON job_items.job_id = jobs.id AND job_items.status = ? "
+                  "ORDER BY %s, job_items.id" % (SCHEDULE_ORDER, _JOB_ORDER))
+
+# The first pending item of the first SCHEDULE_WINDOW jobs that is one of the item names listed
+_NEXT_VISIBLE_ITEM = ("SELECT job_items.id, job_items.name, job_items.destination, jobs.id, jobs.name "
+                      "FROM (SELECT id, name, priority, deadline FROM jobs WHERE status = ? "
+                      "      ORDER BY %s LIMIT ?) AS jobs "
+                      "CROSS JOIN job_items ON job_items.job_id = jobs.id AND job_items.status = ? "
+                      "AND job_items.name IN (%%s) ORDER BY %s, job_items.id LIMIT 1" % (SCHEDULE_ORDER, _JOB_ORDER))
 
 
 class ObjectDB(SQLiteDriver.SQLiteDriver):
-    def __init__(self):
+    def __init__(self, db_file=DB_FILE):
         """
         ObjectDB Constructor
+        :param db_file: path to the SQLite database file
         """
         self._logger = logging.getLogger('GM_Pick_Point.' + self.__class__.__name__)
-        self.connection = self.create_connection()
-        self._status_lock = threading.Lock()
+        self._db_file = db_file
+        self._local = threading.local()
+        self._connections = []              # Every thread's connection, closed by disconnect()
+        self._connections_lock = threading.Lock()
+        self._closed = False
+        self._cache_hits = 0
+
+        conn = self.create_connection()
+        if conn is not None:
+            Schema.migrate(conn)
+
+    @property
+    def connection(self):
+        """
+        Property decorated access function to get the calling thread's connection (opened on first use)
+
+        To Call: object_db.connection
+
+        :return: an sqlite3 connection or None if the database could not be opened
+        """
+        conn = getattr(self._local, 'connection', None)
+        if conn is None and not self._closed:
+            conn = self.create_connection()
+        return conn
 
     def create_connection(self):
         """ create a database connection to the SQLite database
-            specified by the db_file
+            specified by the db_file for the calling thread
         :return: connection
         """
         conn = None
         try:
-            conn = sqlite3.connect(os.getcwd() + "\SQL_Driver\pickpoint.db")
-            self._logger.info("Connection to database created")
+            # Each connection is only used by the thread that opened it, disconnect() closes them from any thread
+            conn = sqlite3.connect(self._db_file, timeout=BUSY_TIMEOUT / 1000.0, check_same_thread=False,
+                                   cached_statements=STATEMENT_CACHE_SIZE)
+            for pragma in CONNECTION_PRAGMAS:
+                conn.execute(pragma)
+            self._local.connection = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+            self._logger.info("Connection to database created for %s", threading.current_thread().name)
             return conn
         except sqlite3.Error:
             self._logger.error('Unhandled Error:\n'
-                               '%s' % str(traceback.format_exc()))
+                               '%s', str(traceback.format_exc()))
         return conn
 
+    def get_cache_hits(self):
+        """
+        :return: the number of reads answered from the cache
+        """
+        return self._cache_hits
+
+    def _cached_query(self, query, params=(), fetch_one=False):
+        """
+        Internal facing function to run a read query, or return its result from the calling thread's cache if the
+        database has not changed since it was run
+        :param query:       SQL query
+        :param params:      parameters of the query
+        :param fetch_one:   True - return the first row, False - return a tuple of all rows
+        :return: the rows of the query
+        """
+        conn = self.connection
+        stamp = (conn.execute('PRAGMA data_version').fetchone()[0], conn.total_changes)
+        if getattr(self._local, 'cache_stamp', None) != stamp:
+            self._local.cache = {}
+            self._local.cache_stamp = stamp
+
+        key = (query, params, fetch_one)
+        if key in self._local.cache:
+            self._cache_hits += 1
+            return self._local.cache[key]
+
+        cursor = conn.execute(query, params)
+        result = cursor.fetchone() if fetch_one else tuple(cursor.fetchall())
+        self._local.cache[key] = result
+        return result
+
     def get_job_list(self):
         """
         Query all rows in the jobs table
         :return: list of jobs and status
         """
-        with self._status_lock:
-            try:
-                cur = self.connection.cursor()
-                cur.execute("SELECT * FROM jobs")
-                rows = cur.fetchall()
-                self._logger.info(len(rows), "rows fetched from jobs table")
-            except sqlite3.Error as e:
-                self._logger.info("get_job_list: %s" % e)
-                return None
+        try:
+            rows = list(self._cached_query("SELECT id, name, status, priority FROM jobs ORDER BY id"))
+            self._logger.info("%d rows fetched from jobs table", len(rows))
+        except sqlite3.Error as e:
+            self._logger.info("get_job_list: %s", e)
+            return None
 
         return rows
 
     def get_incomplete_job(self):
         """
         Abstract method to return an incomplete job
-        :return: an incomplete job
-        """
-        with self._status_lock:
-            try:
-                job = None
-                cur = self.connection.cursor()
-                cur.execute("SELECT * FROM jobs WHERE status == 'Incomplete'")
-                job = cur.fetchone()
-                if job is None:
-                    self._logger.info("get_incomplete_job: No incomplete jobs remaining")
-                else:
-                    self._logger.info("get_incomplete_job: Incomplete job fetched")
-            except sqlite3.Error:
-                self._logger.error('Unhandled Error:\n'
-                                   '%s' % str(traceback.format_exc()))
+        :return: the first incomplete job of the schedule (id, name, status, priority, deadline)
+        """
+        job = None
+        try:
+            job = self._cached_query("SELECT id, name, status, priority, deadline FROM jobs WHERE status = ? "
+                                     "ORDER BY %s LIMIT 1" % SCHEDULE_ORDER, (STATUS_INCOMPLETE,), fetch_one=True)
+            if job is None:
+                self._logger.info("get_incomplete_job: No incomplete jobs remaining")
+            else:
+                self._logger.info("get_incomplete_job: Incomplete job fetched")
+        except sqlite3.Error:
+            self._logger.error('Unhandled Error:\n'
+                               '%s', str(traceback.format_exc()))
 
         return job
 
     def get_object_list(self, table):
         """
-        Query all rows in the objects table
+        Query the items of a job that still have to be picked
         :param table: name of job
-        :return: a list of jobs and statuses for each job
+        :return: a list of (item id, name, destination, quantity left to pick) in the order they were added
         """
         result = None
         try:
-            cur = self.connection.cursor()
-            cur.execute("SELECT * FROM {0}".format(table))
-            result = cur.fetchall()
-
-            self._logger.info("get_object_list: %s rows fetched" % len(result))
+            result = list(self._cached_query(
+                "SELECT job_items.id, job_items.name, job_items.destination, job_items.quantity - job_items.picked "
+                "FROM jobs "
+                "JOIN job_items ON job_items.job_id = jobs.id AND job_items.status = ? "
+                "WHERE jobs.name = ? ORDER BY job_items.id", (STATUS_INCOMPLETE, table)))
+            self._logger.info("get_object_list: %s rows fetched", len(result))
         except sqlite3.Error:
             self._logger.error('Unhandled Error:\n'
-                               '%s' % str(traceback.format_exc()))
+                               '%s', str(traceback.format_exc()))
 
         return result
 
+    def get_next_item(self):
+        """
+        Get the next item to pick: the first pending item of the first incomplete job of the schedule
+        :return: (item id, name, destination, job id, job name) or None if there is nothing to pick
+        """
+        item = None
+        try:
+            item = self._cached_query(_NEXT_ITEM, (STATUS_INCOMPLETE, STATUS_INCOMPLETE), fetch_one=True)
+        except sqlite3.Error:
+            self._logger.error('Unhandled Error:\n'
+                               '%s', str(traceback.format_exc()))
+
+        return item
+
+    def get_pending_items(self, window=SCHEDULE_WINDOW):
+        """
+        Get every item that can be claimed from the jobs at the head of the schedule
+        :param window: number of jobs at the head of the schedule to take items from
+        :return: a list of (item id, name, destination, job id, job name, job priority) in schedule order, an item
+                 is listed once per unit left to pick
+        """
+        items = []
+        try:
+            for row in self._cached_query(_PENDING_ITEMS, (STATUS_INCOMPLETE, window, STATUS_INCOMPLETE)):
+                items.extend([row[:-1]] * max(row[-1], 1))
+        except sqlite3.Error:
+            self._logger.error('Unhandled Error:\n'
+                               '%s', str(traceback.format_exc()))
+
+        return items
+
+    def update_item_status(self, item_id, status):
+        """
+        Update the status of one item of a job
+        :param item_id: ID of the item
+        :param status: new status
+        :return: N/A
+        """
+        try:
+            conn = self.connection
+            with conn:
+                conn.execute("UPDATE job_items SET status = ? WHERE id = ?", (status, item_id))
+            self._logger.info("update_item_status: item %s updated", item_id)
+        except sqlite3.Error:
+            self._logger.error('Unhandled Error:\n'
+                               '%s', str(traceback.format_exc()))
+
+    def claim_next_item(self, worker, lease=LEASE_TIMEOUT, visible=None):
+        """
+        Atomically claim the next item to pick: the first pending item of the first incomplete job of the schedule,
+        or, if the items on the table are known, the first of them pending in the next SCHEDULE_WINDOW jobs.
+        Items whose lease expired are pending again.
+        :param worker: name of the claiming worker
+        :param lease: seconds until the claim expires unless it is renewed
+        :param visible: names of the items visible on the table (None - claim strictly in schedule order)
+        :return: (item id, name, destination, job id, job name) or None if there is nothing to pick
+        """
+        item = None
+        try:
+            now = time.time()
+            with _write_transaction(self.connection) as conn:
+                self._expire_claims(conn, now)
+
+                if visible:
+                    visible = sorted(visible)
+                    item = conn.execute(_NEXT_VISIBLE_ITEM % ', '.join('?' * len(visible)),
+                                        [STATUS_INCOMPLETE, SCHEDULE_WINDOW, STATUS_INCOMPLETE] + visible).fetchone()
+                if item is None:
+                    item = conn.execute(_NEXT_ITEM, (STATUS_INCOMPLETE, STATUS_INCOMPLETE)).fetchone()
+                if item is not None:
+                    item = self._claim_unit(conn, item[0], worker, now + lease)
+            self._logger.info("claim_next_item: %s claimed %s", worker, item)
+        except sqlite3.Error:
+            item = None
+            self._logger.error('Unhandled Error:\n'
+                               '%s', str(traceback.format_exc()))
+
+        return item
+
+    def claim_items(self, item_ids, worker, lease=LEASE_TIMEOUT):
+        """
+        Atomically claim a unit of each of a set of items, skipping the ones another worker claimed first. An item ID
+        listed several times claims several units of the item
+        :param item_ids: IDs of the items to claim
+        :param worker: name of the claiming worker
+        :param lease: seconds until the claims expire unless they are renewed
+        :return: a list with, for each item ID given, (item id, name, destination, job id, job name) of the unit
+                 claimed or None if there was no unit left to claim
+        """
+        items = []
+        try:
+            now = time.time()
+            with _write_transaction(self.connection) as conn:
+                self._expire_claims(conn, now)
+                for item_id in item_ids:
+                    items.append(self._claim_unit(conn, item_id, worker, now + lease))
+            self._logger.info("claim_items: %s claimed %d of %d items",
+                              worker, sum(item is not None for item in items), len(item_ids))
+        except sqlite3.Error:
+            items = [None] * len(item_ids)
+            self._logger.error('Unhandled Error:\n'
+                               '%s', str(traceback.format_exc()))
+
+        return items
+
+    @staticmethod
+    def _claim_unit(conn, item_id, worker, lease_expires):
+        """
+        Internal facing function to claim one unit of a pending item, the caller holds the write lock. The item is
+        claimed itself if it is the last unit, otherwise the unit is split off into a new row so the rest of the
+        quantity can be claimed by other workers
+        :param conn:            the connection of the write transaction
+        :param item_id:         ID of the item
+        :param worker:          name of the claiming worker
+        :param lease_expires:   time.time() the claim expires at
+        :return: (item id, name, destination, job id, job name) of the claimed unit or None if the item is not pending
+        """
+        row = conn.execute("SELECT quantity - picked FROM job_items WHERE id = ? AND status = ?",
+                           (item_id, STATUS_INCOMPLETE)).fetchone()
+        if row is None:
+            return None
+
+        if row[0] > 1:
+            conn.execute("UPDATE job_items SET quantity = quantity - 1 WHERE id = ?", (item_id,))
+            item_id = conn.execute("INSERT INTO job_items(job_id, name, destination, status, claimed_by, "
+                                   "lease_expires) SELECT job_id, name, destination, ?, ?, ? FROM job_items "
+                                   "WHERE id = ?", (STATUS_IN_PROGRESS, worker, lease_expires, item_id)).lastrowid
+        else:
+            conn.execute("UPDATE job_items SET status = ?, claimed_by = ?, lease_expires = ? WHERE id = ?",
+                         (STATUS_IN_PROGRESS, worker, lease_expires, item_id))
+        return conn.execute("SELECT job_items.id, job_items.name, job_items.destination, jobs.id, jobs.name "
+                            "FROM job_items JOIN jobs ON jobs.id = job_items.job_id WHERE job_items.id = ?",
+                            (item_id,)).fetchone()
+
+    def _expire_claims(self, conn, now):
+        """
+        Internal facing function to return the items whose lease expired to the queue, the caller holds the write lock
+        :param conn: the connection of the write transaction
+        :param now: time.time() of the claim
+        """
+        expired = conn.execute("UPDATE job_items SET status = ?, claimed_by = NULL, lease_expires = NULL "
+                               "WHERE status = ? AND lease_expires < ?",
+                               (STATUS_INCOMPLETE, STATUS_IN_PROGRESS, now)).rowcount
+        if expired > 0:
+            self._logger.warning("%d expired claims returned to the queue", expired)
+
+    def renew_lease(self, item_id, worker, lease=LEASE_TIMEOUT):
+        """
+        Extend the claim on an item
+        :param item_id: ID of the claimed item
+        :param worker: name of the worker holding the claim
+        :param lease: seconds from now until the claim expires
+        :return: True if the worker still held the claim
+        """
+        try:
+            conn = self.connection
+            with conn:
+                renewed = conn.execute("UPDATE job_items SET lease_expires = ? "
+                                       "WHERE id = ? AND status = ? AND claimed_by = ?",
+                                       (time.time() + lease, item_id, STATUS_IN_PROGRESS, worker)).rowcount
+            return renewed == 1
+        except sqlite3.Error:
+            self._logger.error('Unhandled Error:\n'
+                               '%s', str(traceback.format_exc()))
+        return False
+
+    def complete_item(self, item_id, worker):
+        """
+        Count one pick of a claimed item. The item is complete once its whole quantity is picked, otherwise it goes
+        back to the queue for the next pick. Its job is marked complete along with its last item
+        :param item_id: ID of the claimed item
+        :param worker: name of the worker holding the claim
+        :return: the number of picks left in the job or None if the worker no longer held the claim
+        """
+        remaining = None
+        try:
+            with _write_transaction(self.connection) as conn:
+                completed = conn.execute("UPDATE job_items SET picked = picked + 1, "
+                                         "status = CASE WHEN picked + 1 >= quantity THEN ? ELSE ? END, "
+                                         "claimed_by = NULL, lease_expires = NULL "
+                                         "WHERE id = ? AND status = ? AND claimed_by = ?",
+                                         (STATUS_COMPLETE, STATUS_INCOMPLETE, item_id, STATUS_IN_PROGRESS,
+                                          worker)).rowcount
+                if completed == 1:
+                    job_id = conn.execute("SELECT job_id FROM job_items WHERE id = ?", (item_id,)).fetchone()[0]
+                    remaining = conn.execute("SELECT COALESCE(SUM(quantity - picked), 0) FROM job_items "
+                                             "WHERE job_id = ? AND status != ?",
+                                             (job_id, STATUS_COMPLETE)).fetchone()[0]
+                    if remaining == 0:
+                        conn.execute("UPDATE jobs SET status = ? WHERE id = ?", (STATUS_COMPLETE, job_id))
+            if remaining is None:
+                self._logger.warning("complete_item: %s no longer holds item %s", worker, item_id)
+        except sqlite3.Error:
+            remaining = None
+            self._logger.error('Unhandled Error:\n'
+                               '%s', str(traceback.format_exc()))
+
+        return remaining
+
+    def release_item(self, item_id, worker):
+        """
+        Give up the claim on an item without picking it, the item is pending again
+        :param item_id: ID of the claimed item
+        :param worker: name of the worker holding the claim
+        :return: N/A
+        """
+        try:
+            conn = self.connection
+            with conn:
+                conn.execute("UPDATE job_items SET status = ?, claimed_by = NULL, lease_expires = NULL "
+                             "WHERE id = ? AND status = ? AND claimed_by = ?",
+                             (STATUS_INCOMPLETE, item_id, STATUS_IN_PROGRESS, worker))
+            self._logger.info("release_item: %s released item %s", worker, item_id)
+        except sqlite3.Error:
+            self._logger.error('Unhandled Error:\n'
+                               '%s', str(traceback.format_exc()))
+
+    def recover_claims(self, worker):
+        """
+        Return the items still claimed by earlier runs on this host to the queue, instead of waiting out their leases.
+        Only the claims of workers whose process is gone are returned, another live pick loop keeps its claims.
+        :param worker: name of the current worker, "host:pid"
+        :return: the number of items returned to the queue
+        """
+        recovered = 0
+        host_prefix = worker.split(':')[0] + ':'
+        try:
+            conn = self.connection
+            claimants = conn.execute("SELECT DISTINCT claimed_by FROM job_items "
+                                     "WHERE status = ? AND substr(claimed_by, 1, ?) = ? AND claimed_by != ?",
+                                     (STATUS_IN_PROGRESS, len(host_prefix), host_prefix, worker)).fetchall()
+
+            # A dead worker never renews its claims again, so they can not change between the read and the write
+            dead_workers = []
+            for (claimant,) in claimants:
+                pid = claimant[len(host_prefix):]
+                if pid.isdigit() and not _process_exists(int(pid)):
+                    dead_workers.append(claimant)
+
+            with conn:
+                for dead_worker in dead_workers:
+                    recovered += conn.execute("UPDATE job_items SET status = ?, claimed_by = NULL, "
+                                              "lease_expires = NULL WHERE status = ? AND claimed_by = ?",
+                                              (STATUS_INCOMPLETE, STATUS_IN_PROGRESS, dead_worker)).rowcount
+            if recovered > 0:
+                self._logger.warning("recover_claims: %d items claimed by an earlier run returned to the queue",
+                                     recovered)
+        except sqlite3.Error:
+            self._logger.error('Unhandled Error:\n'
+                               '%s', str(traceback.format_exc()))
+
+        return recovered
+
     def update_job_status(self, job, status):
         """
         Abstract method update the status of a job
@@ -112,30 +551,30 @@ class ObjectDB(SQLiteDriver.SQLiteDriver):
         :param status: new status
         :return: N/A
         """
-        with self._status_lock:
-            try:
-                cur = self.connection.cursor()
-                cur.execute("UPDATE jobs SET status = '{0}' WHERE name = '{1}'".format(status, job))
-                self.connection.commit()
-                self._logger.info("update_job_status: %s updated" % job)
-            except sqlite3.Error:
-                self._logger.error('Unhandled Error:\n'
-                                   '%s' % str(traceback.format_exc()))
+        try:
+            conn = self.connection
+            with conn:
+                conn.execute("UPDATE jobs SET status = ? WHERE name = ?", (status, job))
+            self._logger.info("update_job_status: %s updated", job)
+        except sqlite3.Error:
+            self._logger.error('Unhandled Error:\n'
+                               '%s', str(traceback.format_exc()))
 
     def reset_job_statuses(self):
         """
-        Abstract method reset all job statuses to "Incomplete"
+        Abstract method reset all job and item statuses to "Incomplete"
         :return: N/A
         """
-        with self._status_lock:
-            try:
-                cur = self.connection.cursor()
-                cur.execute("UPDATE jobs SET status = 'Incomplete'")
-                self.connection.commit()
-                self._logger.info("reset_job_statuses: statuses in jobs table updated")
-            except sqlite3.Error:
-                self._logger.error('Unhandled Error:\n'
-                                   '%s' % str(traceback.format_exc()))
+        try:
+            conn = self.connection
+            with conn:
+                conn.execute("UPDATE jobs SET status = ?", (STATUS_INCOMPLETE,))
+                conn.execute("UPDATE job_items SET status = ?, picked = 0, claimed_by = NULL, lease_expires = NULL",
+                             (STATUS_INCOMPLETE,))
+            self._logger.info("reset_job_statuses: statuses in jobs table updated")
+        except sqlite3.Error:
+            self._logger.error('Unhandled Error:\n'
+                               '%s', str(traceback.format_exc()))
 
     def is_connected(self):
         """
@@ -150,12 +589,17 @@ class ObjectDB(SQLiteDriver.SQLiteDriver):
             return True
 
     def disconnect(self):
-        """ disconnect from database
+        """ disconnect every thread from the database
         :return: N/A
         """
-        self._logger.info("disconnect: camera disconnected")
-        self.connection.close()
-        self.connection = None
+        self._logger.info("disconnect: database disconnected")
+        self._closed = True
+        with self._connections_lock:
+            connections = self._connections
+            self._connections = []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
 
 
 if __name__ == '__main__':
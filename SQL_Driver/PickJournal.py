@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+"""
+--------------------------------------------------------------------
+Michigan  Technological University: Blue Marble Security Enterprise
+--------------------------------------------------------------------
+
+Write-behind journal of pick attempts and their outcomes.
+
+The pick loop hands each record to record(), which only puts it on a
+queue. A background thread writes the queued records to the pick_journal
+table, as many as BATCH_SIZE per transaction, so the pick loop never
+waits on the database. Records written in one batch are committed
+together, after a crash the journal holds every batch up to the last
+one committed.
+
+Usage:
+    journal = PickJournal(object_db, worker)
+    journal.start()
+    journal.record('cat_ear', started, time.time(), camera=(x, y), arm=(x, y, z))
+    ...
+    journal.terminate_thread()
+    journal.join()
+
+PickJournal.py
+Author: Blue Marble Security Enterprise
+Date Last Modified: 10/19/2026
+"""
+
+__author__ = 'Blue Marble Security Enterprise'
+__version__ = '1.0'
+
+import queue
+import sqlite3
+import logging
+import threading
+import traceback
+from collections import namedtuple
+
+BATCH_SIZE = 256                # Max records written per transaction
+FLUSH_INTERVAL = 1.0            # Max seconds a record waits on the queue before it is written
+MAX_QUEUE_SIZE = 10000          # Records past this many waiting to be written are dropped
+
+# One row of the pick_journal table
+PickRecord = namedtuple('PickRecord', ['worker', 'job_item_id', 'item_type', 'started', 'finished', 'camera_x',
+                                       'camera_y', 'arm_x', 'arm_y', 'arm_z', 'success', 'error'])
+
+_WAKE = object()                # Queued by terminate_thread() so the writer stops waiting for records
+
+INSERT_RECORD = 'INSERT INTO pick_journal(%s) VALUES (%s)' % (', '.join(PickRecord._fields),
+                                                             ', '.join('?' * len(PickRecord._fields)))
+
+
+class PickJournal(threading.Thread):
+
+    def __init__(self, object_db, worker, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL,
+                 max_queue_size=MAX_QUEUE_SIZE):
+        """
+        Constructor
+        :param object_db:       The ObjectDB to write to, the thread opens its own connection through it
+        :param worker:          Name of the pick loop the records belong to
+        :param batch_size:      Max records written per transaction
+        :param flush_interval:  Max seconds a record waits on the queue before it is written
+        :param max_queue_size:  Records past this many waiting to be written are dropped
+        """
+        super(PickJournal, self).__init__(name='PickJournal')
+        self.daemon = True
+
+        self._logger = logging.getLogger('GM_Pick_Point.' + self.__class__.__name__)
+        self._terminate_thread_event = threading.Event()
+        self._object_db = object_db
+        self._worker = worker
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._queue = queue.Queue(max_queue_size)
+
+        self._num_written = 0
+        self._num_dropped = 0
+
+    def record(self, item_type, started, finished, camera=(None, None), arm=(None, None, None), success=True,
+               error=None, job_item_id=None):
+        """
+        External facing function to queue a pick record, it never blocks
+        :param item_type:   Name of the picked item
+        :param started:     time.time() the pick started
+        :param finished:    time.time() the pick finished
+        :param camera:      (x, y) of the item in the camera's frame
+        :param arm:         (x, y, z) of the item in the arm's frame
+        :param success:     False if the pick failed
+        :param error:       Description of the failure
+        :param job_item_id: ID of the job item the record is for (None for a pick attempt of the arm)
+        """
+        record = PickRecord(self._worker, job_item_id, item_type, started, finished, camera[0], camera[1],
+                            arm[0], arm[1], arm[2], int(bool(success)), error)
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self._num_dropped += 1
+            self._logger.warning('Pick journal queue full, %d records dropped', self._num_dropped)
+
+    def run(self):
+        """
+        Main thread function
+        """
+        try:
+            while not self._terminate_thread_event.is_set():
+                self._write(self._take_batch(self._flush_interval))
+
+            # Write whatever is left before stopping
+            batch = self._take_batch(0)
+            while len(batch) > 0:
+                self._write(batch)
+                batch = self._take_batch(0)
+        except Exception:
+            self._logger.error('Unhandled Exception:\n%s', str(traceback.format_exc()))
+
+    def terminate_thread(self):
+        """
+        External facing method to request termination of this thread, queued records are written first
+        """
+        self._terminate_thread_event.set()
+        try:
+            self._queue.put_nowait(_WAKE)
+        except queue.Full:
+            pass                        # The writer is busy and will see the event on its next batch
+
+    def flush(self):
+        """
+        External facing function to wait until every queued record is written
+        """
+        self._queue.join()
+
+    def get_num_written(self):
+        """
+        :return: the number of records written to the database
+        """
+        return self._num_written
+
+    def get_num_dropped(self):
+        """
+        :return: the number of records dropped because the queue was full
+        """
+        return self._num_dropped
+
+    def _take_batch(self, timeout):
+        """
+        Internal facing function to take up to batch_size records off the queue
+        :param timeout: seconds to wait for the first record
+        :return: a list of PickRecords
+        """
+        batch = []
+        try:
+            record = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            while True:
+                if record is _WAKE:
+                    self._queue.task_done()
+                else:
+                    batch.append(record)
+                if len(batch) >= self._batch_size:
+                    break
+                record = self._queue.get_nowait()
+        except queue.Empty:
+            pass
+        return batch
+
+    def _write(self, batch):
+        """
+        Internal facing function to write a batch of records in one transaction
+        :param batch: a list of PickRecords
+        """
+        if len(batch) == 0:
+            return
+
+        try:
+            conn = self._object_db.connection
+            with conn:
+                conn.executemany(INSERT_RECORD, batch)
+            self._num_written += len(batch)
+        except (sqlite3.Error, AttributeError):
+            self._num_dropped += len(batch)
+            self._logger.error('Pick journal batch of %d records lost:\n%s',
+                               len(batch), str(traceback.format_exc()))
+        finally:
+            for _ in batch:
+                self._queue.task_done()
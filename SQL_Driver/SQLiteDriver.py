@@ -41,6 +41,87 @@ class SQLiteDriver:
         """
         raise NotImplementedError('Method get_image is not defined')
 
+    def get_next_item(self):
+        """
+        Abstract method to return the next item to pick
+        :return: (item id, name, destination, job id, job name) or None
+        """
+        raise NotImplementedError('Method get_next_item is not defined')
+
+    def update_item_status(self, item_id, status):
+        """
+        Abstract method update the status of one item of a job
+        :param item_id: ID of the item
+        :param status: new status
+        :return: N/A
+        """
+        raise NotImplementedError('Method update_item_status is not defined')
+
+    def claim_next_item(self, worker, lease, visible=None):
+        """
+        Abstract method to atomically claim the next item to pick
+        :param worker: name of the claiming worker
+        :param lease: seconds until the claim expires unless it is renewed
+        :param visible: names of the items visible on the table, they may be claimed ahead of schedule
+        :return: (item id, name, destination, job id, job name) or None
+        """
+        raise NotImplementedError('Method claim_next_item is not defined')
+
+    def get_pending_items(self, window):
+        """
+        Abstract method to get every item that can be claimed from the jobs at the head of the schedule
+        :param window: number of jobs at the head of the schedule to take items from
+        :return: a list of (item id, name, destination, job id, job name, job priority), once per unit left to pick
+        """
+        raise NotImplementedError('Method get_pending_items is not defined')
+
+    def claim_items(self, item_ids, worker, lease):
+        """
+        Abstract method to atomically claim a unit of each of a set of items
+        :param item_ids: IDs of the items to claim
+        :param worker: name of the claiming worker
+        :param lease: seconds until the claims expire unless they are renewed
+        :return: a list with, for each item ID, (item id, name, destination, job id, job name) of the unit claimed
+                 or None
+        """
+        raise NotImplementedError('Method claim_items is not defined')
+
+    def renew_lease(self, item_id, worker, lease):
+        """
+        Abstract method to extend the claim on an item
+        :param item_id: ID of the claimed item
+        :param worker: name of the worker holding the claim
+        :param lease: seconds from now until the claim expires
+        :return: True if the worker still held the claim
+        """
+        raise NotImplementedError('Method renew_lease is not defined')
+
+    def complete_item(self, item_id, worker):
+        """
+        Abstract method to mark a claimed item picked
+        :param item_id: ID of the claimed item
+        :param worker: name of the worker holding the claim
+        :return: the number of picks left in the job or None if the claim was lost
+        """
+        raise NotImplementedError('Method complete_item is not defined')
+
+    def release_item(self, item_id, worker):
+        """
+        Abstract method to give up the claim on an item without picking it
+        :param item_id: ID of the claimed item
+        :param worker: name of the worker holding the claim
+        :return: N/A
+        """
+        raise NotImplementedError('Method release_item is not defined')
+
+    def recover_claims(self, worker):
+        """
+        Abstract method to return the items claimed by earlier runs of a worker to the queue
+        :param worker: name of the current worker
+        :return: the number of items returned to the queue
+        """
+        raise NotImplementedError('Method recover_claims is not defined')
+
     def update_job_status(self, job, status):
         """
         Abstract method update the status of a job
@@ -0,0 +1,268 @@
+#!/usr/bin/env python
+"""
+--------------------------------------------------------------------
+Michigan  Technological University: Blue Marble Security Enterprise
+--------------------------------------------------------------------
+
+Schema of the pick-point database and the migrations that bring older
+database files up to date.
+
+Schema (version 5):
+    jobs        one row per job (name, status, priority, deadline). Jobs
+                are scheduled by priority, then deadline (time.time()
+                seconds, jobs without one last), then age (id)
+    job_items   one row per item to pick, with its own status, pointing
+                at its job. quantity is how many of the item the job
+                needs and picked how many have been picked. A worker claims an item by setting it
+                "In Progress" with its name in claimed_by and a lease
+                (lease_expires, time.time() seconds) it has to renew.
+                A claim is for one unit, claiming an item with more than
+                one left splits the unit off into a row of its own
+    pick_journal
+                one row per pick attempt of the arm and per picked job
+                item (job_item_id set), written behind the pick loop by
+                PickJournal.py
+
+The version of a database file is kept in PRAGMA user_version. Version 0
+is the original layout with a jobs table and one table per job named
+after the job.
+
+To migrate database files (a .bak copy of each is made first):
+    python -m SQL_Driver.Schema SQL_Driver/pickpoint.db
+
+Schema.py
+Author: Blue Marble Security Enterprise
+Date Last Modified: 10/19/2026
+"""
+
+__author__ = 'Blue Marble Security Enterprise'
+__version__ = '1.0'
+
+import sys
+import shutil
+import logging
+import sqlite3
+
+STATUS_INCOMPLETE = 'Incomplete'
+STATUS_IN_PROGRESS = 'In Progress'
+STATUS_COMPLETE = 'Complete'
+
+SCHEMA_V1 = (
+    """CREATE TABLE jobs(
+           id INTEGER PRIMARY KEY AUTOINCREMENT,
+           name TEXT NOT NULL UNIQUE,
+           status TEXT NOT NULL DEFAULT 'Incomplete',
+           priority INTEGER NOT NULL DEFAULT 0)""",
+    """CREATE TABLE job_items(
+           id INTEGER PRIMARY KEY AUTOINCREMENT,
+           job_id INTEGER NOT NULL REFERENCES jobs(id) ON DELETE CASCADE,
+           name TEXT NOT NULL,
+           destination TEXT,
+           status TEXT NOT NULL DEFAULT 'Incomplete')""",
+    "CREATE INDEX jobs_status_priority ON jobs(status, priority)",
+    "CREATE INDEX job_items_job_status ON job_items(job_id, status)",
+)
+
+_logger = logging.getLogger('GM_Pick_Point.Schema')
+
+
+def get_version(conn):
+    """
+    :param conn: an sqlite3 connection
+    :return: the schema version of the database
+    """
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def is_empty(conn):
+    """
+    :param conn: an sqlite3 connection
+    :return: True if the database has no tables
+    """
+    return conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'table'").fetchone()[0] == 0
+
+
+def migrate(conn):
+    """
+    Bring a database up to the latest schema version, each step in its own transaction
+    :param conn: an sqlite3 connection
+    :return: the schema version before migrating
+    """
+    start_version = get_version(conn)
+    if start_version == SCHEMA_VERSION:
+        return start_version
+
+    # A new database starts at version 1 rather than with the one table per job layout
+    if is_empty(conn):
+        _run_in_transaction(conn, _create_v1, 1)
+        _logger.info('Created schema version 1')
+
+    for version, step in MIGRATIONS:
+        if version > get_version(conn):
+            _run_in_transaction(conn, step, version)
+            _logger.info('Migrated database to schema version %d', version)
+    return start_version
+
+
+def _run_in_transaction(conn, step, version):
+    """
+    Internal facing function to run a migration step atomically
+    :param conn:    an sqlite3 connection
+    :param step:    function(conn) running the statements of the step
+    :param version: the schema version after the step
+    """
+    isolation_level = conn.isolation_level
+    conn.isolation_level = None             # Manage the transaction here, DDL included
+    try:
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            step(conn)
+            conn.execute('PRAGMA user_version = %d' % version)
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+    finally:
+        conn.isolation_level = isolation_level
+
+
+def _create_v1(conn):
+    """
+    Internal facing function to create schema version 1 in an empty database
+    """
+    for statement in SCHEMA_V1:
+        conn.execute(statement)
+
+
+def _migrate_to_1(conn):
+    """
+    Internal facing function to move the one table per job layout into jobs / job_items
+    """
+    conn.execute('ALTER TABLE jobs RENAME TO legacy_jobs')
+    for statement in SCHEMA_V1:
+        conn.execute(statement)
+
+    legacy_jobs = conn.execute('SELECT id, name, status FROM legacy_jobs ORDER BY id').fetchall()
+    tables = set(row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'"))
+    for job_id, name, status in legacy_jobs:
+        conn.execute('INSERT INTO jobs(id, name, status) VALUES (?, ?, ?)', (job_id, name, status))
+        if name not in tables:
+            _logger.warning('Job %s has no table, migrated without items', name)
+            continue
+
+        # Items of a finished job are finished too
+        item_status = STATUS_COMPLETE if status == STATUS_COMPLETE else STATUS_INCOMPLETE
+        table = '"%s"' % name.replace('"', '""')
+        conn.execute('INSERT INTO job_items(job_id, name, destination, status) '
+                     'SELECT ?, name, destination, ? FROM %s ORDER BY id' % table, (job_id, item_status))
+        conn.execute('DROP TABLE %s' % table)
+        conn.execute('DELETE FROM sqlite_sequence WHERE name = ?', (name,))
+
+    conn.execute('DROP TABLE legacy_jobs')
+    conn.execute("DELETE FROM sqlite_sequence WHERE name = 'legacy_jobs'")
+
+    leftover = sorted(tables - set(row[1] for row in legacy_jobs) -
+                      {'jobs', 'job_items', 'legacy_jobs', 'sqlite_sequence'})
+    if leftover:
+        _logger.info('Tables not referenced by any job were left as they are: %s', ', '.join(leftover))
+
+
+def _migrate_to_2(conn):
+    """
+    Internal facing function to add the claim lease columns to job_items
+    """
+    conn.execute('ALTER TABLE job_items ADD COLUMN claimed_by TEXT')
+    conn.execute('ALTER TABLE job_items ADD COLUMN lease_expires REAL')
+    # Expired leases are found by a range scan rather than a table scan
+    conn.execute('CREATE INDEX job_items_status_lease ON job_items(status, lease_expires)')
+
+
+def _migrate_to_3(conn):
+    """
+    Internal facing function to add the pick journal
+    """
+    conn.execute("""CREATE TABLE pick_journal(
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        worker TEXT NOT NULL,
+                        job_item_id INTEGER REFERENCES job_items(id) ON DELETE SET NULL,
+                        item_type TEXT,
+                        started REAL NOT NULL,
+                        finished REAL NOT NULL,
+                        camera_x REAL,
+                        camera_y REAL,
+                        arm_x REAL,
+                        arm_y REAL,
+                        arm_z REAL,
+                        success INTEGER NOT NULL,
+                        error TEXT)""")
+    conn.execute('CREATE INDEX pick_journal_job_item ON pick_journal(job_item_id)')
+
+
+# Incomplete, unclaimed rows of the same item of a job, joined to the row they are merged into
+_DUPLICATE_ITEMS = """SELECT job_items.id AS id, item_groups.keep_id AS keep_id FROM job_items
+                      JOIN item_groups ON item_groups.job_id = job_items.job_id
+                                      AND item_groups.name = job_items.name
+                                      AND item_groups.destination IS job_items.destination
+                      WHERE job_items.status = '%s' AND job_items.claimed_by IS NULL
+                        AND job_items.id != item_groups.keep_id""" % STATUS_INCOMPLETE
+
+
+def _migrate_to_4(conn):
+    """
+    Internal facing function to store the quantity of an item as a column instead of as duplicate rows. The units
+    of a merged row are still claimed one at a time (see ObjectDB.claim_items), by as many workers as there are units
+    """
+    conn.execute('ALTER TABLE job_items ADD COLUMN quantity INTEGER NOT NULL DEFAULT 1')
+    conn.execute('ALTER TABLE job_items ADD COLUMN picked INTEGER NOT NULL DEFAULT 0')
+
+    conn.execute("""CREATE TEMP TABLE item_groups AS
+                    SELECT MIN(id) AS keep_id, job_id, name, destination, COUNT(*) AS quantity FROM job_items
+                    WHERE status = '%s' AND claimed_by IS NULL
+                    GROUP BY job_id, name, destination HAVING COUNT(*) > 1""" % STATUS_INCOMPLETE)
+    conn.execute('UPDATE job_items SET quantity = (SELECT quantity FROM item_groups WHERE keep_id = job_items.id) '
+                 'WHERE id IN (SELECT keep_id FROM item_groups)')
+    conn.execute('UPDATE pick_journal SET job_item_id = (SELECT keep_id FROM (%s) WHERE id = pick_journal.job_item_id) '
+                 'WHERE job_item_id IN (SELECT id FROM (%s))' % (_DUPLICATE_ITEMS, _DUPLICATE_ITEMS))
+    merged = conn.execute('DELETE FROM job_items WHERE id IN (SELECT id FROM (%s))' % _DUPLICATE_ITEMS).rowcount
+    conn.execute('DROP TABLE item_groups')
+    if merged > 0:
+        _logger.info('Merged %d duplicate item rows into quantities', merged)
+
+
+# Order pending jobs are scheduled in, matched by the jobs_schedule index so no sort is needed
+SCHEDULE_ORDER = 'priority DESC, deadline IS NULL, deadline, id'
+
+
+def _migrate_to_5(conn):
+    """
+    Internal facing function to add job deadlines and index the schedule order
+    """
+    conn.execute('ALTER TABLE jobs ADD COLUMN deadline REAL')
+    conn.execute('DROP INDEX jobs_status_priority')
+    conn.execute('CREATE INDEX jobs_schedule ON jobs(status, %s)' % SCHEDULE_ORDER)
+
+
+# (version, step) in order. A step moves a database from the previous version to its version
+MIGRATIONS = [
+    (1, _migrate_to_1),
+    (2, _migrate_to_2),
+    (3, _migrate_to_3),
+    (4, _migrate_to_4),
+    (5, _migrate_to_5),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print("Syntax: python -m SQL_Driver.Schema DB_FILE [DB_FILE ...]")
+        sys.exit(1)
+
+    logging.basicConfig(level=logging.INFO)
+    for db_file in sys.argv[1:]:
+        shutil.copyfile(db_file, db_file + '.bak')
+        connection = sqlite3.connect(db_file)
+        old_version = migrate(connection)
+        print("{0}: schema version {1} -> {2} (backup: {0}.bak)".format(db_file, old_version, get_version(connection)))
+        connection.close()
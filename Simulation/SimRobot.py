@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+"""
+--------------------------------------------------------------------
+Michigan  Technological University: Blue Marble Security Enterprise
+--------------------------------------------------------------------
+
+Simulated Niryo arm with the subset of the NiryoRobot interface used by
+the pick loop. Every command blocks for as long as the real arm would
+take, modelled from the distance travelled and the arm speed.
+
+SimRobot.py
+Author: Blue Marble Security Enterprise
+Date Last Modified: 10/19/2026
+"""
+
+__author__ = 'Blue Marble Security Enterprise'
+__version__ = '1.0'
+
+import math
+import time
+import logging
+import threading
+
+MAX_LINEAR_VELOCITY = 0.25      # Linear speed (m/s) of the tool at 100% arm velocity
+STOP_TIME = 0.3                 # Time (s) lost accelerating and decelerating for every full stop
+GRIPPER_TIME = 0.5              # Time (s) to open or close the gripper
+COMMAND_LATENCY = 0.02          # Round trip time (s) of one command over TCP
+CALIBRATION_TIME = 10.0         # Time (s) for an auto calibration
+HOME_POSE = [0.12, 0.0, 0.15, 0.0, 1.57, 0.0]
+
+
+class SimRobot:
+    """
+    Simulated NiryoRobot
+    """
+
+    def __init__(self, table=None, time_scale=1.0, start_pose=HOME_POSE, arm_to_camera=None):
+        """
+        Constructor
+        :param table:           A SimTable the gripper interacts with (None - the gripper grabs nothing)
+        :param time_scale:      Multiplier applied to every modelled duration before sleeping (0 - do not sleep)
+        :param start_pose:      The pose the arm starts at
+        :param arm_to_camera:   This arm's (pose_x, pose_y) -> camera pixel mapping when several arms share a table
+                                (None - the table's mapping)
+        """
+        self._logger = logging.getLogger('GM_Pick_Point.' + self.__class__.__name__)
+        self._table = table
+        self._arm_to_camera = arm_to_camera
+        self._time_scale = time_scale
+        self._pose = list(start_pose)
+        self._velocity_percentage = 100
+        self._calibrated = False
+
+        self._stats_lock = threading.Lock()
+        self._num_commands = 0
+        self._motion_time = 0.0
+        self._gripper_time = 0.0
+
+    def _run_command(self, duration, is_motion):
+        """
+        Internal facing function to account for and block on one command
+        :param duration:    Modelled execution time (s) of the command, excluding latency
+        :param is_motion:   True - the command moves the arm, False - the command is a gripper action
+        """
+        with self._stats_lock:
+            self._num_commands += 1
+            if is_motion:
+                self._motion_time += duration
+            else:
+                self._gripper_time += duration
+
+        delay = (duration + COMMAND_LATENCY) * self._time_scale
+        if delay > 0:
+            time.sleep(delay)
+
+    def _get_travel_time(self, poses):
+        """
+        Internal facing function to model the time to move through a list of poses without stopping in between
+        :param poses: a list of poses [x, y, z, roll, pitch, yaw]
+        :return: time (s)
+        """
+        velocity = MAX_LINEAR_VELOCITY * self._velocity_percentage / 100.0
+        distance = 0.0
+        position = self._pose
+        for pose in poses:
+            distance += math.sqrt(sum((pose[i] - position[i]) ** 2 for i in range(3)))
+            position = pose
+        return distance / velocity + STOP_TIME
+
+    def calibrate_auto(self):
+        if not self._calibrated:
+            self._run_command(CALIBRATION_TIME, True)
+            self._calibrated = True
+
+    def need_calibration(self):
+        return not self._calibrated
+
+    def set_arm_max_velocity(self, percentage_speed):
+        self._velocity_percentage = max(1, min(100, percentage_speed))
+
+    def get_pose(self):
+        return list(self._pose)
+
+    def move_pose(self, *args):
+        pose = list(args[0]) if len(args) == 1 else list(args)
+        self._run_command(self._get_travel_time([pose]), True)
+        self._pose = pose
+
+    def execute_trajectory_from_poses(self, list_poses, dist_smoothing=0.0):
+        poses = [list(pose) for pose in list_poses]
+        self._run_command(self._get_travel_time(poses), True)
+        self._pose = poses[-1]
+
+    def grasp_with_tool(self):
+        self._run_command(GRIPPER_TIME, False)
+        if self._table is not None:
+            self._table.grasp(self._pose[0], self._pose[1], self, self._arm_to_camera)
+
+    def release_with_tool(self):
+        self._run_command(GRIPPER_TIME, False)
+        if self._table is not None:
+            self._table.release(self._pose[0], self._pose[1], self)
+
+    def close_connection(self):
+        self._logger.debug('Connection closed')
+
+    def get_stats(self):
+        """
+        Get the modelled time spent on each kind of command
+        :return: dict with num_commands, motion_time, and gripper_time
+        """
+        with self._stats_lock:
+            result = dict(num_commands=self._num_commands,
+                          motion_time=self._motion_time,
+                          gripper_time=self._gripper_time)
+        return result
@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+"""
+--------------------------------------------------------------------
+Michigan  Technological University: Blue Marble Security Enterprise
+--------------------------------------------------------------------
+
+Shared state of the simulated work table: the items lying on it, in
+FLIR camera pixel coordinates, and what the simulated arm has picked
+
+SimTable.py
+Author: Blue Marble Security Enterprise
+Date Last Modified: 10/19/2026
+"""
+
+__author__ = 'Blue Marble Security Enterprise'
+__version__ = '1.0'
+
+import json
+import random
+import logging
+import threading
+
+from Item import Detection, LABEL_MAP_BY_NAME
+
+PART_LIST = sorted(LABEL_MAP_BY_NAME.keys())
+GRASP_RADIUS = 30               # Max distance (pixels) between the gripper and an item for a grasp to catch it
+
+
+class SimTable:
+    """
+    Thread safe set of items on the simulated table
+    """
+
+    def __init__(self, items, arm_to_camera):
+        """
+        Constructor
+        :param items:           A list of Detections on the table (camera pixel coordinates)
+        :param arm_to_camera:   A function (pose_x, pose_y) -> (camera_x, camera_y) mapping a position in the arm's
+                                frame to camera pixel coordinates
+        """
+        self._logger = logging.getLogger('GM_Pick_Point.' + self.__class__.__name__)
+        self._items = list(items)
+        self._arm_to_camera = arm_to_camera
+        self._held_items = dict()       # gripper -> the Detection it holds
+        self._placed_items = []
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def from_file(path, arm_to_camera):
+        """
+        Load a recorded table layout
+        :param path:            JSON file containing a list of {"item_type", "x", "y", "rot"}
+        :param arm_to_camera:   see the constructor
+        :return: a SimTable
+        """
+        with open(path) as layout_file:
+            layout = json.load(layout_file)
+        items = [Detection.from_name(i['item_type'], i['x'], i['y'], rot=i.get('rot', 0)) for i in layout]
+        return SimTable(items, arm_to_camera)
+
+    @staticmethod
+    def random(num_items, bounds, arm_to_camera, seed=None):
+        """
+        Scatter random parts inside the pickable area
+        :param num_items:       The number of items to place
+        :param bounds:          Dict with the north, east, south, and west bounds in camera pixels
+        :param arm_to_camera:   see the constructor
+        :param seed:            Random seed for a repeatable layout
+        :return: a SimTable
+        """
+        rng = random.Random(seed)
+        items = []
+        for _ in range(num_items):
+            items.append(Detection.from_name(rng.choice(PART_LIST),
+                                             int(rng.uniform(bounds['west'], bounds['east'])),
+                                             int(rng.uniform(bounds['north'], bounds['south'])),
+                                             rot=rng.randint(0, 1)))
+        return SimTable(items, arm_to_camera)
+
+    def get_items(self):
+        """
+        Get every item currently on the table
+        :return: a list of Detections
+        """
+        with self._lock:
+            result = list(self._items)
+        return result
+
+    def get_num_items(self):
+        """
+        :return: the number of items still on the table
+        """
+        with self._lock:
+            result = len(self._items)
+        return result
+
+    def get_placed_items(self):
+        """
+        :return: a list of (Detection, drop off position) for every item that was dropped off
+        """
+        with self._lock:
+            result = list(self._placed_items)
+        return result
+
+    def grasp(self, pose_x, pose_y, holder=None, arm_to_camera=None):
+        """
+        Close the gripper at a position and pick up the nearest item if it is close enough
+        :param pose_x:          X of the gripper in the arm's frame
+        :param pose_y:          Y of the gripper in the arm's frame
+        :param holder:          The gripper grasping (lets several arms share the table)
+        :param arm_to_camera:   The arm's own mapping to camera pixels (None - the table's mapping)
+        :return: the grasped Detection or None
+        """
+        if arm_to_camera is None:
+            arm_to_camera = self._arm_to_camera
+        camera_x, camera_y = arm_to_camera(pose_x, pose_y)
+        with self._lock:
+            best_item = None
+            best_distance = GRASP_RADIUS
+            for item in self._items:
+                distance = ((item.x - camera_x) ** 2 + (item.y - camera_y) ** 2) ** 0.5
+                if distance <= best_distance:
+                    best_item = item
+                    best_distance = distance
+
+            if best_item is not None:
+                self._items.remove(best_item)
+            self._held_items[holder] = best_item
+
+        if best_item is None:
+            self._logger.debug('Grasp at (%0.3f, %0.3f) missed', pose_x, pose_y)
+        return best_item
+
+    def release(self, pose_x, pose_y, holder=None):
+        """
+        Open the gripper at a position, dropping whatever it holds
+        :param pose_x: X of the gripper in the arm's frame
+        :param pose_y: Y of the gripper in the arm's frame
+        :param holder: The gripper releasing
+        """
+        with self._lock:
+            held_item = self._held_items.pop(holder, None)
+            if held_item is not None:
+                self._placed_items.append((held_item, (pose_x, pose_y)))
@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+"""
+--------------------------------------------------------------------
+Michigan  Technological University: Blue Marble Security Enterprise
+--------------------------------------------------------------------
+
+Simulated VisionThread that "detects" the items of a SimTable, with an
+optional replayed camera supplying the images
+
+SimVisionThread.py
+Author: Blue Marble Security Enterprise
+Date Last Modified: 10/19/2026
+"""
+
+__author__ = 'Blue Marble Security Enterprise'
+__version__ = '1.0'
+
+import time
+import logging
+import threading
+import traceback
+
+from Item import DetectionBatch
+
+FRAME_TIME = 0.15               # Time (s) for the real vision thread to capture and process one frame
+
+
+class SimVisionThread(threading.Thread):
+    """
+    Simulated VisionThread
+    """
+
+    def __init__(self, table, camera=None, time_scale=1.0):
+        """
+        Constructor
+        :param table:       The SimTable to detect items on
+        :param camera:      A CameraDriver to take the images from (None - no images)
+        :param time_scale:  Multiplier applied to the modelled frame time
+        """
+        super(SimVisionThread, self).__init__()
+        self.daemon = True
+
+        self._logger = logging.getLogger('GM_Pick_Point.' + self.__class__.__name__)
+        self._terminate_thread_event = threading.Event()
+        self._table = table
+        self._camera = camera
+        self._frame_time = FRAME_TIME * time_scale
+
+        self._camera_result = None
+        self._camera_result_lock = threading.Lock()
+        self._detection_batch = DetectionBatch.from_detections(table.get_items())
+        self._detection_batch_lock = threading.Lock()
+        self._frame_id = 0
+        self._visualization_settings = None
+        self._occupancy_check = None
+        self._num_skipped = 0
+
+    def run(self):
+        """
+        Main thread function
+        """
+        self._logger.debug('Starting Thread')
+        try:
+            while not self._terminate_thread_event.is_set():
+                start_time = time.time()
+                if self._camera is not None:
+                    image = self._camera.get_image(1)[0]
+                    with self._camera_result_lock:
+                        self._camera_result = image
+
+                self._frame_id += 1
+                if self._occupancy_check is not None and not self._occupancy_check():
+                    self._num_skipped += 1
+                    batch = DetectionBatch.empty(self._frame_id, start_time)
+                else:
+                    batch = DetectionBatch.from_detections(self._table.get_items(), self._frame_id, start_time)
+                with self._detection_batch_lock:
+                    self._detection_batch = batch
+
+                self._terminate_thread_event.wait(max(0.0, self._frame_time - (time.time() - start_time)))
+        except Exception:
+            tb = traceback.format_exc()
+            self._logger.error('Unhandled Exception:\n%s', str(tb))
+        self._logger.debug('Terminated Thread')
+
+    def retrieve_images(self):
+        with self._camera_result_lock:
+            result = self._camera_result
+        return result
+
+    def get_items(self):
+        return self.get_detection_batch().detections
+
+    def get_detection_batch(self):
+        with self._detection_batch_lock:
+            result = self._detection_batch
+        return result
+
+    def set_visualization_settings(self, display_results, label_to_show, max_labels, display_class_name,
+                                   display_score):
+        self._visualization_settings = (display_results, label_to_show, max_labels, display_class_name,
+                                        display_score)
+
+    def set_occupancy_check(self, occupancy_check):
+        self._occupancy_check = occupancy_check
+
+    def get_num_skipped(self):
+        """
+        :return: the number of frames inference was skipped for because the table was empty
+        """
+        return self._num_skipped
+
+    def terminate_thread(self):
+        self._logger.debug("Requesting Termination")
+        self._terminate_thread_event.set()
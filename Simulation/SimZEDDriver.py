@@ -0,0 +1,196 @@
+#!/usr/bin/env python
+"""
+--------------------------------------------------------------------
+Michigan  Technological University: Blue Marble Security Enterprise
+--------------------------------------------------------------------
+
+Simulated ZED Mini depth sensor that serves recorded depth maps
+
+Like the ZEDMiniDriver, depth maps are grabbed on a
+DepthAcquisitionThread (one every modelled grab time) and height queries
+are answered from the latest one. With a time scale of 0 there is no
+grab time to hide, queries take the next depth map directly. Heights are
+measured from a DepthBackground, by default a flat table at DESK_DEPTH.
+The recorded depth maps can be fed through a DepthAccumulator like the
+real sensor's grabs.
+
+SimZEDDriver.py
+Author: Blue Marble Security Enterprise
+Date Last Modified: 10/19/2026
+"""
+
+__author__ = 'Blue Marble Security Enterprise'
+__version__ = '1.0'
+
+import os
+import glob
+import time
+import logging
+
+import numpy as np
+
+from DepthAcquisition import DepthAcquisitionThread, DepthImageWriter, get_roi_statistics, get_heights
+from DepthAccumulator import DepthAccumulator
+from DepthBackground import DepthBackground, BACKGROUND_FRAMES
+
+# Constants in meters (same as ZEDMiniDriver)
+DESK_DEPTH = 0.83               # Desk depth from sensor
+ARM_OFFSET = 0.1                # Arm offset for correct picking
+ITEM_THICKNESS = 0.02           # Depth of the items in the synthetic depth map
+DEPTH_MAP_SIZE = (720, 1280)    # Rows, cols of a HD720 depth map
+GRAB_TIME = 0.066               # Time (s) for the real sensor to grab and compute one QUALITY depth frame
+MAX_DEPTH_AGE = 0.2             # Max seconds (unscaled) since a depth map was grabbed for it to answer a query
+
+
+class SimZEDDriver:
+    """
+    Simulated ZEDMiniDriver
+    """
+
+    def __init__(self, depth_dir=None, time_scale=1.0, debug_image_dir=None, debug_sample_interval=1,
+                 background_file=None, accumulate=False):
+        """
+        Constructor
+        :param depth_dir:               Directory of recorded depth maps saved as .npy arrays (meters), served in
+                                        name order. None - serve a flat table ITEM_THICKNESS below the desk depth
+        :param time_scale:              Multiplier applied to the modelled grab time before sleeping (0 - do not sleep)
+        :param debug_image_dir:         Directory to save depth map images of the queries in (None - no images)
+        :param debug_sample_interval:   Save the depth map of one of every this many height queries
+        :param background_file:         .npy of the empty table's depths (None - a flat table at DESK_DEPTH)
+        :param accumulate:              True - answer queries from a DepthAccumulator's running estimate
+        """
+        self._logger = logging.getLogger('GM_Pick_Point.' + self.__class__.__name__)
+        self._time_scale = time_scale
+        self._num_captures = 0
+
+        self._depth_maps = []
+        if depth_dir is not None:
+            for path in sorted(glob.glob(os.path.join(depth_dir, '*.npy'))):
+                self._depth_maps.append(np.load(path))
+            self._logger.info('Loaded %d recorded depth maps', len(self._depth_maps))
+
+        if len(self._depth_maps) == 0:
+            self._depth_maps.append(np.full(DEPTH_MAP_SIZE, DESK_DEPTH - ITEM_THICKNESS, dtype=np.float32))
+
+        self._background_file = background_file
+        self._has_background = background_file is not None and os.path.exists(background_file)
+        if self._has_background:
+            self._background = DepthBackground.load(background_file)
+        else:
+            self._background = DepthBackground(np.full(self._depth_maps[0].shape, DESK_DEPTH, dtype=np.float32))
+
+        self._image_writer = None
+        if debug_image_dir is not None:
+            self._image_writer = DepthImageWriter(debug_image_dir, debug_sample_interval)
+            self._image_writer.start()
+
+        self._accumulator = DepthAccumulator() if accumulate else None
+        self._acquisition_thread = None
+        if time_scale > 0:
+            self._acquisition_thread = DepthAcquisitionThread(self.get_depth_map, name='SimZEDAcquisition',
+                                                              accumulator=self._accumulator)
+            self._acquisition_thread.start()
+
+    def get_depth_map(self):
+        """
+        Grab the next recorded depth map
+        :return: a 2D array of depths (meters)
+        """
+        if self._time_scale > 0:
+            time.sleep(GRAB_TIME * self._time_scale)
+        depth_map = self._depth_maps[self._num_captures % len(self._depth_maps)]
+        self._num_captures += 1
+        return depth_map
+
+    def get_latest_depth(self):
+        """
+        Get the latest depth map, waits for a new one if it is older than the modelled max age
+        :return: (2D array of depths (meters), time.time() it was grabbed at)
+        """
+        depth_map, _, timestamp = self._get_latest_valid()
+        return depth_map, timestamp
+
+    def get_valid_mask(self):
+        """
+        Get the validity mask of the latest depth map
+        :return: 2D bool array, True for the measured depths (False for holes and filled pixels)
+        """
+        _, valid_mask, _ = self._get_latest_valid()
+        return valid_mask
+
+    def _get_latest_valid(self):
+        """
+        Internal facing function to get the latest depth map with its validity mask
+        :return: (2D array of depths (meters), 2D bool array, time.time() it was grabbed at)
+        """
+        if self._acquisition_thread is not None:
+            return self._acquisition_thread.get_latest_valid(MAX_DEPTH_AGE * self._time_scale)
+
+        depth_map = self.get_depth_map()
+        if self._accumulator is not None:
+            depth_map, valid_mask = self._accumulator.update(depth_map)
+        else:
+            valid_mask = np.isfinite(depth_map)
+        return depth_map, valid_mask, time.time()
+
+    def get_depth_statistics(self, boxes):
+        """
+        Get the depth statistics of many boxes from one depth map
+        :param boxes: Nx4 array of (left, top, right, bottom) in the depth map's pixels
+        :return: N array of ROI_STATS_DTYPE (see DepthAcquisition)
+        """
+        depth_map, valid_mask, _ = self._get_latest_valid()
+        stats = get_roi_statistics(depth_map, boxes, self._background.depth_map, valid_mask=valid_mask)
+
+        if self._image_writer is not None:
+            self._image_writer.submit(depth_map, boxes=boxes)
+        return stats
+
+    def get_object_heights(self, boxes):
+        """
+        Collects the heights of every object in the picking area from one depth map
+        :param boxes: Nx4 array of (left, top, right, bottom) of the objects in the depth map's pixels
+        :return: N array of heights (meters) for the arm to pick at, depth holes read as the desk
+        """
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        return get_heights(self.get_depth_statistics(boxes), ARM_OFFSET)
+
+    def get_object_height(self, x: float, y: float) -> float:
+        """Collects the height of an object in the picking area"""
+        return float(self.get_object_heights([x, y, x, y])[0])
+
+    def has_background(self):
+        """
+        :return: True if heights are measured from a captured depth background
+        """
+        return self._has_background
+
+    def is_table_occupied(self):
+        """
+        Check the latest depth map for anything standing on the table
+        :return: True if the table is occupied
+        """
+        depth_map, _ = self.get_latest_depth()
+        return self._background.is_occupied(depth_map)
+
+    def capture_background(self, num_frames=BACKGROUND_FRAMES):
+        """
+        Average the next depth maps into the background and save it
+        :param num_frames: Depth maps to average
+        """
+        depth_maps = [self.get_depth_map() for _ in range(num_frames)]
+        self._background = DepthBackground.build(depth_maps, DESK_DEPTH)
+        if self._background_file is not None:
+            self._background.save(self._background_file)
+        self._has_background = True
+
+    def close(self):
+        """
+        Stop grabbing depth
+        """
+        if self._acquisition_thread is not None:
+            self._acquisition_thread.terminate_thread()
+            self._acquisition_thread.join()
+        if self._image_writer is not None:
+            self._image_writer.terminate_thread()
+            self._image_writer.join()
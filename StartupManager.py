@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+"""
+--------------------------------------------------------------------
+Michigan  Technological University: Blue Marble Security Enterprise
+--------------------------------------------------------------------
+
+Brings up the subsystems of the cell concurrently. Every component is
+created on its own thread as soon as the components it depends on are
+up, and a per-component timeline is logged once everything is started.
+
+Usage:
+    startup = StartupManager()
+    startup.add('robot', connect_robot)
+    startup.add('motion', lambda robot: TrajectoryDriver(robot), depends=('robot',))
+    components = startup.run()
+
+StartupManager.py
+Author: Blue Marble Security Enterprise
+Date Last Modified: 10/19/2026
+"""
+
+__author__ = 'Blue Marble Security Enterprise'
+__version__ = '1.0'
+
+import time
+import logging
+import threading
+import traceback
+from collections import OrderedDict
+
+from CycleTracer import TRACER
+
+
+class _Component:
+    """
+    One subsystem to start
+    """
+
+    def __init__(self, name, factory, depends):
+        self.name = name
+        self.factory = factory
+        self.depends = tuple(depends)
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.start_time = None
+        self.end_time = None
+        self.status = 'pending'         # pending, ok, failed, skipped
+
+
+class StartupManager:
+    """
+    Dependency ordered, concurrent initializer
+    """
+
+    def __init__(self):
+        self._logger = logging.getLogger('GM_Pick_Point.' + self.__class__.__name__)
+        self._components = OrderedDict()
+        self._start_time = None
+
+    def add(self, name, factory, depends=()):
+        """
+        Register a component
+        :param name:    Unique name of the component
+        :param factory: Function creating the component, called with the results of its dependencies (in order)
+        :param depends: Names of the components that have to be up before this one is created
+        """
+        if name in self._components:
+            raise ValueError('Component %s added twice' % name)
+        for dependency in depends:
+            if dependency not in self._components:
+                raise ValueError('%s depends on %s, which has not been added' % (name, dependency))
+        self._components[name] = _Component(name, factory, depends)
+
+    def run(self):
+        """
+        Start every component and wait for all of them
+        If a component fails its dependents are skipped and the first error is raised once every thread is done.
+        :return: dict of component name -> whatever its factory returned
+        """
+        self._start_time = time.time()
+        threads = []
+        for component in self._components.values():
+            thread = threading.Thread(target=self._start_component, args=(component,),
+                                      name='Startup-' + component.name)
+            thread.daemon = True
+            thread.start()
+            threads.append(thread)
+
+        for thread in threads:
+            thread.join()
+
+        self._log_timeline()
+
+        for component in self._components.values():
+            if component.error is not None:
+                raise component.error
+
+        return dict((component.name, component.result) for component in self._components.values())
+
+    def get_timeline(self):
+        """
+        Get when each component started and finished, relative to the start of run()
+        :return: a list of (name, status, start seconds, end seconds) in start order
+        """
+        result = []
+        for component in self._components.values():
+            start = None if component.start_time is None else component.start_time - self._start_time
+            end = None if component.end_time is None else component.end_time - self._start_time
+            result.append((component.name, component.status, start, end))
+        result.sort(key=lambda entry: float('inf') if entry[2] is None else entry[2])
+        return result
+
+    def _start_component(self, component):
+        """
+        Startup thread function: wait for the dependencies, then create one component
+        :param component: the _Component to start
+        """
+        try:
+            dependencies = []
+            for name in component.depends:
+                dependency = self._components[name]
+                dependency.done.wait()
+                if dependency.status != 'ok':
+                    component.status = 'skipped'
+                    self._logger.error('Not starting %s, %s did not start', component.name, name)
+                    return
+                dependencies.append(dependency.result)
+
+            self._logger.debug('Starting %s', component.name)
+            component.start_time = time.time()
+            with TRACER.span('startup.' + component.name):
+                component.result = component.factory(*dependencies)
+            component.status = 'ok'
+
+        except BaseException as e:
+            component.status = 'failed'
+            component.error = e
+            self._logger.error('%s failed to start:\n%s', component.name, traceback.format_exc())
+
+        finally:
+            if component.start_time is not None:
+                component.end_time = time.time()
+            component.done.set()
+
+    def _log_timeline(self):
+        """
+        Internal facing function to log the startup timeline
+        """
+        lines = ['Startup finished in %0.2f s:' % (time.time() - self._start_time)]
+        for name, status, start, end in self.get_timeline():
+            if start is None:
+                lines.append('\t%-10s %s' % (name, status))
+            else:
+                lines.append('\t%-10s %-8s +%7.2f s -> +%7.2f s (%0.2f s)' % (name, status, start, end, end - start))
+        self._logger.info('\n'.join(lines))
@@ -0,0 +1,584 @@
+#!/usr/bin/env python
+"""
+--------------------------------------------------------------------
+Michigan  Technological University: Blue Marble Security Enterprise
+--------------------------------------------------------------------
+
+Depth from the FLIR stereo pair
+
+A StereoRectification is built once from the lens calibration of both
+cameras (calibration/calDetails.npz): stereoCalibrate finds the pose of
+the right camera, stereoRectify the rectifying rotations and projections,
+and the undistort/rectify maps are stored in OpenCV's fixed-point format
+(CV_16SC2 + an interpolation table), which cv2.remap reads faster than
+float maps and which take half the memory.
+
+The rectification is cached under RECTIFICATION_CACHE_DIR, in a
+directory named by a hash of everything it is built from (the
+calibration arrays, the square size, alpha, CACHE_VERSION and the OpenCV
+version). The maps are uncompressed .npy files loaded memory-mapped, so
+a cached rectification loads in milliseconds and only the pages of the
+maps that are remapped are read. A changed calibration gets a new key,
+a stale cache is never read.
+
+A StereoDepthEngine only rectifies and matches the part of the image the
+arm can pick from: the pick ROI is mapped into the rectified left image,
+padded by the disparity search range and the block size, and the maps
+are sliced to that window once. Every pair is then two remaps of the
+window, one StereoBM and one disparity to depth conversion with the Q
+matrix.
+
+A StereoDepthDriver grabs pairs on a DepthAcquisitionThread and answers
+height queries with the same interface as the ZEDMiniDriver, in the
+pixels of the rectified left image. Points of the FLIR image the vision
+runs on (the left camera) are mapped to them by the RegistrationMap from
+StereoRectification.get_registration(), saved with --register to
+STEREO_REGISTRATION_FILE (see load_registration()). It is kept apart
+from the camera -> ZED registration: whatever runs a StereoDepthDriver
+passes it as its camera -> depth transform (Main's camera_to_depth,
+WorkCell's camera_to_zed), the ZED Mini never reads it.
+
+To time the engine on recorded left/right pairs (see
+ReplayStereoCameraDriver):
+    python StereoDepth.py PAIR_DIR [--frames N]
+To save the FLIR -> rectified left registration:
+    python StereoDepth.py --register
+
+StereoDepth.py
+Author: Blue Marble Security Enterprise
+Date Last Modified: 10/19/2026
+"""
+
+__author__ = 'Blue Marble Security Enterprise'
+__version__ = '1.0'
+
+import os
+import time
+import shutil
+import hashlib
+import logging
+import argparse
+
+import cv2
+import numpy as np
+
+from CoordinateTransform import CoordinateTransform, RegistrationMap, CAMERA_CALIBRATION_FILE, REGISTRATION_STEP
+from DepthAcquisition import DepthAcquisitionThread, get_roi_statistics, get_heights
+from DepthAccumulator import DepthAccumulator
+from DepthBackground import DepthBackground, BACKGROUND_FRAMES
+
+# Constants in meters
+DESK_DEPTH = 0.83               # Desk depth from the FLIR pair, used until a background is captured
+ARM_OFFSET = 0.1                # Arm offset for correct picking
+SQUARE_SIZE = 0.025             # Side of a calibration chessboard square, the unit of calDetails' object points
+
+STEREO_BACKGROUND_FILE = os.path.join('calibration', 'stereo_depth_background.npy')
+STEREO_REGISTRATION_FILE = os.path.join('calibration', 'flir_to_rectified_map.npz')   # FLIR -> rectified left map
+RECTIFICATION_CACHE_DIR = os.path.join('calibration', 'rectification_cache')   # Cached rectifications, by hash
+CACHE_VERSION = 1               # Version of the cache layout, part of the hash
+PICK_ROI = (200, 150, 1080, 870)    # (left, top, right, bottom) FLIR pixels the arm can pick from
+RECTIFY_ALPHA = -1              # stereoRectify free scaling (-1 - default, 0 - valid pixels only, 1 - all pixels)
+MIN_DISPARITY = 0               # Smallest disparity (pixels) searched
+NUM_DISPARITIES = 128           # Disparities searched, a multiple of 16 (hand tuned depthmap_128_11.png)
+BLOCK_SIZE = 11                 # Side (pixels) of the matched blocks, odd
+SPECKLE_WINDOW_SIZE = 45        # Max size (pixels) of a disparity blob filtered as speckle
+SPECKLE_RANGE = 16              # Max disparity variation inside a connected blob
+MAX_DEPTH_AGE = 0.2             # Max seconds since a pair was grabbed for it to answer a height query
+ACCUMULATE_DEPTH = True         # True - answer queries from the running estimate, False - from the latest pair
+
+TERMINATION_CRITERIA = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 30, 0.001)
+MAP_FILES = ('left_map', 'left_table', 'right_map', 'right_table')     # .npy files of a cached rectification
+PARAMS_FILE = 'params.npz'      # Small matrices of a cached rectification
+
+
+class StereoRectification:
+    """
+    Fixed-point undistort/rectify maps of a calibrated camera pair
+    """
+
+    def __init__(self, left_maps, right_maps, q_matrix, image_size, camera_matrix, dist_coeffs, rectification,
+                 projection, valid_rois=None):
+        """
+        Constructor
+        :param left_maps:       (CV_16SC2 map, CV_16UC1 interpolation table) of the left camera, float (x, y) maps
+                                are converted
+        :param right_maps:      (CV_16SC2 map, CV_16UC1 interpolation table) of the right camera, float (x, y) maps
+                                are converted
+        :param q_matrix:        4x4 disparity to depth matrix
+        :param image_size:      (width, height) of the images
+        :param camera_matrix:   3x3 left camera matrix
+        :param dist_coeffs:     Left lens distortion coefficients
+        :param rectification:   3x3 rectifying rotation of the left camera
+        :param projection:      3x4 projection of the rectified left camera
+        :param valid_rois:      ((x, y, w, h) of the left, (x, y, w, h) of the right) rectified pixels that are all
+                                valid, None - the whole images
+        """
+        self.left_maps = to_fixed_point(*left_maps)
+        self.right_maps = to_fixed_point(*right_maps)
+        self.q_matrix = np.asarray(q_matrix, dtype=np.float64)
+        self.image_size = tuple(int(size) for size in image_size)
+        self.camera_matrix = np.asarray(camera_matrix, dtype=np.float64)
+        self.dist_coeffs = np.asarray(dist_coeffs, dtype=np.float64)
+        self.rectification = np.asarray(rectification, dtype=np.float64)
+        self.projection = np.asarray(projection, dtype=np.float64)
+        if valid_rois is None:
+            valid_rois = ((0, 0) + self.image_size, (0, 0) + self.image_size)
+        self.valid_rois = tuple(tuple(int(value) for value in roi) for roi in valid_rois)
+
+    @staticmethod
+    def from_stereo(camera_matrix1, dist_coeffs1, camera_matrix2, dist_coeffs2, rotation, translation, image_size,
+                    alpha=RECTIFY_ALPHA):
+        """
+        Build the rectification of a camera pair with a known relative pose
+        :param camera_matrix1:  3x3 left camera matrix
+        :param dist_coeffs1:    Left lens distortion coefficients
+        :param camera_matrix2:  3x3 right camera matrix
+        :param dist_coeffs2:    Right lens distortion coefficients
+        :param rotation:        3x3 rotation from the left to the right camera
+        :param translation:     Translation (meters) from the left to the right camera
+        :param image_size:      (width, height) of the images
+        :param alpha:           stereoRectify free scaling
+        :return: a StereoRectification
+        """
+        image_size = tuple(int(size) for size in image_size)
+        rotation = np.asarray(rotation, dtype=np.float64).reshape(3, 3)
+        translation = np.asarray(translation, dtype=np.float64).reshape(3, 1)
+        rect1, rect2, proj1, proj2, q_matrix, roi1, roi2 = cv2.stereoRectify(
+            camera_matrix1, dist_coeffs1, camera_matrix2, dist_coeffs2, image_size, rotation, translation,
+            flags=cv2.CALIB_ZERO_DISPARITY, alpha=alpha)
+        left_maps = cv2.initUndistortRectifyMap(camera_matrix1, dist_coeffs1, rect1, proj1, image_size, cv2.CV_16SC2)
+        right_maps = cv2.initUndistortRectifyMap(camera_matrix2, dist_coeffs2, rect2, proj2, image_size,
+                                                 cv2.CV_16SC2)
+        return StereoRectification(left_maps, right_maps, q_matrix, image_size, camera_matrix1, dist_coeffs1, rect1,
+                                   proj1, (roi1, roi2))
+
+    @staticmethod
+    def from_calibration(path=CAMERA_CALIBRATION_FILE, square_size=SQUARE_SIZE, alpha=RECTIFY_ALPHA):
+        """
+        Calibrate the pair's relative pose from the chessboard views saved with the lens calibration
+        :param path:        .npz with allObjPoints, imgpoints1/2, mtx1/2, dist1/2 and size
+        :param square_size: Side (meters) of a chessboard square
+        :param alpha:       stereoRectify free scaling
+        :return: a StereoRectification
+        """
+        logger = logging.getLogger('GM_Pick_Point.StereoRectification')
+        calibration = np.load(path)
+        image_size = (int(calibration['size'][1]), int(calibration['size'][2]))
+        object_points = (calibration['allObjPoints'] * square_size).astype(np.float32)
+
+        retval, mtx1, dist1, mtx2, dist2, rotation, translation, _, _ = cv2.stereoCalibrate(
+            object_points, calibration['imgpoints1'].astype(np.float32),
+            calibration['imgpoints2'].astype(np.float32), calibration['mtx1'], calibration['dist1'],
+            calibration['mtx2'], calibration['dist2'], image_size, flags=cv2.CALIB_FIX_INTRINSIC,
+            criteria=TERMINATION_CRITERIA)
+        logger.info('Stereo calibration RMS reprojection error: %0.3f pixels, baseline %0.3f m',
+                    retval, float(np.linalg.norm(translation)))
+        return StereoRectification.from_stereo(mtx1, dist1, mtx2, dist2, rotation, translation, image_size, alpha)
+
+    @staticmethod
+    def from_cache(path=CAMERA_CALIBRATION_FILE, square_size=SQUARE_SIZE, alpha=RECTIFY_ALPHA,
+                   cache_dir=RECTIFICATION_CACHE_DIR):
+        """
+        Load the rectification of a calibration from the cache, building and caching it if it is not there
+        :param path:        .npz with allObjPoints, imgpoints1/2, mtx1/2, dist1/2 and size
+        :param square_size: Side (meters) of a chessboard square
+        :param alpha:       stereoRectify free scaling
+        :param cache_dir:   Directory of the cached rectifications
+        :return: a StereoRectification
+        """
+        logger = logging.getLogger('GM_Pick_Point.StereoRectification')
+        directory = os.path.join(cache_dir, get_calibration_key(path, square_size, alpha))
+        if os.path.exists(directory):
+            logger.info('Loading the cached rectification %s', directory)
+            return StereoRectification.load(directory)
+
+        logger.info('No cached rectification for %s, building it...', path)
+        rectification = StereoRectification.from_calibration(path, square_size, alpha)
+        rectification.save(directory)
+        return StereoRectification.load(directory)
+
+    def save(self, directory):
+        """
+        Save the rectification as uncompressed, memory-mappable arrays
+        The files are written to a temporary directory renamed into place, a directory that exists is complete.
+        :param directory: directory to write, replaced if it exists
+        """
+        temp_directory = '%s.tmp%d' % (directory, os.getpid())
+        os.makedirs(temp_directory, exist_ok=True)
+        for name, array in zip(MAP_FILES, self.left_maps + self.right_maps):
+            np.save(os.path.join(temp_directory, name + '.npy'), array)
+        np.savez(os.path.join(temp_directory, PARAMS_FILE), version=np.array(CACHE_VERSION), q_matrix=self.q_matrix,
+                 image_size=np.array(self.image_size), camera_matrix=self.camera_matrix,
+                 dist_coeffs=self.dist_coeffs, rectification=self.rectification, projection=self.projection,
+                 valid_rois=np.array(self.valid_rois))
+
+        if os.path.exists(directory):
+            shutil.rmtree(directory)
+        os.rename(temp_directory, directory)
+
+    @staticmethod
+    def load(directory):
+        """
+        Load a rectification saved by save(), the maps memory-mapped read only
+        :param directory: directory to read
+        :return: a StereoRectification
+        """
+        with np.load(os.path.join(directory, PARAMS_FILE)) as params:
+            if int(params['version']) != CACHE_VERSION:
+                raise ValueError('Rectification %s is version %d, not %d' % (directory, int(params['version']),
+                                                                             CACHE_VERSION))
+            maps = [np.load(os.path.join(directory, name + '.npy'), mmap_mode='r') for name in MAP_FILES]
+            return StereoRectification((maps[0], maps[1]), (maps[2], maps[3]), params['q_matrix'],
+                                       params['image_size'], params['camera_matrix'], params['dist_coeffs'],
+                                       params['rectification'], params['projection'], params['valid_rois'])
+
+    def rectify_points(self, points):
+        """
+        Map points of the left image to the rectified left image
+        :param points: Nx2 array of left image pixels
+        :return: Nx2 array of rectified left image pixels
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 1, 2)
+        return cv2.undistortPoints(points, self.camera_matrix, self.dist_coeffs, R=self.rectification,
+                                   P=self.projection).reshape(-1, 2)
+
+    def get_registration(self, step=REGISTRATION_STEP):
+        """
+        Tabulate the left image -> rectified left image mapping
+        :param step: Input pixels between grid points
+        :return: a RegistrationMap
+        """
+        # Undistorted pixel -> normalized ray -> rotated ray -> rectified pixel
+        matrix = self.projection[:, :3].dot(self.rectification).dot(np.linalg.inv(self.camera_matrix))
+        transform = CoordinateTransform(matrix, 'homography')
+        return RegistrationMap.build(transform, self.image_size, self.camera_matrix, self.dist_coeffs, step)
+
+
+def load_registration(rectification, path=STEREO_REGISTRATION_FILE):
+    """
+    Get the FLIR -> rectified left registration of a StereoDepthDriver's depth maps
+    :param rectification:   StereoRectification of the pair
+    :param path:            .npz saved with --register, used when it exists
+    :return: a RegistrationMap, tabulated from the rectification when none was saved
+    """
+    if path is not None and os.path.exists(path):
+        return RegistrationMap.load(path)
+    return rectification.get_registration()
+
+
+def to_fixed_point(map1, map2):
+    """
+    Convert undistort/rectify maps to the fixed-point format
+    :param map1:    CV_16SC2 map, or the float x map (or float (x, y) map with map2 None)
+    :param map2:    CV_16UC1 interpolation table, or the float y map
+    :return: (CV_16SC2 map, CV_16UC1 interpolation table), the same arrays if they are fixed-point already
+    """
+    if map1.dtype == np.int16:
+        return map1, map2
+    return cv2.convertMaps(np.asarray(map1, dtype=np.float32), None if map2 is None else
+                           np.asarray(map2, dtype=np.float32), cv2.CV_16SC2)
+
+
+def get_calibration_key(path=CAMERA_CALIBRATION_FILE, square_size=SQUARE_SIZE, alpha=RECTIFY_ALPHA):
+    """
+    Hash everything a rectification is built from
+    :param path:        .npz of the lens calibration
+    :param square_size: Side (meters) of a chessboard square
+    :param alpha:       stereoRectify free scaling
+    :return: hex digest naming the cached rectification
+    """
+    digest = hashlib.sha1()
+    with np.load(path) as calibration:
+        for name in sorted(calibration.files):
+            array = np.ascontiguousarray(calibration[name])
+            digest.update(('%s %s %s' % (name, array.dtype.str, array.shape)).encode())
+            digest.update(array.tobytes())
+    digest.update(('%r %r %d %s' % (float(square_size), float(alpha), CACHE_VERSION, cv2.__version__)).encode())
+    return digest.hexdigest()[:16]
+
+
+class StereoDepthEngine:
+    """
+    Metric depth of the pick ROI from rectified block matching
+    """
+
+    def __init__(self, rectification, roi=PICK_ROI, min_disparity=MIN_DISPARITY, num_disparities=NUM_DISPARITIES,
+                 block_size=BLOCK_SIZE, speckle_window_size=SPECKLE_WINDOW_SIZE, speckle_range=SPECKLE_RANGE):
+        """
+        Constructor
+        :param rectification:       StereoRectification of the pair
+        :param roi:                 (left, top, right, bottom) left image pixels to measure (None - whole image)
+        :param min_disparity:       Smallest disparity (pixels) searched
+        :param num_disparities:     Disparities searched, a multiple of 16
+        :param block_size:          Side (pixels) of the matched blocks, odd
+        :param speckle_window_size: Max size (pixels) of a disparity blob filtered as speckle (0 - no filtering)
+        :param speckle_range:       Max disparity variation inside a connected blob
+        """
+        self._logger = logging.getLogger('GM_Pick_Point.' + self.__class__.__name__)
+        self._rectification = rectification
+        self._q_matrix = rectification.q_matrix
+        width, height = rectification.image_size
+        self.shape = (height, width)
+
+        # Measured part of the rectified left image
+        if roi is None:
+            left, top, right, bottom = 0, 0, width, height
+        else:
+            corners = rectification.rectify_points([[roi[0], roi[1]], [roi[2], roi[1]],
+                                                    [roi[0], roi[3]], [roi[2], roi[3]]])
+            left, top = (int(value) for value in np.floor(corners.min(axis=0)))
+            right, bottom = (int(value) for value in np.ceil(corners.max(axis=0)))
+        self.roi = (max(left, 0), max(top, 0), min(right, width), min(bottom, height))
+        if self.roi[0] >= self.roi[2] or self.roi[1] >= self.roi[3]:
+            raise ValueError('Pick ROI %s is outside the rectified image' % str(roi))
+
+        # Matching window: the leftmost min_disparity + num_disparities columns of a window have no match
+        half_block = block_size // 2
+        window_left = max(self.roi[0] - min_disparity - num_disparities - half_block, 0)
+        window_top = max(self.roi[1] - half_block, 0)
+        window_right = min(self.roi[2] + half_block, width)
+        window_bottom = min(self.roi[3] + half_block, height)
+        self._window = (slice(window_top, window_bottom), slice(window_left, window_right))
+        self._roi_in_window = (slice(self.roi[1] - window_top, self.roi[3] - window_top),
+                               slice(self.roi[0] - window_left, self.roi[2] - window_left))
+
+        # Slice the maps to the window once, remap then only computes the window
+        self._left_maps = tuple(np.ascontiguousarray(rect_map[self._window]) for rect_map in rectification.left_maps)
+        self._right_maps = tuple(np.ascontiguousarray(rect_map[self._window])
+                                 for rect_map in rectification.right_maps)
+
+        self._matcher = cv2.StereoBM_create(numDisparities=num_disparities, blockSize=block_size)
+        self._matcher.setMinDisparity(min_disparity)
+        self._matcher.setSpeckleWindowSize(speckle_window_size)
+        self._matcher.setSpeckleRange(speckle_range)
+        self._min_disparity = min_disparity
+
+        self._logger.info('Measuring rectified ROI %s, matching a %dx%d window', str(self.roi),
+                          window_right - window_left, window_bottom - window_top)
+
+    def rectify(self, left_image, right_image):
+        """
+        Rectify the matching window of a pair
+        :param left_image:  Left image, grayscale or BGR
+        :param right_image: Right image, grayscale or BGR
+        :return: (rectified left window, rectified right window) grayscale
+        """
+        if left_image.ndim == 3:
+            left_image = cv2.cvtColor(left_image, cv2.COLOR_BGR2GRAY)
+        if right_image.ndim == 3:
+            right_image = cv2.cvtColor(right_image, cv2.COLOR_BGR2GRAY)
+        left_window = cv2.remap(left_image, self._left_maps[0], self._left_maps[1], cv2.INTER_LINEAR)
+        right_window = cv2.remap(right_image, self._right_maps[0], self._right_maps[1], cv2.INTER_LINEAR)
+        return left_window, right_window
+
+    def compute_disparity(self, left_image, right_image):
+        """
+        Match a pair inside the ROI
+        :param left_image:  Left image, grayscale or BGR
+        :param right_image: Right image, grayscale or BGR
+        :return: 2D float32 array of the ROI's disparities (pixels), NaN where no block matched
+        """
+        left_window, right_window = self.rectify(left_image, right_image)
+        fixed_disparity = self._matcher.compute(left_window, right_window)[self._roi_in_window]
+
+        # StereoBM returns 16ths of a pixel, unmatched blocks as (min_disparity - 1) * 16
+        disparity = np.multiply(fixed_disparity, 1.0 / 16, dtype=np.float32)
+        disparity[fixed_disparity < self._min_disparity * 16] = np.nan
+        return disparity
+
+    def compute_depth(self, left_image, right_image):
+        """
+        Measure the depth of a pair inside the ROI
+        :param left_image:  Left image, grayscale or BGR
+        :param right_image: Right image, grayscale or BGR
+        :return: a new 2D float32 array of depths (meters) the size of the rectified image, NaN outside the ROI and
+                 where no block matched
+        """
+        disparity = self.compute_disparity(left_image, right_image)
+
+        # Z = Q[2, 3] / (Q[3, 2] * d + Q[3, 3])
+        q_matrix = self._q_matrix
+        with np.errstate(divide='ignore', invalid='ignore'):
+            roi_depth = q_matrix[2, 3] / (q_matrix[3, 2] * disparity + q_matrix[3, 3])
+            roi_depth[~(roi_depth > 0)] = np.nan
+
+        depth_map = np.full(self.shape, np.nan, dtype=np.float32)
+        depth_map[self.roi[1]:self.roi[3], self.roi[0]:self.roi[2]] = roi_depth
+        return depth_map
+
+
+class StereoDepthDriver:
+    """
+    Height queries answered from the FLIR stereo pair, a stand-in for the ZEDMiniDriver
+    """
+
+    def __init__(self, grab_pair, engine, background_file=STEREO_BACKGROUND_FILE, accumulate=ACCUMULATE_DEPTH,
+                 max_depth_age=MAX_DEPTH_AGE):
+        """
+        Constructor
+        :param grab_pair:       Function that waits for the next pair and returns (left image, right image),
+                                None if the capture failed
+        :param engine:          StereoDepthEngine of the pair
+        :param background_file: .npy of the empty table's depths, used when it exists
+        :param accumulate:      True - answer queries from the running estimate, False - from the latest pair
+        :param max_depth_age:   Max seconds since a pair was grabbed for it to answer a height query
+        """
+        self._logger = logging.getLogger('GM_Pick_Point.' + self.__class__.__name__)
+        self._grab_pair = grab_pair
+        self._engine = engine
+        self._max_depth_age = max_depth_age
+        self._background_file = background_file
+        self._background = DepthBackground(np.full(engine.shape, DESK_DEPTH, dtype=np.float32))
+        self._has_background = False
+
+        if background_file is not None and os.path.exists(background_file):
+            background = DepthBackground.load(background_file)
+            if background.shape == engine.shape:
+                self._background = background
+                self._has_background = True
+                self._logger.info('Loaded the depth background from %s', background_file)
+            else:
+                self._logger.error('Depth background %s is %s, not %s, using the desk depth',
+                                   background_file, background.shape, engine.shape)
+
+        self._acquisition_thread = DepthAcquisitionThread(self._grab, name='StereoAcquisition',
+                                                          accumulator=DepthAccumulator() if accumulate else None)
+        self._acquisition_thread.start()
+
+    def _grab(self):
+        """
+        Internal facing function for the acquisition thread to grab one pair and measure its depth
+        :return: a new 2D float32 array of depths (meters), None if the capture failed
+        """
+        pair = self._grab_pair()
+        if pair is None:
+            return None
+        return self._engine.compute_depth(pair[0], pair[1])
+
+    def get_latest_depth(self):
+        """
+        Get the latest depth map, waits for a new one if it is older than max_depth_age
+        :return: (2D array of depths (meters), time.time() it was grabbed at), (None, None) if no depth map yet
+        """
+        return self._acquisition_thread.get_latest(self._max_depth_age)
+
+    def get_valid_mask(self):
+        """
+        Get the validity mask of the latest depth map
+        :return: 2D bool array, True for the measured depths, None if there is no depth map
+        """
+        _, valid_mask, _ = self._acquisition_thread.get_latest_valid(self._max_depth_age)
+        return valid_mask
+
+    def get_depth_statistics(self, boxes):
+        """
+        Get the depth statistics of many boxes from one depth map
+        :param boxes: Nx4 array of (left, top, right, bottom) in the rectified left image's pixels
+        :return: N array of ROI_STATS_DTYPE (see DepthAcquisition), None if there is no depth map
+        """
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        depth_map, valid_mask, _ = self._acquisition_thread.get_latest_valid(self._max_depth_age)
+        if depth_map is None:
+            self._logger.warning('No depth map from the stereo pair, using the desk depth')
+            return None
+        return get_roi_statistics(depth_map, boxes, self._background.depth_map, valid_mask=valid_mask)
+
+    def get_object_heights(self, boxes):
+        """
+        Collects the heights of every object in the picking area from one depth map
+        :param boxes: Nx4 array of (left, top, right, bottom) of the objects in the rectified left image's pixels
+        :return: N array of heights (meters) for the arm to pick at
+        """
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        stats = self.get_depth_statistics(boxes)
+        if stats is None:
+            return np.full(len(boxes), ARM_OFFSET)
+        return get_heights(stats, ARM_OFFSET)
+
+    def get_object_height(self, x: float, y: float) -> float:
+        """Collects the height of an object in the picking area"""
+        return float(self.get_object_heights([x, y, x, y])[0])
+
+    def has_background(self):
+        """
+        :return: True if heights are measured from a captured depth background
+        """
+        return self._has_background
+
+    def is_table_occupied(self):
+        """
+        Check the latest depth map for anything standing on the table
+        :return: True if the table is occupied (or there is no depth map to tell)
+        """
+        depth_map, _ = self.get_latest_depth()
+        if depth_map is None:
+            return True
+        return self._background.is_occupied(depth_map)
+
+    def capture_background(self, num_frames=BACKGROUND_FRAMES):
+        """
+        Average the next grabbed depth maps into the background and save it, the table must be empty
+        :param num_frames: Depth maps to average
+        """
+        depth_maps = []
+        while len(depth_maps) < num_frames:
+            depth_map, _ = self._acquisition_thread.get_next(raw=True)
+            if depth_map is None:
+                raise RuntimeError('No depth map from the stereo pair')
+            depth_maps.append(depth_map)
+
+        background = DepthBackground.build(depth_maps, DESK_DEPTH)
+        if self._background_file is not None:
+            background.save(self._background_file)
+        self._background = background
+        self._has_background = True
+
+    def close(self):
+        """
+        Stop grabbing pairs
+        """
+        self._acquisition_thread.terminate_thread()
+        self._acquisition_thread.join()
+
+
+def time_engine(engine, pairs, num_frames):
+    """
+    Time the depth of recorded pairs
+    :param engine:      StereoDepthEngine
+    :param pairs:       list of (left image, right image)
+    :param num_frames:  Pairs to measure
+    :return: mean seconds per pair
+    """
+    start_time = time.time()
+    for index in range(num_frames):
+        engine.compute_depth(*pairs[index % len(pairs)])
+    return (time.time() - start_time) / num_frames
+
+
+if __name__ == '__main__':
+    from CameraDriver.ReplayCameraDriver import ReplayStereoCameraDriver
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description='Stereo depth from the FLIR pair')
+    parser.add_argument('pair_dir', nargs='?', default=None, help='directory of recorded left/right pairs to time')
+    parser.add_argument('--frames', type=int, default=50, help='pairs to time')
+    parser.add_argument('--register', action='store_true',
+                        help='save the FLIR -> rectified left registration to %s' % STEREO_REGISTRATION_FILE)
+    cmd_args = parser.parse_args()
+
+    setup_start = time.time()
+    stereo_rectification = StereoRectification.from_cache()
+    print('Rectification:  %0.3f s' % (time.time() - setup_start))
+
+    if cmd_args.register:
+        stereo_rectification.get_registration().save(STEREO_REGISTRATION_FILE)
+        print('Saved the registration to %s' % STEREO_REGISTRATION_FILE)
+
+    if cmd_args.pair_dir is not None:
+        replay = ReplayStereoCameraDriver(cmd_args.pair_dir)
+        recorded_pairs = [replay.get_pair() for _ in range(replay.get_num_pairs())]
+        roi_engine = StereoDepthEngine(stereo_rectification)
+        full_engine = StereoDepthEngine(stereo_rectification, roi=None)
+        print('Pick ROI:       %0.1f ms / pair' % (1000.0 * time_engine(roi_engine, recorded_pairs, cmd_args.frames)))
+        print('Whole image:    %0.1f ms / pair' % (1000.0 * time_engine(full_engine, recorded_pairs,
+                                                                        cmd_args.frames)))
@@ -0,0 +1,118 @@
+import unittest
+import sys
+import os
+
+sys.path.append('./..')
+
+import cv2
+import numpy as np
+
+from CoordinateTransform import CoordinateTransform, RegistrationMap, save_transforms, load_transforms
+
+CAMERA_BOUNDS = dict(north=150.0, east=1080.0, south=870.0, west=200.0)
+ARM_BOUNDS = dict(north=0.15, east=0.15, south=0.30, west=-0.15)
+
+
+class test_coordinate_transform(unittest.TestCase):
+
+    def test_from_bounds_maps_corners(self):
+        transform = CoordinateTransform.from_bounds(CAMERA_BOUNDS, ARM_BOUNDS)
+        corners = transform.apply([[200.0, 150.0], [1080.0, 870.0]])
+        np.testing.assert_allclose(corners, [[-0.15, 0.15], [0.15, 0.30]])
+
+    def test_apply_boxes_bounds_corners(self):
+        # 90 degree rotation swaps the box's width and height
+        transform = CoordinateTransform(np.array([[0.0, -1.0, 100.0], [1.0, 0.0, 0.0], [0.0, 0.0, 1.0]]))
+        boxes = transform.apply_boxes([[10.0, 20.0, 30.0, 60.0], [0.0, 0.0, 0.0, 0.0]])
+        np.testing.assert_allclose(boxes, [[40.0, 10.0, 80.0, 30.0], [100.0, 0.0, 100.0, 0.0]])
+
+    def test_fit_affine_recovers_matrix(self):
+        matrix = np.array([[0.0003, 0.00002, -0.2], [-0.00001, 0.0002, 0.12], [0.0, 0.0, 1.0]])
+        src = np.random.RandomState(0).uniform(0, 1000, (20, 2))
+        dst = CoordinateTransform(matrix).apply(src)
+        fitted = CoordinateTransform.fit(src, dst, 'affine')
+        np.testing.assert_allclose(fitted.matrix, matrix, atol=1e-9)
+        self.assertLess(fitted.rms_error, 1e-9)
+
+    def test_fit_homography_beats_affine_on_perspective(self):
+        matrix = np.array([[1.1, 0.05, 30.0], [-0.02, 0.95, 12.0], [0.0001, 0.00005, 1.0]])
+        src = np.random.RandomState(1).uniform(0, 1000, (30, 2))
+        dst = CoordinateTransform(matrix, 'homography').apply(src)
+        homography = CoordinateTransform.fit(src, dst, 'homography')
+        affine = CoordinateTransform.fit(src, dst, 'affine')
+        self.assertLess(homography.rms_error, 1e-6)
+        self.assertGreater(affine.rms_error, homography.rms_error)
+
+    def test_save_and_load(self):
+        src = np.random.RandomState(2).uniform(0, 1000, (10, 2))
+        fitted = CoordinateTransform.fit(src, src * 0.001, 'affine')
+        path = 'transforms_test.npz'
+        try:
+            save_transforms(path, dict(camera_to_arm=fitted))
+            loaded = load_transforms(path)['camera_to_arm']
+        finally:
+            os.remove(path)
+        np.testing.assert_allclose(loaded.matrix, fitted.matrix)
+        self.assertEqual(loaded.model, 'affine')
+        self.assertAlmostEqual(loaded.rms_error, fitted.rms_error)
+
+
+class test_registration_map(unittest.TestCase):
+
+    def setUp(self):
+        self.homography = CoordinateTransform(np.array([[0.9, 0.03, 40.0], [-0.01, 0.85, 25.0],
+                                                        [0.00004, 0.00002, 1.0]]), 'homography')
+        self.camera_matrix = np.array([[900.0, 0.0, 640.0], [0.0, 900.0, 512.0], [0.0, 0.0, 1.0]])
+        self.dist_coeffs = np.array([[-0.2, 0.05, 0.0, 0.0, 0.0]])
+
+    def distort(self, points):
+        # Project undistorted pixels through the lens
+        normalized = (points - self.camera_matrix[:2, 2]) / self.camera_matrix[0, 0]
+        object_points = np.column_stack([normalized, np.ones(len(points))])
+        image_points = cv2.projectPoints(object_points, np.zeros(3), np.zeros(3), self.camera_matrix,
+                                         self.dist_coeffs)[0]
+        return image_points.reshape(-1, 2)
+
+    def test_map_matches_transform(self):
+        registration = RegistrationMap.build(self.homography, (1280, 1024), step=8)
+        points = np.random.RandomState(3).uniform(0, 1280, (50, 2)) * [1.0, 0.8]
+        np.testing.assert_allclose(registration.apply(points), self.homography.apply(points), atol=0.01)
+        np.testing.assert_allclose(registration.apply((100.0, 200.0)), self.homography.apply((100.0, 200.0)),
+                                   atol=0.01)
+        self.assertIsNone(registration.rms_error)
+
+    def test_fit_removes_lens_distortion(self):
+        undistorted = np.random.RandomState(4).uniform(100, 900, (40, 2))
+        src = self.distort(undistorted)
+        dst = self.homography.apply(undistorted)
+
+        registration = RegistrationMap.fit(src, dst, (1280, 1024), self.camera_matrix, self.dist_coeffs)
+        plain = CoordinateTransform.fit(src, dst, 'homography')
+        self.assertLess(registration.rms_error, 0.05)
+        self.assertGreater(plain.rms_error, 10 * registration.rms_error)
+
+        # Error at points that were not used for the fit
+        held_out = np.random.RandomState(5).uniform(100, 900, (20, 2))
+        errors = registration.get_errors(self.distort(held_out), self.homography.apply(held_out))
+        self.assertLess(errors.max(), 0.1)
+
+    def test_apply_boxes_and_save(self):
+        registration = RegistrationMap.build(self.homography, (1280, 1024))
+        boxes = [[100.0, 100.0, 200.0, 150.0]]
+        np.testing.assert_allclose(registration.apply_boxes(boxes), self.homography.apply_boxes(boxes), atol=0.01)
+
+        registration.residuals = np.array([0.5, 1.5])
+        path = 'registration_test.npz'
+        try:
+            registration.save(path)
+            loaded = RegistrationMap.load(path)
+        finally:
+            os.remove(path)
+        np.testing.assert_array_equal(loaded.table, registration.table)
+        self.assertEqual(loaded.step, registration.step)
+        self.assertAlmostEqual(loaded.max_error, 1.5)
+        self.assertEqual(loaded.table.dtype, np.float32)
+
+
+if __name__ == '__main__':
+    unittest.main()
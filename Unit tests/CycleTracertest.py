@@ -0,0 +1,93 @@
+import unittest
+import sys
+import os
+import glob
+import json
+import shutil
+import tempfile
+import threading
+
+sys.path.append('./..')
+
+from CycleTracer import CycleTracer
+
+
+class test_cycle_tracer(unittest.TestCase):
+
+    def setUp(self):
+        self.trace_dir = tempfile.mkdtemp()
+        self.tracer = CycleTracer()
+
+    def tearDown(self):
+        self.tracer.stop()
+        shutil.rmtree(self.trace_dir, ignore_errors=True)
+
+    def _load_events(self):
+        events = []
+        for path in sorted(glob.glob(os.path.join(self.trace_dir, 'Trace - *.json'))):
+            with open(path) as trace_file:
+                events.extend(json.load(trace_file))
+        return events
+
+    def test_disabled_tracer_records_nothing(self):
+        with self.tracer.span('main.loop_delay'):
+            pass
+        self.assertEqual(self.tracer.take_events(), [])
+
+    def test_spans_from_every_thread_are_written(self):
+        self.tracer.start(self.trace_dir)
+        with self.tracer.span('main.execute_pick', job='cat', item='cat_ear', frame=3):
+            pass
+
+        def worker():
+            with self.tracer.span('vision.inference', frame=4):
+                pass
+        thread = threading.Thread(target=worker, name='Worker')
+        thread.start()
+        thread.join()
+        self.tracer.stop()
+
+        events = self._load_events()
+        spans = dict((event['name'], event) for event in events if event['ph'] == 'X')
+        self.assertEqual(spans['main.execute_pick']['args'], dict(job='cat', item='cat_ear', frame=3))
+        self.assertNotEqual(spans['main.execute_pick']['tid'], spans['vision.inference']['tid'])
+        thread_names = [event['args']['name'] for event in events if event['name'] == 'thread_name']
+        self.assertIn('Worker', thread_names)
+
+    def test_error_is_tagged(self):
+        self.tracer.start(self.trace_dir)
+        with self.assertRaises(ValueError):
+            with self.tracer.span('main.call_sql_thread'):
+                raise ValueError()
+        self.tracer.stop()
+
+        span = [event for event in self._load_events() if event['name'] == 'main.call_sql_thread'][0]
+        self.assertEqual(span['args']['error'], 'ValueError')
+
+    def test_slowest_phases_summary(self):
+        self.tracer.start(self.trace_dir)
+        self.tracer.record('robot.move_pose', 100.0, 100.5)
+        self.tracer.record('robot.move_pose', 101.0, 101.1)
+        self.tracer.record('zed.grab', 102.0, 102.05)
+        self.tracer.stop()
+
+        summaries = self.tracer.get_summaries()
+        self.assertEqual(len(summaries), 1)
+        name, count, total, longest = summaries[0][1][0]
+        self.assertEqual((name, count), ('robot.move_pose', 2))
+        self.assertAlmostEqual(total, 0.6)
+        self.assertAlmostEqual(longest, 0.5)
+
+    def test_trace_file_rotates(self):
+        self.tracer.start(self.trace_dir, max_file_size=1)
+        self.tracer.record('robot.move_pose', 100.0, 100.5)
+        self.tracer._writer._write(self.tracer.take_events())
+        self.tracer.record('robot.move_pose', 101.0, 101.5)
+        self.tracer.stop()
+
+        self.assertEqual(len(glob.glob(os.path.join(self.trace_dir, 'Trace - *.json'))), 2)
+        self.assertEqual(len([event for event in self._load_events() if event['ph'] == 'X']), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import unittest
+import sys
+import os
+import json
+import shutil
+import tempfile
+
+sys.path.append('./..')
+
+from SQL_Driver import DBManager
+from SQL_Driver.ObjectDB import ObjectDB
+
+
+class test_db_manager(unittest.TestCase):
+
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp()
+        self.db_file = os.path.join(self.work_dir, 'pickpoint.db')
+        self.conn = DBManager.connect(self.db_file)
+
+    def tearDown(self):
+        self.conn.close()
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def write_file(self, name, text):
+        path = os.path.join(self.work_dir, name)
+        with open(path, 'w') as job_file:
+            job_file.write(text)
+        return path
+
+    def get_items(self):
+        return self.conn.execute('SELECT jobs.name, jobs.priority, job_items.name, job_items.destination, '
+                                 'job_items.quantity FROM job_items JOIN jobs ON jobs.id = job_items.job_id '
+                                 'ORDER BY job_items.id').fetchall()
+
+    def test_import_csv_and_json(self):
+        csv_path = self.write_file('jobs.csv', 'job,name,destination,quantity,priority\n'
+                                               'cat,cat_ear,Cat Bin,2,1\n'
+                                               'cat,cat_food,Cat Bin,,1\n'
+                                               'cat,cat_ear,Cat Bin,1,1\n')
+        json_path = self.write_file('jobs.json', json.dumps([
+            dict(name='dog', items=[dict(name='dog_tail', destination='Dog Bin', quantity=4)])]))
+
+        jobs = DBManager.read_job_file(csv_path)
+        DBManager.read_job_file(json_path, jobs)
+        self.assertEqual(DBManager.import_jobs(self.conn, jobs), 5)
+        self.assertEqual(self.get_items(), [('cat', 1, 'cat_ear', 'Cat Bin', 3), ('cat', 1, 'cat_food', 'Cat Bin', 1),
+                                            ('dog', 0, 'dog_tail', 'Dog Bin', 4)])
+
+    def test_import_deadlines(self):
+        path = self.write_file('jobs.csv', 'job,name,deadline\n'
+                                           'cat,cat_ear,2026-10-20 08:00\n'
+                                           'dog,dog_ear,1000.5\n'
+                                           'bird,bird_wing,\n')
+        DBManager.import_files(self.conn, [path])
+        deadlines = self.conn.execute('SELECT deadline FROM jobs ORDER BY id').fetchall()
+        self.assertIsNotNone(deadlines[0][0])
+        self.assertEqual(deadlines[1:], [(1000.5,), (None,)])
+
+    def test_import_test_conditions(self):
+        path = self.write_file('run_1.txt', 'cat_eyes    2    90\n\nbird_wing    4    0\n\n')
+        DBManager.import_files(self.conn, [path])
+        self.assertEqual(self.get_items(), [('run_1', 0, 'cat_eyes', 'Cat Bin', 1),
+                                            ('run_1', 0, 'bird_wing', 'Bird Bin', 1)])
+
+    def test_import_reopens_existing_job(self):
+        DBManager.import_files(self.conn, [self.write_file('first.csv', 'job,name,priority\ncat,cat_ear,0\n')])
+        self.conn.execute("UPDATE jobs SET status = 'Complete'")
+        self.conn.commit()
+
+        path = self.write_file('second.csv', 'job,name,priority,deadline\ncat,cat_food,2,1000.5\n')
+        DBManager.import_files(self.conn, [path])
+        self.assertEqual(self.conn.execute('SELECT name, status, priority, deadline FROM jobs').fetchall(),
+                         [('cat', 'Incomplete', 2, 1000.5)])
+        self.assertEqual([item[2] for item in self.get_items()], ['cat_ear', 'cat_food'])
+
+    def test_unknown_items_are_rejected(self):
+        path = self.write_file('run_2.txt', 'cat_eyes    2    90\nbird_food    4    0\n')
+        with self.assertRaises(ValueError):
+            DBManager.read_job_file(path)
+        DBManager.import_files(self.conn, [path])
+        self.assertEqual(self.get_items(), [])
+
+    def test_insert_object_checks_the_name_and_reopens_the_job(self):
+        DBManager.create_table(self.conn, 'cat')
+        self.conn.execute("UPDATE jobs SET status = 'Complete'")
+        self.conn.commit()
+
+        DBManager.insert_object(self.conn, 'bird_food', 'Bird Bin', 'cat', 1)
+        self.assertEqual(self.get_items(), [])
+        self.assertEqual(self.conn.execute('SELECT status FROM jobs').fetchone()[0], 'Complete')
+
+        DBManager.insert_object(self.conn, 'cat_food', 'Cat Bin', 'cat', 1)
+        self.assertEqual(self.get_items(), [('cat', 0, 'cat_food', 'Cat Bin', 1)])
+        self.assertEqual(self.conn.execute('SELECT status FROM jobs').fetchone()[0], 'Incomplete')
+
+    def test_failed_import_inserts_nothing(self):
+        good = self.write_file('good.csv', 'job,name\ncat,cat_ear\n')
+        bad = self.write_file('bad.csv', 'job,name,quantity\ndog,dog_ear,many\n')
+        DBManager.import_files(self.conn, [good, bad])
+        self.assertEqual(self.get_items(), [])
+
+    def test_quantity_is_picked_item_by_item(self):
+        DBManager.create_table(self.conn, 'cat')
+        DBManager.insert_object(self.conn, 'cat_ear', 'Cat Bin', 'cat', 2)
+
+        db = ObjectDB(self.db_file)
+        item_id = db.get_object_list('cat')[0][0]
+        unit = db.claim_next_item('worker')
+        self.assertEqual(db.get_object_list('cat'), [(item_id, 'cat_ear', 'Cat Bin', 1)])
+        self.assertEqual(db.complete_item(unit[0], 'worker'), 1)
+        self.assertEqual(db.claim_next_item('worker')[0], item_id)
+        self.assertEqual(db.complete_item(item_id, 'worker'), 0)
+        self.assertIsNone(db.get_incomplete_job())
+        db.disconnect()
+
+
+if __name__ == '__main__':
+    unittest.main()
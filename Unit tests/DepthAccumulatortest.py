@@ -0,0 +1,116 @@
+import unittest
+import sys
+import os
+import time
+
+import numpy as np
+
+sys.path.append('./..')
+
+from DepthAccumulator import DepthAccumulator
+from DepthAcquisition import DepthAcquisitionThread, get_roi_statistics, get_heights
+from Simulation.SimZEDDriver import SimZEDDriver, ARM_OFFSET, ITEM_THICKNESS
+
+
+class test_depth_accumulator(unittest.TestCase):
+
+    def test_smooths_jitter(self):
+        random = np.random.RandomState(0)
+        accumulator = DepthAccumulator(alpha=0.2)
+        for _ in range(30):
+            depth_map, valid_mask = accumulator.update(0.8 + random.normal(0, 0.004, (40, 60)))
+        self.assertTrue(valid_mask.all())
+        self.assertLess(np.std(depth_map), 0.002)
+        self.assertAlmostEqual(float(np.mean(depth_map)), 0.8, 3)
+        self.assertEqual(accumulator.get_num_frames(), 30)
+
+    def test_rejects_outliers_until_the_scene_changes(self):
+        accumulator = DepthAccumulator(outlier_depth=0.02, reset_frames=3)
+        accumulator.update(np.full((10, 10), 0.8))
+
+        # One glitch is ignored
+        glitch = np.full((10, 10), 0.8)
+        glitch[5, 5] = 0.5
+        depth_map, _ = accumulator.update(glitch)
+        self.assertAlmostEqual(float(depth_map[5, 5]), 0.8, 5)
+
+        # An item placed on the table replaces the estimate after reset_frames
+        placed = np.full((10, 10), 0.8)
+        placed[2:4, 2:4] = 0.75
+        for _ in range(3):
+            depth_map, _ = accumulator.update(placed)
+        self.assertAlmostEqual(float(depth_map[3, 3]), 0.75, 5)
+
+    def test_fills_holes_and_masks_them(self):
+        accumulator = DepthAccumulator(max_misses=0, fill_kernel=3, fill_passes=2)
+        depth_map = np.full((20, 20), 0.8)
+        depth_map[8:12, 8:12] = np.nan
+        depth_map[:, 15:] = 0.7
+        filled, valid_mask = accumulator.update(depth_map)
+
+        self.assertFalse(valid_mask[9, 9])
+        self.assertTrue(valid_mask[0, 0])
+        self.assertTrue(np.isfinite(filled).all())
+        self.assertAlmostEqual(float(filled[9, 9]), 0.8, 5)
+        self.assertAlmostEqual(float(filled[0, 17]), 0.7, 5)
+
+    def test_keeps_estimate_through_short_holes(self):
+        accumulator = DepthAccumulator(max_misses=2, fill_passes=0)
+        accumulator.update(np.full((4, 4), 0.8))
+        hole = np.full((4, 4), 0.8)
+        hole[1, 1] = np.nan
+        for _ in range(2):
+            depth_map, valid_mask = accumulator.update(hole)
+            self.assertTrue(valid_mask[1, 1])
+        depth_map, valid_mask = accumulator.update(hole)
+        self.assertFalse(valid_mask[1, 1])
+        self.assertTrue(np.isnan(depth_map[1, 1]))
+
+    def test_acquisition_thread_caches_estimate(self):
+        depth_map = np.full((8, 8), 0.8, dtype=np.float32)
+        depth_map[0, 0] = np.nan
+
+        def grab():
+            time.sleep(0.002)
+            return depth_map
+
+        thread = DepthAcquisitionThread(grab, accumulator=DepthAccumulator())
+        thread.start()
+        cached, valid_mask, _ = thread.get_latest_valid()
+        raw, _ = thread.get_next(raw=True)
+        thread.terminate_thread()
+        thread.join()
+        self.assertAlmostEqual(float(cached[0, 0]), 0.8, 5)
+        self.assertFalse(valid_mask[0, 0])
+        self.assertTrue(valid_mask[1, 1])
+        self.assertTrue(np.isnan(raw[0, 0]))
+
+    def test_filled_boxes_read_as_desk(self):
+        # An item with a hole the accumulator fills in
+        depth_map = np.full((20, 20), 0.83)
+        depth_map[4:16, 4:16] = 0.8
+        depth_map[7:13, 7:13] = np.nan
+        filled, valid_mask = DepthAccumulator(fill_kernel=5, fill_passes=2).update(depth_map)
+        self.assertTrue(np.isfinite(filled).all())
+
+        boxes = [[8, 8, 12, 12], [4, 4, 16, 16]]
+        stats = get_roi_statistics(filled, boxes, 0.83, scale=1.0, min_size=1, valid_mask=valid_mask)
+        self.assertEqual(stats['valid_fraction'][0], 0.0)
+        self.assertGreater(stats['valid_fraction'][1], 0.5)
+        np.testing.assert_allclose(get_heights(stats, ARM_OFFSET), [ARM_OFFSET, ARM_OFFSET + 0.03], atol=1e-5)
+
+        # Without the mask the filled pixels pass as measured
+        stats = get_roi_statistics(filled, boxes, 0.83, scale=1.0, min_size=1)
+        self.assertEqual(stats['valid_fraction'][0], 1.0)
+
+    def test_sim_driver_accumulates(self):
+        zed_driver = SimZEDDriver(time_scale=0, accumulate=True)
+        height = zed_driver.get_object_height(640, 360)
+        valid_mask = zed_driver.get_valid_mask()
+        zed_driver.close()
+        self.assertAlmostEqual(height, ARM_OFFSET + ITEM_THICKNESS, 5)
+        self.assertTrue(valid_mask.all())
+
+
+if __name__ == '__main__':
+    unittest.main()
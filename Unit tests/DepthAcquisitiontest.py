@@ -0,0 +1,150 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+sys.path.append('./..')
+
+from DepthAcquisition import DepthAcquisitionThread, DepthImageWriter, get_depth_at, render_depth_map, \
+    get_roi_statistics, get_heights
+from Simulation.SimZEDDriver import SimZEDDriver, DESK_DEPTH, ARM_OFFSET, ITEM_THICKNESS
+
+
+class test_depth_acquisition(unittest.TestCase):
+
+    def test_latest_depth_map_is_cached(self):
+        frames = []
+
+        def grab():
+            time.sleep(0.005)
+            frames.append(np.full((4, 6), len(frames), dtype=np.float32))
+            return frames[-1]
+
+        thread = DepthAcquisitionThread(grab)
+        thread.start()
+        depth_map, timestamp = thread.get_latest()
+        self.assertIsNotNone(depth_map)
+        self.assertLessEqual(timestamp, time.time())
+
+        # A max age waits for a newer depth map
+        time.sleep(0.05)
+        newer_map, newer_timestamp = thread.get_latest(max_age=0.001)
+        thread.terminate_thread()
+        thread.join()
+        self.assertGreater(newer_timestamp, timestamp)
+        self.assertGreater(newer_map[0, 0], depth_map[0, 0])
+        self.assertGreater(thread.get_num_frames(), 1)
+
+    def test_failed_grabs_are_retried(self):
+        results = [None, None, np.zeros((2, 2), dtype=np.float32)]
+        thread = DepthAcquisitionThread(lambda: results.pop(0) if len(results) > 1 else results[0])
+        thread.start()
+        depth_map, _ = thread.get_latest()
+        thread.terminate_thread()
+        thread.join()
+        self.assertIsNotNone(depth_map)
+        self.assertEqual(thread.get_num_failures(), 2)
+
+    def test_get_depth_at(self):
+        depth_map = np.array([[0.5, np.nan], [0.7, 0.8]], dtype=np.float32)
+        self.assertAlmostEqual(get_depth_at(depth_map, 0, 1, DESK_DEPTH), 0.7, 5)
+        self.assertAlmostEqual(get_depth_at(depth_map, 1, 0, DESK_DEPTH), DESK_DEPTH, 5)
+        self.assertAlmostEqual(get_depth_at(depth_map, 100, -5, DESK_DEPTH), DESK_DEPTH, 5)
+        self.assertAlmostEqual(get_depth_at(depth_map, 100, 100, DESK_DEPTH), 0.8, 5)
+
+    def test_roi_statistics_ignore_holes(self):
+        depth_map = np.full((100, 200), DESK_DEPTH, dtype=np.float32)
+        depth_map[20:60, 30:90] = 0.7                   # An item
+        depth_map[38:42, 58:62] = np.nan                # A hole in the middle of the item
+        depth_map[:, 150:] = np.nan                     # No depth at all
+        boxes = [[30, 20, 90, 60], [150, 10, 190, 50], [100, 70, 100, 70]]
+        stats = get_roi_statistics(depth_map, boxes, DESK_DEPTH)
+
+        self.assertAlmostEqual(stats['median'][0], DESK_DEPTH - 0.7, 5)
+        self.assertAlmostEqual(stats['percentile'][0], DESK_DEPTH - 0.7, 5)
+        self.assertGreater(stats['valid_fraction'][0], 0.9)
+        self.assertLess(stats['valid_fraction'][0], 1.0)
+        self.assertTrue(np.isnan(stats['median'][1]))
+        self.assertEqual(stats['valid_fraction'][1], 0.0)
+        self.assertAlmostEqual(stats['median'][2], 0.0, 5)
+
+        heights = get_heights(stats, ARM_OFFSET)
+        np.testing.assert_allclose(heights, [ARM_OFFSET + DESK_DEPTH - 0.7, ARM_OFFSET, ARM_OFFSET], atol=1e-6)
+
+    def test_roi_statistics_median_and_percentile(self):
+        depth_map = np.tile(np.linspace(0.5, 1.0, 64, dtype=np.float32), (64, 1))
+        stats = get_roi_statistics(depth_map, [[0, 0, 64, 64]], 1.0, percentile=90, scale=1.0)
+        self.assertAlmostEqual(stats['median'][0], 1.0 - np.median(depth_map), 1)
+        self.assertGreater(stats['percentile'][0], stats['median'][0])
+        self.assertEqual(len(get_roi_statistics(depth_map, np.zeros((0, 4)), 1.0)), 0)
+
+    def test_roi_statistics_against_background(self):
+        # A tilted table, the item stands 0.05 above it wherever it is
+        background = np.tile(np.linspace(0.8, 0.9, 200, dtype=np.float32), (100, 1))
+        depth_map = background.copy()
+        depth_map[10:40, 20:60] -= 0.05
+        depth_map[60:90, 140:180] -= 0.05
+        stats = get_roi_statistics(depth_map, [[20, 10, 60, 40], [140, 60, 180, 90]], background)
+        np.testing.assert_allclose(stats['median'], [0.05, 0.05], atol=1e-6)
+
+    def test_sim_driver_answers_from_cache(self):
+        zed_driver = SimZEDDriver(time_scale=1.0)
+        try:
+            zed_driver.get_object_height(640, 360)
+            start = time.time()
+            for _ in range(100):
+                height = zed_driver.get_object_height(640, 360)
+            elapsed = time.time() - start
+        finally:
+            zed_driver.close()
+        self.assertAlmostEqual(height, ARM_OFFSET + ITEM_THICKNESS, 5)
+        self.assertLess(elapsed, 0.066)
+
+    def test_sim_driver_batched_heights(self):
+        zed_driver = SimZEDDriver(time_scale=0)
+        heights = zed_driver.get_object_heights([[100, 100, 140, 130], [600, 300, 650, 360]])
+        zed_driver.close()
+        np.testing.assert_allclose(heights, ARM_OFFSET + ITEM_THICKNESS, atol=1e-6)
+
+
+class test_depth_image_writer(unittest.TestCase):
+
+    def setUp(self):
+        self.image_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.image_dir, ignore_errors=True)
+
+    def test_render_marks_point(self):
+        depth_map = np.full((20, 30), 0.8, dtype=np.float32)
+        depth_map[0, 0] = np.nan
+        image = render_depth_map(depth_map, 10, 5)
+        self.assertEqual(image.dtype, np.uint8)
+        self.assertEqual(image.shape, (20, 30))
+        self.assertEqual(image[0, 0], 0)
+        self.assertTrue(np.all(image[3:8, 8:13] == 0))
+        self.assertGreater(image[15, 20], 0)
+
+    def test_writes_sampled_images(self):
+        writer = DepthImageWriter(self.image_dir, sample_interval=3)
+        writer.start()
+        depth_map = np.full((20, 30), 0.8, dtype=np.float32)
+        for _ in range(7):
+            writer.submit(depth_map, 10, 5)
+        writer.flush()
+        writer.terminate_thread()
+        writer.join(5.0)
+        self.assertFalse(writer.is_alive())
+        self.assertEqual(sorted(os.listdir(self.image_dir)), ['0.png', '3.png', '6.png'])
+        self.assertEqual(writer.get_num_written(), 3)
+        image = cv2.imread(os.path.join(self.image_dir, '3.png'), cv2.IMREAD_GRAYSCALE)
+        self.assertEqual(image[5, 10], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
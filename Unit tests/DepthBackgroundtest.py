@@ -0,0 +1,93 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.append('./..')
+
+from DepthBackground import DepthBackground
+from Simulation.SimZEDDriver import SimZEDDriver, ARM_OFFSET
+from Simulation.SimVisionThread import SimVisionThread
+from Simulation.SimTable import SimTable
+
+
+class test_depth_background(unittest.TestCase):
+
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.work_dir, 'depth_background.npy')
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def test_build_averages_valid_depths(self):
+        first = np.full((4, 5), 0.80, dtype=np.float32)
+        second = np.full((4, 5), 0.84, dtype=np.float32)
+        first[0, 0] = np.nan
+        first[1, 1] = second[1, 1] = np.inf
+        background = DepthBackground.build([first, second], fill_depth=0.83)
+
+        self.assertEqual(background.depth_map.dtype, np.float32)
+        self.assertAlmostEqual(float(background.depth_map[2, 2]), 0.82, 5)
+        self.assertAlmostEqual(float(background.depth_map[0, 0]), 0.84, 5)
+        self.assertAlmostEqual(float(background.depth_map[1, 1]), 0.83, 5)
+        self.assertRaises(ValueError, DepthBackground.build, [], 0.83)
+
+    def test_save_and_load_memory_mapped(self):
+        background = DepthBackground(np.random.RandomState(0).uniform(0.8, 0.9, (30, 40)).astype(np.float32))
+        background.save(self.path)
+        loaded = DepthBackground.load(self.path)
+        self.assertIsInstance(loaded.depth_map, np.memmap)
+        np.testing.assert_array_equal(loaded.depth_map, background.depth_map)
+        self.assertEqual(loaded.shape, (30, 40))
+
+    def test_height_map_and_occupancy(self):
+        background = DepthBackground(np.tile(np.linspace(0.8, 0.9, 64, dtype=np.float32), (48, 1)))
+        depth_map = np.array(background.depth_map)
+        depth_map[0, 0] = np.nan
+        self.assertFalse(background.is_occupied(depth_map))
+
+        depth_map[8:16, 8:16] -= 0.03
+        heights = background.get_height_map(depth_map)
+        self.assertAlmostEqual(float(heights[10, 10]), 0.03, 5)
+        self.assertTrue(np.isnan(heights[0, 0]))
+        self.assertTrue(background.is_occupied(depth_map))
+
+    def test_sim_driver_captures_background(self):
+        zed_driver = SimZEDDriver(time_scale=0, background_file=self.path)
+        self.assertFalse(zed_driver.has_background())
+        self.assertTrue(zed_driver.is_table_occupied())
+
+        # With the flat map as the background nothing stands on the table
+        zed_driver.capture_background(3)
+        self.assertTrue(os.path.exists(self.path))
+        self.assertTrue(zed_driver.has_background())
+        self.assertFalse(zed_driver.is_table_occupied())
+        self.assertAlmostEqual(zed_driver.get_object_height(100, 100), ARM_OFFSET, 5)
+        zed_driver.close()
+
+        # A new driver loads the saved background
+        zed_driver = SimZEDDriver(time_scale=0, background_file=self.path)
+        self.assertTrue(zed_driver.has_background())
+        self.assertFalse(zed_driver.is_table_occupied())
+        zed_driver.close()
+
+    def test_empty_table_skips_inference(self):
+        table = SimTable.random(3, dict(north=150.0, east=1080.0, south=870.0, west=200.0), lambda x, y: (x, y),
+                                seed=0)
+        vision_thread = SimVisionThread(table, time_scale=0.01)
+        vision_thread.set_occupancy_check(lambda: False)
+        vision_thread.start()
+        while vision_thread.get_num_skipped() < 2:
+            time.sleep(0.001)
+        vision_thread.terminate_thread()
+        vision_thread.join()
+        self.assertEqual(len(vision_thread.get_detection_batch()), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+import sys
+
+sys.path.append('./..')
+
+from Item import Detection
+from DetectionDiff import diff_detections
+
+
+class test_detection_diff(unittest.TestCase):
+
+    def test_one_of_two_identical_items_removed(self):
+        previous = [Detection.from_name('cat_ear', 100, 100), Detection.from_name('cat_ear', 500, 500)]
+        current = [Detection.from_name('cat_ear', 502, 499)]
+        diff = diff_detections(previous, current)
+        self.assertEqual(diff.disappeared, [previous[0]])
+        self.assertEqual(diff.appeared, [])
+        self.assertEqual(len(diff.unchanged), 1)
+
+    def test_far_move_with_same_count_is_a_move(self):
+        previous = [Detection.from_name('dog_tail', 100, 100)]
+        current = [Detection.from_name('dog_tail', 700, 300)]
+        diff = diff_detections(previous, current)
+        self.assertEqual(diff.moved, [(previous[0], current[0])])
+        self.assertEqual(diff.disappeared, [])
+        self.assertEqual(diff.appeared, [])
+
+    def test_classes_are_not_mixed(self):
+        previous = [Detection.from_name('bird_wing', 100, 100)]
+        current = [Detection.from_name('bird_body', 100, 100)]
+        diff = diff_detections(previous, current)
+        self.assertEqual(diff.disappeared, previous)
+        self.assertEqual(diff.appeared, current)
+
+    def test_closest_instances_are_paired(self):
+        previous = [Detection.from_name('cat_ear', 100, 100), Detection.from_name('cat_ear', 130, 100)]
+        current = [Detection.from_name('cat_ear', 131, 100)]
+        diff = diff_detections(previous, current)
+        self.assertEqual(diff.disappeared, [previous[0]])
+        self.assertFalse(diff.moved)
+
+
+if __name__ == '__main__':
+    unittest.main()
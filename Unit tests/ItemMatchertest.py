@@ -0,0 +1,81 @@
+import unittest
+import sys
+
+import numpy as np
+
+sys.path.append('./..')
+
+from Item import Item, Detection, DetectionBatch
+from ItemMatcher import ItemMatcher
+
+
+def pending(item_id, name, job_id, priority=0):
+    return item_id, name, 'Bin', job_id, 'job%d' % job_id, priority
+
+
+class test_item_matcher(unittest.TestCase):
+
+    def setUp(self):
+        self.matcher = ItemMatcher()
+
+    def match(self, pending_items, detections, reachable=None):
+        batch = DetectionBatch.from_detections(detections)
+        # Use camera pixels / 1000 as the arm's frame
+        pick_points = batch.positions / 1000.0
+        if reachable is None:
+            reachable = np.ones(len(batch), dtype=bool)
+        return [(row[0], index) for row, index in
+                self.matcher.match(pending_items, batch, pick_points, reachable, (0.0, 0.0))]
+
+    def test_only_same_class_is_matched(self):
+        matches = self.match([pending(1, 'cat_ear', 1), pending(2, 'dog_tail', 2)],
+                             [Detection.from_name('dog_tail', 100, 100)])
+        self.assertEqual(matches, [(2, 0)])
+
+    def test_items_of_every_job_are_served(self):
+        matches = self.match([pending(1, 'cat_ear', 1), pending(2, 'bird_wing', 2), pending(3, 'dog_tail', 3)],
+                             [Detection.from_name('dog_tail', 100, 100), Detection.from_name('cat_ear', 200, 200)])
+        self.assertEqual(matches, [(1, 1), (3, 0)])
+
+    def test_urgent_job_gets_the_only_item(self):
+        matches = self.match([pending(1, 'cat_ear', 1, priority=0), pending(2, 'cat_ear', 2, priority=3)],
+                             [Detection.from_name('cat_ear', 100, 100)])
+        self.assertEqual(matches, [(2, 0)])
+
+    def test_nearest_copy_is_picked(self):
+        matches = self.match([pending(1, 'cat_ear', 1)],
+                             [Detection.from_name('cat_ear', 800, 800), Detection.from_name('cat_ear', 50, 50)])
+        self.assertEqual(matches, [(1, 1)])
+
+    def test_unreachable_items_are_not_matched(self):
+        matches = self.match([pending(1, 'cat_ear', 1)], [Detection.from_name('cat_ear', 100, 100)],
+                             reachable=np.array([False]))
+        self.assertEqual(matches, [])
+
+    def test_only_claimed_items_are_selected(self):
+        # The unrequested dog tail sits next to the arm, the claimed cat ear far away
+        batch = DetectionBatch.from_detections([Detection.from_name('dog_tail', 10, 10),
+                                                Detection.from_name('cat_ear', 900, 900),
+                                                Detection.from_name('cat_ear', 600, 600)])
+        reachable = np.ones(len(batch), dtype=bool)
+        matches = self.matcher.match([pending(1, 'cat_ear', 1), pending(2, 'bird_wing', 2)], batch,
+                                     batch.positions / 1000.0, reachable, (0.0, 0.0))
+        self.assertEqual([(row[0], index) for row, index in matches], [(1, 2)])
+
+        # The next frame is reordered, the claimed item is found at the position it was matched
+        next_batch = DetectionBatch.from_detections([Detection.from_name('cat_ear', 602, 598),
+                                                     Detection.from_name('dog_tail', 10, 10),
+                                                     Detection.from_name('cat_ear', 900, 900)])
+        requested_item = Item('cat_ear', x=600.0, y=600.0, item_id=1)
+        selected = self.matcher.select([requested_item], next_batch, reachable)
+        self.assertEqual(selected, [(requested_item, 0)])
+
+    def test_claimed_items_without_detection_are_skipped(self):
+        batch = DetectionBatch.from_detections([Detection.from_name('cat_ear', 100, 100)])
+        requested_items = [Item('cat_ear', item_id=1), Item('cat_ear', item_id=2), Item('dog_tail', item_id=3)]
+        selected = self.matcher.select(requested_items, batch, np.ones(1, dtype=bool))
+        self.assertEqual([(item.item_id, index) for item, index in selected], [(1, 0)])
+
+
+if __name__ == '__main__':
+    unittest.main()
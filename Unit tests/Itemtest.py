@@ -0,0 +1,58 @@
+import unittest
+import sys
+
+import numpy as np
+
+sys.path.append('./..')
+
+from Item import Item, Detection, DetectionBatch, LABEL_MAP_BY_NAME, DETECTION_DTYPE, NOMINAL_BOX_SIZE
+
+
+class test_item(unittest.TestCase):
+
+    def test_detection_is_immutable(self):
+        detection = Detection.from_name('cat_body', 10, 20)
+        with self.assertRaises(AttributeError):
+            detection.x = 5
+        with self.assertRaises(AttributeError):
+            detection.extra = 5
+
+    def test_detection_names(self):
+        detection = Detection.from_name('dog_tail', 10, 20, rot=1)
+        self.assertEqual(detection.item_type, 'dog_tail')
+        self.assertEqual(detection.family, 'dog')
+        self.assertEqual(detection.class_id, Item('dog_tail').class_id)
+
+    def test_batch_round_trip(self):
+        detections = [Detection.from_name('cat_ear', 100, 200, rot=1, score=0.9),
+                      Detection.from_name('bird_wing', 300, 400)]
+        batch = DetectionBatch.from_detections(detections, frame_id=7)
+        self.assertEqual(len(batch), 2)
+        self.assertEqual(batch.frame_id, 7)
+        self.assertEqual([d.item_type for d in batch], ['cat_ear', 'bird_wing'])
+        self.assertEqual(batch.positions.tolist(), [[100.0, 200.0], [300.0, 400.0]])
+        self.assertEqual(batch.class_ids.tolist(), [LABEL_MAP_BY_NAME['cat_ear'], LABEL_MAP_BY_NAME['bird_wing']])
+        self.assertIs(batch.detections, batch.detections)
+        self.assertEqual(batch.get_item_types(), frozenset(['cat_ear', 'bird_wing']))
+
+    def test_batch_is_read_only(self):
+        batch = DetectionBatch.from_detections([Detection.from_name('cat_ear', 100, 200)])
+        with self.assertRaises(ValueError):
+            batch.array['x'][0] = 5
+        self.assertEqual(len(batch.select(batch.class_ids == 0)), 0)
+
+    def test_batch_leaves_the_callers_array_writable(self):
+        array = np.zeros(2, dtype=DETECTION_DTYPE)
+        batch = DetectionBatch(array)
+        array['x'][0] = 5
+        self.assertEqual(batch.array['x'][0], 0)
+
+    def test_detections_get_a_nominal_box(self):
+        batch = DetectionBatch.from_detections([Detection.from_name('cat_ear', 100, 200)])
+        left, top, right, bottom = batch.array['bbox'][0].tolist()
+        self.assertEqual((right - left, bottom - top), (NOMINAL_BOX_SIZE, NOMINAL_BOX_SIZE))
+        self.assertEqual(((left + right) / 2, (top + bottom) / 2), (100.0, 200.0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,221 @@
+import unittest
+import sys
+import os
+import shutil
+import sqlite3
+import tempfile
+import subprocess
+import threading
+
+sys.path.append('./..')
+
+from SQL_Driver.ObjectDB import ObjectDB
+from SQL_Driver.Schema import STATUS_COMPLETE
+
+SOURCE_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'SQL_Driver', 'pickpoint.db')
+
+
+class test_object_db(unittest.TestCase):
+
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp()
+        self.db_file = os.path.join(self.work_dir, 'pickpoint.db')
+        shutil.copyfile(SOURCE_DB, self.db_file)
+        self.db = ObjectDB(self.db_file)
+
+    def tearDown(self):
+        self.db.disconnect()
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def test_wal_mode(self):
+        self.assertEqual(self.db.connection.execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+
+    def test_connection_per_thread(self):
+        connections = []
+        thread = threading.Thread(target=lambda: connections.append(self.db.connection))
+        thread.start()
+        thread.join()
+        self.assertIsNot(connections[0], self.db.connection)
+        self.assertIs(self.db.connection, self.db.connection)
+
+    def test_read_while_writing(self):
+        writer = sqlite3.connect(self.db_file, isolation_level=None)
+        writer.execute('BEGIN IMMEDIATE')
+        writer.execute("UPDATE jobs SET status = 'In Progress'")
+
+        results = []
+        thread = threading.Thread(target=lambda: results.append(self.db.get_incomplete_job()))
+        thread.start()
+        thread.join(2.0)
+        self.assertFalse(thread.is_alive())
+        self.assertIsNotNone(results[0])        # the uncommitted update is not visible
+
+        writer.execute('COMMIT')
+        writer.close()
+        self.assertIsNone(self.db.get_incomplete_job())
+
+    def test_job_names_are_not_injectable(self):
+        self.assertEqual(self.db.get_object_list('cat; DROP TABLE jobs'), [])
+        self.db.update_job_status("x' OR '1'='1", 'Complete')
+        self.assertEqual(len(self.db.get_job_list()), 3)
+        self.assertIsNotNone(self.db.get_incomplete_job())
+
+    def test_update_and_reset(self):
+        job = self.db.get_incomplete_job()
+        self.db.update_job_status(job[1], 'Complete')
+        self.assertNotEqual(self.db.get_incomplete_job()[1], job[1])
+        self.db.reset_job_statuses()
+        self.assertEqual(self.db.get_incomplete_job()[1], job[1])
+        self.assertGreater(len(self.db.get_object_list(job[1])), 0)
+
+    def test_concurrent_claims_are_unique(self):
+        claims = []
+        claims_lock = threading.Lock()
+
+        def worker(name):
+            while True:
+                item = self.db.claim_next_item(name)
+                if item is None:
+                    return
+                with claims_lock:
+                    claims.append(item[0])
+
+        threads = [threading.Thread(target=worker, args=('worker%d' % i,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        num_items = self.db.connection.execute('SELECT COUNT(*) FROM job_items').fetchone()[0]
+        self.assertEqual(len(claims), num_items)
+        self.assertEqual(len(set(claims)), num_items)
+
+    def test_expired_claim_is_reclaimed(self):
+        item = self.db.claim_next_item('crashed', lease=-1.0)
+        self.assertEqual(self.db.claim_next_item('worker')[0], item[0])
+        self.assertFalse(self.db.renew_lease(item[0], 'crashed'))
+        self.assertIsNone(self.db.complete_item(item[0], 'crashed'))
+        self.assertIsNotNone(self.db.complete_item(item[0], 'worker'))
+
+    def test_completing_last_item_completes_job(self):
+        job = self.db.get_incomplete_job()
+        remaining = None
+        while remaining != 0:
+            item = self.db.claim_next_item('worker')
+            self.assertEqual(item[3], job[0])
+            remaining = self.db.complete_item(item[0], 'worker')
+        self.assertEqual(self.db.get_job_list()[0][2], STATUS_COMPLETE)
+        self.assertNotEqual(self.db.get_incomplete_job()[0], job[0])
+
+    def test_released_item_is_claimed_again(self):
+        item = self.db.claim_next_item('worker')
+        self.assertNotEqual(self.db.claim_next_item('other')[0], item[0])
+        self.db.release_item(item[0], 'worker')
+        self.assertEqual(self.db.claim_next_item('other')[0], item[0])
+
+    def test_claims_of_an_earlier_run_are_recovered(self):
+        # The pid of a process that has exited
+        process = subprocess.Popen([sys.executable, '-c', 'pass'])
+        process.wait()
+        dead_worker = 'host:%d' % process.pid
+
+        item = self.db.claim_next_item(dead_worker)
+        other_host = self.db.claim_next_item('other:%d' % process.pid)
+        self.assertEqual(self.db.recover_claims('host:%d' % os.getpid()), 1)
+        self.assertEqual(self.db.claim_next_item('host:%d' % os.getpid())[0], item[0])
+        self.assertFalse(self.db.renew_lease(item[0], dead_worker))
+        self.assertTrue(self.db.renew_lease(other_host[0], 'other:%d' % process.pid))
+
+    def test_claims_of_a_live_worker_are_kept(self):
+        # Two live pick loops on one host, the second one starting up must not take the first one's claims
+        first_worker = 'host:%d' % os.getppid()
+        second_worker = 'host:%d' % os.getpid()
+        item = self.db.claim_next_item(first_worker)
+        self.assertEqual(self.db.recover_claims(second_worker), 0)
+        self.assertTrue(self.db.renew_lease(item[0], first_worker))
+        self.assertNotEqual(self.db.claim_next_item(second_worker)[0], item[0])
+
+    def test_reads_are_cached_until_the_database_changes(self):
+        jobs = self.db.get_job_list()
+        self.assertEqual(self.db.get_job_list(), jobs)
+        self.assertEqual(self.db.get_cache_hits(), 1)
+
+        # A commit from another connection is seen through data_version
+        other = sqlite3.connect(self.db_file)
+        with other:
+            other.execute("UPDATE jobs SET priority = 5 WHERE id = ?", (jobs[-1][0],))
+        other.close()
+        self.assertEqual(self.db.get_incomplete_job()[0], jobs[-1][0])
+        self.assertEqual(self.db.get_cache_hits(), 1)
+
+        # A write of the connection itself is seen through total_changes
+        item = self.db.get_next_item()
+        self.db.claim_next_item('worker')
+        self.assertNotEqual(self.db.get_next_item()[0], item[0])
+
+    def set_schedule(self, job_id, priority, deadline):
+        with self.db.connection:
+            self.db.connection.execute('UPDATE jobs SET priority = ?, deadline = ? WHERE id = ?',
+                                       (priority, deadline, job_id))
+
+    def test_schedule_order(self):
+        jobs = self.db.get_job_list()
+        self.set_schedule(jobs[0][0], 0, None)
+        self.set_schedule(jobs[1][0], 0, 1000.0)
+        self.set_schedule(jobs[2][0], 0, 500.0)
+        self.assertEqual(self.db.get_incomplete_job()[0], jobs[2][0])       # earliest deadline first
+
+        self.set_schedule(jobs[0][0], 1, None)
+        self.assertEqual(self.db.get_incomplete_job()[0], jobs[0][0])       # priority beats deadline
+        self.assertEqual(self.db.claim_next_item('worker')[3], jobs[0][0])
+
+    def test_visible_items_are_interleaved(self):
+        jobs = self.db.get_job_list()
+        later_item = [row for row in self.db.get_object_list(jobs[1][1]) if row[3] == 1][0]
+        item = self.db.claim_next_item('worker', visible={later_item[1]})
+        self.assertEqual(item[0], later_item[0])
+
+        # Nothing visible is pending: fall back to the schedule
+        self.assertEqual(self.db.claim_next_item('worker', visible={later_item[1], 'nothing'})[3], jobs[0][0])
+
+    def test_schedule_does_not_sort(self):
+        from SQL_Driver.ObjectDB import _NEXT_ITEM
+        plan = ' '.join(str(row) for row in self.db.connection.execute('EXPLAIN QUERY PLAN ' + _NEXT_ITEM,
+                                                                       ('Incomplete', 'Incomplete')))
+        self.assertIn('jobs_schedule', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_claim_items_skips_claimed(self):
+        pending_items = self.db.get_pending_items()
+        self.assertEqual(len(set(row[3] for row in pending_items)), 3)
+        first, second = pending_items[0][0], pending_items[-1][0]
+        self.db.claim_next_item('other')
+
+        claimed = self.db.claim_items([first, second], 'worker')
+        self.assertIsNone(claimed[0])
+        self.assertEqual(claimed[1][0], second)
+        self.assertNotIn(second, [row[0] for row in self.db.get_pending_items()])
+
+    def test_units_of_an_item_are_claimed_by_different_workers(self):
+        item_id = self.db.get_pending_items()[0][0]
+        self.db.connection.execute('UPDATE job_items SET quantity = 3 WHERE id = ?', (item_id,))
+        self.db.connection.commit()
+        self.assertEqual([row[0] for row in self.db.get_pending_items()].count(item_id), 3)
+
+        first = self.db.claim_items([item_id, item_id], 'worker')
+        second = self.db.claim_items([item_id, item_id], 'other')
+        self.assertEqual(len(set(row[0] for row in first)), 2)
+        self.assertEqual(second[0][0], item_id)
+        self.assertIsNone(second[1])
+        self.assertNotIn(item_id, [row[0] for row in self.db.get_pending_items()])
+
+        for row in first:
+            self.db.complete_item(row[0], 'worker')
+        self.db.complete_item(item_id, 'other')
+        job_items = self.db.connection.execute('SELECT SUM(quantity), SUM(picked) FROM job_items '
+                                               'WHERE name = ? AND job_id = ?', first[0][1:2] + first[0][3:4])
+        self.assertEqual(job_items.fetchone(), (3, 3))
+
+
+if __name__ == '__main__':
+    unittest.main()
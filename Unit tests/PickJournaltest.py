@@ -0,0 +1,66 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+import time
+
+sys.path.append('./..')
+
+from SQL_Driver.ObjectDB import ObjectDB
+from SQL_Driver.PickJournal import PickJournal
+
+SOURCE_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'SQL_Driver', 'pickpoint.db')
+
+
+class test_pick_journal(unittest.TestCase):
+
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp()
+        self.db_file = os.path.join(self.work_dir, 'pickpoint.db')
+        shutil.copyfile(SOURCE_DB, self.db_file)
+        self.db = ObjectDB(self.db_file)
+
+    def tearDown(self):
+        self.db.disconnect()
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def count_rows(self):
+        return self.db.connection.execute('SELECT COUNT(*) FROM pick_journal').fetchone()[0]
+
+    def test_records_are_written_in_batches(self):
+        journal = PickJournal(self.db, 'worker', batch_size=10, flush_interval=0.05)
+        for i in range(25):
+            journal.record('cat_ear', time.time(), time.time(), camera=(i, i), arm=(0.1, 0.2, 0.0))
+        journal.start()
+        journal.flush()
+        self.assertEqual(self.count_rows(), 25)
+        self.assertEqual(journal.get_num_written(), 25)
+        journal.terminate_thread()
+        journal.join()
+
+    def test_queued_records_are_written_on_terminate(self):
+        journal = PickJournal(self.db, 'worker', flush_interval=60.0)
+        journal.start()
+        item = self.db.claim_next_item('worker')
+        journal.record(item[1], time.time(), time.time(), job_item_id=item[0])
+        journal.record('dog_ear', time.time(), time.time(), success=False, error='gripper')
+        journal.terminate_thread()
+        journal.join(5.0)
+        self.assertFalse(journal.is_alive())
+
+        rows = self.db.connection.execute('SELECT job_item_id, success, error FROM pick_journal '
+                                          'ORDER BY id').fetchall()
+        self.assertEqual(rows, [(item[0], 1, None), (None, 0, 'gripper')])
+
+    def test_record_never_blocks(self):
+        journal = PickJournal(self.db, 'worker', max_queue_size=2)
+        start = time.time()
+        for i in range(5):
+            journal.record('cat_ear', start, start)
+        self.assertLess(time.time() - start, 1.0)
+        self.assertEqual(journal.get_num_dropped(), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
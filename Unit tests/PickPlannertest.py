@@ -0,0 +1,40 @@
+import unittest
+import sys
+
+sys.path.append('./..')
+
+from Item import Item
+from PickPlanner import PickPlanner, PlannedPick
+
+BIN_A = [0.0, 0.3, 0.25, 0.0, 1.57, 0.0]
+BIN_B = [0.0, -0.3, 0.25, 0.0, 1.57, 0.0]
+
+
+class test_pick_planner(unittest.TestCase):
+
+    def _make_pick(self, x, y, drop_off):
+        return PlannedPick(Item('cat_body', x=x, y=y), (x, y), drop_off, 'cat')
+
+    def test_plan_keeps_every_pick(self):
+        picks = [self._make_pick(0.2, 0.1 * i, BIN_A) for i in range(-2, 3)]
+        plan = PickPlanner().plan(picks, (0.12, 0.0))
+        self.assertEqual(len(plan), len(picks))
+        self.assertEqual(set(id(p) for p in plan), set(id(p) for p in picks))
+
+    def test_plan_is_no_longer_than_given_order(self):
+        picks = [self._make_pick(0.25, -0.2, BIN_A), self._make_pick(0.25, 0.25, BIN_B),
+                 self._make_pick(0.2, -0.25, BIN_A), self._make_pick(0.2, 0.2, BIN_B)]
+        start = (0.12, 0.0)
+        plan = PickPlanner().plan(picks, start)
+        self.assertLessEqual(PickPlanner.get_travel(plan, start), PickPlanner.get_travel(picks, start))
+
+    def test_picks_near_drop_off_come_next(self):
+        near_a = self._make_pick(0.2, 0.28, BIN_B)
+        near_b = self._make_pick(0.2, -0.28, BIN_A)
+        plan = PickPlanner().plan([near_b, near_a], (0.0, 0.3))
+        self.assertIs(plan[0], near_a)
+        self.assertIs(plan[1], near_b)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+import sys
+import logging
+
+sys.path.append('./..')
+
+from RateLimitFilter import RateLimitFilter
+
+
+class _ListHandler(logging.Handler):
+
+    def __init__(self):
+        super(_ListHandler, self).__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+class test_rate_limit_filter(unittest.TestCase):
+
+    def setUp(self):
+        self.logger = logging.getLogger('GM_Pick_Point.RateLimitTest')
+        self.logger.setLevel(logging.DEBUG)
+        self.logger.propagate = False
+        self.rate_limit_filter = RateLimitFilter(interval=60.0, burst=3)
+        self.handlers = [_ListHandler(), _ListHandler()]
+        for handler in self.handlers:
+            handler.addFilter(self.rate_limit_filter)
+            self.logger.addHandler(handler)
+
+    def tearDown(self):
+        for handler in self.handlers:
+            self.logger.removeHandler(handler)
+
+    def test_burst_per_message(self):
+        for i in range(10):
+            self.logger.debug('Vision Thread X: %s', i)
+            self.logger.debug('object depth: %s', i)
+        self.assertEqual(len(self.handlers[0].messages), 6)
+        self.assertEqual(self.handlers[0].messages, self.handlers[1].messages)
+        self.assertEqual(self.rate_limit_filter.get_dropped(), 14)
+
+    def test_warnings_are_never_limited(self):
+        for i in range(10):
+            self.logger.warning('Arm unreachable')
+        self.assertEqual(len(self.handlers[0].messages), 10)
+
+    def test_dropped_count_is_reported(self):
+        first = logging.LogRecord('x', logging.DEBUG, '', 0, 'height: %s', (1,), None)
+        second = logging.LogRecord('x', logging.DEBUG, '', 0, 'height: %s', (2,), None)
+
+        rate_limit_filter = RateLimitFilter(interval=60.0, burst=1)
+        self.assertTrue(rate_limit_filter.filter(first))
+        for i in range(4):
+            rate_limit_filter.filter(logging.LogRecord('x', logging.DEBUG, '', 0, 'height: %s', (i,), None))
+        second.created = first.created + 61.0
+        self.assertTrue(rate_limit_filter.filter(second))
+        self.assertEqual(second.getMessage(), 'height: 2 (4 similar messages suppressed)')
+
+    def test_expired_budgets_are_forgotten(self):
+        rate_limit_filter = RateLimitFilter(interval=60.0, burst=1)
+        start = logging.LogRecord('x', logging.DEBUG, '', 0, 'start', None, None).created
+        for i in range(100):
+            record = logging.LogRecord('x', logging.DEBUG, '', 0, 'item %d moved' % i, None, None)
+            record.created = start
+            rate_limit_filter.filter(record)
+        for i in range(3):
+            record = logging.LogRecord('x', logging.DEBUG, '', 0, 'height: %s', (i,), None)
+            record.created = start
+            rate_limit_filter.filter(record)
+        self.assertEqual(len(rate_limit_filter._budgets), 101)
+
+        # After an interval only the budget that dropped messages is kept, after two nothing is
+        record = logging.LogRecord('x', logging.DEBUG, '', 0, 'later', None, None)
+        record.created = start + 61.0
+        rate_limit_filter.filter(record)
+        self.assertEqual(len(rate_limit_filter._budgets), 2)
+        self.assertEqual(rate_limit_filter.get_dropped(), 2)
+
+        record = logging.LogRecord('x', logging.DEBUG, '', 0, 'later', None, None)
+        record.created = start + 122.0
+        rate_limit_filter.filter(record)
+        self.assertEqual(len(rate_limit_filter._budgets), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import unittest
+import sys
+import os
+import shutil
+import sqlite3
+import tempfile
+
+sys.path.append('./..')
+
+from SQL_Driver import Schema
+from SQL_Driver.ObjectDB import ObjectDB
+
+
+def make_legacy_db(db_file):
+    # The layout before schema version 1: a jobs table and one table per job
+    conn = sqlite3.connect(db_file)
+    conn.execute('CREATE TABLE jobs(id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT, status TEXT)')
+    conn.executemany('INSERT INTO jobs(name, status) VALUES (?, ?)', [('cat', 'Incomplete'), ('dog', 'Complete')])
+    for name in ('cat', 'dog'):
+        conn.execute('CREATE TABLE %s(id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT, destination TEXT)' % name)
+        conn.executemany('INSERT INTO %s(name, destination) VALUES (?, ?)' % name,
+                         [(name + '_ear', 'home'), (name + '_tail', 'box')])
+    conn.execute('CREATE TABLE shapes(id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT, destination TEXT)')
+    conn.commit()
+    return conn
+
+
+class test_schema(unittest.TestCase):
+
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp()
+        self.db_file = os.path.join(self.work_dir, 'pickpoint.db')
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def test_migrate_legacy_tables(self):
+        conn = make_legacy_db(self.db_file)
+        self.assertEqual(Schema.migrate(conn), 0)
+        self.assertEqual(Schema.get_version(conn), Schema.SCHEMA_VERSION)
+
+        tables = set(row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'"))
+        self.assertNotIn('cat', tables)
+        self.assertNotIn('dog', tables)
+        self.assertIn('shapes', tables)
+
+        items = conn.execute('SELECT jobs.name, job_items.name, job_items.status FROM job_items '
+                             'JOIN jobs ON jobs.id = job_items.job_id ORDER BY job_items.id').fetchall()
+        self.assertEqual(items, [('cat', 'cat_ear', 'Incomplete'), ('cat', 'cat_tail', 'Incomplete'),
+                                 ('dog', 'dog_ear', 'Complete'), ('dog', 'dog_tail', 'Complete')])
+
+        # Migrating again is a no-op
+        self.assertEqual(Schema.migrate(conn), Schema.SCHEMA_VERSION)
+        conn.close()
+
+    def test_duplicate_rows_become_quantities(self):
+        conn = make_legacy_db(self.db_file)
+        conn.execute("INSERT INTO cat(name, destination) VALUES ('cat_ear', 'home')")
+        conn.commit()
+        Schema.migrate(conn)
+        items = conn.execute("SELECT name, quantity, picked FROM job_items WHERE job_id = 1 ORDER BY id").fetchall()
+        self.assertEqual(items, [('cat_ear', 2, 0), ('cat_tail', 1, 0)])
+        conn.close()
+
+    def test_new_database(self):
+        conn = sqlite3.connect(self.db_file)
+        Schema.migrate(conn)
+        self.assertEqual(Schema.get_version(conn), Schema.SCHEMA_VERSION)
+        self.assertEqual(conn.execute('SELECT COUNT(*) FROM jobs').fetchone()[0], 0)
+        conn.close()
+
+    def test_failed_step_is_rolled_back(self):
+        conn = make_legacy_db(self.db_file)
+
+        def bad_step(conn):
+            conn.execute('DROP TABLE cat')
+            raise sqlite3.OperationalError('step failed')
+
+        with self.assertRaises(sqlite3.OperationalError):
+            Schema._run_in_transaction(conn, bad_step, 1)
+        self.assertEqual(Schema.get_version(conn), 0)
+        self.assertEqual(conn.execute('SELECT COUNT(*) FROM cat').fetchone()[0], 2)
+        conn.close()
+
+    def test_next_item_uses_index(self):
+        make_legacy_db(self.db_file).close()
+        db = ObjectDB(self.db_file)
+        plan = ' '.join(str(row) for row in db.connection.execute(
+            'EXPLAIN QUERY PLAN SELECT id FROM job_items WHERE job_id = 1 AND status = ?',
+            (Schema.STATUS_INCOMPLETE,)))
+        self.assertIn('job_items_job_status', plan)
+
+        item_id, name, destination, job_id, job_name = db.get_next_item()
+        self.assertEqual((name, destination, job_name), ('cat_ear', 'home', 'cat'))
+        db.update_item_status(item_id, Schema.STATUS_COMPLETE)
+        self.assertEqual(db.get_next_item()[1], 'cat_tail')
+        self.assertEqual(len(db.get_object_list('cat')), 1)
+        db.disconnect()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,19 @@
+import unittest
+import sys
+import os
+sys.path.append('./..')
+import benchmark
+
+
+class test_simulation(unittest.TestCase):
+
+    def test_clears_table(self):
+        os.chdir('..')
+        args = benchmark.parse_args(['--items', '5', '--time-scale', '0', '--loop-delay', '0', '--timeout', '60'])
+        results = benchmark.run_benchmark(args)
+        self.assertEqual(results['picks'], 5)
+        self.assertGreater(results['picks_per_hour'], 0)
+        self.assertIn('robot.execute_trajectory_from_poses', [phase[0] for phase in results['phases']])
+
+if __name__ == '__main__':
+    unittest.main()
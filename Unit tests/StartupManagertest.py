@@ -0,0 +1,64 @@
+import unittest
+import sys
+import time
+
+sys.path.append('./..')
+
+from StartupManager import StartupManager
+
+
+class test_startup_manager(unittest.TestCase):
+
+    def test_independent_components_start_concurrently(self):
+        startup = StartupManager()
+        startup.add('vision', lambda: time.sleep(0.3) or 'vision')
+        startup.add('zed', lambda: time.sleep(0.3) or 'zed')
+        start = time.time()
+        components = startup.run()
+        self.assertLess(time.time() - start, 0.55)
+        self.assertEqual(components, dict(vision='vision', zed='zed'))
+
+    def test_dependents_wait_and_get_results(self):
+        order = []
+
+        def connect():
+            time.sleep(0.1)
+            order.append('robot')
+            return 'robot'
+
+        def motion(robot):
+            order.append('motion')
+            return 'motion(%s)' % robot
+
+        startup = StartupManager()
+        startup.add('robot', connect)
+        startup.add('motion', motion, depends=('robot',))
+        components = startup.run()
+        self.assertEqual(order, ['robot', 'motion'])
+        self.assertEqual(components['motion'], 'motion(robot)')
+
+        timeline = dict((name, (status, start, end)) for name, status, start, end in startup.get_timeline())
+        self.assertGreaterEqual(timeline['motion'][1], timeline['robot'][2])
+
+    def test_failure_skips_dependents_and_raises(self):
+        def connect():
+            raise ConnectionError('arm unreachable')
+
+        startup = StartupManager()
+        startup.add('robot', connect)
+        startup.add('motion', lambda robot: robot, depends=('robot',))
+        startup.add('zed', lambda: 'zed')
+        with self.assertRaises(ConnectionError):
+            startup.run()
+
+        statuses = dict((name, status) for name, status, _, _ in startup.get_timeline())
+        self.assertEqual(statuses, dict(robot='failed', motion='skipped', zed='ok'))
+
+    def test_unknown_dependency(self):
+        startup = StartupManager()
+        with self.assertRaises(ValueError):
+            startup.add('motion', lambda robot: robot, depends=('robot',))
+
+
+if __name__ == '__main__':
+    unittest.main()
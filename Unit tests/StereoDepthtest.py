@@ -0,0 +1,155 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+
+import cv2
+import numpy as np
+
+sys.path.append('./..')
+
+from StereoDepth import StereoRectification, StereoDepthEngine, StereoDepthDriver, get_calibration_key, \
+    load_registration, ARM_OFFSET
+from CameraDriver.ReplayCameraDriver import ReplayStereoCameraDriver
+
+FOCAL_LENGTH = 1000.0
+BASELINE = 0.1
+IMAGE_SIZE = (1280, 1024)
+CALIBRATION_FILE = os.path.join('..', 'calibration', 'calDetails.npz')
+
+
+def make_pair(disparity):
+    """
+    Textured fronto-parallel plane seen by an ideal pair, the right image shifted by the disparity
+    """
+    random = np.random.RandomState(0)
+    texture = cv2.GaussianBlur((random.rand(IMAGE_SIZE[1], IMAGE_SIZE[0] + disparity) * 255).astype(np.uint8),
+                               (3, 3), 0)
+    return texture[:, :IMAGE_SIZE[0]].copy(), texture[:, disparity:IMAGE_SIZE[0] + disparity].copy()
+
+
+class test_stereo_depth(unittest.TestCase):
+
+    def setUp(self):
+        camera_matrix = np.array([[FOCAL_LENGTH, 0.0, 640.0], [0.0, FOCAL_LENGTH, 512.0], [0.0, 0.0, 1.0]])
+        self.rectification = StereoRectification.from_stereo(camera_matrix, np.zeros(5), camera_matrix, np.zeros(5),
+                                                              np.eye(3), [-BASELINE, 0.0, 0.0], IMAGE_SIZE)
+
+    def test_fixed_point_maps(self):
+        self.assertEqual(self.rectification.left_maps[0].dtype, np.int16)
+        self.assertEqual(self.rectification.left_maps[1].dtype, np.uint16)
+        self.assertEqual(self.rectification.right_maps[0].shape, (IMAGE_SIZE[1], IMAGE_SIZE[0], 2))
+
+    def test_depth_of_a_plane(self):
+        engine = StereoDepthEngine(self.rectification, roi=(200, 150, 1080, 870))
+        depth_map = engine.compute_depth(*make_pair(125))
+        self.assertEqual(depth_map.shape, (IMAGE_SIZE[1], IMAGE_SIZE[0]))
+        self.assertAlmostEqual(float(np.nanmedian(depth_map)), FOCAL_LENGTH * BASELINE / 125, 3)
+
+        # Only the ROI is measured
+        self.assertTrue(np.isnan(depth_map[:140]).all())
+        self.assertTrue(np.isnan(depth_map[:, 1090:]).all())
+        self.assertGreater(np.isfinite(depth_map[150:870, 200:1080]).mean(), 0.9)
+
+    def test_roi_matches_whole_image(self):
+        left, right = make_pair(100)
+        roi_depth = StereoDepthEngine(self.rectification, roi=(400, 300, 700, 500)).compute_depth(left, right)
+        full_depth = StereoDepthEngine(self.rectification, roi=None).compute_depth(left, right)
+        measured = np.isfinite(roi_depth)
+        self.assertTrue(measured.any())
+
+        # Within a sixteenth of a pixel of disparity
+        np.testing.assert_allclose(roi_depth[measured], full_depth[measured], atol=0.002)
+
+    def test_registration_maps_to_rectified_pixels(self):
+        points = np.array([[100.0, 200.0], [640.0, 512.0], [1200.0, 900.0]])
+        np.testing.assert_allclose(self.rectification.get_registration().apply(points),
+                                   self.rectification.rectify_points(points), atol=0.01)
+
+    def test_load_registration(self):
+        path = 'stereo_registration_test.npz'
+        registration = load_registration(self.rectification, path)
+        self.assertFalse(os.path.exists(path))
+
+        # A saved registration is used instead of the rectification
+        registration.table[...] = 0.0
+        try:
+            registration.save(path)
+            loaded = load_registration(self.rectification, path)
+        finally:
+            os.remove(path)
+        np.testing.assert_array_equal(loaded.apply((640.0, 512.0)), (0.0, 0.0))
+
+    def test_driver_heights(self):
+        pair = make_pair(125)
+        engine = StereoDepthEngine(self.rectification)
+        driver = StereoDepthDriver(lambda: pair, engine, background_file=None, accumulate=False)
+        try:
+            heights = driver.get_object_heights([[500.0, 400.0, 560.0, 460.0], [0.0, 0.0, 10.0, 10.0]])
+        finally:
+            driver.close()
+
+        # Desk depth 0.83 m, the plane is 0.8 m away, the box outside the ROI reads as the desk
+        self.assertAlmostEqual(float(heights[0]), ARM_OFFSET + 0.03, 3)
+        self.assertAlmostEqual(float(heights[1]), ARM_OFFSET, 5)
+
+    def test_cache_round_trip(self):
+        cache_dir = tempfile.mkdtemp()
+        try:
+            directory = os.path.join(cache_dir, 'key')
+            self.rectification.save(directory)
+            loaded = StereoRectification.load(directory)
+            self.assertIsInstance(loaded.left_maps[0], np.memmap)
+            for saved_map, loaded_map in zip(self.rectification.left_maps + self.rectification.right_maps,
+                                             loaded.left_maps + loaded.right_maps):
+                np.testing.assert_array_equal(loaded_map, saved_map)
+            np.testing.assert_allclose(loaded.q_matrix, self.rectification.q_matrix)
+            self.assertEqual(loaded.valid_rois, self.rectification.valid_rois)
+            self.assertEqual(loaded.image_size, IMAGE_SIZE)
+
+            left, right = make_pair(125)
+            np.testing.assert_array_equal(StereoDepthEngine(loaded).compute_depth(left, right),
+                                          StereoDepthEngine(self.rectification).compute_depth(left, right))
+
+            # Release the memory-mapped files before removing them
+            del loaded, saved_map, loaded_map
+        finally:
+            shutil.rmtree(cache_dir)
+
+    def test_cache_key(self):
+        key = get_calibration_key(CALIBRATION_FILE)
+        self.assertEqual(get_calibration_key(CALIBRATION_FILE), key)
+        self.assertNotEqual(get_calibration_key(CALIBRATION_FILE, alpha=0), key)
+        self.assertNotEqual(get_calibration_key(CALIBRATION_FILE, square_size=0.03), key)
+
+    def test_float_maps_are_converted(self):
+        camera_matrix = np.array([[FOCAL_LENGTH, 0.0, 32.0], [0.0, FOCAL_LENGTH, 24.0], [0.0, 0.0, 1.0]])
+        float_maps = cv2.initUndistortRectifyMap(camera_matrix, np.zeros(5), np.eye(3), camera_matrix, (64, 48),
+                                                 cv2.CV_32FC1)
+        rectification = StereoRectification(float_maps, float_maps, np.eye(4), (64, 48), camera_matrix, np.zeros(5),
+                                            np.eye(3), np.hstack([camera_matrix, np.zeros((3, 1))]))
+        self.assertEqual(rectification.left_maps[0].dtype, np.int16)
+        self.assertEqual(rectification.left_maps[1].dtype, np.uint16)
+
+        image = (np.random.RandomState(1).rand(48, 64) * 255).astype(np.uint8)
+        remapped = cv2.remap(image, rectification.left_maps[0], rectification.left_maps[1], cv2.INTER_LINEAR)
+        np.testing.assert_array_equal(remapped, image)
+
+    def test_replay_pairs(self):
+        pair_dir = tempfile.mkdtemp()
+        try:
+            left, right = make_pair(10)
+            cv2.imwrite(os.path.join(pair_dir, 'a_left.png'), left)
+            cv2.imwrite(os.path.join(pair_dir, 'a_right.png'), right)
+            cv2.imwrite(os.path.join(pair_dir, 'b_left.png'), left)
+            replay = ReplayStereoCameraDriver(pair_dir)
+        finally:
+            shutil.rmtree(pair_dir)
+        self.assertEqual(replay.get_num_pairs(), 1)
+        replay_left, replay_right = replay.get_pair()
+        np.testing.assert_array_equal(replay_right[:, :, 0], right)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+import sys
+
+sys.path.append('./..')
+
+from ArmDriver.FakeRobotServer import FakeRobotServer, FakeRobotClient
+from ArmDriver.TrajectoryDriver import TrajectoryDriver
+
+DROP_OFF = [0.003, -0.152, 0.25, -0.050, 1.395, -1.571]
+
+
+class test_trajectory_driver(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeRobotServer()
+        self.server.start()
+        self.robot = FakeRobotClient(self.server.port)
+
+    def tearDown(self):
+        self.robot.close_connection()
+        self.server.terminate_thread()
+        self.server.join()
+
+    def test_pick_is_four_round_trips(self):
+        motion = TrajectoryDriver(self.robot)
+        motion.execute_pick(0.2, 0.05, 0.1, 0.0, DROP_OFF)
+        commands = [c[0] for c in self.server.get_commands()]
+        self.assertEqual(commands, ['release_with_tool', 'execute_trajectory_from_poses', 'grasp_with_tool',
+                                    'execute_trajectory_from_poses', 'release_with_tool'])
+
+        # The gripper is left open so the next pick skips the release
+        self.server.clear_commands()
+        motion.execute_pick(0.25, -0.05, 0.1, 1.5708, DROP_OFF)
+        self.assertEqual(len(self.server.get_commands()), 4)
+
+    def test_trajectory_ends_on_the_drop_off(self):
+        motion = TrajectoryDriver(self.robot)
+        motion.execute_pick(0.2, 0.05, 0.1, 0.0, DROP_OFF)
+        trajectories = [c[1] for c in self.server.get_commands() if c[0] == 'execute_trajectory_from_poses']
+        self.assertAlmostEqual(trajectories[0][0][1][2], 0.1)
+        self.assertEqual(trajectories[1][0][-1], DROP_OFF)
+
+    def test_falls_back_to_single_moves(self):
+        motion = TrajectoryDriver(self.robot, use_trajectories=False)
+        motion.execute_pick(0.2, 0.05, 0.1, 0.0, DROP_OFF)
+        commands = [c[0] for c in self.server.get_commands()]
+        self.assertEqual(commands.count('move_pose'), 4)
+        self.assertNotIn('execute_trajectory_from_poses', commands)
+
+    def test_rejected_trajectories_fall_back_to_single_moves(self):
+        server = FakeRobotServer(supports_trajectories=False)
+        server.start()
+        robot = FakeRobotClient(server.port)
+        try:
+            motion = TrajectoryDriver(robot)
+            motion.execute_pick(0.2, 0.05, 0.1, 0.0, DROP_OFF)
+            commands = [c[0] for c in server.get_commands()]
+            self.assertEqual(commands, ['release_with_tool', 'execute_trajectory_from_poses', 'move_pose', 'move_pose',
+                                        'grasp_with_tool', 'move_pose', 'move_pose', 'release_with_tool'])
+
+            # Trajectories are not tried again
+            server.clear_commands()
+            motion.execute_pick(0.25, -0.05, 0.1, 1.5708, DROP_OFF)
+            commands = [c[0] for c in server.get_commands()]
+            self.assertEqual(commands.count('move_pose'), 4)
+            self.assertNotIn('execute_trajectory_from_poses', commands)
+        finally:
+            robot.close_connection()
+            server.terminate_thread()
+            server.join()
+
+    def test_failure_after_an_accepted_trajectory_is_raised(self):
+        motion = TrajectoryDriver(self.robot)
+        motion.execute_pick(0.2, 0.05, 0.1, 0.0, DROP_OFF)
+        self.server._supports_trajectories = False
+        with self.assertRaises(RuntimeError):
+            motion.execute_pick(0.25, -0.05, 0.1, 1.5708, DROP_OFF)
+
+
+if __name__ == '__main__':
+    unittest.main()
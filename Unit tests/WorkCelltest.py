@@ -0,0 +1,122 @@
+import unittest
+import sys
+import time
+
+sys.path.append('./..')
+
+import benchmark
+from Item import Detection, DetectionBatch
+from CoordinateTransform import CoordinateTransform
+from Simulation.SimRobot import SimRobot
+from WorkCell import ArmStation, ArmWorker, PickQueue
+
+CAMERA = dict(north=0.0, east=1000.0, south=1000.0, west=0.0)
+REACH = dict(north=0.0, east=1.0, south=1.0, west=0.0)
+DROP_OFFS = dict(home=[0.0, 0.0, 0.2, 0.0, 1.57, 0.0])
+
+
+def make_station(name, west, east, robot=None):
+    # Arm reaches camera x in [west, east]
+    camera_to_arm = CoordinateTransform.from_bounds(dict(CAMERA, west=west, east=east), REACH)
+    return ArmStation(name, robot or SimRobot(time_scale=0), camera_to_arm, REACH, DROP_OFFS)
+
+
+class FlakyRobot(SimRobot):
+    # Drops the first grasp like a gripper fault
+
+    def __init__(self):
+        super(FlakyRobot, self).__init__(time_scale=0)
+        self.num_failures = 0
+
+    def grasp_with_tool(self):
+        if self.num_failures == 0:
+            self.num_failures += 1
+            raise RuntimeError('grasp_with_tool failed')
+        super(FlakyRobot, self).grasp_with_tool()
+
+
+class FlatZED:
+    def get_object_height(self, x, y):
+        return 0.05
+
+
+class test_work_cell(unittest.TestCase):
+
+    def setUp(self):
+        self.left = make_station('left', 0.0, 600.0)
+        self.right = make_station('right', 400.0, 1000.0)
+        self.queue = PickQueue([self.left, self.right], zone_radius=100)
+
+    def test_only_reachable_items_are_claimed(self):
+        self.queue.update(DetectionBatch.from_detections([Detection.from_name('cat_ear', 900, 500)]))
+        self.assertIsNone(self.queue.claim(self.left))
+        detection, _ = self.queue.claim(self.right)
+        self.assertEqual(detection.x, 900)
+
+    def test_items_only_one_arm_can_reach_go_first(self):
+        shared = Detection.from_name('cat_ear', 500, 0)
+        own = Detection.from_name('dog_ear', 100, 900)
+        self.queue.update(DetectionBatch.from_detections([shared, own]))
+        detection, _ = self.queue.claim(self.left)
+        self.assertEqual(detection, own)
+
+    def test_reservation_blocks_nearby_items(self):
+        first = Detection.from_name('cat_ear', 500, 500)
+        neighbour = Detection.from_name('dog_ear', 550, 500)
+        far = Detection.from_name('dog_ear', 500, 900)
+        self.queue.update(DetectionBatch.from_detections([first, neighbour, far]))
+
+        claimed_left, _ = self.queue.claim(self.left)
+        claimed_right, _ = self.queue.claim(self.right)
+        self.assertNotEqual(claimed_left, claimed_right)
+        self.assertGreater(abs(claimed_left.y - claimed_right.y), 100)
+
+    def test_picked_item_is_not_queued_from_an_older_frame(self):
+        item = Detection.from_name('cat_ear', 100, 100)
+        frame_time = time.time()
+        self.queue.update(DetectionBatch.from_detections([item], frame_id=1, timestamp=frame_time))
+        self.queue.claim(self.left)
+
+        # A frame taken while the pick was running still shows the item
+        self.queue.update(DetectionBatch.from_detections([item], frame_id=2, timestamp=frame_time))
+        self.assertEqual(self.queue.get_num_pending(), 0)
+        self.queue.complete(self.left)
+        self.queue.update(DetectionBatch.from_detections([item], frame_id=3, timestamp=frame_time))
+        self.assertEqual(self.queue.get_num_pending(), 0)
+
+        # A frame taken after the pick that still shows it means the pick missed
+        self.queue.update(DetectionBatch.from_detections([item], frame_id=4, timestamp=time.time() + 1))
+        self.assertEqual(self.queue.get_num_pending(), 1)
+
+    def test_worker_keeps_picking_after_a_failed_pick(self):
+        robot = FlakyRobot()
+        station = make_station('flaky', 0.0, 1000.0, robot)
+        queue = PickQueue([station], zone_radius=100)
+        worker = ArmWorker(station, queue, FlatZED(), CoordinateTransform.from_bounds(CAMERA, CAMERA))
+        item = Detection.from_name('cat_ear', 500, 500)
+        frame_time = time.time()
+        worker.start()
+        try:
+            frame_id = 0
+            deadline = time.time() + 10
+            while station.num_picks == 0 and time.time() < deadline:
+                frame_id += 1
+                queue.update(DetectionBatch.from_detections([item], frame_id=frame_id, timestamp=frame_time))
+                time.sleep(0.05)
+            self.assertTrue(worker.is_alive())
+        finally:
+            worker.terminate_thread()
+            worker.join()
+
+        self.assertEqual(robot.num_failures, 1)
+        self.assertEqual(station.num_picks, 1)
+
+    def test_simulated_cell_clears_table(self):
+        args = benchmark.parse_args(['--items', '8', '--arms', '2', '--time-scale', '0', '--timeout', '60'])
+        results = benchmark.run_cell_benchmark(args)
+        self.assertEqual(results['picks'], 8)
+        self.assertEqual(sum(num_picks for _, num_picks in results['arms']), 8)
+
+
+if __name__ == '__main__':
+    unittest.main()
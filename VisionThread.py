@@ -31,8 +31,9 @@ import traceback
 from CameraDriver.SpinSingleCameraDriver import SpinSingleCameraDriver
 from CameraDriver.SpinCameraDriver import SpinCameraDriver
 from NeuralNetwork import MachineLearningThread
-from Item import Item
+from Item import DetectionBatch
 from NeuralNetwork.NeuralNetwork import Network
+from CycleTracer import TRACER
 
 REMAP_INTERPOLATION = cv2.INTER_LINEAR
 DEPTH_VISUALIZATION_SCALE = 8192 * 2
@@ -48,14 +49,16 @@ class VisionThread(threading.Thread):
     network_model - the neural network model
     log_dir - Where the log file is stored
     downscale_ratio - How much to scale down the images by
+    display - False to never open the live display (headless)
     """
-    def __init__(self, camera_id, network_model, log_dir, downscale_ratio):
+    def __init__(self, camera_id, network_model, log_dir, downscale_ratio, display=True):
         """
         Constructor
         :param camera_id:       ID of the camera 
         :param network_model:   The type of network model to use for object detection
         :param log_dir:         The directory to place log files in for TensorFlow
         :param downscale_ratio: The image down sampling percentage [1 - 0)
+        :param display:         False - never open the OpenCV live display, whatever the visualization settings
         """
         # Setup Threading
         super(VisionThread, self).__init__()       # Initialize Thread
@@ -85,7 +88,8 @@ class VisionThread(threading.Thread):
 
         # visualization settings:
         self._visualization_settings_lock = threading.RLock()
-        self._display_results = True
+        self._display_enabled = display
+        self._display_results = display
         self._class_label_to_show = "None"
         self._max_labels = 1
         self._display_class_name = False
@@ -93,8 +97,10 @@ class VisionThread(threading.Thread):
 
         self.img_counter = 0
 
-        self._item_list = []
-        self._item_list_lock = threading.Lock()
+        self._detection_batch = DetectionBatch.empty()
+        self._detection_batch_lock = threading.Lock()
+        self._frame_time = 0.0
+        self._occupancy_check = None    # Returns False when nothing is on the table, inference is skipped
 
         self._logger.debug('Threads Initialized')
 
@@ -143,12 +149,26 @@ class VisionThread(threading.Thread):
     def get_items(self):
         """
         External facing method to get the latest list of detected items and their positions
-        :return: a list of Items
+        :return: a tuple of Detections (immutable, shared with the caller)
         """
-        with self._item_list_lock:
-            result = copy.deepcopy(self._item_list)
+        return self.get_detection_batch().detections
+
+    def get_detection_batch(self):
+        """
+        External facing method to get every detection of the latest frame
+        :return: a DetectionBatch (read only, shared with the caller)
+        """
+        with self._detection_batch_lock:
+            result = self._detection_batch
         return result
 
+    def set_occupancy_check(self, occupancy_check):
+        """
+        External facing method to skip inference while the table is empty
+        :param occupancy_check: Function returning False when nothing is on the table (None - always run inference)
+        """
+        self._occupancy_check = occupancy_check
+
     """
     Kill the thread
     self - the self of the thread
@@ -178,7 +198,9 @@ class VisionThread(threading.Thread):
 
                 # Get image
                 start_time = time.time()
-                image = self._camera_thread.get_images(1)[0]
+                self._frame_time = start_time
+                with TRACER.span('vision.capture'):
+                    image = self._camera_thread.get_images(1)[0]
 
                 # If Calibration is needed, collect data
                 calibration = False
@@ -191,30 +213,40 @@ class VisionThread(threading.Thread):
 
                 # Grab the image
                 img_name = os.getcwd() + "\images\capture\cam_0_frame_{}.png".format(self.img_counter)
-                cv2.imwrite(img_name, image)
-                imageName = img_name
+                with TRACER.span('vision.save_image', frame=self.img_counter + 1):
+                    cv2.imwrite(img_name, image)
+                    imageName = img_name
 
-                # Read Image
-                imgL = cv2.imread(imageName)
+                    # Read Image
+                    imgL = cv2.imread(imageName)
 
                 self.img_counter = self.img_counter + 1
 
                 with self._camera_result_lock:
                     self._camera_result = (image)
                 
+                # Nothing on the table, nothing to detect
+                if self._occupancy_check is not None and not self._occupancy_check():
+                    with self._detection_batch_lock:
+                        self._detection_batch = DetectionBatch.empty(self.img_counter, self._frame_time)
+                    continue
+
                 # process images
 
-                downscaled_img = cv2.resize(image, (0, 0), fx=self._downscale_ratio, fy=self._downscale_ratio)
-                ml_result = self._machine_learning_thread.process_image(downscaled_img)
+                with TRACER.span('vision.inference', frame=self.img_counter):
+                    downscaled_img = cv2.resize(image, (0, 0), fx=self._downscale_ratio, fy=self._downscale_ratio)
+                    ml_result = self._machine_learning_thread.process_image(downscaled_img)
 
                 with self._machine_learning_result_lock:
                     self._machine_learning_result = ml_result
 
-                self._process_results()
+                with TRACER.span('vision.process_results', frame=self.img_counter):
+                    self._process_results()
 
                 with self._visualization_settings_lock:
                     if self._display_results:
-                        self._display_machine_learning_result(image)
+                        with TRACER.span('vision.display', frame=self.img_counter):
+                            self._display_machine_learning_result(image)
                 delta_time = time.time() - start_time
                 sum = self._average_time * self._iteration
                 self._iteration += 1.0
@@ -224,7 +256,7 @@ class VisionThread(threading.Thread):
         except Exception:
             # Pass on error
             tb = traceback.format_exc()
-            self._logger.error('Unhandled Exception:\n%s' % str(tb))
+            self._logger.error('Unhandled Exception:\n%s', str(tb))
             self._logger.error('Terminating All Threads')
 
         finally:
@@ -246,19 +278,13 @@ class VisionThread(threading.Thread):
         Process results from the camera
         """
 
-        ml_results = self.get_machine_learning_result()
+        with self._machine_learning_result_lock:
+            ml_results = self._machine_learning_result
 
-        ml_items = Network.get_item_locations(ml_results)
-        items = []
-        for item in ml_items:
-            x = item.x
-            y = item.y
-            z = 0
-            item.z = z
-            items.append(item)
+        batch = Network.get_detection_batch(ml_results, frame_id=self.img_counter, timestamp=self._frame_time)
 
-        with self._item_list_lock:
-            self._item_list = items
+        with self._detection_batch_lock:
+            self._detection_batch = batch
 
     """
     Set the settings of the  thread's visual settings
@@ -279,7 +305,7 @@ class VisionThread(threading.Thread):
         :return:
         """
         with self._visualization_settings_lock:
-            self._display_results = display_results
+            self._display_results = display_results and self._display_enabled
             self._class_label_to_show = label_to_show
             self._max_labels = max_labels
             self._display_class_name = display_class_name
@@ -305,16 +331,15 @@ class VisionThread(threading.Thread):
                 font = cv2.FONT_HERSHEY_SIMPLEX
                 cv2.putText(result, '%0.4f seconds/frame' % self._average_time, (0, 30), font, 1, (255, 255, 255), 1, cv2.LINE_AA)
             cv2.imshow('GM Pick-Point', result)
-            print("Vision Thread X: {}".format(self._current_x))
-            print("Vision Thread Y: {}".format(self._current_y))
+            self._logger.debug('Vision Thread X: %s Y: %s', self._current_x, self._current_y)
             cv2.waitKey(1)                      # DO NOT REMOVE: For some reason this works
 
     def _get_x(self):
-        print("Vision Thread X: {}".format(self._current_x))
+        self._logger.debug('Vision Thread X: %s', self._current_x)
         return self._current_x
 
     def _get_y(self):
-        print("Vision Thread Y: {}".format(self._current_y))
+        self._logger.debug('Vision Thread Y: %s', self._current_y)
         return self._current_y
 
 # Logging Parameters
@@ -0,0 +1,491 @@
+#!/usr/bin/env python
+"""
+--------------------------------------------------------------------
+Michigan  Technological University: Blue Marble Security Enterprise
+--------------------------------------------------------------------
+
+Multi-arm work cell. Several arms, each with its own calibrated transform
+and reach bounds, sort the items seen by one vision stream.
+
+Every new detection frame refreshes a shared PickQueue. Each arm runs its
+own ArmWorker thread that claims the next pick for itself: the closest
+item to where the arm is that the arm can reach, items that only it can
+reach first. A claimed item is reserved, and no other arm may claim an
+item within ZONE_RADIUS of a reservation, so two arms never target the
+same item or reach into the same spot at the same time.
+
+The cell sorts everything it sees into the drop offs of the arm that
+picks it; SQL jobs are not used in this mode.
+
+Each arm is a section of the cell config file (see load_stations):
+    [arm_left]
+    ip = 10.10.10.10
+    north = 0.15            (reach bounds in the arm's frame)
+    east = 0.15
+    south = 0.30
+    west = -0.15
+    camera_north = 150      (the same bounds in camera pixels, used when the
+    camera_east = 700        arm has no fitted camera_to_arm_<name> transform)
+    camera_south = 870
+    camera_west = 200
+
+To run the cell:
+    python WorkCell.py cell.config
+
+WorkCell.py
+Author: Blue Marble Security Enterprise
+Date Last Modified: 10/19/2026
+"""
+
+__author__ = 'Blue Marble Security Enterprise'
+__version__ = '1.0'
+
+import os
+import sys
+import time
+import logging
+import threading
+import traceback
+import configparser
+
+from ArmDriver.TrajectoryDriver import TrajectoryDriver
+from CoordinateTransform import CoordinateTransform, RegistrationMap, TRANSFORM_FILE, REGISTRATION_FILE, \
+    load_transforms
+from CycleTracer import TRACER
+
+MATCH_RADIUS = 20               # Max distance (pixels) between a queued item and its detection in a later frame
+ZONE_RADIUS = 120               # Min distance (pixels) between an arm's target and another arm's reserved item
+POLL_INTERVAL = 0.05            # Seconds between checks for a new detection frame
+IDLE_WAIT = 0.5                 # Max seconds an idle arm waits before asking the queue again
+
+
+class ArmStation:
+    """
+    One arm of the cell
+    """
+
+    def __init__(self, name, robot, camera_to_arm, reach, drop_offs):
+        """
+        Constructor
+        :param name:            Unique name of the arm
+        :param robot:           A connected NiryoRobot (or stand-in)
+        :param camera_to_arm:   CoordinateTransform from camera pixels to this arm's coordinates
+        :param reach:           dict with the north, east, south, and west bounds the arm can pick in (arm coordinates)
+        :param drop_offs:       dict of drop off name -> pose [x, y, z, roll, pitch, yaw], must include 'home'
+        """
+        self.name = name
+        self.robot = robot
+        self.camera_to_arm = camera_to_arm
+        self.reach = reach
+        self.drop_offs = drop_offs
+        self.motion = TrajectoryDriver(robot)
+
+        # Arm flips x and y
+        self.position = (drop_offs['home'][0], drop_offs['home'][1])
+        self.num_picks = 0
+
+    def to_arm(self, camera_points):
+        """
+        Transform camera pixels to arm coordinates and check which can be reached
+        :param camera_points: Nx2 array of camera pixel coords
+        :return: (Nx2 array of arm (x, y) with the arm's x/y flip applied, N boolean reachable mask)
+        """
+        arm_points = self.camera_to_arm.apply(camera_points)
+        reachable = (arm_points[:, 0] >= self.reach['west']) & (arm_points[:, 0] <= self.reach['east']) & \
+                    (arm_points[:, 1] >= self.reach['north']) & (arm_points[:, 1] <= self.reach['south'])
+
+        # Arm flips x and y
+        return arm_points[:, ::-1], reachable
+
+    def get_drop_off(self, detection):
+        """
+        :param detection: a Detection
+        :return: the drop off pose for the detection's family ('home' if it can not be sorted)
+        """
+        return self.drop_offs.get(detection.family, self.drop_offs['home'])
+
+
+class _QueuedItem:
+    """
+    A detection waiting in the PickQueue with its position in every arm's frame
+    """
+    __slots__ = ('detection', 'arm_positions', 'num_arms')
+
+    def __init__(self, detection, arm_positions):
+        self.detection = detection
+        self.arm_positions = arm_positions      # arm name -> (x, y), only for the arms that can reach it
+        self.num_arms = len(arm_positions)
+
+
+class PickQueue:
+    """
+    Thread safe queue of the items the arms still have to pick, rebuilt from every detection frame
+    """
+
+    def __init__(self, stations, match_radius=MATCH_RADIUS, zone_radius=ZONE_RADIUS):
+        """
+        Constructor
+        :param stations:        list of ArmStations
+        :param match_radius:    Max distance (pixels) between an item and its detection in a later frame
+        :param zone_radius:     Min distance (pixels) between an arm's target and another arm's reserved item
+        """
+        self._logger = logging.getLogger('GM_Pick_Point.' + self.__class__.__name__)
+        self._stations = list(stations)
+        self._match_radius = match_radius
+        self._zone_radius = zone_radius
+
+        self._condition = threading.Condition()
+        self._pending = []              # _QueuedItems nobody has claimed
+        self._reserved = dict()         # arm name -> the Detection it is picking
+        self._completed = []            # (Detection, time.time() of completion) until a later frame is seen
+        self._frame_id = None
+
+    def update(self, batch):
+        """
+        Replace the queue with the items of a new frame, leaving out reserved and just picked items
+        :param batch: a DetectionBatch
+        """
+        positions = batch.positions
+        arm_points = dict()
+        for station in self._stations:
+            arm_points[station.name] = station.to_arm(positions)
+
+        with self._condition:
+            # An item picked after this frame was taken is still in the frame
+            self._completed = [(d, t) for d, t in self._completed if t >= batch.timestamp]
+            taken = list(self._reserved.values()) + [d for d, _ in self._completed]
+
+            pending = []
+            for index, detection in enumerate(batch.detections):
+                if self._near(detection, taken, self._match_radius, same_class=True):
+                    continue
+                reachable_by = dict()
+                for name, (points, reachable) in arm_points.items():
+                    if reachable[index]:
+                        reachable_by[name] = (float(points[index, 0]), float(points[index, 1]))
+                if reachable_by:
+                    pending.append(_QueuedItem(detection, reachable_by))
+
+            self._pending = pending
+            self._frame_id = batch.frame_id
+            self._condition.notify_all()
+
+    def claim(self, station, timeout=0.0):
+        """
+        Reserve the next pick for an arm
+        :param station: the ArmStation asking
+        :param timeout: seconds to wait for a pick to become available
+        :return: (Detection, (x, y) in the arm's frame) or None if there is nothing the arm may pick
+        """
+        deadline = time.time() + timeout
+        with self._condition:
+            while True:
+                choice = self._choose(station)
+                if choice is not None:
+                    self._pending.remove(choice)
+                    self._reserved[station.name] = choice.detection
+                    return choice.detection, choice.arm_positions[station.name]
+
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return None
+                self._condition.wait(remaining)
+
+    def complete(self, station):
+        """
+        Mark an arm's reserved item as picked
+        :param station: the ArmStation that picked it
+        """
+        with self._condition:
+            detection = self._reserved.pop(station.name, None)
+            if detection is not None:
+                self._completed.append((detection, time.time()))
+            self._condition.notify_all()
+
+    def release(self, station):
+        """
+        Give up an arm's reservation without picking the item (it is queued again from the next frame)
+        :param station: the ArmStation that reserved it
+        """
+        with self._condition:
+            self._reserved.pop(station.name, None)
+            self._condition.notify_all()
+
+    def get_num_pending(self):
+        """
+        :return: the number of items waiting to be claimed
+        """
+        with self._condition:
+            result = len(self._pending)
+        return result
+
+    def _choose(self, station):
+        """
+        Internal facing function to pick the best item for an arm, called with the lock held
+        :param station: the ArmStation asking
+        :return: a _QueuedItem or None
+        """
+        others = [d for name, d in self._reserved.items() if name != station.name]
+        best = None
+        best_key = None
+        for queued in self._pending:
+            position = queued.arm_positions.get(station.name)
+            if position is None or self._near(queued.detection, others, self._zone_radius):
+                continue
+            # Items fewer arms can reach go first, then the closest one
+            key = (queued.num_arms, (position[0] - station.position[0]) ** 2 + (position[1] - station.position[1]) ** 2)
+            if best_key is None or key < best_key:
+                best = queued
+                best_key = key
+        return best
+
+    @staticmethod
+    def _near(detection, others, radius, same_class=False):
+        """
+        Internal facing function to check if a detection is within a radius of any of a list of detections
+        """
+        for other in others:
+            if same_class and other.class_id != detection.class_id:
+                continue
+            if (other.x - detection.x) ** 2 + (other.y - detection.y) ** 2 <= radius ** 2:
+                return True
+        return False
+
+
+class ArmWorker(threading.Thread):
+    """
+    Thread running the picks of one arm
+    """
+
+    def __init__(self, station, queue, zed_driver, camera_to_zed):
+        """
+        Constructor
+        :param station:         the ArmStation to drive
+        :param queue:           the shared PickQueue
+        :param zed_driver:      the shared ZEDMiniDriver (or stand-in)
+        :param camera_to_zed:   CoordinateTransform (or RegistrationMap) from camera pixels to ZED pixels
+        """
+        super(ArmWorker, self).__init__(name='ArmWorker-' + station.name)
+        self.daemon = True
+
+        self._logger = logging.getLogger('GM_Pick_Point.' + self.__class__.__name__)
+        self._terminate_thread_event = threading.Event()
+        self._station = station
+        self._queue = queue
+        self._zed_driver = zed_driver
+        self._camera_to_zed = camera_to_zed
+
+    def run(self):
+        """
+        Main thread function, a failed pick is released back to the queue and the worker keeps going,
+        it only stops on terminate_thread() or when the connection to the arm fails
+        """
+        station = self._station
+        home = station.drop_offs['home']
+        try:
+            station.motion.move_pose(home)
+            station.position = (home[0], home[1])
+
+            while not self._terminate_thread_event.is_set():
+                claim = self._queue.claim(station, IDLE_WAIT)
+                if claim is None:
+                    # Get out of the way while there is nothing to do
+                    if station.position != (home[0], home[1]):
+                        station.motion.move_pose(home)
+                        station.position = (home[0], home[1])
+                    continue
+
+                detection, (arm_x, arm_y) = claim
+                try:
+                    with TRACER.span('cell.execute_pick', arm=station.name, item=detection.item_type):
+                        self._execute_pick(detection, arm_x, arm_y)
+                except OSError:
+                    # The connection to the arm is gone, nothing more this worker can do
+                    self._queue.release(station)
+                    raise
+                except Exception:
+                    # One failed pick should not take the arm out of the cell, requeue the item and go home
+                    self._logger.error('%s: Pick of %s failed:\n%s',
+                                       station.name, detection.item_type, traceback.format_exc())
+                    self._queue.release(station)
+                    station.motion.move_pose(home)
+                    station.position = (home[0], home[1])
+                    continue
+                self._queue.complete(station)
+
+        except Exception:
+            tb = traceback.format_exc()
+            self._logger.error('%s: Unhandled Exception:\n%s', station.name, str(tb))
+
+    def terminate_thread(self):
+        """
+        External facing method to request termination of this thread
+        """
+        self._terminate_thread_event.set()
+
+    def _execute_pick(self, detection, arm_x, arm_y):
+        """
+        Internal facing function to pick one item and place it at the arm's drop off
+        :param detection:   the Detection to pick
+        :param arm_x:       X of the item in the arm's frame
+        :param arm_y:       Y of the item in the arm's frame
+        """
+        station = self._station
+        zed_x, zed_y = self._camera_to_zed.apply((detection.x, detection.y))
+        arm_z = self._zed_driver.get_object_height(zed_x, zed_y)
+
+        rotation = 1.5708 if detection.rot else 0
+        drop_off = station.get_drop_off(detection)
+        self._logger.debug('%s picking %s at (%0.3f, %0.3f, %0.3f)',
+                           station.name, detection.item_type, arm_x, arm_y, arm_z)
+
+        station.motion.execute_pick(arm_x, arm_y, arm_z, rotation, drop_off)
+        station.position = (drop_off[0], drop_off[1])
+        station.num_picks += 1
+
+
+class WorkCell:
+    """
+    Feeds one vision stream to several arms
+    """
+
+    def __init__(self, stations, vision_thread, zed_driver, camera_to_zed):
+        """
+        Constructor
+        :param stations:        list of ArmStations
+        :param vision_thread:   A VisionThread (or stand-in) that has not been started
+        :param zed_driver:      A ZEDMiniDriver (or stand-in), shared by every arm
+        :param camera_to_zed:   CoordinateTransform (or RegistrationMap) from camera pixels to ZED pixels
+        """
+        self._logger = logging.getLogger('GM_Pick_Point.' + self.__class__.__name__)
+        self._stations = list(stations)
+        self._vision_thread = vision_thread
+        self._queue = PickQueue(self._stations)
+        self._zed_driver = zed_driver
+        if zed_driver.has_background():
+            vision_thread.set_occupancy_check(zed_driver.is_table_occupied)
+        self._workers = [ArmWorker(station, self._queue, zed_driver, camera_to_zed)
+                         for station in self._stations]
+        self._terminate_event = threading.Event()
+
+    def run(self):
+        """
+        Run the cell until terminate() is called
+        """
+        try:
+            self._logger.debug('Starting Vision Thread')
+            self._vision_thread.start()
+            for worker in self._workers:
+                worker.start()
+
+            last_frame_id = None
+            while not self._terminate_event.is_set():
+                batch = self._vision_thread.get_detection_batch()
+                if batch.frame_id != last_frame_id:
+                    last_frame_id = batch.frame_id
+                    with TRACER.span('cell.update_queue', frame=batch.frame_id):
+                        self._queue.update(batch)
+                self._terminate_event.wait(POLL_INTERVAL)
+
+        except Exception:
+            tb = traceback.format_exc()
+            self._logger.error('Unhandled Exception:\n%s', str(tb))
+
+        finally:
+            for worker in self._workers:
+                worker.terminate_thread()
+            for worker in self._workers:
+                worker.join()
+            self._vision_thread.terminate_thread()
+            self._vision_thread.join()
+            for station in self._stations:
+                station.robot.close_connection()
+            self._zed_driver.close()
+
+            for station in self._stations:
+                self._logger.info('%s: %d picks', station.name, station.num_picks)
+
+    def terminate(self):
+        """
+        External facing method to stop the cell
+        """
+        self._terminate_event.set()
+
+    def get_queue(self):
+        """
+        :return: the shared PickQueue
+        """
+        return self._queue
+
+    def get_stations(self):
+        """
+        :return: the list of ArmStations
+        """
+        return list(self._stations)
+
+
+def load_stations(config_file, drop_offs, connect, transform_file=TRANSFORM_FILE):
+    """
+    Build the ArmStations described by the arm_<name> sections of a cell config file
+    :param config_file:     Path to the cell config file
+    :param drop_offs:       dict of drop off name -> pose, used for every arm
+    :param connect:         Function ip -> connected robot
+    :param transform_file:  .npz of fitted transforms, camera_to_arm_<name> is used when present
+    :return: a list of ArmStations
+    """
+    config = configparser.ConfigParser()
+    config.read(config_file)
+    transforms = load_transforms(transform_file) if os.path.exists(transform_file) else dict()
+
+    stations = []
+    for section_name in config.sections():
+        if not section_name.startswith('arm_'):
+            continue
+        name = section_name[len('arm_'):]
+        section = config[section_name]
+        reach = dict((bound, section.getfloat(bound)) for bound in ('north', 'east', 'south', 'west'))
+
+        camera_to_arm = transforms.get('camera_to_arm_' + name)
+        if camera_to_arm is None:
+            camera_bounds = dict((bound, section.getfloat('camera_' + bound))
+                                 for bound in ('north', 'east', 'south', 'west'))
+            camera_to_arm = CoordinateTransform.from_bounds(camera_bounds, reach)
+
+        robot = connect(section.get('ip'))
+        if robot.need_calibration():
+            robot.calibrate_auto()
+        stations.append(ArmStation(name, robot, camera_to_arm, reach, dict(drop_offs)))
+
+    if len(stations) == 0:
+        raise ValueError('No arm_<name> sections in %s' % config_file)
+    return stations
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print("Syntax: {0} CELL_CONFIG".format(sys.argv[0]))
+        sys.exit(1)
+
+    import main
+    from pyniryo import NiryoRobot
+    from VisionThread import VisionThread
+    from ZEDMiniDriver import ZEDMiniDriver
+
+    logging.basicConfig(level=logging.INFO)
+
+    # The camera and ZED bounds are shared with the single arm setup
+    main_config = configparser.ConfigParser()
+    main_config.read(main.CONFIG_FILE)
+    cell_camera_to_zed = CoordinateTransform.from_bounds(
+        dict((bound, main_config.getfloat('camera_coordinates', bound)) for bound in ('north', 'east', 'south', 'west')),
+        dict((bound, main_config.getfloat('zed_coordinates', bound)) for bound in ('north', 'east', 'south', 'west')))
+    if os.path.exists(TRANSFORM_FILE):
+        cell_camera_to_zed = load_transforms(TRANSFORM_FILE).get('camera_to_zed', cell_camera_to_zed)
+    if os.path.exists(REGISTRATION_FILE):
+        cell_camera_to_zed = RegistrationMap.load(REGISTRATION_FILE)
+
+    cell = WorkCell(load_stations(sys.argv[1], main.sorting_coords, NiryoRobot),
+                    VisionThread(main.CAMERA_SERIAL_NUM, main.GRAPH_TYPE, main.LOG_DIR, main.IMAGE_DOWNSCALE_RATIO,
+                                 display=False),
+                    ZEDMiniDriver(), cell_camera_to_zed)
+    cell.run()
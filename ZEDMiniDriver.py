@@ -1,9 +1,55 @@
+#!/usr/bin/env python
+"""
+--------------------------------------------------------------------
+Michigan  Technological University: Blue Marble Security Enterprise
+--------------------------------------------------------------------
+
+Runs the ZED Mini depth sensor
+
+Depth is grabbed continuously on a DepthAcquisitionThread and fed to a
+DepthAccumulator, height queries are answered from its smoothed, hole
+filled running estimate instead of waiting on a grab. Every query reads
+robust statistics of boxes around the items (see
+DepthAcquisition.get_roi_statistics), all the boxes of a query are read
+from the same depth map in one pass. A box counts only the measured
+pixels of the estimate as valid, the filled ones do not. The depth
+background is averaged from raw grabs, not from the estimate. Heights are measured from a
+per-pixel DepthBackground of the empty table when one was captured
+(python DepthBackground.py), from DESK_DEPTH otherwise. Debug images of
+the depth map are off by default, when turned on one of every
+DEBUG_SAMPLE_INTERVAL queries is saved by a DepthImageWriter thread.
+
+ZEDMiniDriver.py
+Author: Blue Marble Security Enterprise
+Date Last Modified: 10/19/2026
+"""
+
+__author__ = 'Blue Marble Security Enterprise'
+__version__ = '1.0'
+
+import os
+import logging
+
+import numpy as np
 import sl
 
+from CycleTracer import TRACER
+from DepthAcquisition import DepthAcquisitionThread, DepthImageWriter, get_depth_at, get_roi_statistics, \
+    get_heights
+from DepthAccumulator import DepthAccumulator
+from DepthBackground import DepthBackground, BACKGROUND_FILE, BACKGROUND_FRAMES
+
 # Constants in meters
 DESK_DEPTH = 0.83  # Desk depth from sensor
 ARM_OFFSET = 0.1  # Arm offset for correct picking
 SHIFT_AMNT = 0.4  # Arm shift amount for returning
+DEPTH_MAP_SIZE = (720, 1280)    # Rows, cols of a HD720 depth map
+
+MAX_DEPTH_AGE = 0.2             # Max seconds since a depth map was grabbed for it to answer a height query
+ACCUMULATE_DEPTH = True         # True - answer queries from the running estimate, False - from the latest grab
+DEBUG_IMAGES = False            # True - save depth map images with the queried boxes outlined
+DEBUG_SAMPLE_INTERVAL = 10      # Save the depth map of one of every this many height queries
+DEBUG_IMAGE_DIR = os.path.join('images', 'depth_map')
 
 
 class ZEDMiniDriver:
@@ -11,7 +57,22 @@ class ZEDMiniDriver:
     Runs the ZED Mini depth sensor
     """
 
-    def __init__(self) -> None:
+    def __init__(self, debug_images=DEBUG_IMAGES, debug_sample_interval=DEBUG_SAMPLE_INTERVAL,
+                 max_depth_age=MAX_DEPTH_AGE, background_file=BACKGROUND_FILE, accumulate=ACCUMULATE_DEPTH) -> None:
+        """
+        Constructor
+        :param debug_images:            True - save depth map images with the queried boxes outlined
+        :param debug_sample_interval:   Save the depth map of one of every this many height queries
+        :param max_depth_age:           Max seconds since a depth map was grabbed for it to answer a height query
+        :param background_file:         .npy of the empty table's depths, used when it exists
+        :param accumulate:              True - answer queries from the running estimate, False - from the latest grab
+        """
+        self._logger = logging.getLogger('GM_Pick_Point.' + self.__class__.__name__)
+        self._max_depth_age = max_depth_age
+        self._background_file = background_file
+        self._background = DepthBackground(np.full(DEPTH_MAP_SIZE, DESK_DEPTH, dtype=np.float32))
+        self._has_background = False
+
         # Create a camera and a set of initial parameters
         self._zed_mini = sl.Camera()
         self._init_params = sl.InitParameters()
@@ -23,56 +84,157 @@ class ZEDMiniDriver:
         self._init_params.depth_minimum_distance = 300
         self._init_params.depth_maximum_distance = 2000
 
-        # Create a 'Mat' to store the depth information later
+        # Create a 'Mat' to store the depth information later, only used by the acquisition thread
         self._depth_map = sl.Mat()
-        # Create another Mat for depth map printouts
-        self._depth_image = sl.Mat()
-        self._num_captures = 0
         self._run_params = sl.RuntimeParameters()
 
         # Open the zed mini
         if not self._zed_mini.is_opened():
-            print("Opening ZED Mini...")
+            self._logger.info('Opening ZED Mini...')
             status = self._zed_mini.open(self._init_params)
             if status is not sl.ERROR_CODE.SUCCESS:
-                print("  Failure")
-                print(repr(status))
-                exit()
-            print("  Success")
+                self._logger.error('Opening ZED Mini - FAILURE: %r', status)
+                raise RuntimeError('Could not open the ZED Mini: %r' % status)
+            self._logger.info('Opening ZED Mini - COMPLETE')
+
+        self._image_writer = None
+        if debug_images:
+            self._image_writer = DepthImageWriter(DEBUG_IMAGE_DIR, debug_sample_interval)
+            self._image_writer.start()
+
+        self._acquisition_thread = DepthAcquisitionThread(self._grab, name='ZEDAcquisition',
+                                                          accumulator=DepthAccumulator() if accumulate else None)
+        self._acquisition_thread.start()
 
-        # debug -- print the depth of the middle of the picture. If the 
+        # debug -- print the depth of the middle of the picture. If the
         # workfield is empty, that's the depth of the desk
-        if self._zed_mini.grab(self._run_params) == sl.ERROR_CODE.SUCCESS:
-            self._zed_mini.retrieve_measure(self._depth_map, sl.MEASURE.DEPTH)
-            #DESK_DEPTH = self._depth_map.get_value(1280/2, 720/2)[1] / 1000
-            print(f"starting desk depth: {DESK_DEPTH}")
-            self._zed_mini.retrieve_image(self._depth_image, sl.VIEW.DEPTH)
-            for i in range(int((1280/2)-2),int((1280/2)+3)):
-                for j in range(int((720/2)-2), int((720/2)+3)):
-                    self._depth_image.set_value(i, j, [0, 0, 0, 0, 0])
-            self._depth_image.write("images/depth_map/init.png")
+        depth_map, _ = self._acquisition_thread.get_latest()
+        if depth_map is not None:
+            center_depth = get_depth_at(depth_map, depth_map.shape[1] / 2, depth_map.shape[0] / 2, DESK_DEPTH)
+            self._logger.info('Starting desk depth: %s, measured: %0.3f', DESK_DEPTH, center_depth)
+
+        if background_file is not None and os.path.exists(background_file):
+            background = DepthBackground.load(background_file)
+            if background.shape == DEPTH_MAP_SIZE:
+                self._background = background
+                self._has_background = True
+                self._logger.info('Loaded the depth background from %s', background_file)
+            else:
+                self._logger.error('Depth background %s is %s, not %s, using the desk depth',
+                                   background_file, background.shape, DEPTH_MAP_SIZE)
+        else:
+            self._logger.warning('No depth background, heights are measured from the desk depth')
+
+    def _grab(self):
+        """
+        Internal facing function for the acquisition thread to grab one depth map
+        :return: a new 2D float32 array of depths (meters), None if the grab failed
+        """
+        if self._zed_mini.grab(self._run_params) != sl.ERROR_CODE.SUCCESS:
+            return None
+        self._zed_mini.retrieve_measure(self._depth_map, sl.MEASURE.DEPTH)
+
+        # get_data() is a view of the Mat the next grab writes to, the multiply makes the cached copy
+        return np.multiply(self._depth_map.get_data(), 0.001, dtype=np.float32)
+
+    def get_latest_depth(self):
+        """
+        Get the latest depth map, waits for a new one if it is older than max_depth_age
+        :return: (2D array of depths (meters), time.time() it was grabbed at), (None, None) if no depth map yet
+        """
+        return self._acquisition_thread.get_latest(self._max_depth_age)
+
+    def get_valid_mask(self):
+        """
+        Get the validity mask of the latest depth map
+        :return: 2D bool array, True for the measured depths (False for holes and filled pixels),
+                 None if there is no depth map
+        """
+        _, valid_mask, _ = self._acquisition_thread.get_latest_valid(self._max_depth_age)
+        return valid_mask
+
+    def get_depth_statistics(self, boxes):
+        """
+        Get the depth statistics of many boxes from one depth map
+        :param boxes: Nx4 array of (left, top, right, bottom) in the ZED's pixels
+        :return: N array of ROI_STATS_DTYPE (see DepthAcquisition), None if there is no depth map
+        """
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        with TRACER.span('zed.depth_cache', boxes=len(boxes)):
+            depth_map, valid_mask, _ = self._acquisition_thread.get_latest_valid(self._max_depth_age)
+        if depth_map is None:
+            self._logger.warning('No depth map from the ZED Mini, using the desk depth')
+            return None
+
+        stats = get_roi_statistics(depth_map, boxes, self._background.depth_map, valid_mask=valid_mask)
+
+        # debug -- save a grayscale copy of the depthmap with the polled boxes outlined
+        if self._image_writer is not None:
+            self._image_writer.submit(depth_map, boxes=boxes)
+        return stats
+
+    def get_object_heights(self, boxes):
+        """
+        Collects the heights of every object in the picking area from one depth map
+        :param boxes: Nx4 array of (left, top, right, bottom) of the objects in the ZED's pixels
+        :return: N array of heights (meters) for the arm to pick at
+        """
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        stats = self.get_depth_statistics(boxes)
+        if stats is None:
+            return np.full(len(boxes), ARM_OFFSET)
+
+        self._logger.debug('zed boxes: %s median heights: %s valid: %s', boxes.tolist(), stats['median'].tolist(),
+                           stats['valid_fraction'].tolist())
+        return get_heights(stats, ARM_OFFSET)
 
     def get_object_height(self, x: float, y: float) -> float:
         """Collects the height of an object in the picking area"""
+        return float(self.get_object_heights([x, y, x, y])[0])
 
-        print(f"zed x, y : {x}, {y}")
+    def has_background(self):
+        """
+        :return: True if heights are measured from a captured depth background
+        """
+        return self._has_background
 
-        # Collect the entire depth map and save the specified coordinate depth
-        object_depth = 840
-        if self._zed_mini.grab(self._run_params) == sl.ERROR_CODE.SUCCESS:
-            self._zed_mini.retrieve_measure(self._depth_map, sl.MEASURE.DEPTH)
-            object_depth = self._depth_map.get_value(x, y)[1] / 1000
+    def is_table_occupied(self):
+        """
+        Check the latest depth map for anything standing on the table
+        :return: True if the table is occupied (or there is no depth map to tell)
+        """
+        depth_map, _ = self.get_latest_depth()
+        if depth_map is None:
+            return True
+        return self._background.is_occupied(depth_map)
 
-        print(f"object depth: {object_depth}")
+    def capture_background(self, num_frames=BACKGROUND_FRAMES):
+        """
+        Average the next grabbed depth maps into the background and save it, the table must be empty
+        :param num_frames: Depth maps to average
+        """
+        self._logger.info('Capturing the depth background from %d depth maps...', num_frames)
+        depth_maps = []
+        while len(depth_maps) < num_frames:
+            depth_map, _ = self._acquisition_thread.get_next(raw=True)
+            if depth_map is None:
+                raise RuntimeError('No depth map from the ZED Mini')
+            depth_maps.append(depth_map)
 
-        # debug -- save a grayscale copy of the depthmap
-        self._zed_mini.retrieve_image(self._depth_image, sl.VIEW.DEPTH)
-        # add a dot on the map where the zed mini just polled the depth of
-        for i in range(int(x-2),int(x+3)):
-            for j in range(int(y-2), int(y+3)):
-                self._depth_image.set_value(i, j, [0, 0, 0, 0, 0])
-        
-        self._depth_image.write("images/depth_map/" + str(self._num_captures) + ".png")
-        self._num_captures = self._num_captures + 1
+        background = DepthBackground.build(depth_maps, DESK_DEPTH)
+        if self._background_file is not None:
+            background.save(self._background_file)
+        self._background = background
+        self._has_background = True
+        self._logger.info('Capturing the depth background - COMPLETE')
 
-        return ARM_OFFSET + (DESK_DEPTH - object_depth)
+    def close(self):
+        """
+        Stop grabbing depth and close the ZED Mini
+        """
+        self._acquisition_thread.terminate_thread()
+        self._acquisition_thread.join()
+        if self._image_writer is not None:
+            self._image_writer.terminate_thread()
+            self._image_writer.join()
+        self._zed_mini.close()
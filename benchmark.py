@@ -0,0 +1,374 @@
+#!/usr/bin/env python
+"""
+--------------------------------------------------------------------
+Michigan  Technological University: Blue Marble Security Enterprise
+--------------------------------------------------------------------
+
+End to end cycle time benchmark. Runs the full pick loop headless
+against the simulated arm, depth sensor, camera and table and reports
+picks/hour with a per-phase breakdown. With --arms N the multi-arm
+WorkCell is run instead, with N simulated arms sharing the table. With
+--stereo-dir heights are measured by the StereoDepthDriver from recorded
+FLIR pairs instead of the simulated ZED Mini.
+
+benchmark.py
+Author: Blue Marble Security Enterprise
+Date Last Modified: 10/19/2026
+"""
+
+__author__ = 'Blue Marble Security Enterprise'
+__version__ = '1.0'
+
+import os
+import sys
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+import threading
+import configparser
+from collections import OrderedDict
+
+import main
+from main import Main
+from SQL_Driver import ObjectDB, DBManager
+from CoordinateTransform import CoordinateTransform
+from HeadlessGUI import HeadlessGUI
+from WorkCell import WorkCell, ArmStation
+from CycleTracer import TRACER
+from Simulation.SimRobot import SimRobot
+from Simulation.SimTable import SimTable
+from Simulation.SimVisionThread import SimVisionThread
+from Simulation.SimZEDDriver import SimZEDDriver
+from StereoDepth import StereoRectification, StereoDepthEngine, StereoDepthDriver, load_registration
+from CameraDriver.ReplayCameraDriver import ReplayStereoCameraDriver
+
+# Coordinate bounds of the simulated cell
+SIM_CONFIG = {
+    'camera_coordinates': dict(north=150.0, east=1080.0, south=870.0, west=200.0),
+    'arm_coordinates':    dict(north=0.15, east=0.15, south=0.30, west=-0.15),
+    'zed_coordinates':    dict(north=150.0, east=980.0, south=600.0, west=300.0),
+}
+
+CELL_ARM_COVERAGE = 0.6         # Fraction of the camera's width each arm of a simulated work cell can reach
+STEREO_FRAME_TIME = 0.033       # Time (s) for the FLIR pair to capture one pair
+
+# Main methods and robot commands timed as phases
+MAIN_PHASES = ['_call_vision_thread', '_call_sql_thread', '_process_sql_job', '_plan_picks', '_verify_pick',
+               '_execute_pick', 'main_loop_helper']
+ROBOT_PHASES = ['move_pose', 'execute_trajectory_from_poses', 'grasp_with_tool', 'release_with_tool']
+DEPTH_PHASES = ['get_object_height', 'get_object_heights']
+
+
+class PhaseTimer:
+    """
+    Accumulates wall clock time spent in wrapped methods
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._totals = dict()
+        self._counts = dict()
+
+    def wrap(self, obj, method_name, phase_name):
+        """
+        Replace a bound method of an object with a timed version
+        :param obj:         the object
+        :param method_name: name of the method to time
+        :param phase_name:  name to report the time under
+        """
+        method = getattr(obj, method_name)
+
+        def timed(*args, **kwargs):
+            start_time = time.time()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.add(phase_name, time.time() - start_time)
+
+        setattr(obj, method_name, timed)
+
+    def add(self, phase_name, duration):
+        with self._lock:
+            self._totals[phase_name] = self._totals.get(phase_name, 0.0) + duration
+            self._counts[phase_name] = self._counts.get(phase_name, 0) + 1
+
+    def get_phases(self):
+        """
+        :return: a list of (phase name, count, total seconds) sorted by total time
+        """
+        with self._lock:
+            result = [(name, self._counts[name], total) for name, total in self._totals.items()]
+        result.sort(key=lambda phase: phase[2], reverse=True)
+        return result
+
+
+def write_config(path):
+    """
+    Write the simulated cell's coordinate bounds to a config file
+    :param path: where to write the config file
+    """
+    config = configparser.ConfigParser()
+    for section_name, variables in SIM_CONFIG.items():
+        config[section_name] = dict((name, str(value)) for name, value in variables.items())
+    with open(path, 'w') as config_file:
+        config.write(config_file)
+
+
+ARM_TO_CAMERA = CoordinateTransform.from_bounds(SIM_CONFIG['camera_coordinates'],
+                                                SIM_CONFIG['arm_coordinates']).inverse()
+
+
+def arm_to_camera(pose_x, pose_y):
+    """
+    Map a position in the arm's frame to FLIR camera pixels (the inverse of the pick loop's mapping)
+    """
+    # Arm flips x and y
+    camera_x, camera_y = ARM_TO_CAMERA.apply((pose_y, pose_x))
+    return camera_x, camera_y
+
+
+def create_depth_driver(args):
+    """
+    Create the depth sensor stand-in
+    :param args: parsed command line arguments
+    :return: (a StereoDepthDriver replaying recorded pairs with --stereo-dir, a SimZEDDriver otherwise,
+              the camera -> depth map registration of the StereoDepthDriver, None for the SimZEDDriver)
+    """
+    if args.stereo_dir is None:
+        return SimZEDDriver(args.depth_dir, time_scale=args.time_scale), None
+
+    replay = ReplayStereoCameraDriver(args.stereo_dir, frame_interval=STEREO_FRAME_TIME * args.time_scale)
+    rectification = StereoRectification.from_cache()
+    driver = StereoDepthDriver(replay.get_pair, StereoDepthEngine(rectification), background_file=None)
+    return driver, load_registration(rectification)
+
+
+def write_jobs(db_path, table):
+    """
+    Replace the jobs of the benchmark's database with one job requesting every item on the table, the pick loop
+    only picks requested items
+    :param db_path: path to the benchmark's copy of the database
+    :param table:   the SimTable
+    """
+    items = OrderedDict()
+    for item in table.get_items():
+        key = (item.item_type, item.item_type.split('_')[0].title() + ' Bin')
+        items[key] = items.get(key, 0) + 1
+
+    conn = DBManager.connect(db_path)
+    try:
+        with conn:
+            conn.execute('delete from job_items')
+            conn.execute('delete from jobs')
+        DBManager.import_jobs(conn, OrderedDict([('benchmark', [0, None, items])]))
+    finally:
+        conn.close()
+
+
+def run_benchmark(args):
+    """
+    Run the pick loop against the simulated cell
+    :param args: parsed command line arguments
+    :return: a dict of results
+    """
+    work_dir = tempfile.mkdtemp(prefix='pick_point_benchmark_')
+    config_path = os.path.join(work_dir, 'sim.config')
+    db_path = os.path.join(work_dir, 'pickpoint.db')
+    write_config(config_path)
+    shutil.copyfile(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'SQL_Driver', 'pickpoint.db'), db_path)
+    if not os.path.exists(main.LOG_DIR):
+        os.makedirs(main.LOG_DIR)
+
+    # Build the simulated cell
+    if args.layout is not None:
+        table = SimTable.from_file(args.layout, arm_to_camera)
+    else:
+        table = SimTable.random(args.items, SIM_CONFIG['camera_coordinates'], arm_to_camera, seed=args.seed)
+    num_items = table.get_num_items()
+    target_picks = min(args.picks, num_items) if args.picks > 0 else num_items
+    write_jobs(db_path, table)
+
+    camera = None
+    if args.image_dir is not None:
+        from CameraDriver.ReplayCameraDriver import ReplayCameraDriver
+        camera = ReplayCameraDriver(args.image_dir)
+
+    robot = SimRobot(table, time_scale=args.time_scale)
+    robot.set_arm_max_velocity(args.speed)
+    zed_driver, camera_to_depth = create_depth_driver(args)
+    vision_thread = SimVisionThread(table, camera, time_scale=args.time_scale)
+    gui = HeadlessGUI()
+
+    pick_loop = Main(gui=gui, vision_thread=vision_thread, robot=robot, zed_driver=zed_driver,
+                     sql_db=ObjectDB.ObjectDB(db_path), config_file=config_path, loop_delay=args.loop_delay,
+                     trace=args.trace, headless=True, camera_to_depth=camera_to_depth)
+
+    timer = PhaseTimer()
+    for method_name in MAIN_PHASES:
+        timer.wrap(pick_loop, method_name, 'main.' + method_name)
+    for method_name in ROBOT_PHASES:
+        timer.wrap(robot, method_name, 'robot.' + method_name)
+    for method_name in DEPTH_PHASES:
+        timer.wrap(zed_driver, method_name, 'depth.' + method_name)
+
+    # Stop the pick loop once enough items have been placed or the time runs out
+    def watchdog():
+        deadline = time.time() + args.timeout
+        while len(table.get_placed_items()) < target_picks and time.time() < deadline:
+            time.sleep(0.05)
+        gui.terminate_thread()
+
+    watchdog_thread = threading.Thread(target=watchdog)
+    watchdog_thread.daemon = True
+
+    start_time = time.time()
+    watchdog_thread.start()
+    pick_loop.main_loop()
+    elapsed = time.time() - start_time
+
+    shutil.rmtree(work_dir, ignore_errors=True)
+
+    picks = len(table.get_placed_items())
+    return dict(picks=picks,
+                items=num_items,
+                elapsed=elapsed,
+                picks_per_hour=picks * 3600.0 / elapsed if elapsed > 0 else 0.0,
+                phases=timer.get_phases(),
+                robot=robot.get_stats())
+
+
+def run_cell_benchmark(args):
+    """
+    Run the multi-arm work cell against the simulated cell
+    The arms are spread along the camera's x axis, each reaching CELL_ARM_COVERAGE of its width, so neighbouring
+    arms share part of the table.
+    :param args: parsed command line arguments
+    :return: a dict of results
+    """
+    camera_bounds = SIM_CONFIG['camera_coordinates']
+    arm_bounds = SIM_CONFIG['arm_coordinates']
+    if args.layout is not None:
+        table = SimTable.from_file(args.layout, arm_to_camera)
+    else:
+        table = SimTable.random(args.items, camera_bounds, arm_to_camera, seed=args.seed)
+    num_items = table.get_num_items()
+    target_picks = min(args.picks, num_items) if args.picks > 0 else num_items
+
+    timer = PhaseTimer()
+    width = (camera_bounds['east'] - camera_bounds['west']) * CELL_ARM_COVERAGE
+    step = (camera_bounds['east'] - camera_bounds['west'] - width) / max(args.arms - 1, 1)
+    stations = []
+    robots = []
+    for index in range(args.arms):
+        station_bounds = dict(camera_bounds, west=camera_bounds['west'] + index * step)
+        station_bounds['east'] = station_bounds['west'] + width
+        camera_to_arm = CoordinateTransform.from_bounds(station_bounds, arm_bounds)
+        to_camera = camera_to_arm.inverse()
+
+        # Arm flips x and y
+        robot = SimRobot(table, time_scale=args.time_scale,
+                         arm_to_camera=lambda pose_x, pose_y, t=to_camera: t.apply((pose_y, pose_x)))
+        robot.set_arm_max_velocity(args.speed)
+        for method_name in ROBOT_PHASES:
+            timer.wrap(robot, method_name, 'robot.' + method_name)
+        robots.append(robot)
+        stations.append(ArmStation('arm%d' % index, robot, camera_to_arm, arm_bounds, dict(main.sorting_coords)))
+
+    zed_driver, camera_to_depth = create_depth_driver(args)
+    for method_name in DEPTH_PHASES:
+        timer.wrap(zed_driver, method_name, 'depth.' + method_name)
+
+    camera = None
+    if args.image_dir is not None:
+        from CameraDriver.ReplayCameraDriver import ReplayCameraDriver
+        camera = ReplayCameraDriver(args.image_dir)
+    vision_thread = SimVisionThread(table, camera, time_scale=args.time_scale)
+
+    camera_to_zed = camera_to_depth
+    if camera_to_zed is None:
+        camera_to_zed = CoordinateTransform.from_bounds(camera_bounds, SIM_CONFIG['zed_coordinates'])
+    cell = WorkCell(stations, vision_thread, zed_driver, camera_to_zed)
+    if args.trace:
+        TRACER.start(main.LOG_DIR)
+
+    def watchdog():
+        deadline = time.time() + args.timeout
+        while len(table.get_placed_items()) < target_picks and time.time() < deadline:
+            time.sleep(0.05)
+        cell.terminate()
+
+    watchdog_thread = threading.Thread(target=watchdog)
+    watchdog_thread.daemon = True
+
+    start_time = time.time()
+    watchdog_thread.start()
+    cell.run()
+    elapsed = time.time() - start_time
+    TRACER.stop()
+
+    robot_stats = dict(num_commands=0, motion_time=0.0, gripper_time=0.0)
+    for robot in robots:
+        for key, value in robot.get_stats().items():
+            robot_stats[key] += value
+
+    picks = len(table.get_placed_items())
+    return dict(picks=picks,
+                items=num_items,
+                elapsed=elapsed,
+                picks_per_hour=picks * 3600.0 / elapsed if elapsed > 0 else 0.0,
+                phases=timer.get_phases(),
+                robot=robot_stats,
+                arms=[(station.name, station.num_picks) for station in stations])
+
+
+def print_report(results):
+    """
+    Print the benchmark results
+    :param results: the dict returned by run_benchmark
+    """
+    print('')
+    print('Picks:        %d / %d' % (results['picks'], results['items']))
+    print('Elapsed:      %0.2f s' % results['elapsed'])
+    print('Picks/hour:   %0.1f' % results['picks_per_hour'])
+    print('Robot:        %d commands, %0.2f s modelled motion, %0.2f s modelled gripper' %
+          (results['robot']['num_commands'], results['robot']['motion_time'], results['robot']['gripper_time']))
+    print('')
+    print('%-42s %8s %10s %10s %8s' % ('Phase', 'Count', 'Total (s)', 'Mean (ms)', '% Run'))
+    for name, count, total in results['phases']:
+        print('%-42s %8d %10.3f %10.1f %8.1f' % (name, count, total, 1000.0 * total / count,
+                                                  100.0 * total / results['elapsed']))
+    print('(main._execute_pick includes the robot and depth phases)')
+    for name, num_picks in results.get('arms', []):
+        print('%-12s %d picks' % (name, num_picks))
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description='Headless pick loop cycle time benchmark')
+    parser.add_argument('--items', type=int, default=10, help='number of random items on the table')
+    parser.add_argument('--picks', type=int, default=0, help='stop after this many picks (0 - clear the table)')
+    parser.add_argument('--layout', default=None, help='JSON table layout to use instead of random items')
+    parser.add_argument('--seed', type=int, default=0, help='random seed for the table layout')
+    parser.add_argument('--depth-dir', default=None, help='directory of recorded depth maps (.npy, meters)')
+    parser.add_argument('--stereo-dir', default=None,
+                        help='directory of recorded FLIR left/right pairs to measure depth from instead')
+    parser.add_argument('--image-dir', default=None, help='directory of recorded FLIR images to replay')
+    parser.add_argument('--speed', type=int, default=100, help='arm velocity percentage')
+    parser.add_argument('--time-scale', type=float, default=1.0,
+                        help='multiplier on every simulated duration (0 - run as fast as possible). '
+                             'Picks/hour only reflects the real cell at 1')
+    parser.add_argument('--loop-delay', type=float, default=main.LOOP_DELAY,
+                        help='seconds the pick loop waits at the end of every cycle')
+    parser.add_argument('--timeout', type=float, default=600.0, help='give up after this many seconds')
+    parser.add_argument('--arms', type=int, default=1,
+                        help='number of simulated arms (more than 1 runs the multi-arm work cell)')
+    parser.add_argument('--trace', action='store_true',
+                        help='also write a Chrome trace of every phase to %s' % main.LOG_DIR)
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    logging.getLogger('GM_Pick_Point').setLevel(logging.DEBUG)
+    cmd_args = parse_args(sys.argv[1:])
+    print_report(run_cell_benchmark(cmd_args) if cmd_args.arms > 1 else run_benchmark(cmd_args))
@@ -68,7 +68,7 @@ rightMapX, rightMapY = cv2.initUndistortRectifyMap(
 
 # Save rectified calibration
 np.savez_compressed(testCal, imageSize=thisSize,
-        leftMapX=leftRectification, leftMapY=leftMapY, leftROI=leftROI,
+        leftMapX=leftMapX, leftMapY=leftMapY, leftROI=leftROI,
         rightMapX=rightMapX, rightMapY=rightMapY, rightROI=rightROI)
 
 
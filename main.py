@@ -12,6 +12,7 @@ Date last modified: 4/10/21
 __author__ = 'Blue Marble Security Enterprise'
 __version__ = '1.0'
 
+import os
 import threading
 import numpy as np
 import cv2
@@ -21,22 +22,41 @@ import traceback
 import copy
 import time
 import configparser
+import argparse
+import concurrent.futures
 
 from SQL_Driver import ObjectDB
-from Item import Item
-from VisionThread import VisionThread
-from GUI import GUI
-from ZEDMiniDriver import ZEDMiniDriver
-
-from pyniryo import *
+from SQL_Driver.PickJournal import PickJournal
+from Item import Item, DetectionBatch
+from PickPlanner import PickPlanner, PlannedPick
+from ItemMatcher import ItemMatcher
+from DetectionDiff import diff_detections
+from CoordinateTransform import CoordinateTransform, RegistrationMap, TRANSFORM_FILE, REGISTRATION_FILE, \
+    load_transforms
+from ArmDriver.TrajectoryDriver import TrajectoryDriver
+from CycleTracer import TRACER
+from StartupManager import StartupManager
+from RateLimitFilter import RateLimitFilter
 
 LOG_LEVEL_CMD = logging.WARNING         # The min log level that will be displayed in the console
+LOG_LEVEL_HEADLESS = logging.INFO       # The min log level recorded at all in headless mode (debug calls cost nothing)
+HEADLESS = False                        # True - no GUI window or OpenCV window, diagnostics only go to the log
 LOG_DIR = 'Logs'                        # Directory to save log files to
+CONFIG_FILE = '.config'                 # Config file holding the coordinate bounds of each device
+ROBOT_IP = '10.10.10.10'                # IP of the Niryo arm
+ZED_Y_CORRECTION = -4                   # Pixel correction applied to the ZED y coord when only bounds are calibrated
+LOOP_DELAY = 5                          # Seconds to wait at the end of every pick cycle
 CAMERA_SERIAL_NUM = '18585124'          # stereo camera ID
 GRAPH_TYPE = 'SSD_INCEPTION_V2'         # Network graph model to use for object detection
 IMAGE_DOWNSCALE_RATIO = 0.5             # Downscale ratio for machine learning
                                         #    1  = process the full image (more accurate)
                                         #    <1 = process a smaler version of the image (faster)
+MAX_PICKS_PER_SNAPSHOT = 5              # Max number of picks to execute from one detection snapshot
+VERIFY_RADIUS = 20                      # Max distance (pixels) an item may move between the snapshot and its pick
+UNSEEN_CLAIM_TIMEOUT = 15.0             # Seconds a claimed item may go without a matching detection before it is
+                                        #    released for other workers
+TRACE_CYCLES = False                    # Record per-phase spans of every pick cycle to Chrome trace files in LOG_DIR
+SKIP_EMPTY_TABLE = True                 # Skip inference while the depth background shows an empty table
 picked_items = []
 
 sorting_coords = {
@@ -89,17 +109,37 @@ class Main:
         }
     }
 
-    def __init__(self):
+    def __init__(self, gui=None, vision_thread=None, robot=None, zed_driver=None, sql_db=None,
+                 config_file=CONFIG_FILE, loop_delay=LOOP_DELAY, trace=TRACE_CYCLES, headless=HEADLESS,
+                 camera_to_depth=None):
         """
         Constructor
+        Any subsystem that is not passed in is created from the real hardware. Hardware drivers are only imported
+        when they are needed so the pick loop can run headless against simulated subsystems.
+        :param gui:             A started GUI thread (or stand-in)
+        :param vision_thread:   A VisionThread (or stand-in) that has not been started
+        :param robot:           A connected NiryoRobot (or stand-in)
+        :param zed_driver:      A ZEDMiniDriver (or stand-in)
+        :param sql_db:          An SQLiteDriver
+        :param config_file:     Path to the config file
+        :param loop_delay:      Seconds to wait at the end of every pick cycle
+        :param trace:           True - record per-phase spans to Chrome trace files in LOG_DIR
+        :param headless:        True - run without the GUI window and the OpenCV window, only log at
+                                LOG_LEVEL_HEADLESS and above
+        :param camera_to_depth: Transform from camera pixels to the zed_driver's depth map pixels (a stand-in's,
+                                e.g. StereoDepth.load_registration()), None - load the camera->ZED transform
         """
+        self._config_file = config_file
+        self._camera_to_depth = camera_to_depth
+        self._loop_delay = loop_delay
+        self._headless = headless
 
         # =================================
         # Setup Logging
         # =================================
         # Create master logger and set global log level
         self._logger = logging.getLogger("GM_Pick_Point")
-        self._logger.setLevel(logging.DEBUG)
+        self._logger.setLevel(LOG_LEVEL_HEADLESS if headless else logging.DEBUG)
 
         # create log file
         file_handler = logging.FileHandler(LOG_DIR + '/GM_Pick_Point - %s.log' %
@@ -115,17 +155,22 @@ class Main:
         file_handler.setFormatter(log_formatter)
         console_handler.setFormatter(log_formatter)
 
+        # Limit per frame / per pick diagnostics so throughput does not depend on terminal or disk speed
+        rate_limit_filter = RateLimitFilter()
+        file_handler.addFilter(rate_limit_filter)
+        console_handler.addFilter(rate_limit_filter)
+
         # Add outputs to main logger
         self._logger.addHandler(file_handler)
         self._logger.addHandler(console_handler)
         # =====================================================================
 
+        if trace:
+            TRACER.start(LOG_DIR)
+
         # read data from config file
         self.parse_config()
-
-        # Setup GUI
-        self._logger.debug('Initializing GUI Thread')
-        self._gui_thread = GUI()
+        self._load_transforms()
 
         # Setup SQL
         self._logger.debug('Initializing SQL Thread')
@@ -133,35 +178,58 @@ class Main:
         self._sql_thread_complete = threading.Event()
         self._processing_job = threading.Event()
         self._requested_item = None
+        self._job_name = None
+        self._worker = ObjectDB.worker_name()      # Name the items this loop claims are held by
+        self._claim_times = dict()          # Claimed item id -> time.time() it was claimed
+        self._last_seen = dict()            # Claimed item id -> time.time() a detection last served it
+        # One persistent worker claims the next items, so the prefetches share one database connection
+        self._prefetch_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1,
+                                                                        thread_name_prefix='SQL Prefetch')
+        self._prefetch_future = None        # Items claimed while the previous ones were finishing
+        self._item_matcher = ItemMatcher()
         self._sql_result = []
         self._sql_result_lock = threading.Lock()
-        self._sql_db = ObjectDB.ObjectDB()
 
-        # Setup Vision Thread
-        self._logger.debug('Initializing Vision Thread')
-        self._vision_thread = VisionThread(CAMERA_SERIAL_NUM, GRAPH_TYPE, LOG_DIR,
-                                           IMAGE_DOWNSCALE_RATIO)
-        # start TCP connection
-        self.robot = NiryoRobot("10.10.10.10")
-        self.robot.calibrate_auto()
-        
-        # Initialize ZED Mini Driver
-        self._logger.debug("Initializing ZED Mini Driver")
-        self._zed_driver = ZEDMiniDriver()
+        # Bring up the hardware concurrently, each subsystem only waits on the ones it really depends on
+        startup = StartupManager()
+        startup.add('sql', lambda: sql_db if sql_db is not None else ObjectDB.ObjectDB())
+        startup.add('gui', lambda: gui if gui is not None else self._create_gui(headless))
+        startup.add('vision', lambda: vision_thread if vision_thread is not None else
+                    self._create_vision_thread(headless))
+        startup.add('robot', lambda: self._connect_robot(robot))
+        startup.add('motion', TrajectoryDriver, depends=('robot',))
+        startup.add('zed', lambda: zed_driver if zed_driver is not None else self._create_zed_driver())
+        components = startup.run()
+
+        self._sql_db = components['sql']
+        self._sql_db.recover_claims(self._worker)       # Resume the job an earlier run was interrupted in
+        self._journal = PickJournal(self._sql_db, self._worker)
+        self._gui_thread = components['gui']
+        self._vision_thread = components['vision']
+        self.robot = components['robot']
+        self._motion = components['motion']
+        self._zed_driver = components['zed']
+        if SKIP_EMPTY_TABLE and self._zed_driver.has_background():
+            self._vision_thread.set_occupancy_check(self._zed_driver.is_table_occupied)
 
         # Setup local variables
         self._camera_result = None
         self._camera_result_lock = threading.Lock()
 
-        self._last_item_list = []
-        self._last_item_list_lock = threading.Lock()
-
-        self._current_item_list = []
-        self._current_item_list_lock = threading.Lock()
+        # Detection batches are read only and shared with the vision thread, so they are handed out without copying
+        self._last_detection_batch = DetectionBatch.empty()
+        self._current_detection_batch = DetectionBatch.empty()
+        self._detection_batch_lock = threading.Lock()
 
         self._object_removed_successfully = False
         self._object_not_found = False
 
+        # Setup pick planning
+        self._pick_planner = PickPlanner()
+        self._pre_pick_batch = None         # Snapshot the last picks were planned from
+        self._pick_completed_time = 0.0     # time.time() the last pick of a snapshot finished
+        self._arm_position = self._get_position(sorting_coords['home'])
+
         self._termination_requested_event = threading.Event()
 
 
@@ -174,9 +242,11 @@ class Main:
         try:
             self._logger.debug('Starting Vision Thread')
             self._vision_thread.start()
+            self._journal.start()
 
             self._logger.debug('Homing Arm')
-            self.robot.move_pose(sorting_coords["home"])
+            self._motion.move_pose(sorting_coords["home"])
+            self._arm_position = self._get_position(sorting_coords['home'])
 
             while self._gui_thread.is_alive():      # Keep going until the GUI thread dies
                 vision_task_thread = None
@@ -185,8 +255,6 @@ class Main:
                     vision_task_thread = threading.Thread(target=self._call_vision_thread())
                     vision_task_thread.start()
 
-                    print("Test")
-
                     # If a SQL job is being processed don't start another one
                     if not self._processing_job.is_set():
                         sql_task_thread = threading.Thread(target=self._call_sql_thread())
@@ -208,133 +276,78 @@ class Main:
 
                     if sql_task_thread is not None:
                         sql_task_thread.join()
-                        self._processing_job.set()
+                        if len(self._sql_result) > 0:
+                            self._processing_job.set()
+                        else:
+                            # Other workers hold every pending item, try again after the loop delay
+                            with TRACER.span('main.loop_delay'):
+                                time.sleep(self._loop_delay)
                     else:
                         # If a SQL job is being processed then continue to processes that job
-                        lest_requested_item = self._sql_result[0]
-                        msgs = self._process_sql_job()              # Get messages from the processing
+                        with TRACER.span('main.process_sql_job', job=self._job_name):
+                            msgs = self._process_sql_job()          # Get messages from the processing
 
                         # Log all messages to the GUI
                         for msg in msgs:
                             text = list(GUI_MESSAGES.keys())[list(GUI_MESSAGES.values()).index(msg[0])]
-                            text = "%s : %s" % (text, msg[1].item_type)
+                            if len(msg) > 1:
+                                text = "%s : %s" % (text, msg[1].item_type)
                             self._gui_thread.add_msg_to_log(text)
 
+                        # The job is complete, fetch the next one on the next iteration
+                        if not self._processing_job.is_set() or len(self._sql_result) == 0:
+                            continue
+
                         size = (0, 0)
                         with self._camera_result_lock:
                             if self._camera_result is not None:
                                 image_0 = self._camera_result[0]
                                 size = image_0.shape
 
-                        # Get the X, Y, Z coords of the object
                         requested_item = self._sql_result[0]
 
-                        # If recognized items are not empty
-                        if (not self.get_current_item_list): #Modified with continue
-
+                        # Plan the claimed items in this snapshot so the arm travels as little as possible. Wait for
+                        # a frame taken after the last picks, and for it to be diffed against their snapshot first
+                        snapshot = self.get_current_detection_batch()
+                        if self._pre_pick_batch is not None or snapshot.timestamp < self._pick_completed_time:
                             self.main_loop_helper(requested_item)
                             continue
 
-                        selected_item = None
-                        
-                        
-                        # Choose first existing item 
-                        for next_item in self.get_current_item_list():
-
-                                selected_item = next_item
-                                picked_items.append(next_item.item_type)
-
-                                break
-
-                        # Prep to create command
-                        if (selected_item is None): #Modified with continue
+                        with TRACER.span('main.plan_picks', job=self._job_name, frame=snapshot.frame_id):
+                            plan = self._plan_picks(snapshot, self.get_sql_result())
 
-                            print("No Objects Identified")
+                        if len(plan) == 0:
+                            self._logger.debug('No Objects Identified')
 
                             self.main_loop_helper(requested_item)
                             continue
 
-                        # Translate to arm coordinates
-                        arm_x, arm_y = self.convert_coordinates(selected_item.x, selected_item.y,
-                            self.config_variables['camera_coordinates'],
-                            self.config_variables['arm_coordinates'])
-                        drop_off = ""
+                        self._pre_pick_batch = snapshot
 
+                        # Execute several picks from the one snapshot. The first pick is straight from the snapshot,
+                        # every other pick is re-verified against the latest frame before the arm moves
+                        for pick_number, planned_pick in enumerate(plan[:MAX_PICKS_PER_SNAPSHOT]):
+                            if pick_number > 0 and not self._verify_pick(planned_pick):
+                                self._logger.debug('%s moved since the snapshot, skipping',
+                                                   planned_pick.item.item_type)
+                                continue
 
-                        if ('bird' in selected_item.item_type.lower()):
-                            drop_off = sorting_coords['bird']
+                            with TRACER.span('main.execute_pick', job=self._job_name,
+                                             item=planned_pick.item.item_type, frame=snapshot.frame_id):
+                                self._execute_pick(planned_pick)
 
-                        elif ('dog' in selected_item.item_type.lower()):
-                            drop_off = sorting_coords['dog']
-
-                        elif ('cat' in selected_item.item_type.lower()):
-                            drop_off = sorting_coords['cat']
-
-                        else:
-                            print("Object was not able to be identified..... Going Home")
-                            drop_off = sorting_coords['home']
+                        self._pick_completed_time = time.time()
 
-
-
-                        print("Appending instructions for {} X={} Y={}".format(selected_item.item_type, selected_item.x, selected_item.y))
-                        
-                        print("Translated Coordinates: Arm_x: {} Arm_y: {}".format(arm_x, arm_y))
-                        # Check if in bounds
-                        if (not (arm_x >= self.config_variables['arm_coordinates']['west'] #Modified with continue
-                            and arm_x <= self.config_variables['arm_coordinates']['east']
-                            and arm_y >= self.config_variables['arm_coordinates']['north']
-                            and arm_y <= self.config_variables['arm_coordinates']['south'])):
-                        
-                            self.main_loop_helper(requested_item)
-                            continue
-
-                        zed_x, zed_y = self.convert_coordinates(selected_item.x, selected_item.y,
-                            self.config_variables['camera_coordinates'],
-                            self.config_variables['zed_coordinates'])
-                        # TEMPORARY:: y value is consistenly a little low, so subtract to move it up a little bit
-                        zed_y -= 4
-                        print(f"zed x, y : {zed_x}, {zed_y}")
-                        arm_z = self._zed_driver.get_object_height(zed_x, zed_y)
-                        print(f"height: {arm_z}")
-
-                        # Default rotation
-                        applied_rotation = 0
-
-                        # If length of detection box is larger than height
-                        if (selected_item.rot):
-                            # Value is in radians [90 degrees]
-                            applied_rotation = 1.5708
-
-                        # MOVE ABOVE THEN PICK X Y Z ROLL PITCH YAW
-                        # Arm flips x and y
-                        self.robot.move_pose(arm_y, arm_x, arm_z + .18, applied_rotation, 1.4, 0)
-                        self.robot.release_with_tool()
-
-                        self.robot.move_pose(arm_y, arm_x, arm_z, applied_rotation, 1.4, 0)
-                        self.robot.grasp_with_tool()
-                        
-
-                        # SHIFT AXIS AMOUNT
-                        # Move out of the way
-                        self.robot.move_pose(arm_y, arm_x, arm_z + 0.2, applied_rotation, 1.4, 0)
-
-                        # DROP OFF POINT
-                        self.robot.move_pose(drop_off)
-                        self.robot.release_with_tool()
-                        self.robot.grasp_with_tool()
-
-                        # Move Home if drop_off not at Home
-                        if (drop_off != sorting_coords['home']):
-                            self.robot.move_pose(sorting_coords["home"])
-
-                        else:
-                            print("Error appending instructions... Out of Bounds")
+                        # Move Home if the last drop_off was not at Home
+                        if self._arm_position != self._get_position(sorting_coords['home']):
+                            self._motion.move_pose(sorting_coords["home"])
+                            self._arm_position = self._get_position(sorting_coords['home'])
 
                         self.main_loop_helper(requested_item)
 
         except Exception:
             tb = traceback.format_exc()
-            self._logger.error('Unhandled Exception:\n%s' % str(tb))
+            self._logger.error('Unhandled Exception:\n%s', str(tb))
         finally:
             # Request Termination of Threads
             self._logger.debug('Terminating Vision Thread')
@@ -350,6 +363,73 @@ class Main:
             
             # terminate robot connection
             self.robot.close_connection()
+            self._zed_driver.close()
+
+            # Put an item that was claimed but not picked back in the queue for the other workers
+            prefetched_items, _ = self._take_prefetched_items()
+            for prefetched_item in prefetched_items:
+                self._sql_db.release_item(prefetched_item[0], self._worker)
+            self._prefetch_executor.shutdown()
+            with self._sql_result_lock:
+                for item in self._sql_result:
+                    self._sql_db.release_item(item.item_id, self._worker)
+
+            # Write the rest of the pick journal
+            if self._journal.is_alive():
+                self._journal.terminate_thread()
+                self._journal.join()
+
+            TRACER.stop()
+
+    def _create_gui(self, headless=False):
+        """
+        Startup function to create and start the GUI thread
+        :param headless: True - create a HeadlessGUI that only logs
+        :return: the GUI
+        """
+        self._logger.debug('Initializing GUI Thread')
+        if headless:
+            from HeadlessGUI import HeadlessGUI
+            return HeadlessGUI()
+        from GUI import GUI
+        return GUI()
+
+    def _create_vision_thread(self, headless=False):
+        """
+        Startup function to create the vision thread (initializes the camera and loads the network graph)
+        :param headless: True - never open the OpenCV live display
+        :return: the VisionThread (not started)
+        """
+        self._logger.debug('Initializing Vision Thread')
+        from VisionThread import VisionThread
+        return VisionThread(CAMERA_SERIAL_NUM, GRAPH_TYPE, LOG_DIR, IMAGE_DOWNSCALE_RATIO, display=not headless)
+
+    def _connect_robot(self, robot=None):
+        """
+        Startup function to connect to the arm and calibrate it if it is not calibrated already
+        :param robot: A connected NiryoRobot (or stand-in), None to connect to ROBOT_IP
+        :return: the robot
+        """
+        # start TCP connection
+        if robot is None:
+            from pyniryo import NiryoRobot
+            robot = NiryoRobot(ROBOT_IP)
+
+        if robot.need_calibration():
+            self._logger.debug('Calibrating Arm')
+            robot.calibrate_auto()
+        else:
+            self._logger.debug('Arm already calibrated, skipping calibration')
+        return robot
+
+    def _create_zed_driver(self):
+        """
+        Startup function to open the ZED Mini
+        :return: the ZEDMiniDriver
+        """
+        self._logger.debug("Initializing ZED Mini Driver")
+        from ZEDMiniDriver import ZEDMiniDriver
+        return ZEDMiniDriver()
 
     def parse_config(self):
         """
@@ -358,18 +438,18 @@ class Main:
         bad_read = False
         self._logger.debug('parsing config file...')
         config = configparser.ConfigParser()
-        config.read('.config')
+        config.read(self._config_file)
         # for each key to a subdictionary in the config_variables dictionary...
         for section_name in list(self.config_variables):
             # check if the subdictionary is found in the config file
             if section_name not in config.sections():
                 bad_read = True
-                print("Error! section " + section_name + " not found in config file, adding it")
+                self._logger.error('Section %s not found in config file, adding it', section_name)
                 # create an instance of the section in the config file for the user to fill out
                 config[section_name] = {}
                 for variable_name in list(self.config_variables[section_name]):
                     config[section_name][str(variable_name)] = str(self.config_variables[section_name][variable_name])
-                config_file = open('.config', 'w')
+                config_file = open(self._config_file, 'w')
                 config.write(config_file)
 
             # for each key in the subdictionary...
@@ -378,7 +458,8 @@ class Main:
                 self.config_variables[section_name][variable_name] = config.getfloat(section_name, variable_name)
                 # if the value is 0.0, then report error
                 if self.config_variables[section_name][variable_name] == 0.0:
-                    print(variable_name + ' in .config is undefined, please add value in .config file')
+                    self._logger.error('%s in %s is undefined, please add a value',
+                                       variable_name, self._config_file)
                     bad_read = True
 
         if bad_read == True:
@@ -387,22 +468,165 @@ class Main:
         self._logger.debug('parsing config file - COMPLETE')
         return
 
-    def convert_coordinates(self, in_x:float, in_y:float, in_coor:dict, out_coor:dict):
+    def _load_transforms(self):
+        """
+        Helper function to load the calibrated camera->arm and camera->ZED transforms, the dense camera->ZED
+        registration map first when there is one. Falls back to the axis-aligned transforms described by the bounds in the config file.
+        """
+        transforms = dict()
+        if os.path.exists(TRANSFORM_FILE):
+            transforms = load_transforms(TRANSFORM_FILE)
+
+        if 'camera_to_arm' in transforms:
+            self._camera_to_arm = transforms['camera_to_arm']
+        else:
+            self._camera_to_arm = CoordinateTransform.from_bounds(self.config_variables['camera_coordinates'],
+                                                                  self.config_variables['arm_coordinates'])
+
+        if self._camera_to_depth is not None:
+            self._camera_to_zed = self._camera_to_depth
+        elif os.path.exists(REGISTRATION_FILE):
+            self._camera_to_zed = RegistrationMap.load(REGISTRATION_FILE)
+        elif 'camera_to_zed' in transforms:
+            self._camera_to_zed = transforms['camera_to_zed']
+        else:
+            self._camera_to_zed = CoordinateTransform.from_bounds(self.config_variables['camera_coordinates'],
+                                                                  self.config_variables['zed_coordinates'])
+            # y value is consistenly a little low, so move it up a little bit
+            self._camera_to_zed.matrix[1, 2] += ZED_Y_CORRECTION
+
+        for name, transform in (('camera_to_arm', self._camera_to_arm), ('camera_to_zed', self._camera_to_zed)):
+            if transform.rms_error is None:
+                self._logger.info('%s: %s from config bounds', name, transform.model)
+            else:
+                self._logger.info('%s: fitted %s, RMS error %0.4f, max error %0.4f',
+                                  name, transform.model, transform.rms_error, transform.max_error)
+
+    def _plan_picks(self, batch, requested_items):
+        """
+        Internal function to build a travel minimizing pick plan out of the reachable items in a snapshot that serve
+        the claimed items, other items on the table are left alone
+        :param batch:           a DetectionBatch of one frame
+        :param requested_items: the claimed Items (see _add_claimed_items)
+        :return: a list of PlannedPicks in the order they should be picked
+        """
+        if len(batch) == 0 or len(requested_items) == 0:
+            return []
+
+        # Translate every item to the arm's frame at once and find the detections of the claimed items
+        items = batch.detections
+        with TRACER.span('main.convert_coordinates', frame=batch.frame_id, items=len(batch)):
+            arm_points, in_bounds = self._get_arm_points(batch)
+            selected = self._item_matcher.select(requested_items, batch, in_bounds)
+            reachable = np.array([index for _, index in selected], dtype=np.intp)
+            zed_points = self._camera_to_zed.apply(batch.positions[reachable])
+            zed_boxes = self._camera_to_zed.apply_boxes(batch.array['bbox'][reachable])
+
+        # Read the height of every selected item from one depth map
+        with TRACER.span('zed.get_object_heights', items=len(reachable)):
+            heights = self._zed_driver.get_object_heights(zed_boxes)
+
+        candidates = []
+        for selected_index, (index, height) in enumerate(zip(reachable, heights)):
+            item = items[index]
+            arm_x, arm_y = arm_points[index]
+            drop_off_name = self._get_drop_off_name(item)
+
+            # Arm flips x and y
+            candidates.append(PlannedPick(item, (arm_y, arm_x), sorting_coords[drop_off_name], drop_off_name,
+                                          depth_position=tuple(zed_points[selected_index]), height=float(height)))
+
+        return self._pick_planner.plan(candidates, self._arm_position)
+
+    def _get_arm_points(self, batch):
+        """
+        Internal function to translate every item of a snapshot to the arm's frame
+        :param batch: a DetectionBatch of one frame
+        :return: (Nx2 (x, y) in the arm's frame, N bool True for the items within the arm's bounds)
+        """
+        arm_points = self._camera_to_arm.apply(batch.positions)
+        arm_bounds = self.config_variables['arm_coordinates']
+        in_bounds = (arm_points[:, 0] >= arm_bounds['west']) & (arm_points[:, 0] <= arm_bounds['east']) & \
+                    (arm_points[:, 1] >= arm_bounds['north']) & (arm_points[:, 1] <= arm_bounds['south'])
+        return arm_points, in_bounds
+
+    def _verify_pick(self, planned_pick):
+        """
+        Internal function to check that a planned item is still where the snapshot saw it
+        :param planned_pick: the PlannedPick to check
+        :return: True if the item is still within VERIFY_RADIUS of its planned position, False otherwise
+        """
+        planned_item = planned_pick.item
+        for item in self._vision_thread.get_items():
+            if item.class_id == planned_item.class_id and \
+                    abs(item.x - planned_item.x) <= VERIFY_RADIUS and \
+                    abs(item.y - planned_item.y) <= VERIFY_RADIUS:
+                return True
+        return False
+
+    def _execute_pick(self, planned_pick):
+        """
+        Internal function to pick one planned item and place it at its drop off
+        :param planned_pick: the PlannedPick to execute
+        """
+        selected_item = planned_pick.item
+        arm_y, arm_x = planned_pick.pick_position
+        drop_off = planned_pick.drop_off
+        picked_items.append(selected_item.item_type)
+
+        if planned_pick.drop_off_name == 'home':
+            self._logger.info('%s could not be sorted, dropping it at home', selected_item.item_type)
+
+        zed_x, zed_y = planned_pick.depth_position
+        arm_z = planned_pick.height
+        if arm_z is None:
+            with TRACER.span('zed.get_object_height', item=selected_item.item_type):
+                arm_z = self._zed_driver.get_object_height(zed_x, zed_y)
+
+        self._logger.debug('Picking %s at camera (%s, %s), arm (%0.3f, %0.3f, %0.3f), zed (%0.1f, %0.1f)',
+                           selected_item.item_type, selected_item.x, selected_item.y, arm_x, arm_y, arm_z,
+                           zed_x, zed_y)
+
+        # Default rotation
+        applied_rotation = 0
+
+        # If length of detection box is larger than height
+        if (selected_item.rot):
+            # Value is in radians [90 degrees]
+            applied_rotation = 1.5708
+
+        # MOVE ABOVE, PICK, MOVE OUT OF THE WAY AND DROP OFF X Y Z ROLL PITCH YAW
+        # Arm flips x and y
+        started = time.time()
+        try:
+            self._motion.execute_pick(arm_y, arm_x, arm_z, applied_rotation, drop_off)
+        except Exception as e:
+            self._journal.record(selected_item.item_type, started, time.time(), (selected_item.x, selected_item.y),
+                                 (arm_x, arm_y, arm_z), success=False, error=str(e))
+            raise
+        self._journal.record(selected_item.item_type, started, time.time(), (selected_item.x, selected_item.y),
+                             (arm_x, arm_y, arm_z))
+        self._arm_position = planned_pick.drop_position
+
+    @staticmethod
+    def _get_drop_off_name(item):
+        """
+        Get the sorting_coords key of the drop off for a detected item
+        :param item: a Detection
+        :return: a key into sorting_coords ('home' if the item can not be sorted)
+        """
+        if item.family in sorting_coords:
+            return item.family
+        return 'home'
+
+    @staticmethod
+    def _get_position(pose):
         """
-        converts coordinates from the in_coor coordinate system to the out_coor coordinate system
-        in_coor and out_coor are both dictionaries with north, east, south, and west values
-        that correspond to the upper, right, lower, and left bounds of the pickable area
-        returns the x and y values of "selected_item" in terms of 
+        Get the (x, y) of a pose in the arm's frame
+        :param pose: a pose [x, y, z, roll, pitch, yaw]
+        :return: (x, y)
         """
-        # first, convert the x and y coordinates of the selected item so that they are independent of the input coordinate system
-        # mid_x is the x coordinate of the item where 0.0 is the left edge of the pickable area and 1.0 is the right edge of the pickable area
-        # mid_y is the y coordinate of the item where 0.0 is the top edge of the pickable area and 1.0 is the bottom edge of the pickable area
-        mid_x = (in_x - in_coor['west'])  / (in_coor['east'] - in_coor['west'])
-        mid_y = (in_y - in_coor['north']) / (in_coor['south'] - in_coor['north'])
-        # out_x and out_y are the coordinates in terms of the output coordinate system
-        out_x = mid_x * (out_coor['east'] - out_coor['west']) + out_coor['west']
-        out_y = mid_y * (out_coor['south'] - out_coor['north']) + out_coor['north']
-        return out_x, out_y
+        return pose[0], pose[1]
 
     def get_camera_images(self):
         """
@@ -424,58 +648,166 @@ class Main:
 
         self._sql_thread_complete.wait()
         with self._sql_result_lock:
-            result = copy.deepcopy(self._sql_result)
+            result = list(self._sql_result)
+        return result
+
+    def get_current_detection_batch(self):
+        """
+        External facing function to get every detection in the current frame
+        :return: a DetectionBatch (read only, shared)
+        """
+        with self._detection_batch_lock:
+            result = self._current_detection_batch
+        return result
+
+    def get_last_detection_batch(self):
+        """
+        External facing function to get every detection in the last frame
+        :return: a DetectionBatch (read only, shared)
+        """
+        with self._detection_batch_lock:
+            result = self._last_detection_batch
         return result
 
     def get_current_item_list(self):
         """
         External facing function to get a list of Items that are in the current frame
-        :return: a list of Items
+        :return: a tuple of Detections (immutable, shared)
         """
-        with self._current_item_list_lock:
-            result = copy.deepcopy(self._current_item_list)
-        return result
+        return self.get_current_detection_batch().detections
 
     def get_last_item_list(self):
         """
         External facing function to get a list of Items that where in the last frame
-        :return: a list of Items
+        :return: a tuple of Detections (immutable, shared)
         """
-        with self._last_item_list_lock:
-            result = copy.deepcopy(self._last_item_list)
-        return result
+        return self.get_last_detection_batch().detections
 
     def _call_vision_thread(self):
         """
         Task thread method to call request updated info from the vision thread
         """
-        images = self._vision_thread.retrieve_images()
-        items = self._vision_thread.get_items()
+        with TRACER.span('main.call_vision_thread'):
+            images = self._vision_thread.retrieve_images()
+            batch = self._vision_thread.get_detection_batch()
 
         with self._camera_result_lock:
             self._camera_result = images
 
-        with self._current_item_list_lock:
-            self._last_item_list = self._current_item_list
-            self._current_item_list = items
+        with self._detection_batch_lock:
+            self._last_detection_batch = self._current_detection_batch
+            self._current_detection_batch = batch
 
     def _call_sql_thread(self):
         """
-        Task thread function to call the SQL thread to request a new job
+        Task thread function to call the SQL thread to request a new job. Nothing is claimed while other workers hold
+        every pending item, the pick loop only stops once no job is incomplete
         """
         self._sql_thread_complete.clear()
-        with self._sql_result_lock:
-            next_incomplete_job = self._sql_db.get_incomplete_job()
-            self._logger.debug("next job: %s"  % str(next_incomplete_job[1]))
-            if next_incomplete_job is None:
+        with TRACER.span('main.call_sql_thread'), self._sql_result_lock:
+            # Claiming marks the items in progress so another pick loop sharing the database skips them
+            claimed_items, positions = self._claim_work(self.get_current_detection_batch(), list(self._sql_result))
+            if len(claimed_items) > 0:
+                self._add_claimed_items(claimed_items, positions)
+            elif self._sql_db.get_incomplete_job() is None:
                 raise ValueError("Database is empty")
-
-            job = self._sql_db.get_object_list(next_incomplete_job[1])
-            self._sql_result = []
-            for item in job:
-                self._sql_result.append(Item(item[1], placement=item[2]))
             self._sql_thread_complete.set()
 
+    def _claim_work(self, batch, held_items):
+        """
+        Internal function to claim the pending items, of any job near the head of the schedule, that the items on the
+        table can serve. If the table serves none and nothing is held, the next item of the schedule is claimed so
+        there is still a requested item
+        :param batch:       a DetectionBatch of the table
+        :param held_items:  the claimed Items not picked yet, the detections serving them are not matched again
+        :return: (a list of claimed (item id, name, destination, job id, job name), most urgent first,
+                  dict of claimed item id -> (x, y) camera pixels of the detection it was matched to)
+        """
+        num_wanted = MAX_PICKS_PER_SNAPSHOT - len(held_items)
+        if num_wanted <= 0:
+            return [], dict()
+
+        matches = []
+        pending_items = self._sql_db.get_pending_items()
+        if len(pending_items) > 0 and len(batch) > 0:
+            with TRACER.span('main.match_items', pending=len(pending_items), items=len(batch)):
+                arm_points, in_bounds = self._get_arm_points(batch)
+                for _, index in self._item_matcher.select(held_items, batch, in_bounds):
+                    in_bounds[index] = False
+                # Arm flips x and y
+                matches = self._item_matcher.match(pending_items, batch, arm_points[:, ::-1], in_bounds,
+                                                   self._arm_position)
+
+        claimed_items = []
+        positions = dict()
+        if len(matches) > 0:
+            matches = matches[:num_wanted]
+            claims = self._sql_db.claim_items([row[0] for row, _ in matches], self._worker)
+            matched_positions = batch.positions
+            # A unit of an item with more left to pick is claimed under an ID of its own
+            for claimed_item, (_, index) in zip(claims, matches):
+                if claimed_item is not None:
+                    claimed_items.append(claimed_item)
+                    positions[claimed_item[0]] = tuple(matched_positions[index])
+        if len(claimed_items) == 0 and len(held_items) == 0:
+            # Another worker may have claimed the matches meanwhile, still prefer an item on the table
+            claimed_item = self._sql_db.claim_next_item(self._worker, visible=batch.get_item_types())
+            if claimed_item is not None:
+                claimed_items = [claimed_item]
+        return claimed_items, positions
+
+    def _add_claimed_items(self, claimed_items, positions):
+        """
+        Internal function to add claimed items to the requested items, the caller holds the SQL result lock
+        :param claimed_items:   a list of (item id, name, destination, job id, job name), most urgent first
+        :param positions:       dict of item id -> (x, y) camera pixels of the detection the item was matched to
+        """
+        if len(self._sql_result) == 0:
+            self._job_name = claimed_items[0][4]
+            self._logger.debug("next job: %s", str(self._job_name))
+        now = time.time()
+        for item_id, name, destination, _, _ in claimed_items:
+            x, y = positions.get(item_id, (None, None))
+            self._sql_result.append(Item(name, placement=destination, x=x, y=y, item_id=item_id))
+            self._claim_times[item_id] = now
+            self._last_seen[item_id] = now
+
+    def _forget_claims(self, items):
+        """
+        Internal function to drop items that were completed, released or lost from the requested items
+        :param items: the Items to drop
+        """
+        with self._sql_result_lock:
+            self._sql_result = [item for item in self._sql_result if item not in items]
+        for item in items:
+            self._claim_times.pop(item.item_id, None)
+            self._last_seen.pop(item.item_id, None)
+
+    def _prefetch_next_items(self):
+        """
+        Prefetch worker function to claim the next items while the arm finishes with the current ones
+        :return: (a list of (item id, name, destination, job id, job name), empty if there is no work,
+                  dict of item id -> (x, y) camera pixels of the matched detection), see _claim_work
+        """
+        with TRACER.span('main.prefetch_next_items'):
+            return self._claim_work(self.get_current_detection_batch(), self.get_sql_result())
+
+    def _take_prefetched_items(self):
+        """
+        Internal function to take the items claimed by the last prefetch
+        :return: (a list of (item id, name, destination, job id, job name), empty if nothing was prefetched,
+                  dict of item id -> (x, y) camera pixels of the matched detection)
+        """
+        if self._prefetch_future is None:
+            return [], dict()
+        future = self._prefetch_future
+        self._prefetch_future = None
+        try:
+            return future.result()
+        except Exception:
+            self._logger.error('Prefetch failed:\n%s', traceback.format_exc())
+            return [], dict()
+
     def _process_sql_job(self):
         """
         Internal function to process the current sql job
@@ -483,25 +815,40 @@ class Main:
         msg = []
 
         sql_items = self.get_sql_result()
-        current_items = self.get_current_item_list()
-        last_items = self.get_last_item_list()
-
-        # Current Job is done
+        current_batch = self.get_current_detection_batch()
+        current_items = current_batch.detections
+
+        # Add the items claimed meanwhile, once the claimed items are done wait for them or claim the next ones
+        if self._prefetch_future is not None and (len(sql_items) == 0 or self._prefetch_future.done()):
+            prefetched_items, positions = self._take_prefetched_items()
+            if len(prefetched_items) > 0:
+                with self._sql_result_lock:
+                    self._add_claimed_items(prefetched_items, positions)
+                    sql_items = list(self._sql_result)
         if len(sql_items) == 0:
-            msg.append((GUI_MESSAGES["JOB_QUEUE_EMPTY"],))
             self._processing_job.clear()
             return msg
 
-        # get requested item and update visualization
+        # Keep the claims alive while waiting for the items, if one expired another worker may have it now
+        held_items = [item for item in sql_items if self._sql_db.renew_lease(item.item_id, self._worker)]
+        if len(held_items) < len(sql_items):
+            self._logger.warning('%d claims expired', len(sql_items) - len(held_items))
+            self._forget_claims([item for item in sql_items if item not in held_items])
+            sql_items = held_items
+            if len(sql_items) == 0:
+                self._processing_job.clear()
+                return msg
         requested_item = sql_items[0]
-        self._logger.info('Next Requested Item: %s' % requested_item.item_type)
+
+        # update visualization
+        self._logger.info('Next Requested Item: %s', requested_item.item_type)
         msg.append((GUI_MESSAGES["CURRENT_REQUESTED_OBJECT"], requested_item))
         self._vision_thread.set_visualization_settings(True, requested_item.item_type, 1, False, False)
 
         # Check if requested item was found
         item_found = False
         for item in current_items:
-            if item.item_type == requested_item.item_type:
+            if item.class_id == requested_item.class_id:
                 item_found = True
                 break
 
@@ -509,47 +856,112 @@ class Main:
             msg.append((GUI_MESSAGES["OBJECT_NOT_FOUND"], requested_item))
             self._object_not_found = False
 
-        # Get all items that have been removed since the last iteration
+        # Get all items that have been removed since the reference frame
         removed_items = []
-        for item_one in last_items:
-            found_difference = True
-            for item_two in current_items:
-                if item_one.item_type == item_two.item_type:
-                    found_difference = False
-                    break
-
-            if found_difference:
-                removed_items.append(item_one)
-
-        # Check if the correct item was removed
-        correct_item_removed = False
+        reference_batch = self._get_reference_batch(current_batch)
+        if reference_batch is not None:
+            diff = diff_detections(reference_batch.detections, current_items)
+            removed_items = diff.disappeared
+            if diff.changed:
+                self._logger.debug('Frame %d: %d appeared, %d disappeared, %d moved',
+                                   current_batch.frame_id, len(diff.appeared), len(diff.disappeared),
+                                   len(diff.moved))
+
+        # Check which of the claimed items were removed, each removed item completes one claimed item of its class
+        open_items = list(sql_items)
+        completed = []
         for item in removed_items:
-            if item.item_type == requested_item.item_type:
-
-                if not correct_item_removed:
-                    correct_item_removed = True
-                    msg.append((GUI_MESSAGES["CORRECT_OBJECT_MOVED"], item))
-                else:
-                    msg.append((GUI_MESSAGES["WRONG_NUMBER_MOVED"], item))
+            claimed_item = next((open_item for open_item in open_items if open_item.class_id == item.class_id), None)
+            if claimed_item is not None:
+                open_items.remove(claimed_item)
+                completed.append((claimed_item, item))
+                msg.append((GUI_MESSAGES["CORRECT_OBJECT_MOVED"], item))
+            elif any(sql_item.class_id == item.class_id for sql_item in sql_items):
+                msg.append((GUI_MESSAGES["WRONG_NUMBER_MOVED"], item))
             else:
                 msg.append((GUI_MESSAGES["WRONG_OBJECT_REMOVED"], item))
 
-        if correct_item_removed:
-            with self._sql_result_lock:
-                self._sql_result.remove(self._sql_result[0])
+        if len(completed) > 0:
+            for claimed_item, removed_item in completed:
+                remaining = self._sql_db.complete_item(claimed_item.item_id, self._worker)
+                self._journal.record(claimed_item.item_type, self._claim_times.get(claimed_item.item_id, 0.0),
+                                     time.time(),
+                                     (removed_item.x, removed_item.y), success=remaining is not None,
+                                     job_item_id=claimed_item.item_id)
+                if remaining == 0:
+                    msg.append((GUI_MESSAGES["JOB_QUEUE_EMPTY"],))
             self._object_removed_successfully = True
+            self._forget_claims([claimed_item for claimed_item, _ in completed])
+
+        # Once the last picks are diffed, give up the claims no detection has served for a while
+        released = []
+        if self._pre_pick_batch is None:
+            released = self._release_unseen_claims(open_items, current_batch)
+
+        # Claim more items as soon as some are done, so moving on to them costs the pick loop nothing
+        if (len(completed) > 0 or len(released) > 0) and self._prefetch_future is None:
+            self._prefetch_future = self._prefetch_executor.submit(self._prefetch_next_items)
         return msg
 
+    def _release_unseen_claims(self, open_items, batch):
+        """
+        Internal function to release the claimed items no detection of the current frame has served for
+        UNSEEN_CLAIM_TIMEOUT, so other workers can take them and this one can claim the items on its table
+        :param open_items:  the claimed Items not picked yet
+        :param batch:       the DetectionBatch of the current frame
+        :return: a list of the released Items
+        """
+        now = time.time()
+        reachable = np.zeros(len(batch), dtype=bool)
+        if len(batch) > 0:
+            _, reachable = self._get_arm_points(batch)
+        for item, _ in self._item_matcher.select(open_items, batch, reachable):
+            self._last_seen[item.item_id] = now
+
+        released = [item for item in open_items
+                    if now - self._last_seen.get(item.item_id, now) > UNSEEN_CLAIM_TIMEOUT]
+        if len(released) > 0:
+            self._logger.warning('Releasing %d claims not seen for %0.1f s', len(released), UNSEEN_CLAIM_TIMEOUT)
+            for item in released:
+                self._sql_db.release_item(item.item_id, self._worker)
+            self._forget_claims(released)
+        return released
+
+    def _get_reference_batch(self, current_batch):
+        """
+        Internal function to get the frame the current frame should be diffed against.
+        After a pick this is the snapshot the pick was planned from, as soon as a frame taken after the pick arrives.
+        :param current_batch: the DetectionBatch of the current frame
+        :return: a DetectionBatch or None if the current frame was taken before the last pick finished
+        """
+        if self._pre_pick_batch is None:
+            return self.get_last_detection_batch()
+
+        if current_batch.timestamp < self._pick_completed_time:
+            return None
+
+        reference_batch = self._pre_pick_batch
+        self._pre_pick_batch = None
+        return reference_batch
+
     def main_loop_helper(self, requested_item):
         """
         Helper function for some repeated end of loop code.
         """
         message = 'Requesting Object: %s' % requested_item.item_type
-        time.sleep(5)
+        with TRACER.span('main.loop_delay', job=self._job_name):
+            time.sleep(self._loop_delay)
         self._object_removed_successfully = False
         self._object_not_found = False
 
 
 if __name__ == '__main__':
-    main_thread = Main()
+    parser = argparse.ArgumentParser(description='GM pick-point')
+    parser.add_argument('--headless', action='store_true', default=HEADLESS,
+                        help='run without the GUI and OpenCV windows, diagnostics only go to the log')
+    parser.add_argument('--trace', action='store_true', default=TRACE_CYCLES,
+                        help='write Chrome trace files of every pick cycle to %s' % LOG_DIR)
+    cmd_args = parser.parse_args()
+
+    main_thread = Main(trace=cmd_args.trace, headless=cmd_args.headless)
     main_thread.main_loop()
@@ -5,7 +5,7 @@ Michigan  Technological University: Blue Marble Security Enterprise
 
 test_cond_generator.py
 Author: Max Hoglund
-Date last modified: 4/20/21
+Date last modified: 10/19/2026
 """
 
 __author__ = 'Blue Marble Security Enterprise'
@@ -25,11 +25,11 @@ pieces = [
     "dog_ear",
     "dog_food",
     "dog_tail",
-    "bird_eyes",
+    "bird_eye",
     "bird_body",
     "bird_mouth",
     "bird_wing",
-    "bird_food"
+    "bird_seeds"
     ]
 rotation = [
     "0",
@@ -17,6 +17,8 @@ import cv2
 from matplotlib import pyplot as plt
 import os
 
+from StereoDepth import StereoRectification
+
 LEFT_PATH = os.getcwd() + '/calibration/newlights_left.png'
 RIGHT_PATH = os.getcwd() + '/calibration/newlights_right.png'
 
@@ -36,40 +38,17 @@ print(tuple(calDetails['size']))
 mySize = tuple(calDetails['size'])
 thisSize = (mySize[1], mySize[2])
 
-# Calibrate Cameras together
-TERMINATION_CRITERIA = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 30, 0.001)
-retval, cameraMatrix1, distCoeffs1, cameraMatrix2, distCoeffs2, R, T, E, F = cv2.stereoCalibrate(calDetails['allObjPoints'], calDetails['imgpoints1'], calDetails['imgpoints2'], calDetails['mtx1'], calDetails['dist1'], calDetails['mtx2'], calDetails['dist2'], thisSize, None, None, None, None, flags=cv2.CALIB_FIX_INTRINSIC, criteria=TERMINATION_CRITERIA)
-
-OPTIMIZE_ALPHA = -1
-
-# Left Camera
-#img = cv2.imread(os.getcwd() + '/calibration/testLeft.png')
-img = cv2.imread(LEFT_PATH)
-h,  w = img.shape[:2]
-Lnewcameramtx, Lroi=cv2.getOptimalNewCameraMatrix(cameraMatrix1, distCoeffs1,(w,h),1,(w,h))
-
-# Right Camera
-#img = cv2.imread(os.getcwd() + '/calibration/testRight.png')
-img = cv2.imread(RIGHT_PATH)
-h,  w = img.shape[:2]
-Rnewcameramtx, Rroi=cv2.getOptimalNewCameraMatrix(cameraMatrix2, distCoeffs2,(w,h),1,(w,h))
-
-
-# Rectify the images (Rotate/Translate images)
-leftRectification, rightRectification, leftProjection, rightProjection, dispartityToDepthMap, leftROI, rightROI = cv2.stereoRectify(Lnewcameramtx, distCoeffs1, Rnewcameramtx, distCoeffs2, thisSize, R, T, None, None, None, None, None, cv2.CALIB_ZERO_DISPARITY, OPTIMIZE_ALPHA)
-
-leftMapX, leftMapY = cv2.initUndistortRectifyMap(
-        cameraMatrix1, distCoeffs1, leftRectification,
-        leftProjection, thisSize, cv2.CV_32FC1)
-rightMapX, rightMapY = cv2.initUndistortRectifyMap(
-        cameraMatrix2, distCoeffs2, rightRectification,
-        rightProjection, thisSize, cv2.CV_32FC1)
-
-
-# Save rectified calibration
-np.savez_compressed(testCal, imageSize=thisSize,
-        leftMapX=leftRectification, leftMapY=leftMapY, leftROI=leftROI,
-        rightMapX=rightMapX, rightMapY=rightMapY, rightROI=rightROI)
+# Rectify the images (Rotate/Translate images), built once per calibration then memory-mapped from the cache
+rectification = StereoRectification.from_cache(calibrationDetailsPath)
+cameraMatrix2 = calDetails['mtx2']
+distCoeffs2 = calDetails['dist2']
+leftROI, rightROI = rectification.valid_rois
+
+# Save rectified calibration, uncompressed so it is read without decompressing. The MapX/MapY slots hold the
+# fixed-point map and its interpolation table, cv2.remap takes them in the same order
+np.savez(testCal, imageSize=thisSize,
+        leftMapX=rectification.left_maps[0], leftMapY=rectification.left_maps[1], leftROI=leftROI,
+        rightMapX=rectification.right_maps[0], rightMapY=rectification.right_maps[1], rightROI=rightROI)
 
 
 print("Calibrations Loaded")